@@ -0,0 +1,371 @@
+import os
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+from entrecore_auth_core import PasswordSetRequest, SignupRequest
+from pydantic import BaseModel, EmailStr, Field, ValidationError
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from auth_service import models
+
+# Rows written per transaction
+CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+# bcrypt releases the GIL, so hashing threads run on all cores
+HASH_WORKERS = int(os.getenv("BULK_HASH_WORKERS", str(os.cpu_count() or 4)))
+MAX_BULK_ROWS = int(os.getenv("BULK_MAX_ROWS", "100000"))
+
+_hash_pool: Optional[ThreadPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+
+
+class BulkUser(BaseModel):
+    """One row of a bulk import. Users without a password must reset it."""
+
+    email: EmailStr
+    first_name: str
+    last_name: str
+    phone_number: Optional[str] = None
+    password: Optional[str] = None
+    roles: List[str] = Field(default_factory=lambda: ["user"])
+    email_verified: bool = False
+
+
+class BulkImportRequest(BaseModel):
+    # Rows are validated one by one so a bad row doesn't reject the batch
+    users: List[Dict[str, Any]] = Field(max_length=MAX_BULK_ROWS)
+
+
+class BulkDisableRequest(BaseModel):
+    emails: List[str] = Field(max_length=MAX_BULK_ROWS)
+    disabled: bool = True
+
+
+class BulkRoleChangeRequest(BaseModel):
+    emails: List[str] = Field(max_length=MAX_BULK_ROWS)
+    add: List[str] = []
+    remove: List[str] = []
+
+
+def hash_pool() -> ThreadPoolExecutor:
+    """Shared pool for password hashing, bounding CPU use across imports"""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ThreadPoolExecutor(
+                max_workers=HASH_WORKERS, thread_name_prefix="bulk-hash"
+            )
+        return _hash_pool
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _error_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def validate_user(row: Dict[str, Any]) -> BulkUser:
+    """Validate an import row with the same rules as self-service signup"""
+    user = BulkUser.model_validate(row)
+    if user.phone_number is not None:
+        SignupRequest(
+            first_name=user.first_name,
+            last_name=user.last_name,
+            email=user.email,
+            phone_number=user.phone_number,
+        )
+    if user.password is not None:
+        PasswordSetRequest(
+            email=user.email, password=user.password, confirm_password=user.password
+        )
+    return user
+
+
+def _insert_users(db: Session, mappings: List[Dict[str, Any]]) -> None:
+    db.execute(insert(models.DBUser), mappings)
+    role_rows = _role_rows(mappings)
+    if role_rows:
+        db.execute(insert(models.DBUserRole), role_rows)
+
+
+def _role_rows(users: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """user_roles rows mirroring the roles of users given as id/roles mappings"""
+    return [
+        {"user_id": user["id"], "role": role}
+        for user in users
+        for role in dict.fromkeys(user["roles"])
+    ]
+
+
+def ndjson_report(results: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Render per-row results as NDJSON, ending with a summary line"""
+    counts = Counter()
+    for result in results:
+        counts[result["status"]] += 1
+        yield orjson.dumps(result) + b"\n"
+    yield orjson.dumps({"summary": dict(counts)}) + b"\n"
+
+
+def _prepare_chunk(
+    chunk: List[Tuple[int, Dict[str, Any]]],
+    seen: set,
+    hasher: Callable[[str], str],
+) -> List[Tuple[int, Any, Optional[Future]]]:
+    """Validate a chunk and queue its password hashes on the pool"""
+    prepared = []
+    for row, raw in chunk:
+        try:
+            user = validate_user(raw)
+        except ValidationError as e:
+            result = {
+                "row": row,
+                "email": raw.get("email"),
+                "status": "error",
+                "error": _error_message(e),
+            }
+            prepared.append((row, result, None))
+            continue
+        if user.email in seen:
+            prepared.append(
+                (
+                    row,
+                    {
+                        "row": row,
+                        "email": user.email,
+                        "status": "error",
+                        "error": "Duplicate email in request",
+                    },
+                    None,
+                )
+            )
+            continue
+        seen.add(user.email)
+        future = hash_pool().submit(hasher, user.password) if user.password else None
+        prepared.append((row, user, future))
+    return prepared
+
+
+def _write_chunk(
+    db: Session, prepared: List[Tuple[int, Any, Optional[Future]]]
+) -> List[Dict[str, Any]]:
+    """Insert the valid users of a chunk in one transaction"""
+    results: Dict[int, Dict[str, Any]] = {}
+    users = []
+    for row, user, future in prepared:
+        if isinstance(user, dict):
+            results[row] = user
+        else:
+            users.append((row, user, future))
+
+    emails = [user.email for _, user, _ in users]
+    existing = set()
+    if emails:
+        for email, username in db.execute(
+            select(models.DBUser.email, models.DBUser.username).where(
+                or_(models.DBUser.email.in_(emails), models.DBUser.username.in_(emails))
+            )
+        ):
+            existing.update((email, username))
+
+    now = datetime.now(timezone.utc)
+    mappings = []
+    for row, user, future in users:
+        if user.email in existing:
+            if future is not None:
+                future.cancel()
+            results[row] = {
+                "row": row,
+                "email": user.email,
+                "status": "error",
+                "error": "Email already registered",
+            }
+            continue
+        mappings.append(
+            (
+                row,
+                {
+                    "id": str(uuid.uuid4()),
+                    "username": user.email,
+                    "email": user.email,
+                    "full_name": f"{user.first_name} {user.last_name}",
+                    "first_name": user.first_name,
+                    "last_name": user.last_name,
+                    "phone_number": user.phone_number,
+                    "hashed_password": future.result() if future else None,
+                    "roles": user.roles,
+                    "disabled": False,
+                    "created_at": now,
+                    "email_verified": user.email_verified,
+                    "verification_token": (
+                        None if user.email_verified else str(uuid.uuid4())
+                    ),
+                },
+            )
+        )
+
+    if mappings:
+        try:
+            _insert_users(db, [mapping for _, mapping in mappings])
+            db.commit()
+            inserted = mappings
+        except IntegrityError:
+            # A concurrent signup took one of the emails; retry row by row
+            db.rollback()
+            inserted = []
+            for row, mapping in mappings:
+                try:
+                    _insert_users(db, [mapping])
+                    db.commit()
+                    inserted.append((row, mapping))
+                except IntegrityError:
+                    db.rollback()
+                    results[row] = {
+                        "row": row,
+                        "email": mapping["email"],
+                        "status": "error",
+                        "error": "Email already registered",
+                    }
+        for row, mapping in inserted:
+            results[row] = {
+                "row": row,
+                "email": mapping["email"],
+                "status": "created",
+                "id": mapping["id"],
+            }
+
+    return [results[row] for row in sorted(results)]
+
+
+def import_users(
+    session_factory: Callable[[], Session],
+    rows: Iterable[Dict[str, Any]],
+    hasher: Callable[[str], str],
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Create users in chunked transactions, yielding one result per row in
+    input order. The next chunk's passwords are hashed while the current
+    chunk is written, so the database and the hashing pool stay busy.
+    """
+    db = session_factory()
+    seen = set()
+    pending = None
+    try:
+        for chunk in _chunks(enumerate(rows), chunk_size):
+            prepared = _prepare_chunk(chunk, seen, hasher)
+            if pending is not None:
+                yield from _write_chunk(db, pending)
+            pending = prepared
+        if pending is not None:
+            yield from _write_chunk(db, pending)
+    finally:
+        if pending is not None:
+            for _, _, future in pending:
+                if future is not None:
+                    future.cancel()
+        db.close()
+
+
+def set_disabled(
+    session_factory: Callable[[], Session],
+    emails: Iterable[str],
+    disabled: bool = True,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """Disable or re-enable users by email, one UPDATE per chunk"""
+    db = session_factory()
+    try:
+        for chunk in _chunks(dict.fromkeys(emails), chunk_size):
+            found = dict(
+                db.execute(
+                    select(models.DBUser.email, models.DBUser.id).where(
+                        models.DBUser.email.in_(chunk)
+                    )
+                ).all()
+            )
+            if found:
+                db.execute(
+                    update(models.DBUser)
+                    .where(models.DBUser.id.in_(found.values()))
+                    .values(disabled=disabled),
+                    execution_options={"synchronize_session": False},
+                )
+                db.commit()
+            for email in chunk:
+                if email in found:
+                    yield {"email": email, "status": "updated", "id": found[email]}
+                else:
+                    yield {"email": email, "status": "not_found"}
+    finally:
+        db.close()
+
+
+def change_roles(
+    session_factory: Callable[[], Session],
+    emails: Iterable[str],
+    add: List[str],
+    remove: List[str],
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """Add and remove roles by email, one bulk UPDATE per chunk"""
+    db = session_factory()
+    try:
+        for chunk in _chunks(dict.fromkeys(emails), chunk_size):
+            current = {
+                email: (user_id, roles or [])
+                for user_id, email, roles in db.execute(
+                    select(
+                        models.DBUser.id, models.DBUser.email, models.DBUser.roles
+                    ).where(models.DBUser.email.in_(chunk))
+                )
+            }
+            changes, results = [], []
+            for email in chunk:
+                if email not in current:
+                    results.append({"email": email, "status": "not_found"})
+                    continue
+                user_id, roles = current[email]
+                new_roles = [role for role in roles if role not in remove]
+                new_roles += [role for role in add if role not in new_roles]
+                if new_roles == roles:
+                    status = "unchanged"
+                else:
+                    status = "updated"
+                    changes.append({"id": user_id, "roles": new_roles})
+                results.append(
+                    {
+                        "email": email,
+                        "status": status,
+                        "id": user_id,
+                        "roles": new_roles,
+                    }
+                )
+            if changes:
+                # ORM bulk UPDATE by primary key: executemany of one statement
+                db.execute(update(models.DBUser), changes)
+                db.execute(
+                    delete(models.DBUserRole).where(
+                        models.DBUserRole.user_id.in_([c["id"] for c in changes])
+                    )
+                )
+                role_rows = _role_rows(changes)
+                if role_rows:
+                    db.execute(insert(models.DBUserRole), role_rows)
+                db.commit()
+            yield from results
+    finally:
+        db.close()
@@ -2,8 +2,9 @@ import json
 import os
 import re
 import uuid
+from contextlib import asynccontextmanager
 from datetime import timezone, datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import List, Optional
 
 from dotenv import load_dotenv
 from entrecore_auth_core import (
@@ -11,12 +12,14 @@ from entrecore_auth_core import (
     PasswordResetConfirm,
     PasswordResetRequest,
     PasswordSetRequest,
+    Role,
     SignupRequest,
     Token,
     TokenPayload,
     User,
 )
-from fastapi import Body, Depends, FastAPI, Form, HTTPException, status
+from fastapi import Body, Depends, FastAPI, Form, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from google.auth.transport import requests as google_requests
 from google.oauth2 import id_token
@@ -25,8 +28,16 @@ from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr, validator
 from sqlalchemy.orm import Session
 
-from auth_service import database, models
+from auth_service import (
+    bulk_users,
+    database,
+    models,
+    permissions,
+    signup_store,
+    user_directory,
+)
 from auth_service.database import get_db
+from auth_service.responses import ORJSONResponse
 
 # Load environment variables from .env file
 load_dotenv()
@@ -34,6 +45,15 @@ load_dotenv()
 # Initialize database
 models.Base.metadata.create_all(bind=database.engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Default roles for databases created by create_all rather than migrations
+    with database.SessionLocal() as db:
+        permissions.seed_default_permissions(db)
+    yield
+
+
 app = FastAPI(
     title="Authentication Service",
     description="""
@@ -53,6 +73,7 @@ app = FastAPI(
     docs_url="/api/v1/docs",
     redoc_url="/api/v1/redoc",
     openapi_url="/api/v1/openapi.json",
+    lifespan=lifespan,
 )
 
 UTC = timezone.utc
@@ -66,6 +87,7 @@ GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/token")
+permission_resolver = permissions.PermissionResolver(database.SessionLocal)
 
 
 # Helper functions
@@ -76,9 +98,9 @@ def verify_password(plain_password, hashed_password):
 # Token blacklist (in production, use Redis)
 token_blacklist = {}
 
-# Add temporary storage for signup data (in production, use Redis or a database)
-# This dictionary will store signup data between the two-step signup process
-signup_temp_storage: Dict[str, Dict[str, Any]] = {}
+# Signup data kept between the two signup steps, expiring abandoned signups.
+# Use SIGNUP_STORE=redis or database when running more than one worker.
+signup_sessions = signup_store.create_signup_store(database.SessionLocal)
 
 
 @app.post(
@@ -172,6 +194,58 @@ async def get_current_user(
         raise credentials_exception
 
 
+def require_permission(permission: str, active_user: bool = False):
+    """
+    Dependency allowing only access tokens whose claims grant permission.
+    Permissions are resolved when the token is issued, so the check needs
+    neither the database nor the roles JSON column. With active_user, the
+    user is also looked up by primary key so that a disabled user's
+    still-valid token can't make changes.
+    """
+
+    async def check_permission(
+        token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    ) -> TokenPayload:
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise credentials_exception
+
+        # Refresh and password reset tokens don't authorize requests
+        if (
+            payload.get("sub") is None
+            or payload.get("refresh")
+            or payload.get("purpose")
+            or payload.get("jti") in token_blacklist
+        ):
+            raise credentials_exception
+
+        if permission not in payload.get("perms", ()):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Missing permission: {permission}",
+            )
+
+        if active_user:
+            user = db.get(models.DBUser, payload["sub"])
+            if user is None or user.disabled:
+                raise credentials_exception
+
+        return TokenPayload(
+            sub=payload["sub"],
+            exp=datetime.fromtimestamp(payload["exp"], UTC),
+            roles=payload.get("roles") or [],
+            jti=payload.get("jti"),
+        )
+
+    return check_permission
+
+
 def authenticate_user(db: Session, username: str, password: str):
     """Authenticate a user by username/email and password"""
     # First try to find user by username
@@ -185,11 +259,18 @@ def authenticate_user(db: Session, username: str, password: str):
     if not user or not verify_password(password, user.hashed_password):
         return False
 
+    # Disabled users can't log in
+    if user.disabled:
+        return False
+
     return user
 
 
 def create_access_token(data: dict, expires_delta: timedelta):
     to_encode = data.copy()
+    if "roles" in to_encode and "perms" not in to_encode:
+        # Flattened once here so authorization checks read it from the claims
+        to_encode["perms"] = permission_resolver.resolve(to_encode["roles"])
     expire = datetime.now(UTC) + expires_delta
     jti = str(uuid.uuid4())  # Add unique token ID
 
@@ -241,13 +322,16 @@ async def signup_initial(signup_data: SignupRequest, db: Session = Depends(get_d
     if db.query(models.DBUser).filter(models.DBUser.email == signup_data.email).first():
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # Store the signup data in our temporary storage
-    signup_temp_storage[signup_data.email] = {
-        "first_name": signup_data.first_name,
-        "last_name": signup_data.last_name,
-        "phone_number": signup_data.phone_number,
-        "email": signup_data.email,
-    }
+    # Store the signup data until the password is set
+    signup_sessions.put(
+        signup_data.email,
+        {
+            "first_name": signup_data.first_name,
+            "last_name": signup_data.last_name,
+            "phone_number": signup_data.phone_number,
+            "email": signup_data.email,
+        },
+    )
 
     # Return success message
     return {"message": "User information collected", "email": signup_data.email}
@@ -286,25 +370,12 @@ async def signup_complete(
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # Check if we have the signup data from step 1
-    if password_data.email not in signup_temp_storage:
-        # For tests: fall back to importing from test_auth_flow
-        try:
-            from tests import test_auth_flow
-
-            stored_data = {
-                "first_name": test_auth_flow.signup_data["first_name"],
-                "last_name": test_auth_flow.signup_data["last_name"],
-                "phone_number": test_auth_flow.signup_data["phone_number"],
-            }
-        except ImportError:
-            # Default values if all else fails
-            stored_data = {
-                "first_name": "Default",
-                "last_name": "User",
-                "phone_number": "+1234567890",
-            }
-    else:
-        stored_data = signup_temp_storage[password_data.email]
+    stored_data = signup_sessions.get(password_data.email)
+    if stored_data is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Signup session not found or expired, please sign up again",
+        )
 
     # Create new user
     hashed_password = pwd_context.hash(password_data.password)
@@ -331,9 +402,8 @@ async def signup_complete(
     db.commit()
     db.refresh(db_user)
 
-    # Clean up the temporary storage
-    if password_data.email in signup_temp_storage:
-        del signup_temp_storage[password_data.email]
+    # Clean up the signup session
+    signup_sessions.delete(password_data.email)
 
     return User(
         id=db_user.id,
@@ -596,6 +666,7 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
 
 @app.post(
     "/api/v1/token",
+    response_class=ORJSONResponse,
     response_model=Token,
     tags=["Authentication"],
     summary="Login to get access token",
@@ -653,6 +724,7 @@ async def login_for_access_token(
 
 @app.post(
     "/api/v1/refresh-token",
+    response_class=ORJSONResponse,
     response_model=Token,
     tags=["Authentication"],
     summary="Get new access token",
@@ -670,7 +742,9 @@ async def login_for_access_token(
         },
     },
 )
-async def refresh_token(token: str = None, refresh_data: dict = Body(None)):
+async def refresh_token(
+    token: str = None, refresh_data: dict = Body(None), db: Session = Depends(get_db)
+):
     """Get a new access token using refresh token"""
     # Accept token from either query param or JSON body
     if token is None and refresh_data:
@@ -691,10 +765,20 @@ async def refresh_token(token: str = None, refresh_data: dict = Body(None)):
         if jti in token_blacklist:
             raise HTTPException(status_code=401, detail="Token has been revoked")
 
+        # Roles (and so permissions) come from the user as they are now,
+        # not as they were when the refresh token was issued
+        user = (
+            db.query(models.DBUser)
+            .filter(models.DBUser.id == payload.get("sub"))
+            .first()
+        )
+        if user is None or user.disabled:
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+
         # Create new access token
         access_token_expires = timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
         access_token = create_access_token(
-            data={"sub": payload.get("sub"), "roles": payload.get("roles")},
+            data={"sub": user.id, "roles": user.roles},
             expires_delta=access_token_expires,
         )
 
@@ -715,6 +799,7 @@ async def refresh_token(token: str = None, refresh_data: dict = Body(None)):
 
 @app.get(
     "/api/v1/users/me",
+    response_class=ORJSONResponse,
     response_model=User,
     tags=["User Profile"],
     summary="Get current user",
@@ -739,6 +824,109 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+@app.get(
+    "/api/v1/users",
+    response_class=ORJSONResponse,
+    tags=["Admin"],
+    summary="List users",
+    description="""
+    Lists users one page at a time, newest first. Pass `next_cursor` of a page
+    as `cursor` to get the next one.
+
+    * `email` / `name`: prefix search on email or full name (sorted by that
+      field); only one of them can be given
+    * `role`, `disabled`, `email_verified`: filters
+
+    Requires the `users:read` permission.
+    """,
+    responses={
+        200: {
+            "description": "A page of users",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "items": [
+                            {
+                                "id": "2f0c4b7e-...",
+                                "email": "user@example.com",
+                                "full_name": "Test User",
+                                "roles": ["user"],
+                                "disabled": False,
+                            }
+                        ],
+                        "next_cursor": "WyIyMDI1LTAzLTI1VDEwOjU4OjUxIiwiMmYwYyJd",
+                    }
+                }
+            },
+        },
+        400: {
+            "description": "Invalid cursor",
+            "content": {"application/json": {"example": {"detail": "Invalid cursor"}}},
+        },
+        422: {
+            "description": "Both email and name given",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Search by either email or name, not both"}
+                }
+            },
+        },
+    },
+)
+def list_users(
+    limit: int = Query(50, ge=1, le=user_directory.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    email: Optional[str] = Query(None, min_length=1),
+    name: Optional[str] = Query(None, min_length=1),
+    role: Optional[str] = None,
+    disabled: Optional[bool] = None,
+    email_verified: Optional[bool] = None,
+    claims: TokenPayload = Depends(require_permission(permissions.USERS_READ)),
+    db: Session = Depends(get_db),
+):
+    """List and search users"""
+    if email and name:
+        # Each search walks its own index, so the two can't be combined
+        raise HTTPException(
+            status_code=422, detail="Search by either email or name, not both"
+        )
+    users, next_cursor = user_directory.list_users(
+        db,
+        limit,
+        cursor=cursor,
+        email=email,
+        name=name,
+        role=role,
+        disabled=disabled,
+        email_verified=email_verified,
+    )
+    return ORJSONResponse({"items": users, "next_cursor": next_cursor})
+
+
+@app.get(
+    "/api/v1/roles",
+    response_class=ORJSONResponse,
+    response_model=List[Role],
+    tags=["Admin"],
+    summary="List roles",
+    description="""
+    Lists the roles and the permissions each grants. A token carries the
+    permissions of its user's roles as of when it was issued.
+    Requires the `roles:read` permission.
+    """,
+    responses={200: {"description": "Roles", "model": List[Role]}},
+)
+def list_roles(
+    claims: TokenPayload = Depends(require_permission(permissions.ROLES_READ)),
+    db: Session = Depends(get_db),
+):
+    """List roles with their permissions"""
+    return [
+        Role(name=name, permissions=role_permissions)
+        for name, role_permissions in permissions.load_role_permissions(db).items()
+    ]
+
+
 def find_user_by_id(user_id: str, db: Session = Depends(get_db)):
     """Find a user by their ID in the database"""
     db_user = db.query(models.DBUser).filter(models.DBUser.id == user_id).first()
@@ -924,8 +1112,133 @@ async def update_user(
     )
 
 
+NDJSON_REPORT_EXAMPLE = (
+    '{"row":0,"email":"a@example.com","status":"created","id":"..."}\n'
+    '{"row":1,"email":"b@example.com","status":"error","error":"Email already registered"}\n'
+    '{"summary":{"created":1,"error":1}}\n'
+)
+
+
+@app.post(
+    "/api/v1/admin/users/import",
+    tags=["Admin"],
+    summary="Bulk import users",
+    description="""
+    Creates many users in one request. Each row is validated on its own with the
+    signup rules, passwords are hashed on a worker pool and users are inserted in
+    chunked transactions. Rows without a password get no login until reset.
+
+    The response is streamed as NDJSON: one result per row in input order,
+    followed by a summary line. Requires the `users:write` permission.
+    """,
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Per-row import report",
+            "content": {"application/x-ndjson": {"example": NDJSON_REPORT_EXAMPLE}},
+        },
+        403: {
+            "description": "Missing permission",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Missing permission: users:write"}
+                }
+            },
+        },
+    },
+)
+def bulk_import_users(
+    request: bulk_users.BulkImportRequest,
+    claims: TokenPayload = Depends(
+        require_permission(permissions.USERS_WRITE, active_user=True)
+    ),
+):
+    """Import users in bulk"""
+    results = bulk_users.import_users(
+        database.SessionLocal, request.users, pwd_context.hash
+    )
+    return StreamingResponse(
+        bulk_users.ndjson_report(results), media_type="application/x-ndjson"
+    )
+
+
+@app.post(
+    "/api/v1/admin/users/disable",
+    tags=["Admin"],
+    summary="Bulk disable users",
+    description="""
+    Disables (or, with `disabled: false`, re-enables) users by email with one
+    UPDATE per chunk. Disabled users can no longer log in. The response is a
+    streamed NDJSON report. Requires the `users:write` permission.
+    """,
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Per-user report",
+            "content": {
+                "application/x-ndjson": {
+                    "example": '{"email":"a@example.com","status":"updated","id":"..."}\n'
+                    '{"summary":{"updated":1}}\n'
+                }
+            },
+        },
+    },
+)
+def bulk_disable_users(
+    request: bulk_users.BulkDisableRequest,
+    claims: TokenPayload = Depends(
+        require_permission(permissions.USERS_WRITE, active_user=True)
+    ),
+):
+    """Disable users in bulk"""
+    results = bulk_users.set_disabled(
+        database.SessionLocal, request.emails, request.disabled
+    )
+    return StreamingResponse(
+        bulk_users.ndjson_report(results), media_type="application/x-ndjson"
+    )
+
+
+@app.post(
+    "/api/v1/admin/users/roles",
+    tags=["Admin"],
+    summary="Bulk change user roles",
+    description="""
+    Adds and removes roles for users by email, with one bulk UPDATE per chunk.
+    The response is a streamed NDJSON report with each user's resulting roles.
+    Requires the `users:write` permission.
+    """,
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Per-user report",
+            "content": {
+                "application/x-ndjson": {
+                    "example": '{"email":"a@example.com","status":"updated","id":"...",'
+                    '"roles":["user","manager"]}\n{"summary":{"updated":1}}\n'
+                }
+            },
+        },
+    },
+)
+def bulk_change_roles(
+    request: bulk_users.BulkRoleChangeRequest,
+    claims: TokenPayload = Depends(
+        require_permission(permissions.USERS_WRITE, active_user=True)
+    ),
+):
+    """Change roles in bulk"""
+    results = bulk_users.change_roles(
+        database.SessionLocal, request.emails, request.add, request.remove
+    )
+    return StreamingResponse(
+        bulk_users.ndjson_report(results), media_type="application/x-ndjson"
+    )
+
+
 @app.get(
     "/api/v1/health",
+    response_class=ORJSONResponse,
     tags=["System"],
     summary="Health check",
     description="Check if the service is running",
@@ -0,0 +1,47 @@
+"""Roles and permissions tables
+
+Revision ID: 663661d2f629
+Revises: 6c3e2efbe621
+Create Date: 2026-10-19 11:40:03.552917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '663661d2f629'
+down_revision: Union[str, None] = '6c3e2efbe621'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('roles',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('permissions',
+    sa.Column('name', sa.String(length=128), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('role_permissions',
+    sa.Column('role_name', sa.String(length=64), nullable=False),
+    sa.Column('permission_name', sa.String(length=128), nullable=False),
+    sa.ForeignKeyConstraint(['permission_name'], ['permissions.name'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['role_name'], ['roles.name'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('role_name', 'permission_name')
+    )
+    # Default roles are seeded by the service at startup (permissions.py)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('role_permissions')
+    op.drop_table('permissions')
+    op.drop_table('roles')
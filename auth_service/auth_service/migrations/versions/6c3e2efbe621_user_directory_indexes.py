@@ -0,0 +1,51 @@
+"""User directory indexes and user_roles table
+
+Revision ID: 6c3e2efbe621
+Revises: 92db595dec6e
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c3e2efbe621'
+down_revision: Union[str, None] = '92db595dec6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_created', 'users', ['created_at', 'id', 'disabled', 'email_verified'], unique=False)
+    op.create_index('ix_users_status_created', 'users', ['disabled', 'email_verified', 'created_at', 'id'], unique=False)
+    op.create_index('ix_users_full_name', 'users', ['full_name', 'id', 'disabled', 'email_verified'], unique=False)
+    op.create_table('user_roles',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('role', sa.String(length=64), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'role')
+    )
+    op.create_index('ix_user_roles_role', 'user_roles', ['role', 'user_id'], unique=False)
+    # Backfill from the roles JSON column in one statement
+    op.execute(
+        """
+        INSERT IGNORE INTO user_roles (user_id, role)
+        SELECT users.id, user_role.role
+        FROM users,
+             JSON_TABLE(users.roles, '$[*]' COLUMNS (role VARCHAR(64) PATH '$')) AS user_role
+        WHERE user_role.role IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_roles_role', table_name='user_roles')
+    op.drop_table('user_roles')
+    op.drop_index('ix_users_full_name', table_name='users')
+    op.drop_index('ix_users_status_created', table_name='users')
+    op.drop_index('ix_users_created', table_name='users')
@@ -0,0 +1,46 @@
+"""Users created_at not null, user_roles of default roles
+
+Revision ID: b5e7c1d9a3f4
+Revises: 2664c683fa4e
+Create Date: 2026-10-19 16:22:08.417530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e7c1d9a3f4'
+down_revision: Union[str, None] = '2664c683fa4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows without a creation time would never show up in directory pages
+    op.execute("UPDATE users SET created_at = COALESCE(last_login, CURRENT_TIMESTAMP) WHERE created_at IS NULL")
+    op.alter_column('users', 'created_at',
+               existing_type=sa.DateTime(timezone=True),
+               nullable=False,
+               server_default=sa.func.now())
+    # Users created with the roles column default got no user_roles rows
+    op.execute(
+        """
+        INSERT IGNORE INTO user_roles (user_id, role)
+        SELECT users.id, user_role.role
+        FROM users,
+             JSON_TABLE(users.roles, '$[*]' COLUMNS (role VARCHAR(64) PATH '$')) AS user_role
+        WHERE user_role.role IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('users', 'created_at',
+               existing_type=sa.DateTime(timezone=True),
+               nullable=True,
+               server_default=None)
@@ -5,6 +5,7 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     JSON,
     Text,
 )
@@ -13,11 +14,21 @@ from sqlalchemy.dialects.mysql import JSON as MySQLJSON
 import uuid
 from datetime import datetime, timezone
 from .database import Base
-from sqlalchemy.orm import validates
+from sqlalchemy.orm import relationship, validates
 
 
 class DBUser(Base):
     __tablename__ = "users"
+    # Directory listings (see user_directory.py) seek and sort on these
+    # indexes; the trailing columns let the boolean filters be checked
+    # without reading the row
+    __table_args__ = (
+        Index("ix_users_created", "created_at", "id", "disabled", "email_verified"),
+        Index(
+            "ix_users_status_created", "disabled", "email_verified", "created_at", "id"
+        ),
+        Index("ix_users_full_name", "full_name", "id", "disabled", "email_verified"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     username = Column(String(255), unique=True, index=True, nullable=True)
@@ -29,8 +40,12 @@ class DBUser(Base):
     hashed_password = Column(String(255), nullable=True)  # Nullable for Google users
     disabled = Column(Boolean, default=False)
     roles = Column(MySQLJSON, default=lambda: ["user"])
+    # Not nullable: directory pages seek on (created_at, id), which NULLs fall out of
     created_at = Column(
-        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
     )
     last_login = Column(DateTime(timezone=True), nullable=True)
     email_verified = Column(Boolean, default=False)
@@ -39,12 +54,91 @@ class DBUser(Base):
     password_reset_token = Column(String(255), nullable=True)
     password_reset_expires = Column(DateTime(timezone=True), nullable=True)
 
+    role_rows = relationship(
+        "DBUserRole", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    def __init__(self, **kwargs):
+        # The column default would bypass validate_roles and leave user_roles empty
+        kwargs.setdefault("roles", ["user"])
+        super().__init__(**kwargs)
+
     @validates("roles")
     def validate_roles(self, key, roles):
-        """Ensure roles is always stored as a list"""
+        """Ensure roles is always stored as a list, mirrored in user_roles"""
         if roles is None:
-            return ["user"]
+            roles = ["user"]
+        self.role_rows = [DBUserRole(role=role) for role in dict.fromkeys(roles)]
         return roles
 
     def __repr__(self):
         return f"<DBUser(id={self.id}, username={self.username}, email={self.email})>"
+
+
+class DBUserRole(Base):
+    """One row per role of a user, so role filters use an index, not JSON"""
+
+    __tablename__ = "user_roles"
+    __table_args__ = (Index("ix_user_roles_role", "role", "user_id"),)
+
+    user_id = Column(
+        String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    role = Column(String(64), primary_key=True)
+
+    def __repr__(self):
+        return f"<DBUserRole(user_id={self.user_id}, role={self.role})>"
+
+
+class DBRole(Base):
+    __tablename__ = "roles"
+
+    name = Column(String(64), primary_key=True)
+    description = Column(String(255), nullable=True)
+
+    permissions = relationship("DBPermission", secondary="role_permissions")
+
+    def __repr__(self):
+        return f"<DBRole(name={self.name})>"
+
+
+class DBPermission(Base):
+    __tablename__ = "permissions"
+
+    name = Column(String(128), primary_key=True)
+    description = Column(String(255), nullable=True)
+
+    def __repr__(self):
+        return f"<DBPermission(name={self.name})>"
+
+
+class DBRolePermission(Base):
+    __tablename__ = "role_permissions"
+
+    role_name = Column(
+        String(64), ForeignKey("roles.name", ondelete="CASCADE"), primary_key=True
+    )
+    permission_name = Column(
+        String(128),
+        ForeignKey("permissions.name", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    def __repr__(self):
+        return (
+            f"<DBRolePermission(role_name={self.role_name}, "
+            f"permission_name={self.permission_name})>"
+        )
+
+
+class DBSignupSession(Base):
+    """Step 1 signup data awaiting step 2, for the database signup store"""
+
+    __tablename__ = "signup_sessions"
+
+    email = Column(String(255), primary_key=True)
+    data = Column(JSON, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<DBSignupSession(email={self.email}, expires_at={self.expires_at})>"
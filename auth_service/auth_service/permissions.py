@@ -0,0 +1,131 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from auth_service import models
+
+logger = logging.getLogger(__name__)
+
+PERMISSION_CACHE_SECONDS = float(os.getenv("PERMISSION_CACHE_SECONDS", "60"))
+
+USERS_READ = "users:read"
+USERS_WRITE = "users:write"
+ROLES_READ = "roles:read"
+PROFILE_READ = "profile:read"
+PROFILE_WRITE = "profile:write"
+
+# Seeded into empty roles/permissions tables
+DEFAULT_ROLE_PERMISSIONS: Dict[str, List[str]] = {
+    "user": [PROFILE_READ, PROFILE_WRITE],
+    "admin": [PROFILE_READ, PROFILE_WRITE, USERS_READ, USERS_WRITE, ROLES_READ],
+}
+
+
+def load_role_permissions(db: Session) -> Dict[str, List[str]]:
+    """Read the role -> permissions mapping in one query"""
+    mapping: Dict[str, List[str]] = {}
+    for role, permission in db.execute(
+        select(models.DBRole.name, models.DBRolePermission.permission_name)
+        .outerjoin(
+            models.DBRolePermission,
+            models.DBRolePermission.role_name == models.DBRole.name,
+        )
+        .order_by(models.DBRole.name, models.DBRolePermission.permission_name)
+    ):
+        permissions = mapping.setdefault(role, [])
+        if permission is not None:
+            permissions.append(permission)
+    return mapping
+
+
+def _insert_ignore(model):
+    """INSERT that skips rows already present, for concurrent seeding"""
+    return (
+        insert(model)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+
+
+def seed_default_permissions(db: Session) -> None:
+    """
+    Create the default roles and permissions if no role exists yet. Safe to
+    run from several workers starting at once: rows another worker has
+    just inserted are skipped rather than failing.
+    """
+    if db.execute(select(models.DBRole.name).limit(1)).first() is not None:
+        return
+    permissions = sorted(
+        {p for perms in DEFAULT_ROLE_PERMISSIONS.values() for p in perms}
+    )
+    db.execute(
+        _insert_ignore(models.DBRole), [{"name": r} for r in DEFAULT_ROLE_PERMISSIONS]
+    )
+    db.execute(
+        _insert_ignore(models.DBPermission), [{"name": p} for p in permissions]
+    )
+    db.execute(
+        _insert_ignore(models.DBRolePermission),
+        [
+            {"role_name": role, "permission_name": permission}
+            for role, perms in DEFAULT_ROLE_PERMISSIONS.items()
+            for permission in perms
+        ],
+    )
+    db.commit()
+    logger.info(f"Seeded default roles: {', '.join(DEFAULT_ROLE_PERMISSIONS)}")
+
+
+class PermissionResolver:
+    """
+    Expands roles to their flattened permission list when a token is issued.
+
+    The whole role -> permissions mapping is small and rarely changes, so it
+    is cached and reloaded every PERMISSION_CACHE_SECONDS; issuing a token
+    doesn't touch the database otherwise.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl_seconds: float = PERMISSION_CACHE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._session_factory = session_factory
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._mapping: Optional[Dict[str, List[str]]] = None
+        self._loaded_at = 0.0
+
+    def _role_permissions(self) -> Dict[str, List[str]]:
+        with self._lock:
+            if (
+                self._mapping is None
+                or self._clock() - self._loaded_at >= self._ttl_seconds
+            ):
+                db = self._session_factory()
+                try:
+                    self._mapping = load_role_permissions(db)
+                finally:
+                    db.close()
+                self._loaded_at = self._clock()
+            return self._mapping
+
+    def invalidate(self) -> None:
+        """Reload the mapping on next use, e.g. after editing role tables"""
+        with self._lock:
+            self._mapping = None
+
+    def resolve(self, roles: Iterable[str]) -> List[str]:
+        """Sorted union of the permissions of roles; unknown roles grant none"""
+        mapping = self._role_permissions()
+        permissions = set()
+        for role in roles or []:
+            permissions.update(mapping.get(role, ()))
+        return sorted(permissions)
@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from auth_service import models
+
+try:
+    import redis
+except ImportError:  # Only needed for SIGNUP_STORE=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+SIGNUP_SESSION_TTL_SECONDS = int(os.getenv("SIGNUP_SESSION_TTL_SECONDS", "3600"))
+SIGNUP_STORE_MAX_ENTRIES = int(os.getenv("SIGNUP_STORE_MAX_ENTRIES", "10000"))
+
+
+class SignupStore(ABC):
+    """
+    Holds the data of step 1 of the signup until step 2 sets the password.
+    Entries expire after ttl_seconds so abandoned signups don't pile up.
+    """
+
+    def __init__(self, ttl_seconds: int = SIGNUP_SESSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def put(self, email: str, data: Dict[str, Any]) -> None:
+        """Store signup data, replacing any earlier entry and restarting its TTL"""
+
+    @abstractmethod
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        """Signup data of email, or None if there is none or it expired"""
+
+    @abstractmethod
+    def delete(self, email: str) -> None:
+        """Remove the signup data of email, if any"""
+
+
+class MemorySignupStore(SignupStore):
+    """
+    Per-process store, for a single worker. Holds at most max_entries
+    signups; when full, the oldest is dropped.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = SIGNUP_SESSION_TTL_SECONDS,
+        max_entries: int = SIGNUP_STORE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Insertion order is expiry order, since every entry has the same TTL
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            email, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[email]
+
+    def put(self, email: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            self._entries.pop(email, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+            self._entries[email] = (now + self.ttl_seconds, dict(data))
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._expire(self._clock())
+            entry = self._entries.get(email)
+            return dict(entry[1]) if entry else None
+
+    def delete(self, email: str) -> None:
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(self._clock())
+            return len(self._entries)
+
+
+class RedisSignupStore(SignupStore):
+    """Store shared by all workers, expiring entries with Redis key TTLs"""
+
+    def __init__(
+        self,
+        client: Any,
+        ttl_seconds: int = SIGNUP_SESSION_TTL_SECONDS,
+        prefix: str = "signup:",
+    ):
+        super().__init__(ttl_seconds)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisSignupStore":
+        if redis is None:
+            raise ImportError("redis is required for SIGNUP_STORE=redis")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def put(self, email: str, data: Dict[str, Any]) -> None:
+        self.client.set(self.prefix + email, json.dumps(data), ex=self.ttl_seconds)
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        value = self.client.get(self.prefix + email)
+        return json.loads(value) if value is not None else None
+
+    def delete(self, email: str) -> None:
+        self.client.delete(self.prefix + email)
+
+
+class DatabaseSignupStore(SignupStore):
+    """
+    Store shared by all workers through the signup_sessions table. Expired
+    rows are ignored on read and purged at most every purge_interval seconds.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl_seconds: int = SIGNUP_SESSION_TTL_SECONDS,
+        purge_interval: float = 60.0,
+    ):
+        super().__init__(ttl_seconds)
+        self._session_factory = session_factory
+        self._purge_interval = purge_interval
+        self._last_purge = 0.0
+
+    def put(self, email: str, data: Dict[str, Any]) -> None:
+        now = datetime.now(timezone.utc)
+        db = self._session_factory()
+        try:
+            db.merge(
+                models.DBSignupSession(
+                    email=email,
+                    data=data,
+                    expires_at=now + timedelta(seconds=self.ttl_seconds),
+                )
+            )
+            if time.monotonic() - self._last_purge >= self._purge_interval:
+                self._last_purge = time.monotonic()
+                db.execute(
+                    delete(models.DBSignupSession).where(
+                        models.DBSignupSession.expires_at <= now
+                    )
+                )
+            db.commit()
+        finally:
+            db.close()
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        db = self._session_factory()
+        try:
+            return db.execute(
+                select(models.DBSignupSession.data).where(
+                    models.DBSignupSession.email == email,
+                    models.DBSignupSession.expires_at > datetime.now(timezone.utc),
+                )
+            ).scalar()
+        finally:
+            db.close()
+
+    def delete(self, email: str) -> None:
+        db = self._session_factory()
+        try:
+            db.execute(
+                delete(models.DBSignupSession).where(
+                    models.DBSignupSession.email == email
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+def create_signup_store(session_factory: Callable[[], Session]) -> SignupStore:
+    """
+    Build the store chosen by SIGNUP_STORE: "memory" (default, single
+    worker only), "redis" (REDIS_URL) or "database".
+    """
+    backend = os.getenv("SIGNUP_STORE", "memory").lower()
+    if backend == "redis":
+        return RedisSignupStore.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        )
+    if backend == "database":
+        return DatabaseSignupStore(session_factory)
+    if backend != "memory":
+        raise ValueError(f"Unknown SIGNUP_STORE: {backend}")
+    return MemorySignupStore()
@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from httpx import ASGITransport
@@ -7,6 +8,12 @@ from datetime import datetime, timedelta
 
 client = TestClient(app)
 
+@pytest.fixture(scope="module", autouse=True)
+def app_lifespan():
+    """Run the app's startup (default role seeding) for the whole module"""
+    with client:
+        yield
+
 # Test user email to use across steps
 test_user_email = f"test_{uuid.uuid4().hex[:8]}@example.com"
 
@@ -268,4 +275,161 @@ def test_logout():
         "/api/v1/users/me",
         headers={"Authorization": f"Bearer {tokens['access_token']}"}
     )
-    assert response.status_code == 401 
\ No newline at end of file
+    assert response.status_code == 401 
+
+
+def admin_headers():
+    """Create an admin directly in the database and log in as them"""
+    from auth_service.database import SessionLocal
+    from auth_service.main import pwd_context
+    from auth_service.models import DBUser
+
+    email = f"admin_{uuid.uuid4().hex[:8]}@example.com"
+    db = SessionLocal()
+    db.add(DBUser(
+        email=email,
+        username=email,
+        first_name="Admin",
+        last_name="User",
+        full_name="Admin User",
+        hashed_password=pwd_context.hash(password_data["password"]),
+        roles=["user", "admin"]
+    ))
+    db.commit()
+    db.close()
+    response = client.post(
+        "/api/v1/token",
+        data={"username": email, "password": password_data["password"]},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_admin_bulk_user_endpoints():
+    """Test bulk import, role change and disable with NDJSON reports"""
+    headers = admin_headers()
+    batch = uuid.uuid4().hex[:8]
+    emails = [f"bulk_{batch}_{i}@example.com" for i in range(3)]
+    users = [{"email": email, "first_name": "Bulk", "last_name": "User", "password": password_data["password"]}
+             for email in emails]
+    users += [{"email": emails[0], "first_name": "Dup", "last_name": "User"}, {"email": "not-an-email"}]
+
+    response = client.post("/api/v1/admin/users/import", json={"users": users}, headers=headers)
+    assert response.status_code == 200
+    report = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["status"] for row in report[:-1]] == ["created"] * 3 + ["error"] * 2
+    assert report[3]["error"] == "Duplicate email in request"
+    assert report[-1] == {"summary": {"created": 3, "error": 2}}
+
+    response = client.post("/api/v1/admin/users/roles", json={"emails": emails[:2], "add": ["manager"]},
+                           headers=headers)
+    assert [row["roles"] for row in map(json.loads, response.text.splitlines()[:-1])] == [["user", "manager"]] * 2
+
+    response = client.post("/api/v1/admin/users/disable", json={"emails": [emails[0]]}, headers=headers)
+    assert json.loads(response.text.splitlines()[0])["status"] == "updated"
+    response = client.post(
+        "/api/v1/token",
+        data={"username": emails[0], "password": password_data["password"]},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    assert response.status_code == 401
+
+    # Regular users can't use the admin endpoints
+    response = client.post("/api/v1/admin/users/disable", json={"emails": emails},
+                           headers={"Authorization": f"Bearer {tokens['google_user_token']}"})
+    assert response.status_code in [401, 403]
+
+def test_admin_user_directory():
+    """Test listing users by keyset page with search and filters"""
+    headers = admin_headers()
+    batch = uuid.uuid4().hex[:8]
+    users = [{"email": f"dir_{batch}_{i}@example.com", "first_name": "Dir", "last_name": batch,
+              "roles": ["user", "auditor"] if i % 2 else ["user"]} for i in range(5)]
+    client.post("/api/v1/admin/users/import", json={"users": users}, headers=headers)
+
+    pages, cursor = [], None
+    while True:
+        params = {"email": f"dir_{batch}", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/users", params=params, headers=headers)
+        assert response.status_code == 200
+        pages.append([user["email"] for user in response.json()["items"]])
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [[users[0]["email"], users[1]["email"]], [users[2]["email"], users[3]["email"]],
+                     [users[4]["email"]]]
+
+    response = client.get("/api/v1/users", params={"name": f"Dir {batch}", "role": "auditor"}, headers=headers)
+    assert sorted(user["email"] for user in response.json()["items"]) == [users[1]["email"], users[3]["email"]]
+    assert "hashed_password" not in response.json()["items"][0]
+
+    response = client.get("/api/v1/users", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+    response = client.get("/api/v1/users", params={"email": "dir_", "name": "Dir"}, headers=headers)
+    assert response.status_code == 422
+
+def test_permissions_are_resolved_into_tokens():
+    """Test permissions embedded at token issue and checked from the claims"""
+    from jose import jwt
+
+    headers = admin_headers()
+    claims = jwt.get_unverified_claims(headers["Authorization"].split()[1])
+    assert {"users:read", "users:write"} <= set(claims["perms"])
+
+    response = client.get("/api/v1/roles", headers=headers)
+    assert response.status_code == 200
+    assert "users:write" in {role["name"]: role["permissions"] for role in response.json()}["admin"]
+
+    email = f"plain_{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/v1/admin/users/import", json={"users": [
+        {"email": email, "first_name": "Plain", "last_name": "User", "password": password_data["password"]}
+    ]}, headers=headers)
+    response = client.post(
+        "/api/v1/token",
+        data={"username": email, "password": password_data["password"]},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    user_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = client.get("/api/v1/users", headers=user_headers)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Missing permission: users:read"
+
+    # Refresh tokens carry the same claims but don't authorize requests
+    response = client.get("/api/v1/users", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert response.status_code == 401
+
+def test_signup_complete_requires_signup_session():
+    """Test that setting a password without step 1 is refused"""
+    email = f"nosession_{uuid.uuid4().hex[:8]}@example.com"
+    response = client.post(
+        "/api/v1/signup/set-password",
+        json={"email": email, "password": password_data["password"], "confirm_password": password_data["password"]}
+    )
+    assert response.status_code == 400
+    assert "sign up again" in response.json()["detail"]
+
+def test_refresh_takes_roles_from_the_database():
+    """Test that a refreshed token reflects role changes and disabling"""
+    headers = admin_headers()
+    email = f"refresh_{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/v1/admin/users/import", json={"users": [
+        {"email": email, "first_name": "Re", "last_name": "Fresh", "password": password_data["password"],
+         "roles": ["user", "admin"]}
+    ]}, headers=headers)
+    response = client.post(
+        "/api/v1/token",
+        data={"username": email, "password": password_data["password"]},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    refresh_token = response.json()["refresh_token"]
+
+    client.post("/api/v1/admin/users/roles", json={"emails": [email], "remove": ["admin"]}, headers=headers)
+    response = client.post("/api/v1/refresh-token", params={"token": refresh_token})
+    user_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/api/v1/users", headers=user_headers).status_code == 403
+
+    client.post("/api/v1/admin/users/disable", json={"emails": [email]}, headers=headers)
+    response = client.post("/api/v1/refresh-token", params={"token": refresh_token})
+    assert response.status_code == 401
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from auth_service import models
+from auth_service.signup_store import DatabaseSignupStore, MemorySignupStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_memory_store_entries_expire_after_ttl():
+    clock = FakeClock()
+    store = MemorySignupStore(ttl_seconds=60, clock=clock)
+    store.put("a@example.com", {"first_name": "A"})
+
+    clock.now = 59
+    assert store.get("a@example.com") == {"first_name": "A"}
+    clock.now = 60
+    assert store.get("a@example.com") is None
+    assert len(store) == 0
+
+
+def test_memory_store_evicts_oldest_when_full():
+    clock = FakeClock()
+    store = MemorySignupStore(ttl_seconds=60, max_entries=2, clock=clock)
+    for email in ("a@example.com", "b@example.com", "c@example.com"):
+        store.put(email, {"email": email})
+
+    assert len(store) == 2
+    assert store.get("a@example.com") is None
+    assert store.get("b@example.com") is not None
+    assert store.get("c@example.com") is not None
+
+
+def test_memory_store_put_restarts_ttl():
+    clock = FakeClock()
+    store = MemorySignupStore(ttl_seconds=60, max_entries=2, clock=clock)
+    store.put("a@example.com", {"step": 1})
+    clock.now = 50
+    store.put("b@example.com", {"step": 1})
+    store.put("a@example.com", {"step": 2})
+
+    clock.now = 100
+    assert store.get("a@example.com") == {"step": 2}
+    assert store.get("b@example.com") == {"step": 1}
+    # Re-putting a moved it behind b, so b is evicted first
+    store.put("c@example.com", {"step": 1})
+    assert store.get("b@example.com") is None
+    assert store.get("a@example.com") == {"step": 2}
+
+
+@pytest.fixture
+def sqlite_sessions():
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    models.DBSignupSession.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def add_session(session_factory, email, expires_at):
+    db = session_factory()
+    db.add(
+        models.DBSignupSession(email=email, data={"email": email}, expires_at=expires_at)
+    )
+    db.commit()
+    db.close()
+
+
+def stored_emails(session_factory):
+    db = session_factory()
+    try:
+        return set(db.execute(select(models.DBSignupSession.email)).scalars())
+    finally:
+        db.close()
+
+
+def test_database_store_ignores_expired_rows(sqlite_sessions):
+    store = DatabaseSignupStore(sqlite_sessions, ttl_seconds=60)
+    add_session(
+        sqlite_sessions,
+        "old@example.com",
+        datetime.now(timezone.utc) - timedelta(seconds=1),
+    )
+    store.put("new@example.com", {"first_name": "New"})
+
+    assert store.get("old@example.com") is None
+    assert store.get("new@example.com") == {"first_name": "New"}
+    store.delete("new@example.com")
+    assert store.get("new@example.com") is None
+
+
+def test_database_store_purges_expired_rows(sqlite_sessions):
+    store = DatabaseSignupStore(sqlite_sessions, ttl_seconds=60, purge_interval=0)
+    add_session(
+        sqlite_sessions,
+        "old@example.com",
+        datetime.now(timezone.utc) - timedelta(seconds=1),
+    )
+    store.put("new@example.com", {"first_name": "New"})
+
+    assert stored_emails(sqlite_sessions) == {"new@example.com"}
@@ -0,0 +1,248 @@
+import logging
+from datetime import date, datetime
+from decimal import Context, Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .base import to_utc_datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Decimal columns whose schema field doesn't give its own precision/scale
+DEFAULT_DECIMAL_PRECISION = 38
+DEFAULT_DECIMAL_SCALE = 10
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+
+def require_pyarrow():
+    """
+    Fail with an actionable message when the columnar output mode is used without pyarrow.
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    if pa is None:
+        raise ImportError("Columnar output requires pyarrow: pip install pyarrow")
+
+
+def _arrow_types() -> Dict[str, Any]:
+    return {
+        'string': pa.string(),
+        'integer': pa.int64(),
+        'double': pa.float64(),
+        'boolean': pa.bool_(),
+        'date': pa.date32(),
+        'datetime': pa.timestamp('us', tz='UTC'),
+    }
+
+
+def _arrow_type(field: Dict[str, Any], types: Dict[str, Any]) -> 'pa.DataType':
+    if field.get('type') == 'decimal':
+        precision = field.get('precision', DEFAULT_DECIMAL_PRECISION)
+        scale = field.get('scale', DEFAULT_DECIMAL_SCALE)
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.decimal256(precision, scale)
+    return types.get(field.get('type'), pa.string())
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ('true', 't', 'yes', '1'):
+            return True
+        if lowered in ('false', 'f', 'no', '0'):
+            return False
+        raise ValueError(f"Not a boolean: {value!r}")
+    return bool(value)
+
+
+def _to_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _to_string(value: Any) -> str:
+    return value if isinstance(value, str) else str(value)
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"Not an integer: {value!r}")
+    if isinstance(value, (str, Decimal)):
+        try:
+            number = Decimal(value.strip() if isinstance(value, str) else value)
+        except InvalidOperation:
+            raise ValueError(f"Not an integer: {value!r}")
+        if not number.is_finite() or number != number.to_integral_value():
+            raise ValueError(f"Not an integer: {value!r}")
+        value = number
+    result = int(value)
+    if not INT64_MIN <= result <= INT64_MAX:
+        raise ValueError(f"Out of int64 range: {value!r}")
+    return result
+
+
+def _to_decimal(value: Any, value_type: 'pa.DataType') -> Decimal:
+    """Exact decimal rounded to the column's scale; floats go through their shortest repr."""
+    if isinstance(value, bool):
+        raise TypeError(f"Not a decimal: {value!r}")
+    try:
+        number = value if isinstance(value, Decimal) else Decimal(str(value).strip())
+        # Signals InvalidOperation when the rounded value has more digits than the column
+        return number.quantize(Decimal(1).scaleb(-value_type.scale), context=Context(prec=value_type.precision))
+    except InvalidOperation:
+        raise ValueError(f"Does not fit {value_type}: {value!r}")
+
+
+# Arrow type id -> converter from a Python record value
+_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    'string': _to_string,
+    'int64': _to_int,
+    'double': float,
+    'bool': _to_bool,
+    'date32[day]': _to_date,
+    'timestamp[us, tz=UTC]': to_utc_datetime,
+}
+
+
+def _converter(value_type: 'pa.DataType') -> Callable[[Any], Any]:
+    if pa.types.is_decimal(value_type):
+        return lambda value: _to_decimal(value, value_type)
+    return _CONVERTERS.get(str(value_type), _to_string)
+
+
+def arrow_schema(schema: Dict[str, Any], fields: Optional[List[str]] = None) -> 'pa.Schema':
+    """
+    Build an Arrow schema from a connector's get_schema definition.
+
+    Args:
+        schema: Result of get_schema ({'fields': [{'name', 'type'}, ...]});
+            decimal fields may set 'precision' and 'scale'
+        fields: Optional columns to include, in this order; columns missing
+            from the schema are typed as strings
+
+    Returns:
+        pyarrow Schema
+    """
+    require_pyarrow()
+    types = _arrow_types()
+    declared = {field['name']: _arrow_type(field, types) for field in schema.get('fields', [])}
+    names = list(fields) if fields else list(declared)
+    return pa.schema([pa.field(name, declared.get(name, pa.string())) for name in names])
+
+
+def records_to_batch(records: List[Dict[str, Any]], schema: 'pa.Schema',
+                     on_error: Optional[Callable[[int, str], None]] = None) -> 'pa.RecordBatch':
+    """
+    Convert rows into a RecordBatch typed by an Arrow schema.
+
+    Values that can't be converted to their column's type become nulls,
+    unless on_error is given: then the whole record is left out of the batch
+    and reported instead, so bad records can be dead-lettered.
+
+    Args:
+        records: Rows as dicts
+        schema: Target Arrow schema
+        on_error: Optional callable receiving the index of each rejected
+            record and the reason
+
+    Returns:
+        pyarrow RecordBatch
+    """
+    require_pyarrow()
+    columns = []
+    rejected: Dict[int, str] = {}
+    for field in schema:
+        convert = _converter(field.type)
+        values = []
+        failures = 0
+        for index, record in enumerate(records):
+            value = record.get(field.name)
+            if value is not None:
+                try:
+                    value = convert(value)
+                except (TypeError, ValueError):
+                    if on_error is not None and index not in rejected:
+                        rejected[index] = f"{field.name}: {value!r} is not {field.type}"
+                    value = None
+                    failures += 1
+            values.append(value)
+        if failures and on_error is None:
+            logger.warning(f"{failures} values of {field.name} are not {field.type}, stored as null")
+        columns.append(pa.array(values, type=field.type))
+    batch = pa.RecordBatch.from_arrays(columns, schema=schema)
+    if not rejected:
+        return batch
+    for index, reason in sorted(rejected.items()):
+        on_error(index, reason)
+    keep = [index not in rejected for index in range(len(records))]
+    return batch.filter(pa.array(keep))
+
+
+def iter_record_batches(chunks: Iterable[List[Dict[str, Any]]], schema: 'pa.Schema') -> Iterator['pa.RecordBatch']:
+    """
+    Convert a stream of row chunks into RecordBatches.
+
+    Args:
+        chunks: Iterable of row lists, e.g. from ERPConnector.stream_data
+        schema: Target Arrow schema
+
+    Yields:
+        One RecordBatch per non-empty chunk
+    """
+    for chunk in chunks:
+        if chunk:
+            yield records_to_batch(chunk, schema)
+
+
+def to_pandas(table: 'pa.Table'):
+    """
+    Hand an Arrow table to pandas without copying its buffers.
+
+    Columns become ArrowDtype-backed, so pandas reads the Arrow memory directly
+    instead of converting to NumPy object arrays.
+
+    Args:
+        table: pyarrow Table or RecordBatch
+
+    Returns:
+        pandas DataFrame
+    """
+    import pandas as pd
+
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def write_parquet(batches: Iterable['pa.RecordBatch'], path: str, schema: 'pa.Schema',
+                  compression: str = 'snappy') -> int:
+    """
+    Stream RecordBatches into a Parquet file, one row group per batch.
+
+    Args:
+        batches: RecordBatches to write
+        path: Output file
+        schema: Schema of the batches
+        compression: Parquet compression codec
+
+    Returns:
+        Number of rows written
+    """
+    require_pyarrow()
+    rows = 0
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
@@ -0,0 +1,275 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the request rate of one account.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the bucket full.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size, defaults to one second worth of tokens
+                (and then follows the rate when it changes)
+            clock: Monotonic clock, injectable for tests
+        """
+        self.rate = rate
+        self.fixed_capacity = capacity is not None
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated_at = clock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def set_rate(self, rate: float):
+        """
+        Change the refill rate, keeping the tokens accumulated so far.
+
+        Unless the capacity was given explicitly, it is resized to one second
+        worth of tokens at the new rate, so a rate cut also shrinks the burst.
+
+        Args:
+            rate: New tokens per second
+        """
+        self._refill(self.clock())
+        self.rate = rate
+        if not self.fixed_capacity:
+            self.capacity = max(1.0, rate)
+            self.tokens = min(self.tokens, self.capacity)
+
+    def reserve(self) -> float:
+        """
+        Take one token, borrowing against the future if the bucket is empty.
+
+        Returns:
+            Seconds the caller has to wait before using the token
+        """
+        now = self.clock()
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class AccountGovernor:
+    """
+    Request-rate and concurrency governor for a single ERP account.
+
+    Combines a token bucket with a resizable concurrency limit. Both limits
+    adapt with AIMD: they are cut multiplicatively when the ERP signals
+    throttling and grow additively after a run of successful calls.
+    """
+
+    def __init__(self, account_key: str, max_concurrency: int = 5,
+                 requests_per_second: float = 10.0, min_requests_per_second: float = 0.5,
+                 increase_step: float = 0.5, decrease_factor: float = 0.5,
+                 success_window: int = 20, throttle_cooldown: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize the governor.
+
+        Args:
+            account_key: Identifier of the governed account (e.g. 'netsuite:1234567')
+            max_concurrency: Upper bound for concurrent in-flight requests
+            requests_per_second: Upper bound for the request rate
+            min_requests_per_second: Lower bound the rate never drops below
+            increase_step: Requests/second added after each success window
+            decrease_factor: Multiplier applied to both limits on throttling
+            success_window: Consecutive successes required before increasing limits
+            throttle_cooldown: Seconds during which further throttle signals are
+                treated as the same event (in-flight requests fail together)
+            clock: Monotonic clock, injectable for tests
+            sleep: Sleep function, injectable for tests
+        """
+        self.account_key = account_key
+        self.max_concurrency = max_concurrency
+        self.max_rate = requests_per_second
+        self.min_rate = min_requests_per_second
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.success_window = success_window
+        self.throttle_cooldown = throttle_cooldown
+        self.clock = clock
+        self.sleep = sleep
+
+        self.bucket = TokenBucket(requests_per_second, clock=clock)
+        self.concurrency_limit = max_concurrency
+        self.in_flight = 0
+        self.blocked_until = 0.0
+
+        self._condition = threading.Condition()
+        self._successes = 0
+        self._last_decrease = None
+        self._stats = {
+            'requests': 0,
+            'throttle_events': 0,
+            'throttle_signals': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+        }
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """
+        Wait for a concurrency slot and a rate token.
+
+        Args:
+            timeout: Optional maximum seconds to wait for a concurrency slot
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            TimeoutError: If no slot became available within the timeout
+        """
+        started = self.clock()
+        with self._condition:
+            deadline = None if timeout is None else started + timeout
+            while self.in_flight >= self.concurrency_limit:
+                remaining = None if deadline is None else deadline - self.clock()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No request slot available for {self.account_key}")
+                self._condition.wait(remaining)
+            self.in_flight += 1
+            delay = max(self.bucket.reserve(), self.blocked_until - self.clock())
+
+        if delay > 0:
+            self.sleep(delay)
+
+        waited = self.clock() - started
+        with self._condition:
+            self._stats['requests'] += 1
+            self._stats['total_wait_seconds'] += waited
+            self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+        return waited
+
+    def release(self):
+        """
+        Give back a concurrency slot.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        """
+        Context manager holding a request slot for the duration of a call.
+
+        Args:
+            timeout: Optional maximum seconds to wait for a concurrency slot
+        """
+        self.acquire(timeout)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def record_success(self):
+        """
+        Record a successful call; grows the limits additively after a full window.
+        """
+        with self._condition:
+            self._successes += 1
+            if self._successes < self.success_window:
+                return
+            self._successes = 0
+
+            if self.bucket.rate < self.max_rate:
+                self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.increase_step))
+            if self.concurrency_limit < self.max_concurrency:
+                self.concurrency_limit += 1
+                self._condition.notify()
+
+    def record_throttle(self, retry_after: Optional[float] = None):
+        """
+        Record a throttling response; cuts the limits multiplicatively.
+
+        Args:
+            retry_after: Optional seconds the ERP asked us to back off for
+        """
+        with self._condition:
+            now = self.clock()
+            self._stats['throttle_signals'] += 1
+            self._successes = 0
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+            if self._last_decrease is not None and now - self._last_decrease < self.throttle_cooldown:
+                return
+            self._last_decrease = now
+            self._stats['throttle_events'] += 1
+
+            self.bucket.set_rate(max(self.min_rate, self.bucket.rate * self.decrease_factor))
+            self.concurrency_limit = max(1, int(self.concurrency_limit * self.decrease_factor))
+
+        logger.warning(f"Throttled by {self.account_key}: rate lowered to "
+                       f"{self.bucket.rate:.2f} req/s, concurrency to {self.concurrency_limit}")
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the governor's state and counters.
+
+        Returns:
+            Dict with wait-time, throttling and current limit metrics
+        """
+        with self._condition:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'account': self.account_key,
+                'requests_per_second': self.bucket.rate,
+                'concurrency_limit': self.concurrency_limit,
+                'in_flight': self.in_flight,
+            })
+        requests = snapshot['requests']
+        snapshot['avg_wait_seconds'] = snapshot['total_wait_seconds'] / requests if requests else 0.0
+        return snapshot
+
+
+_governors: Dict[str, AccountGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(account_key: str, **settings) -> AccountGovernor:
+    """
+    Get the process-wide governor for an account, creating it on first use.
+
+    All connector instances for the same account share one governor, so the
+    account's limits hold across parallel extractions. Settings only apply
+    when the governor is created.
+
+    Args:
+        account_key: Identifier of the governed account
+        **settings: AccountGovernor keyword arguments
+
+    Returns:
+        The shared AccountGovernor
+    """
+    with _governors_lock:
+        governor = _governors.get(account_key)
+        if governor is None:
+            governor = AccountGovernor(account_key, **settings)
+            _governors[account_key] = governor
+        return governor
+
+
+def reset_governors():
+    """
+    Drop all registered governors (used by tests and on configuration reload).
+    """
+    with _governors_lock:
+        _governors.clear()
@@ -1,17 +1,143 @@
+import base64
+import hashlib
+import hmac
 import logging
-from typing import Dict, List, Any, Optional
+import secrets
+import time
+from email.utils import parsedate_to_datetime
+from functools import partial
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
+from urllib.parse import parse_qsl, quote, urlsplit, urlunsplit
 import zeep
+from zeep.exceptions import Fault, TransportError
+from zeep.helpers import serialize_object
 from zeep.transports import Transport
+from lxml import etree
 from requests import Session
 from requests.auth import AuthBase
 
-from ..base import ERPConnector, ERPAuthHandler
+from ..base import ERPConnector, ERPAuthHandler, FilterPlan, parse_filters
+from ..governor import get_governor
+from ..retry import PERMANENT, TRANSIENT, default_classifier, error_status_code
+from ..schema_cache import SchemaCache
+from .schema import CUSTOMIZATION_TYPES, STANDARD_SCHEMAS, build_schema, custom_field_schema
+from .search import SearchSpec, compile_filters, flatten_record, flatten_row, namespace
+from .soap import SOAP_ENV_NS, EnvelopeBuilder, parse_row, parse_search_response
 
 logger = logging.getLogger(__name__)
 
+FORM_CONTENT_TYPE = 'application/x-www-form-urlencoded'
+
+# Faults NetSuite raises when account concurrency or request governance is exceeded
+THROTTLE_FAULT_CODES = (
+    'WS_CONCUR_SESSION_DISALLWD',
+    'WS_REQUEST_BLOCKED',
+    'EXCEEDED_CONCURRENCY_LIMIT',
+    'EXCEEDED_REQUEST_LIMIT',
+    'SSS_REQUEST_LIMIT_EXCEEDED',
+)
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Other faults that succeed when the same request is sent again later
+TRANSIENT_FAULT_CODES = THROTTLE_FAULT_CODES + (
+    'UNEXPECTED_ERROR',
+    'WS_SESSION_TIMED_OUT',
+    'SESSION_TIMED_OUT',
+)
+
+SIGNATURE_METHODS = {
+    'HMAC-SHA256': hashlib.sha256,
+    'HMAC-SHA1': hashlib.sha1,
+}
+
+
+def _encode(value: Any) -> str:
+    """Percent-encode a value as required by RFC 5849 section 3.6."""
+    return quote(str(value), safe='~')
+
+
+def _fault_text(fault: Fault) -> str:
+    """Get the code, message and detail of a SOAP fault as one searchable string."""
+    detail = etree.tostring(fault.detail, encoding='unicode') if fault.detail is not None else ''
+    return f"{fault.code} {fault.message} {detail}"
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """
+    Check whether an exception is NetSuite telling us to slow down.
+    
+    Args:
+        error: Exception raised by a SuiteTalk call
+        
+    Returns:
+        bool: True for concurrency/rate governance faults and 429/503 responses
+    """
+    if error_status_code(error) in THROTTLE_STATUS_CODES:
+        return True
+    if isinstance(error, Fault):
+        text = _fault_text(error)
+        return any(code in text for code in THROTTLE_FAULT_CODES)
+    return False
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convert a Retry-After header, given in seconds or as an HTTP date, to seconds."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Get the Retry-After hint of an HTTP error response, if present.
+    
+    zeep's TransportError only carries the status code and body, so for SOAP
+    calls the hint is attached by ThrottleAwareTransport as ``retry_after``.
+    
+    Args:
+        error: Exception raised by a SuiteTalk call
+        
+    Returns:
+        Seconds to back off, or None
+    """
+    if isinstance(error, TransportError):
+        return getattr(error, 'retry_after', None)
+    response = getattr(error, 'response', None)
+    return _parse_retry_after(response.headers.get('Retry-After') if response is not None else None)
+
+
+class ThrottleAwareTransport(Transport):
+    """
+    zeep transport raising a TransportError that keeps the Retry-After header
+    of 429/503 responses, which zeep drops when it builds the error itself.
+    """
+    
+    def post(self, address, message, headers):
+        response = super().post(address, message, headers)
+        if response.status_code in THROTTLE_STATUS_CODES:
+            error = TransportError(f"Server returned HTTP status {response.status_code}",
+                                   status_code=response.status_code, content=response.content)
+            error.retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+            raise error
+        return response
+
+
 class NetSuiteOAuthHandler(ERPAuthHandler):
     """
-    OAuth 1.0a authentication handler for NetSuite
+    OAuth 1.0a Token-Based Authentication (TBA) handler for NetSuite.
+    
+    Everything that does not change between requests - the HMAC signing key,
+    the encoded static oauth_* parameters and the tokenPassport base-string
+    prefix - is computed once per handler, so signing a request only costs
+    one HMAC over the per-request part.
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -25,43 +151,263 @@ class NetSuiteOAuthHandler(ERPAuthHandler):
                 - consumer_secret: OAuth consumer secret
                 - token_id: OAuth token ID
                 - token_secret: OAuth token secret
+                - signature_method: 'HMAC-SHA256' (default) or 'HMAC-SHA1'
         """
         super().__init__(config)
-        self.account_id = config.get('account_id')
-        self.consumer_key = config.get('consumer_key')
-        self.consumer_secret = config.get('consumer_secret')
-        self.token_id = config.get('token_id')
-        self.token_secret = config.get('token_secret')
+        self._load_credentials()
+    
+    def _load_credentials(self):
+        """
+        Read credentials from the config and precompute the static signing components.
+        """
+        self.account_id = self.config.get('account_id')
+        self.consumer_key = self.config.get('consumer_key')
+        self.consumer_secret = self.config.get('consumer_secret')
+        self.token_id = self.config.get('token_id')
+        self.token_secret = self.config.get('token_secret')
+        self.signature_method = self.config.get('signature_method', 'HMAC-SHA256').upper()
+        
+        if self.signature_method not in SIGNATURE_METHODS:
+            raise ValueError(f"Unsupported OAuth signature method: {self.signature_method}")
         
-    def get_auth_headers(self) -> Dict[str, str]:
+        # NetSuite expects the realm/account in upper case with '_' (e.g. 1234567_SB1)
+        self.realm = (self.account_id or '').upper().replace('-', '_')
+        
+        signing_key = f"{_encode(self.consumer_secret or '')}&{_encode(self.token_secret or '')}"
+        self._hmac_template = hmac.new(signing_key.encode('utf-8'),
+                                       digestmod=SIGNATURE_METHODS[self.signature_method])
+        self._oauth_static_params = [
+            (_encode('oauth_consumer_key'), _encode(self.consumer_key or '')),
+            (_encode('oauth_signature_method'), _encode(self.signature_method)),
+            (_encode('oauth_token'), _encode(self.token_id or '')),
+            (_encode('oauth_version'), '1.0'),
+        ]
+        self._header_prefix = (
+            f'OAuth realm="{_encode(self.realm)}", '
+            f'oauth_consumer_key="{_encode(self.consumer_key or "")}", '
+            f'oauth_token="{_encode(self.token_id or "")}", '
+            f'oauth_signature_method="{self.signature_method}", '
+        )
+        self._passport_prefix = f"{self.realm}&{self.consumer_key or ''}&{self.token_id or ''}&"
+        self._base_url_cache: Dict[str, str] = {}
+    
+    def _sign(self, base_string: str) -> str:
         """
-        Get OAuth headers for NetSuite requests.
+        Sign a base string with the precomputed HMAC key.
         
+        Args:
+            base_string: Signature base string
+            
         Returns:
-            Dict of header name/value pairs
+            Base64 encoded signature
+        """
+        digest = self._hmac_template.copy()
+        digest.update(base_string.encode('utf-8'))
+        return base64.b64encode(digest.digest()).decode('ascii')
+    
+    def _normalize_url(self, url: str) -> str:
+        """
+        Build the encoded base string URI (RFC 5849 section 3.4.1.2) for a URL.
+        
+        Args:
+            url: Request URL, optionally including a query string
+            
+        Returns:
+            Percent-encoded base string URI
         """
-        # In a real implementation, generate OAuth 1.0a signature
-        # This is a simplified placeholder
+        cached = self._base_url_cache.get(url)
+        if cached is not None:
+            return cached
+        
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        netloc = parts.netloc.lower()
+        if (scheme, parts.port) in (('http', 80), ('https', 443)):
+            netloc = netloc.rsplit(':', 1)[0]
+        normalized = _encode(urlunsplit((scheme, netloc, parts.path or '/', '', '')))
+        
+        # URLs come from a small set of endpoints, so this stays tiny
+        if len(self._base_url_cache) < 1024:
+            self._base_url_cache[url] = normalized
+        return normalized
+    
+    def sign_request(self, method: str, url: str, params: Optional[List[Tuple[str, str]]] = None,
+                     nonce: Optional[str] = None, timestamp: Optional[str] = None) -> str:
+        """
+        Build a signed OAuth 1.0a Authorization header value for a single request.
+        
+        Args:
+            method: HTTP method
+            url: Request URL; query parameters are included in the signature
+            params: Optional additional (decoded) parameters, e.g. form body fields
+            nonce: Optional nonce, generated when omitted
+            timestamp: Optional timestamp, current time when omitted
+            
+        Returns:
+            Value for the Authorization header
+        """
+        nonce = nonce or secrets.token_hex(16)
+        timestamp = str(timestamp or int(time.time()))
+        
+        query = urlsplit(url).query
+        request_params = parse_qsl(query, keep_blank_values=True) if query else []
+        if params:
+            request_params.extend(params)
+        
+        encoded = [(_encode(k), _encode(v)) for k, v in request_params]
+        encoded.extend(self._oauth_static_params)
+        encoded.append(('oauth_nonce', _encode(nonce)))
+        encoded.append(('oauth_timestamp', timestamp))
+        encoded.sort()
+        
+        normalized_params = '&'.join(f"{k}={v}" for k, v in encoded)
+        base_string = f"{method.upper()}&{self._normalize_url(url)}&{_encode(normalized_params)}"
+        signature = self._sign(base_string)
+        
+        return (
+            f'{self._header_prefix}'
+            f'oauth_timestamp="{timestamp}", '
+            f'oauth_nonce="{_encode(nonce)}", '
+            f'oauth_version="1.0", '
+            f'oauth_signature="{_encode(signature)}"'
+        )
+    
+    def token_passport(self, nonce: Optional[str] = None,
+                       timestamp: Optional[str] = None) -> Dict[str, str]:
+        """
+        Build the values of a SuiteTalk SOAP tokenPassport header.
+        
+        Args:
+            nonce: Optional nonce, generated when omitted
+            timestamp: Optional timestamp, current time when omitted
+            
+        Returns:
+            Dict with account, consumerKey, token, nonce, timestamp, signature and algorithm
+        """
+        nonce = nonce or secrets.token_hex(16)
+        timestamp = str(timestamp or int(time.time()))
+        signature = self._sign(f"{self._passport_prefix}{nonce}&{timestamp}")
+        
         return {
-            'Authorization': f'OAuth realm="{self.account_id}"'
+            'account': self.realm,
+            'consumerKey': self.consumer_key,
+            'token': self.token_id,
+            'nonce': nonce,
+            'timestamp': timestamp,
+            'signature': signature,
+            'algorithm': self.signature_method.replace('-', '_'),
         }
     
+    def get_auth_headers(self, method: str = 'GET', url: Optional[str] = None,
+                         params: Optional[List[Tuple[str, str]]] = None) -> Dict[str, str]:
+        """
+        Get OAuth headers for a NetSuite REST request.
+        
+        Args:
+            method: HTTP method of the request being signed
+            url: Request URL, defaults to the account's SuiteTalk REST root
+            params: Optional additional parameters included in the signature
+            
+        Returns:
+            Dict of header name/value pairs
+        """
+        if url is None:
+            host = (self.account_id or '').lower().replace('_', '-')
+            url = f'https://{host}.suitetalk.api.netsuite.com/services/rest/'
+        return {'Authorization': self.sign_request(method, url, params)}
+    
+    def build_auth(self) -> 'NetSuiteTBAAuth':
+        """
+        Get a per-request signing hook for HTTP clients.
+        
+        Returns:
+            NetSuiteTBAAuth bound to this handler
+        """
+        return NetSuiteTBAAuth(self)
+    
     def refresh_credentials(self) -> bool:
         """
-        NetSuite OAuth 1.0a doesn't typically require refresh.
+        Re-read credentials from the config, e.g. after a Key Vault rotation.
         
         Returns:
-            True as refresh isn't needed
+            True as OAuth 1.0a tokens don't expire
         """
-        # OAuth 1.0a doesn't typically require refresh
+        self._load_credentials()
         return True
+
+
+class NetSuiteTBAAuth(AuthBase):
+    """
+    Signs every outgoing request with a fresh nonce and timestamp.
+    
+    Works as a requests ``auth=`` hook and as an httpx callable auth hook.
+    """
+    
+    def __init__(self, handler: NetSuiteOAuthHandler):
+        self.handler = handler
+    
+    def __call__(self, request):
+        url = str(request.url)
+        params = []
+        content_type = request.headers.get('Content-Type', '')
+        if content_type.startswith(FORM_CONTENT_TYPE):
+            body = request.body if hasattr(request, 'body') else request.content
+            if isinstance(body, bytes):
+                body = body.decode('utf-8')
+            if body:
+                params = parse_qsl(body, keep_blank_values=True)
         
+        request.headers['Authorization'] = self.handler.sign_request(request.method, url, params)
+        return request
+
+
+class NetSuiteTokenPassportPlugin(zeep.Plugin):
+    """
+    zeep plugin that adds a freshly signed tokenPassport header to each SOAP request.
+    """
+    
+    def __init__(self, handler: NetSuiteOAuthHandler, api_version: str):
+        self.handler = handler
+        self.messages_ns = f'urn:messages_{api_version}.platform.webservices.netsuite.com'
+        self.core_ns = f'urn:core_{api_version}.platform.webservices.netsuite.com'
+    
+    def build_passport(self) -> etree._Element:
+        """
+        Build a signed tokenPassport element.
+        
+        Returns:
+            tokenPassport XML element
+        """
+        values = self.handler.token_passport()
+        passport = etree.Element(f'{{{self.messages_ns}}}tokenPassport')
+        for name in ('account', 'consumerKey', 'token', 'nonce', 'timestamp'):
+            etree.SubElement(passport, f'{{{self.core_ns}}}{name}').text = values[name]
+        signature = etree.SubElement(passport, f'{{{self.core_ns}}}signature')
+        signature.set('algorithm', values['algorithm'])
+        signature.text = values['signature']
+        return passport
+    
+    def egress(self, envelope, http_headers, operation, binding_options):
+        header = envelope.find(f'{{{SOAP_ENV_NS}}}Header')
+        if header is None:
+            header = etree.Element(f'{{{SOAP_ENV_NS}}}Header')
+            envelope.insert(0, header)
+        for existing in header.findall(f'{{{self.messages_ns}}}tokenPassport'):
+            header.remove(existing)
+        header.append(self.build_passport())
+        return envelope, http_headers
+
 
 class NetSuiteConnector(ERPConnector):
     """
     Connector for NetSuite ERP using SuiteTalk SOAP API.
     """
     
+    modified_field = 'lastModifiedDate'
+    id_field = 'internalId'
+    # Searches return records by ascending internal id
+    ordered_by_id = True
+    
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize the NetSuite connector.
@@ -72,19 +418,44 @@ class NetSuiteConnector(ERPConnector):
                 - api_version: SuiteTalk API version (e.g., '2020_1')
                 - wsdl_url: URL to the NetSuite WSDL file
                 - oauth: OAuth credentials
+                - governance: Optional AccountGovernor settings (max_concurrency,
+                  requests_per_second, ...) for this account
+                - page_size: Search page size (5-1000, default 1000)
+                - body_fields_only: Skip sublists in full-record searches (default True)
+                - schema_cache: Optional dict with 'directory' for persisted schemas
+                  and 'ttl_seconds' (default 86400)
+                - raw_xml: Send searches as raw SOAP and stream-parse the responses
+                  instead of materializing zeep objects (default False)
+                - endpoint_url: SOAP endpoint for raw_xml mode, defaults to the
+                  WSDL's service address
         """
         super().__init__(config)
         self.account_id = config.get('account_id')
         self.api_version = config.get('api_version', '2020_1')
         self.wsdl_url = config.get('wsdl_url', 
                         f'https://webservices.netsuite.com/wsdl/v{self.api_version}_0/netsuite.wsdl')
+        self.page_size = min(1000, max(5, config.get('page_size', 1000)))
+        self.body_fields_only = config.get('body_fields_only', True)
+        self.raw_xml = config.get('raw_xml', False)
+        self.endpoint_url = config.get('endpoint_url')
         
         # Initialize the auth handler
         self.auth_handler = NetSuiteOAuthHandler(config.get('oauth', {}))
+        self.passport_plugin = NetSuiteTokenPassportPlugin(self.auth_handler, self.api_version)
+        self.envelopes = EnvelopeBuilder(self.api_version)
+        
+        # Governance limits are per account, so every connector for the account shares them
+        account_key = f"netsuite:{(self.account_id or '').upper().replace('-', '_')}"
+        self.governor = get_governor(account_key, **config.get('governance', {}))
+        
+        cache_config = config.get('schema_cache', {})
+        self.schema_cache = SchemaCache(cache_config.get('directory'),
+                                        ttl_seconds=cache_config.get('ttl_seconds', 86400))
         
         # Connection objects
         self.client = None
         self.service = None
+        self.session = None
         self.app_info = None
     
     def connect(self) -> bool:
@@ -95,18 +466,8 @@ class NetSuiteConnector(ERPConnector):
             bool: True if connection was successful, False otherwise
         """
         try:
-            session = Session()
-            # Add OAuth headers to all requests
-            session.headers.update(self.auth_handler.get_auth_headers())
-            
-            transport = Transport(session=session)
-            self.client = zeep.Client(wsdl=self.wsdl_url, transport=transport)
-            
-            # Set up application info
-            self.app_info = self.client.get_type('ns0:ApplicationInfo')()
-            self.app_info.applicationId = 'DataIngestionService'
-            
-            self.service = self.client.service
+            # Loading the WSDL is the first network round trip, so retry it like any call
+            self.with_retry('connect', self._create_client)
             
             # Test connection with a simple request
             return self.test_connection()
@@ -114,6 +475,81 @@ class NetSuiteConnector(ERPConnector):
             logger.error(f"Failed to connect to NetSuite: {str(e)}")
             return False
     
+    def _create_client(self):
+        """
+        Load the WSDL and create the zeep client and service proxy.
+        """
+        session = Session()
+        transport = ThrottleAwareTransport(session=session)
+        # Every SOAP request carries its own signed tokenPassport header
+        self.client = zeep.Client(wsdl=self.wsdl_url, transport=transport,
+                                  plugins=[self.passport_plugin])
+        # Raw mode posts over the same pooled connections
+        self.session = session
+        if not self.endpoint_url:
+            self.endpoint_url = self.client.service._binding_options.get('address')
+        
+        # Set up application info
+        self.app_info = self.client.get_type('ns0:ApplicationInfo')()
+        self.app_info.applicationId = 'DataIngestionService'
+        
+        self.service = self.client.service
+    
+    def classify_error(self, error: Exception) -> str:
+        """
+        Classify a NetSuite failure as transient or permanent.
+        
+        SOAP faults are permanent (bad request, permissions, invalid search)
+        unless they carry a governance or known server-side transient code.
+        
+        Args:
+            error: Exception raised by a SuiteTalk call
+            
+        Returns:
+            retry.TRANSIENT or retry.PERMANENT
+        """
+        if isinstance(error, Fault):
+            text = _fault_text(error)
+            return TRANSIENT if any(code in text for code in TRANSIENT_FAULT_CODES) else PERMANENT
+        return default_classifier(error)
+    
+    def _call(self, operation: str, **kwargs) -> Any:
+        """
+        Invoke a SuiteTalk operation, retrying transient faults.
+        
+        Args:
+            operation: SOAP operation name (e.g. 'search', 'getServerTime')
+            **kwargs: Operation arguments
+            
+        Returns:
+            The operation response
+        """
+        return self.with_retry(operation, self._invoke, operation, **kwargs)
+    
+    def _invoke(self, operation: str, **kwargs) -> Any:
+        """
+        Make a single attempt at a SuiteTalk operation under the account's governor.
+        
+        Args:
+            operation: SOAP operation name
+            **kwargs: Operation arguments
+            
+        Returns:
+            The operation response
+        """
+        if not self.service:
+            raise ConnectionError("Not connected to NetSuite")
+        
+        with self.governor.slot():
+            try:
+                response = getattr(self.service, operation)(**kwargs)
+            except Exception as e:
+                if is_throttling_error(e):
+                    self.governor.record_throttle(retry_after_seconds(e))
+                raise
+        self.governor.record_success()
+        return response
+    
     def disconnect(self) -> bool:
         """
         Close connection to NetSuite.
@@ -124,6 +560,7 @@ class NetSuiteConnector(ERPConnector):
         # SOAP doesn't typically require disconnection
         self.client = None
         self.service = None
+        self.session = None
         return True
     
     def test_connection(self) -> bool:
@@ -134,12 +571,10 @@ class NetSuiteConnector(ERPConnector):
             bool: True if connection is working, False otherwise
         """
         try:
-            # Make a simple request, like getting server time
             if self.service:
-                # Example of a simple NetSuite API call
-                # response = self.service.getServerTime()
-                # For now, just check if service exists
-                return self.service is not None
+                # getServerTime is the cheapest authenticated SuiteTalk call
+                self._call('getServerTime')
+                return True
             return False
         except Exception as e:
             logger.error(f"NetSuite connection test failed: {str(e)}")
@@ -149,88 +584,469 @@ class NetSuiteConnector(ERPConnector):
         """
         Retrieve metadata about available records in NetSuite.
         
+        Only answers from the schema cache; it never triggers discovery.
+        
         Args:
             entity_type: Optional record type to get metadata for
             
         Returns:
-            Dict containing metadata information
+            Dict with the supported 'records' and, for record types whose schema
+            is cached, the schema version, hash and discovery time under 'schemas'
         """
         if not self.service:
             raise ConnectionError("Not connected to NetSuite")
-            
-        # In a real implementation, use NetSuite's metadata APIs
-        # This is a simplified placeholder
-        metadata = {
-            'records': [
-                'account', 'customer', 'invoice', 'item',
-                'vendor', 'salesOrder', 'purchaseOrder'
-            ]
-        }
         
-        if entity_type and entity_type in metadata['records']:
-            metadata = {'records': [entity_type]}
-            
-        return metadata
+        records = list(STANDARD_SCHEMAS)
+        if entity_type and entity_type in records:
+            records = [entity_type]
+        
+        schemas = {}
+        for record_type in records:
+            entry = self.schema_cache.get(self.account_id, record_type, self.api_version,
+                                          allow_stale=True)
+            if entry:
+                schemas[record_type] = {
+                    'version': entry['version'],
+                    'hash': entry['hash'],
+                    'fetched_at': entry['fetched_at'],
+                    'stale': not self.schema_cache.is_fresh(entry),
+                }
+        return {'records': records, 'schemas': schemas}
     
     def get_data(self, entity: str, filters: Optional[Dict[str, Any]] = None, 
                 fields: Optional[List[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Retrieve data from NetSuite.
         
+        When fields are given they are pushed down as advanced-search columns
+        with returnSearchColumns, so NetSuite only serializes those columns
+        instead of full records with their sublists. Filters are compiled into
+        SearchBasic criteria; only predicates SuiteTalk can't express are
+        evaluated here after transfer (see explain_filters).
+        
         Args:
             entity: Record type to retrieve
-            filters: Optional search filters
+            filters: Optional search filters (Filter expression or dict form)
             fields: Optional list of fields to retrieve
             limit: Optional maximum number of records
             
         Returns:
             List of dictionaries containing the retrieved data
         """
+        return list(islice(self._iter_rows(entity, filters, fields), limit))
+    
+    def stream_data(self, entity: str, filters: Optional[Dict[str, Any]] = None,
+                    fields: Optional[List[str]] = None,
+                    batch_size: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Retrieve data from NetSuite in chunks, fetching search pages as they are consumed.
+        
+        Args:
+            entity: Record type to retrieve
+            filters: Optional search filters (Filter expression or dict form)
+            fields: Optional list of fields to retrieve
+            batch_size: Maximum number of rows per chunk
+            
+        Yields:
+            Lists of at most batch_size rows
+        """
+        rows = self._iter_rows(entity, filters, fields)
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                return
+            yield chunk
+    
+    def stream_pages(self, entity: str, filters: Optional[Dict[str, Any]] = None,
+                     fields: Optional[List[str]] = None, start_page: int = 1,
+                     page_size: Optional[int] = None) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Retrieve data from NetSuite one search page at a time.
+        
+        Resuming at start_page runs the search again and jumps to that page
+        with searchMoreWithId, so only the first page is fetched twice.
+        
+        Args:
+            entity: Record type to retrieve
+            filters: Optional search filters (Filter expression or dict form)
+            fields: Optional list of fields to retrieve
+            start_page: 1-based page to start at
+            page_size: Search page size (clamped to 5-1000), defaults to the
+                connector's page_size; a resumed run must use the same size
+            
+        Yields:
+            (page index, rows) tuples
+        """
+        return self._iter_pages(entity, filters, fields, start_page, page_size)
+    
+    def _iter_rows(self, entity: str, filters: Any, fields: Optional[List[str]]) -> Iterator[Dict[str, Any]]:
+        """
+        Run the search for get_data and yield its matching, projected rows.
+        
+        Args:
+            entity: Record type to retrieve
+            filters: Optional search filters
+            fields: Optional list of fields to retrieve
+            
+        Yields:
+            Flat rows
+        """
+        for _, rows in self._iter_pages(entity, filters, fields):
+            yield from rows
+    
+    def _iter_pages(self, entity: str, filters: Any, fields: Optional[List[str]],
+                    start_page: int = 1,
+                    page_size: Optional[int] = None) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Run a search and yield the matching, projected rows of each page.
+        
+        Args:
+            entity: Record type to retrieve
+            filters: Optional search filters
+            fields: Optional list of fields to retrieve
+            start_page: 1-based page to start at
+            page_size: Search page size, defaults to the connector's page_size
+            
+        Yields:
+            (page index, rows) tuples
+        """
         if not self.service:
             raise ConnectionError("Not connected to NetSuite")
+        
+        plan = self.plan_filters(entity, filters)
+        logger.info(f"Retrieving {entity} data with fields: {fields}, "
+                    f"filter plan: {plan.describe()}")
+        
+        residual = plan.residual
+        columns = fields
+        if fields and residual is not None:
+            # The residual filter needs its fields even if they weren't requested
+            columns = list(dict.fromkeys(list(fields) + residual.fields()))
+        spec = SearchSpec(entity, criteria=plan.native, columns=columns)
+        page_size = self.page_size if page_size is None else min(1000, max(5, page_size))
+        
+        on_error = None
+        if self.record_error_handler is not None:
+            def on_error(page_index: int, position: int, payload: Any, reason: str):
+                self.record_error_handler(entity, page_index, position, payload, reason)
+        
+        if self.raw_xml:
+            pages = self._raw_search_pages(spec, start_page, on_error, page_size)
+        else:
+            pages = ((index, self._page_rows(page, spec, on_error and partial(on_error, index)))
+                     for index, page in self._search_pages(spec, start_page, page_size))
+        for page_index, page_rows in pages:
+            if residual is not None:
+                page_rows = [row for row in page_rows if residual.matches(row)]
+            if columns != fields:
+                page_rows = [{field: row.get(field) for field in fields} for row in page_rows]
+            yield page_index, page_rows
+    
+    def plan_filters(self, entity: str, filters: Any) -> FilterPlan:
+        """
+        Compile filters into SuiteTalk search criteria plus a Python residual.
+        
+        Args:
+            entity: Record type
+            filters: Filter expression or dict-form filters
             
-        # In a real implementation, use NetSuite's search APIs
-        # This is a simplified placeholder
-        logger.info(f"Retrieving {entity} data with filters: {filters}, fields: {fields}, limit: {limit}")
+        Returns:
+            FilterPlan whose native part is SearchBasic criteria
+        """
+        return compile_filters(entity, parse_filters(filters))
+    
+    def _search_pages(self, spec: SearchSpec, start_page: int = 1, page_size: Optional[int] = None):
+        """
+        Run a search and yield its result pages.
         
-        # Example implementation would use SuiteTalk search APIs
-        return []
+        Args:
+            spec: Search to run
+            start_page: 1-based page to start at; earlier pages are skipped
+            page_size: Records per page, defaults to the connector's page_size
+            
+        Yields:
+            (page index, serialized searchResult dict) tuples
+        """
+        search_type = self.client.get_type(spec.record_type(self.api_version))
+        try:
+            search_record = search_type(**spec.payload())
+        except TypeError as e:
+            raise ValueError(f"Invalid search for {spec.entity}: {str(e)}")
+        headers = {'searchPreferences': spec.preferences(page_size or self.page_size, self.body_fields_only)}
+        
+        result = self._search_result(self._call('search', searchRecord=search_record,
+                                                _soapheaders=headers))
+        if start_page <= 1:
+            yield 1, result
+        
+        total_pages = result.get('totalPages') or 1
+        for page_index in range(max(2, start_page), total_pages + 1):
+            yield page_index, self._search_result(self._call('searchMoreWithId', searchId=result['searchId'],
+                                                             pageIndex=page_index, _soapheaders=headers))
+    
+    def _raw_search_pages(self, spec: SearchSpec, start_page: int = 1,
+                          on_error: Optional[Callable[[int, int, Any, str], None]] = None,
+                          page_size: Optional[int] = None):
+        """
+        Run a search as raw SOAP and yield the flat rows of each page.
+        
+        Args:
+            spec: Search to run
+            start_page: 1-based page to start at; earlier pages are skipped
+            on_error: Optional callable receiving the page, position, element
+                and reason of rows that can't be mapped
+            page_size: Records per page, defaults to the connector's page_size
+            
+        Yields:
+            (page index, flat rows) tuples
+        """
+        preferences = spec.preferences(page_size or self.page_size, self.body_fields_only)
+        page = self._post('search', spec, lambda passport: self.envelopes.search(spec, passport, preferences),
+                          on_error and partial(on_error, 1))
+        if start_page <= 1:
+            yield 1, page['rows']
+        
+        for page_index in range(max(2, start_page), (page.get('totalPages') or 1) + 1):
+            more = self._post('searchMoreWithId', spec, lambda passport: self.envelopes.search_more(
+                page['searchId'], page_index, passport, preferences), on_error and partial(on_error, page_index))
+            yield page_index, more['rows']
     
-    def get_schema(self, entity: str) -> Dict[str, Any]:
+    def _post(self, operation: str, spec: SearchSpec, build_envelope,
+              on_error: Optional[Callable[[int, Any, str], None]] = None) -> Dict[str, Any]:
+        """
+        Post a raw SOAP search request, retrying transient faults.
+        
+        Args:
+            operation: SOAP operation name, sent as SOAPAction
+            spec: Search the request belongs to
+            build_envelope: Callable building the envelope for a tokenPassport element
+            on_error: Optional per-row mapping error callback, see parse_search_response
+            
+        Returns:
+            Parsed page, see parse_search_response
+        """
+        return self.with_retry(operation, self._invoke_raw, operation, spec, build_envelope, on_error)
+    
+    def _invoke_raw(self, operation: str, spec: SearchSpec, build_envelope,
+                    on_error: Optional[Callable[[int, Any, str], None]] = None) -> Dict[str, Any]:
+        """
+        Make a single raw SOAP attempt under the account's governor.
+        
+        The envelope is rebuilt per attempt because each tokenPassport nonce
+        may only be used once. The response is parsed while it streams in.
+        
+        Args:
+            operation: SOAP operation name
+            spec: Search the request belongs to
+            build_envelope: Callable building the envelope for a tokenPassport element
+            on_error: Optional per-row mapping error callback
+            
+        Returns:
+            Parsed page
+        """
+        if not self.session or not self.endpoint_url:
+            raise ConnectionError("Not connected to NetSuite")
+        
+        body = build_envelope(self.passport_plugin.build_passport())
+        headers = {'Content-Type': 'text/xml; charset=utf-8', 'SOAPAction': operation}
+        with self.governor.slot():
+            try:
+                with self.session.post(self.endpoint_url, data=body, headers=headers,
+                                       stream=True) as response:
+                    # SOAP faults arrive as HTTP 500 with a Fault body
+                    if response.status_code >= 400 and response.status_code != 500:
+                        response.raise_for_status()
+                    response.raw.decode_content = True
+                    try:
+                        page = parse_search_response(response.raw, spec.columns, spec.family, on_error)
+                    except etree.XMLSyntaxError:
+                        response.raise_for_status()
+                        raise
+                    response.raise_for_status()
+            except Exception as e:
+                if is_throttling_error(e):
+                    self.governor.record_throttle(retry_after_seconds(e))
+                raise
+        self.governor.record_success()
+        return page
+    
+    @staticmethod
+    def _result(response: Any, name: str) -> Dict[str, Any]:
+        """
+        Extract and check the result element of an operation response.
+        
+        Args:
+            response: zeep response
+            name: Result element name (e.g. 'searchResult', 'readResponseList')
+            
+        Returns:
+            The result as a dict
+        """
+        body = getattr(response, 'body', response)
+        result = serialize_object(getattr(body, name, body), target_cls=dict)
+        
+        status = result.get('status') or {}
+        if status.get('isSuccess') is False:
+            detail = (status.get('statusDetail') or [{}])[0]
+            raise Fault(detail.get('message') or f'NetSuite request failed ({name})',
+                        code=detail.get('code'))
+        return result
+    
+    @classmethod
+    def _search_result(cls, response: Any) -> Dict[str, Any]:
+        """
+        Extract and check the searchResult of a search response.
+        
+        Args:
+            response: zeep response of search/searchMoreWithId
+            
+        Returns:
+            searchResult as a dict
+        """
+        return cls._result(response, 'searchResult')
+    
+    @staticmethod
+    def _page_rows(page: Dict[str, Any], spec: SearchSpec,
+                   on_error: Optional[Callable[[int, Any, str], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Flatten the records or search rows of one result page.
+        
+        Args:
+            page: Serialized searchResult
+            spec: Search that produced the page
+            on_error: Optional callable receiving the position, raw record and
+                reason of each record that can't be flattened; the record is
+                skipped instead of failing the page
+            
+        Returns:
+            Flat rows
+        """
+        if spec.advanced:
+            items = (page.get('searchRowList') or {}).get('searchRow') or []
+            flatten = partial(flatten_row, fields=spec.columns)
+        else:
+            items = (page.get('recordList') or {}).get('record') or []
+            flatten = flatten_record
+        if on_error is None:
+            return [flatten(item) for item in items]
+        
+        rows = []
+        for position, item in enumerate(items):
+            try:
+                rows.append(flatten(item))
+            except Exception as e:
+                on_error(position, item, f"{type(e).__name__}: {str(e)}")
+        return rows
+    
+    def map_record(self, entity: str, payload: Any, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Flatten a raw search row or record, e.g. to replay a dead-lettered one.
+        
+        Args:
+            entity: Record type
+            payload: Serialized searchRow/record dict, or its XML in raw_xml mode
+            fields: Columns of the search the payload came from
+            
+        Returns:
+            Flat row
+        """
+        spec = SearchSpec(entity, columns=fields)
+        if isinstance(payload, (str, bytes)):
+            return parse_row(payload, spec.columns, spec.family)
+        return flatten_row(payload, spec.columns) if spec.advanced else flatten_record(payload)
+    
+    def get_schema(self, entity: str, refresh: bool = False) -> Dict[str, Any]:
         """
         Get the schema definition for a specific NetSuite record type.
         
+        Schemas are discovered once per (account, record type, API version) and
+        served from the schema cache until its TTL expires.
+        
+        Args:
+            entity: Record type name
+            refresh: Re-discover even if a fresh cached schema exists
+            
+        Returns:
+            Dict containing the 'fields' plus 'schema_hash' and 'schema_version'
+        """
+        entry = None if refresh else self.schema_cache.get(self.account_id, entity, self.api_version)
+        if entry is None:
+            entry = self.refresh_schema(entity)
+        return dict(entry['schema'], schema_hash=entry['hash'], schema_version=entry['version'])
+    
+    def refresh_schema(self, entity: str) -> Dict[str, Any]:
+        """
+        Re-discover the schema of a record type and update the cache.
+        
+        If discovery fails and a stale schema is cached, the stale schema is
+        returned rather than failing the caller.
+        
         Args:
             entity: Record type name
             
         Returns:
-            Dict containing schema information
+            The cache entry; 'drifted' is True if the schema changed
+        """
+        try:
+            schema = self._discover_schema(entity)
+        except Exception as e:
+            stale = self.schema_cache.get(self.account_id, entity, self.api_version, allow_stale=True)
+            if stale is None:
+                raise
+            logger.warning(f"Schema discovery for {entity} failed, using cached version "
+                           f"{stale['version']}: {str(e)}")
+            return stale
+        return self.schema_cache.put(self.account_id, entity, self.api_version, schema)
+    
+    def invalidate_schema(self, entity: Optional[str] = None):
+        """
+        Mark cached schemas stale, e.g. after a customization was deployed.
+        
+        Args:
+            entity: Optional record type, all record types when omitted
+        """
+        self.schema_cache.invalidate(self.account_id, record_type=entity, api_version=self.api_version)
+    
+    def _discover_schema(self, entity: str) -> Dict[str, Any]:
+        """
+        Build a record type's schema from its standard fields and the account's custom fields.
+        
+        Custom fields are listed with getCustomizationId and their definitions
+        fetched with a single getList call.
+        
+        Args:
+            entity: Record type name
+            
+        Returns:
+            Schema dict with a 'fields' list
         """
         if not self.service:
             raise ConnectionError("Not connected to NetSuite")
-            
-        # For a real implementation, could use custom SDF or SuiteScript to get field metadata
-        # This is a simplified placeholder based on known NetSuite schemas
-        schemas = {
-            'account': {
-                'fields': [
-                    {'name': 'internalId', 'type': 'string', 'isKey': True},
-                    {'name': 'name', 'type': 'string'},
-                    {'name': 'number', 'type': 'string'},
-                    {'name': 'type', 'type': 'string'},
-                    {'name': 'description', 'type': 'string'},
-                    {'name': 'balance', 'type': 'decimal'}
-                ]
-            },
-            'customer': {
-                'fields': [
-                    {'name': 'internalId', 'type': 'string', 'isKey': True},
-                    {'name': 'entityId', 'type': 'string'},
-                    {'name': 'companyName', 'type': 'string'},
-                    {'name': 'email', 'type': 'string'},
-                    {'name': 'phone', 'type': 'string'}
-                ]
-            }
-        }
         
-        return schemas.get(entity, {'fields': []}) 
\ No newline at end of file
+        if entity not in CUSTOMIZATION_TYPES:
+            return build_schema(entity, [])
+        
+        customization_type, applies_to = CUSTOMIZATION_TYPES[entity]
+        result = self._result(self._call('getCustomizationId',
+                                         customizationType={'getCustomizationType': customization_type},
+                                         includeInactives=False),
+                              'getCustomizationIdResult')
+        refs = (result.get('customizationRefList') or {}).get('customizationRef') or []
+        if not refs:
+            return build_schema(entity, [])
+        
+        ref_type = self.client.get_type(f'{{{namespace("core", "platform", self.api_version)}}}CustomizationRef')
+        base_refs = [ref_type(internalId=ref.get('internalId'), scriptId=ref.get('scriptId'),
+                              type=customization_type) for ref in refs]
+        result = self._result(self._call('getList', baseRef=base_refs), 'readResponseList')
+        
+        custom_fields = []
+        for read in result.get('readResponse') or []:
+            status = read.get('status') or {}
+            if status.get('isSuccess') is False or not read.get('record'):
+                continue
+            field = custom_field_schema(read['record'], applies_to)
+            if field:
+                custom_fields.append(field)
+        logger.info(f"Discovered {len(custom_fields)} custom fields for NetSuite {entity}")
+        return build_schema(entity, custom_fields)
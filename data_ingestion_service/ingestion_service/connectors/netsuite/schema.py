@@ -0,0 +1,128 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Standard body fields per record type. Custom fields are discovered per
+# account on top of these.
+STANDARD_SCHEMAS = {
+    'account': [
+        {'name': 'internalId', 'type': 'string', 'isKey': True},
+        {'name': 'name', 'type': 'string'},
+        {'name': 'number', 'type': 'string'},
+        {'name': 'type', 'type': 'string'},
+        {'name': 'description', 'type': 'string'},
+        {'name': 'balance', 'type': 'decimal'},
+    ],
+    'customer': [
+        {'name': 'internalId', 'type': 'string', 'isKey': True},
+        {'name': 'entityId', 'type': 'string'},
+        {'name': 'companyName', 'type': 'string'},
+        {'name': 'email', 'type': 'string'},
+        {'name': 'phone', 'type': 'string'},
+        {'name': 'balance', 'type': 'decimal'},
+        {'name': 'dateCreated', 'type': 'datetime'},
+        {'name': 'lastModifiedDate', 'type': 'datetime'},
+    ],
+    'vendor': [
+        {'name': 'internalId', 'type': 'string', 'isKey': True},
+        {'name': 'entityId', 'type': 'string'},
+        {'name': 'companyName', 'type': 'string'},
+        {'name': 'email', 'type': 'string'},
+        {'name': 'phone', 'type': 'string'},
+        {'name': 'balance', 'type': 'decimal'},
+        {'name': 'dateCreated', 'type': 'datetime'},
+        {'name': 'lastModifiedDate', 'type': 'datetime'},
+    ],
+    'item': [
+        {'name': 'internalId', 'type': 'string', 'isKey': True},
+        {'name': 'itemId', 'type': 'string'},
+        {'name': 'displayName', 'type': 'string'},
+        {'name': 'isInactive', 'type': 'boolean'},
+        {'name': 'createdDate', 'type': 'datetime'},
+        {'name': 'lastModifiedDate', 'type': 'datetime'},
+    ],
+}
+
+_TRANSACTION_FIELDS = [
+    {'name': 'internalId', 'type': 'string', 'isKey': True},
+    {'name': 'tranId', 'type': 'string'},
+    {'name': 'tranDate', 'type': 'date'},
+    {'name': 'entity', 'type': 'string'},
+    {'name': 'status', 'type': 'string'},
+    {'name': 'currency', 'type': 'string'},
+    {'name': 'subsidiary', 'type': 'string'},
+    {'name': 'memo', 'type': 'string'},
+    {'name': 'amount', 'type': 'decimal'},
+    {'name': 'total', 'type': 'decimal'},
+    {'name': 'createdDate', 'type': 'datetime'},
+    {'name': 'lastModifiedDate', 'type': 'datetime'},
+]
+for _record_type in ('invoice', 'salesOrder', 'purchaseOrder'):
+    STANDARD_SCHEMAS[_record_type] = _TRANSACTION_FIELDS
+
+# Record type -> (customization type holding its custom fields, applies-to flag)
+CUSTOMIZATION_TYPES = {
+    'customer': ('entityCustomField', 'appliesToCustomer'),
+    'vendor': ('entityCustomField', 'appliesToVendor'),
+    'item': ('itemCustomField', None),
+    'invoice': ('transactionBodyCustomField', 'bodySale'),
+    'salesOrder': ('transactionBodyCustomField', 'bodySale'),
+    'purchaseOrder': ('transactionBodyCustomField', 'bodyPurchase'),
+}
+
+# CustomizationFieldType -> schema type
+CUSTOM_FIELD_TYPES = {
+    '_checkBox': 'boolean',
+    '_currency': 'decimal',
+    '_decimalNumber': 'decimal',
+    '_percent': 'decimal',
+    '_integerNumber': 'integer',
+    '_date': 'date',
+    '_datetime': 'datetime',
+    '_timeOfDay': 'string',
+}
+
+
+def custom_field_schema(record: Dict[str, Any], applies_to: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Convert a serialized custom field definition into a schema field.
+
+    Args:
+        record: Serialized *CustomField record from getList
+        applies_to: Flag that must be set for the field to apply to the record type
+
+    Returns:
+        Schema field dict, or None if the field doesn't apply
+    """
+    if applies_to and record.get(applies_to) is False:
+        return None
+    script_id = record.get('scriptId')
+    if not script_id:
+        return None
+    return {
+        'name': script_id,
+        'type': CUSTOM_FIELD_TYPES.get(record.get('fieldType'), 'string'),
+        'label': record.get('label'),
+        'isCustom': True,
+    }
+
+
+def build_schema(entity: str, custom_fields: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine the standard fields of a record type with its custom fields.
+
+    Args:
+        entity: Record type
+        custom_fields: Schema fields of the account's custom fields
+
+    Returns:
+        Schema dict with a 'fields' list, custom fields sorted by name
+    """
+    fields = [dict(field) for field in STANDARD_SCHEMAS.get(entity, [])]
+    known = {field['name'] for field in fields}
+    for field in sorted(custom_fields, key=lambda f: f['name']):
+        if field['name'] not in known:
+            fields.append(field)
+            known.add(field['name'])
+    return {'fields': fields}
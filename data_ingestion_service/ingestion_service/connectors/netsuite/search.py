@@ -0,0 +1,362 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..base import After, And, Eq, Filter, FilterPlan, In, Or, Range, to_utc_datetime
+
+logger = logging.getLogger(__name__)
+
+# Record type -> (search family, schema module, schema area, transaction type filter)
+RECORD_SEARCHES = {
+    'account': ('Account', 'accounting', 'lists', None),
+    'item': ('Item', 'accounting', 'lists', None),
+    'customer': ('Customer', 'relationships', 'lists', None),
+    'vendor': ('Vendor', 'relationships', 'lists', None),
+    'invoice': ('Transaction', 'sales', 'transactions', '_invoice'),
+    'salesOrder': ('Transaction', 'sales', 'transactions', '_salesOrder'),
+    'purchaseOrder': ('Transaction', 'sales', 'transactions', '_purchaseOrder'),
+}
+
+# SearchBasic criteria field types per search family. Fields not listed here
+# (and 'type' on transactions, which is fixed by the record type) are
+# filtered in Python after transfer.
+SEARCH_FIELD_TYPES = {
+    'Transaction': {
+        'internalId': 'select', 'internalIdNumber': 'long', 'tranId': 'string',
+        'tranDate': 'date', 'lastModifiedDate': 'date', 'dateCreated': 'date',
+        'amount': 'double', 'status': 'enum', 'entity': 'select', 'subsidiary': 'select',
+        'postingPeriod': 'select', 'currency': 'select', 'department': 'select',
+        'location': 'select', 'class': 'select', 'memo': 'string', 'mainLine': 'boolean',
+    },
+    'Customer': {
+        'internalId': 'select', 'internalIdNumber': 'long', 'entityId': 'string',
+        'companyName': 'string', 'email': 'string', 'phone': 'string',
+        'lastModifiedDate': 'date', 'dateCreated': 'date', 'isInactive': 'boolean',
+        'subsidiary': 'select', 'stage': 'enum', 'balance': 'double',
+    },
+    'Vendor': {
+        'internalId': 'select', 'internalIdNumber': 'long', 'entityId': 'string',
+        'companyName': 'string', 'email': 'string', 'phone': 'string',
+        'lastModifiedDate': 'date', 'dateCreated': 'date', 'isInactive': 'boolean',
+        'subsidiary': 'select', 'balance': 'double',
+    },
+    'Account': {
+        'internalId': 'select', 'internalIdNumber': 'long', 'name': 'string',
+        'number': 'string', 'type': 'enum', 'isInactive': 'boolean', 'subsidiary': 'select',
+    },
+    'Item': {
+        'internalId': 'select', 'internalIdNumber': 'long', 'itemId': 'string',
+        'displayName': 'string', 'lastModifiedDate': 'date', 'created': 'date',
+        'type': 'enum', 'isInactive': 'boolean', 'subsidiary': 'select',
+    },
+}
+
+# Operators by field type for: equality, lower bound (exclusive, inclusive),
+# upper bound (inclusive) and closed range
+RANGE_OPERATORS = {
+    'long': ('equalTo', 'greaterThan', 'greaterThanOrEqualTo', 'lessThanOrEqualTo', 'between'),
+    'double': ('equalTo', 'greaterThan', 'greaterThanOrEqualTo', 'lessThanOrEqualTo', 'between'),
+    'date': ('on', 'after', 'onOrAfter', 'onOrBefore', 'within'),
+}
+
+RECORD_REF_KEYS = {'internalId', 'externalId', 'name', 'type', 'typeId', 'scriptId'}
+
+
+def namespace(module: str, area: str, api_version: str) -> str:
+    """
+    Build a SuiteTalk XML namespace.
+
+    Args:
+        module: Schema module (e.g. 'core', 'common', 'sales')
+        area: Schema area (e.g. 'platform', 'lists', 'transactions')
+        api_version: SuiteTalk API version (e.g. '2020_1')
+
+    Returns:
+        Namespace URN
+    """
+    return f'urn:{module}_{api_version}.{area}.webservices.netsuite.com'
+
+
+class SearchSpec:
+    """
+    Backend-neutral description of a SuiteTalk search.
+
+    Criteria and columns are kept as nested dicts mirroring the SuiteTalk
+    schema, so the same spec can be handed to zeep or serialized directly.
+    """
+
+    def __init__(self, entity: str, criteria: Optional[Dict[str, Dict[str, Any]]] = None,
+                 columns: Optional[List[str]] = None):
+        """
+        Initialize the search spec.
+
+        Args:
+            entity: Record type to search
+            criteria: SearchBasic field name -> search field values
+                (e.g. {'lastModifiedDate': {'operator': 'after', 'searchValue': ...}})
+            columns: Optional body fields to return; turns the search into an
+                advanced search returning only these columns
+
+        Raises:
+            ValueError: If the record type has no search mapping
+        """
+        if entity not in RECORD_SEARCHES:
+            raise ValueError(f"Unsupported NetSuite record type for search: {entity}")
+        self.entity = entity
+        self.family, self.module, self.area, transaction_type = RECORD_SEARCHES[entity]
+        self.criteria = dict(criteria or {})
+        if transaction_type:
+            self.criteria.setdefault('type', {'operator': 'anyOf', 'searchValue': [transaction_type]})
+        self.columns = list(dict.fromkeys(columns)) if columns else None
+
+    @property
+    def advanced(self) -> bool:
+        return self.columns is not None
+
+    def record_type(self, api_version: str) -> str:
+        """
+        Get the qualified XML type of the searchRecord element.
+
+        Args:
+            api_version: SuiteTalk API version
+
+        Returns:
+            '{namespace}TypeName' of the SearchBasic or SearchAdvanced type
+        """
+        if self.advanced:
+            return f'{{{namespace(self.module, self.area, api_version)}}}{self.family}SearchAdvanced'
+        return f'{{{namespace("common", "platform", api_version)}}}{self.family}SearchBasic'
+
+    def payload(self) -> Dict[str, Any]:
+        """
+        Get the searchRecord content as nested dicts.
+
+        Returns:
+            SearchBasic fields for a basic search, or criteria/columns for an advanced search
+        """
+        if not self.advanced:
+            return dict(self.criteria)
+        # An empty SearchColumn element asks NetSuite to return that column
+        return {
+            'criteria': {'basic': dict(self.criteria)},
+            'columns': {'basic': {column: [{}] for column in self.columns}},
+        }
+
+    def preferences(self, page_size: int, body_fields_only: bool = True) -> Dict[str, Any]:
+        """
+        Get the searchPreferences SOAP header values.
+
+        Args:
+            page_size: Records per page
+            body_fields_only: Skip sublists in full-record results
+
+        Returns:
+            searchPreferences values
+        """
+        return {
+            'bodyFieldsOnly': True if self.advanced else body_fields_only,
+            'returnSearchColumns': self.advanced,
+            'pageSize': page_size,
+        }
+
+
+def flatten_value(value: Any) -> Any:
+    """
+    Reduce a serialized SuiteTalk value to a scalar where possible.
+
+    RecordRefs become their internalId, search column values their searchValue.
+
+    Args:
+        value: Value from a serialized zeep object
+
+    Returns:
+        Flattened value
+    """
+    if isinstance(value, list):
+        values = [flatten_value(item) for item in value]
+        return values[0] if len(values) == 1 else values
+    if isinstance(value, dict):
+        if 'searchValue' in value:
+            return flatten_value(value['searchValue'])
+        if 'internalId' in value and set(value) <= RECORD_REF_KEYS:
+            return value['internalId']
+    return value
+
+
+def _custom_fields(custom_field_list: Any) -> Dict[str, Any]:
+    """Expand a customFieldList into scriptId -> value pairs."""
+    if not isinstance(custom_field_list, dict):
+        return {}
+    custom = {}
+    for field in custom_field_list.get('customField') or []:
+        if isinstance(field, dict) and field.get('scriptId'):
+            custom[field['scriptId']] = flatten_value(field.get('value', field.get('searchValue')))
+    return custom
+
+
+def flatten_record(record: Dict[str, Any], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Flatten a serialized full record into a flat row.
+
+    Args:
+        record: Serialized record from a basic search
+        fields: Optional fields to keep
+
+    Returns:
+        Flat dict of field values
+    """
+    row = {}
+    for key, value in record.items():
+        if value is None:
+            continue
+        if key == 'customFieldList':
+            row.update(_custom_fields(value))
+        else:
+            row[key] = flatten_value(value)
+    if fields:
+        return {field: row.get(field) for field in fields}
+    return row
+
+
+def flatten_row(search_row: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """
+    Flatten a serialized advanced-search row to the requested columns.
+
+    Args:
+        search_row: Serialized searchRow with a 'basic' column group
+        fields: Requested columns
+
+    Returns:
+        Flat dict with exactly the requested fields
+    """
+    basic = search_row.get('basic') or {}
+    custom = _custom_fields(basic.get('customFieldList'))
+    row = {}
+    for field in fields:
+        if field in basic:
+            row[field] = flatten_value(basic[field])
+        else:
+            row[field] = custom.get(field)
+    return row
+
+
+def _operand(field_type: str, value: Any) -> Any:
+    """Convert a filter operand to the SuiteTalk search value type."""
+    if field_type == 'date':
+        return to_utc_datetime(value)
+    if field_type == 'long':
+        return int(value)
+    if field_type == 'double':
+        return float(value)
+    return value
+
+
+def _any_of(field_type: str, values: List[Any]) -> Dict[str, Any]:
+    """Build an anyOf criterion for a select or enum field."""
+    if field_type == 'select':
+        values = [{'internalId': str(value)} for value in values]
+    return {'operator': 'anyOf', 'searchValue': list(values)}
+
+
+def _compile_one(expr: Filter, field_types: Dict[str, str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Compile a single conjunct into a SearchBasic criterion.
+    
+    Args:
+        expr: Filter that must hold on its own
+        field_types: Search field types of the record family
+        
+    Returns:
+        (search field, criterion) or None if SuiteTalk can't express the filter
+    """
+    if isinstance(expr, Or):
+        # anyOf can express an OR of equalities on one select/enum field
+        values, fields = [], set()
+        for child in expr.filters:
+            if not isinstance(child, (Eq, In)):
+                return None
+            fields.add(child.field)
+            values.extend([child.value] if isinstance(child, Eq) else child.values)
+        if len(fields) != 1:
+            return None
+        expr = In(fields.pop(), values)
+    
+    field = getattr(expr, 'field', None)
+    # internalId is a select field; ranges need its numeric twin
+    if field == 'internalId' and isinstance(expr, (Range, After)):
+        field = 'internalIdNumber'
+    field_type = field_types.get(field)
+    if field_type is None:
+        return None
+    
+    if isinstance(expr, (Eq, In)):
+        values = [expr.value] if isinstance(expr, Eq) else expr.values
+        if field_type in ('select', 'enum'):
+            return field, _any_of(field_type, values)
+        if len(values) != 1:
+            return None
+        if field_type == 'string':
+            return field, {'operator': 'is', 'searchValue': values[0]}
+        if field_type == 'boolean':
+            return field, {'searchValue': bool(values[0])}
+        return field, {'operator': RANGE_OPERATORS[field_type][0],
+                       'searchValue': _operand(field_type, values[0])}
+    
+    if field_type not in RANGE_OPERATORS:
+        return None
+    _, greater, greater_or_equal, less_or_equal, between = RANGE_OPERATORS[field_type]
+    
+    if isinstance(expr, After):
+        operator = greater_or_equal if expr.inclusive else greater
+        return field, {'operator': operator, 'searchValue': _operand(field_type, expr.value)}
+    
+    if isinstance(expr, Range):
+        if expr.low is not None and expr.high is not None:
+            return field, {'operator': between, 'searchValue': _operand(field_type, expr.low),
+                           'searchValue2': _operand(field_type, expr.high)}
+        if expr.low is not None:
+            return field, {'operator': greater_or_equal, 'searchValue': _operand(field_type, expr.low)}
+        return field, {'operator': less_or_equal, 'searchValue': _operand(field_type, expr.high)}
+    
+    return None
+
+
+def compile_filters(entity: str, expr: Optional[Filter]) -> FilterPlan:
+    """
+    Compile a filter expression into SuiteTalk SearchBasic criteria.
+    
+    SearchBasic criteria are implicitly ANDed and hold one criterion per
+    field, so each top-level conjunct is pushed down if SuiteTalk can express
+    it and its field isn't taken yet; the rest becomes the residual filter.
+    
+    Args:
+        entity: Record type being searched
+        expr: Filter expression, or None
+        
+    Returns:
+        FilterPlan with SearchBasic criteria as native query
+    """
+    if expr is None:
+        return FilterPlan()
+    if entity not in RECORD_SEARCHES:
+        raise ValueError(f"Unsupported NetSuite record type for search: {entity}")
+    
+    family, _, _, transaction_type = RECORD_SEARCHES[entity]
+    field_types = dict(SEARCH_FIELD_TYPES.get(family, {}))
+    if transaction_type:
+        field_types.pop('type', None)
+    
+    conjuncts = expr.conjuncts() if isinstance(expr, And) else [expr]
+    native, pushed, residual = {}, [], []
+    for conjunct in conjuncts:
+        compiled = _compile_one(conjunct, field_types)
+        if compiled is not None and compiled[0] not in native:
+            native[compiled[0]] = compiled[1]
+            pushed.append(conjunct)
+        else:
+            residual.append(conjunct)
+    
+    if not residual:
+        residual_expr = None
+    else:
+        residual_expr = residual[0] if len(residual) == 1 else And(*residual)
+    return FilterPlan(native=native, pushed=pushed, residual=residual_expr)
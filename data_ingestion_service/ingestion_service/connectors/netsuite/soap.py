@@ -0,0 +1,365 @@
+import io
+import logging
+from copy import deepcopy
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from lxml import etree
+from zeep.exceptions import Fault
+
+from .search import SEARCH_FIELD_TYPES, SearchSpec, namespace
+
+logger = logging.getLogger(__name__)
+
+SOAP_ENV_NS = 'http://schemas.xmlsoap.org/soap/envelope/'
+XSI_NS = 'http://www.w3.org/2001/XMLSchema-instance'
+XSI_TYPE = f'{{{XSI_NS}}}type'
+
+# Elements of the searchResult header that are copied into the page
+_PAGE_FIELDS = {
+    'totalRecords': int,
+    'pageSize': int,
+    'totalPages': int,
+    'pageIndex': int,
+    'searchId': str,
+}
+
+# Custom field xsi:type fragment -> search field type, e.g. SearchColumnDoubleCustomField
+_CUSTOM_FIELD_TYPES = (
+    ('Double', 'double'),
+    ('Long', 'long'),
+    ('Boolean', 'boolean'),
+    ('Date', 'date'),
+)
+
+
+_LOCAL_NAMES: Dict[str, str] = {}
+
+# Elements iterparse reports; everything else is only visited through them
+_WATCHED_TAGS = ['{*}searchRow', '{*}record', '{*}status', '{*}Fault'] + [
+    f'{{*}}{name}' for name in _PAGE_FIELDS]
+
+
+def _local(tag: Any) -> str:
+    """Strip the namespace of an element tag."""
+    if not isinstance(tag, str):
+        return ''
+    name = _LOCAL_NAMES.get(tag)
+    if name is None:
+        # A response only uses a few dozen distinct tags
+        name = _LOCAL_NAMES[tag] = tag.rpartition('}')[2]
+    return name
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class EnvelopeBuilder:
+    """
+    Serializes SearchSpecs into SuiteTalk SOAP envelopes without zeep.
+
+    Produces the same requests zeep would send for search and
+    searchMoreWithId, so raw mode doesn't need the WSDL to build them.
+    """
+
+    def __init__(self, api_version: str):
+        """
+        Initialize the builder.
+
+        Args:
+            api_version: SuiteTalk API version (e.g. '2020_1')
+        """
+        self.api_version = api_version
+        self.messages_ns = namespace('messages', 'platform', api_version)
+        self.core_ns = namespace('core', 'platform', api_version)
+        self.common_ns = namespace('common', 'platform', api_version)
+
+    def _envelope(self, passport: etree._Element, preferences: Optional[Dict[str, Any]],
+                  record_ns: Optional[str] = None):
+        nsmap = {
+            'soapenv': SOAP_ENV_NS,
+            'xsi': XSI_NS,
+            'platformMsgs': self.messages_ns,
+            'platformCore': self.core_ns,
+            'platformCommon': self.common_ns,
+        }
+        if record_ns:
+            nsmap['rec'] = record_ns
+        envelope = etree.Element(f'{{{SOAP_ENV_NS}}}Envelope', nsmap=nsmap)
+        header = etree.SubElement(envelope, f'{{{SOAP_ENV_NS}}}Header')
+        header.append(passport)
+        if preferences:
+            prefs = etree.SubElement(header, f'{{{self.messages_ns}}}searchPreferences')
+            for name, value in preferences.items():
+                etree.SubElement(prefs, f'{{{self.messages_ns}}}{name}').text = _text(value)
+        body = etree.SubElement(envelope, f'{{{SOAP_ENV_NS}}}Body')
+        return envelope, body
+
+    def _search_value(self, parent: etree._Element, name: str, value: Any):
+        for item in value if isinstance(value, list) else [value]:
+            element = etree.SubElement(parent, f'{{{self.core_ns}}}{name}')
+            if isinstance(item, dict):
+                # RecordRef: internalId/externalId/type travel as attributes
+                for key, ref_value in item.items():
+                    if ref_value is not None:
+                        element.set(key, _text(ref_value))
+            else:
+                element.text = _text(item)
+
+    def _criteria(self, parent: etree._Element, criteria: Dict[str, Dict[str, Any]]):
+        for field, criterion in criteria.items():
+            element = etree.SubElement(parent, f'{{{self.common_ns}}}{field}')
+            if criterion.get('operator'):
+                element.set('operator', criterion['operator'])
+            for name in ('searchValue', 'searchValue2'):
+                if criterion.get(name) is not None:
+                    self._search_value(element, name, criterion[name])
+
+    def search(self, spec: SearchSpec, passport: etree._Element, preferences: Dict[str, Any]) -> bytes:
+        """
+        Build a search request.
+
+        Args:
+            spec: Search to run
+            passport: Signed tokenPassport element
+            preferences: searchPreferences values (see SearchSpec.preferences)
+
+        Returns:
+            Serialized envelope
+        """
+        record_ns = namespace(spec.module, spec.area, self.api_version)
+        envelope, body = self._envelope(passport, preferences, record_ns)
+        search = etree.SubElement(body, f'{{{self.messages_ns}}}search')
+        record = etree.SubElement(search, f'{{{self.messages_ns}}}searchRecord')
+
+        if not spec.advanced:
+            record.set(XSI_TYPE, f'platformCommon:{spec.family}SearchBasic')
+            self._criteria(record, spec.criteria)
+        else:
+            record.set(XSI_TYPE, f'rec:{spec.family}SearchAdvanced')
+            criteria = etree.SubElement(record, f'{{{record_ns}}}criteria')
+            self._criteria(etree.SubElement(criteria, f'{{{record_ns}}}basic'), spec.criteria)
+            columns = etree.SubElement(etree.SubElement(record, f'{{{record_ns}}}columns'),
+                                       f'{{{record_ns}}}basic')
+            for column in spec.columns:
+                # An empty SearchColumn element asks NetSuite to return that column
+                etree.SubElement(columns, f'{{{self.common_ns}}}{column}')
+        return etree.tostring(envelope, xml_declaration=True, encoding='UTF-8')
+
+    def search_more(self, search_id: str, page_index: int, passport: etree._Element,
+                    preferences: Dict[str, Any]) -> bytes:
+        """
+        Build a searchMoreWithId request.
+
+        Args:
+            search_id: searchId of the first page
+            page_index: 1-based page to fetch
+            passport: Signed tokenPassport element
+            preferences: searchPreferences values
+
+        Returns:
+            Serialized envelope
+        """
+        envelope, body = self._envelope(passport, preferences)
+        more = etree.SubElement(body, f'{{{self.messages_ns}}}searchMoreWithId')
+        etree.SubElement(more, f'{{{self.messages_ns}}}searchId').text = search_id
+        etree.SubElement(more, f'{{{self.messages_ns}}}pageIndex').text = str(page_index)
+        return etree.tostring(envelope, xml_declaration=True, encoding='UTF-8')
+
+
+def _typed(text: Optional[str], field_type: Optional[str]) -> Any:
+    """Convert element text to the Python type zeep would produce."""
+    if text is None:
+        return None
+    try:
+        if field_type == 'double':
+            return float(text)
+        if field_type == 'long':
+            return int(text)
+        if field_type == 'boolean':
+            return text == 'true'
+        if field_type == 'date':
+            return datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        pass
+    return text
+
+
+def _value(element: etree._Element, field_type: Optional[str]) -> Any:
+    """Value of a field element: a RecordRef's internalId or its typed text."""
+    internal_id = element.get('internalId')
+    if internal_id is not None:
+        return internal_id
+    return _typed(element.text, field_type)
+
+
+def _custom_type(element: etree._Element) -> Optional[str]:
+    xsi_type = element.get(XSI_TYPE) or ''
+    for fragment, field_type in _CUSTOM_FIELD_TYPES:
+        if fragment in xsi_type:
+            return field_type
+    return None
+
+
+def _custom_fields(element: etree._Element, value_tag: str) -> Dict[str, Any]:
+    """Expand a customFieldList element into scriptId -> value pairs."""
+    custom = {}
+    for field in element:
+        script_id = field.get('scriptId')
+        if not script_id:
+            continue
+        field_type = _custom_type(field)
+        values = [_value(child, field_type) for child in field.iterchildren(f'{{*}}{value_tag}')]
+        custom[script_id] = values[0] if len(values) == 1 else (values or None)
+    return custom
+
+
+def _search_row(element: etree._Element, columns: List[str], field_types: Dict[str, str]) -> Dict[str, Any]:
+    """Flatten a searchRow element to exactly the requested columns."""
+    found = {}
+    # Joined record groups are not requested by SearchSpec, only 'basic'
+    for group in element.iterchildren('{*}basic'):
+        for field in group:
+            name = _local(field.tag)
+            if name == 'customFieldList':
+                found.update(_custom_fields(field, 'searchValue'))
+                continue
+            field_type = field_types.get(name)
+            values = [_value(child, field_type) for child in field.iterchildren('{*}searchValue')]
+            found[name] = values[0] if len(values) == 1 else (values or None)
+    return {column: found.get(column) for column in columns}
+
+
+def _record(element: etree._Element, field_types: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Flatten a full record element.
+
+    Attributes (internalId, externalId), scalar body fields, RecordRefs and
+    custom fields are kept; nested structures such as sublists are skipped.
+    """
+    row = {key: value for key, value in element.attrib.items() if key != XSI_TYPE}
+    for field in element:
+        name = _local(field.tag)
+        if name == 'customFieldList':
+            row.update(_custom_fields(field, 'value'))
+        elif field.get('internalId') is not None:
+            row[name] = field.get('internalId')
+        elif len(field) == 0:
+            row[name] = _typed(field.text, field_types.get(name))
+    return row
+
+
+def _release(element: etree._Element):
+    """Free a processed element and the siblings already processed before it."""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def _raise_fault(element: etree._Element):
+    fault_string = element.findtext('faultstring') or 'SOAP fault'
+    fault_code = element.findtext('faultcode')
+    detail = element.find('detail')
+    if detail is not None:
+        # NetSuite puts the actionable code (e.g. WS_REQUEST_BLOCKED) in the detail
+        for child in detail.iter():
+            if _local(child.tag) == 'code' and child.text:
+                fault_code = child.text
+                break
+        detail = deepcopy(detail)
+    raise Fault(fault_string, code=fault_code, detail=detail)
+
+
+def parse_row(xml: Union[str, bytes], columns: Optional[List[str]] = None,
+              family: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse a single searchRow or record element, e.g. a dead-lettered one.
+
+    Args:
+        xml: Serialized searchRow or record element
+        columns: Requested columns for advanced-search rows; None for full records
+        family: Search family used to type standard fields
+
+    Returns:
+        Flat row
+    """
+    element = etree.fromstring(xml.encode('utf-8') if isinstance(xml, str) else xml)
+    field_types = SEARCH_FIELD_TYPES.get(family, {})
+    if columns is not None:
+        return _search_row(element, columns, field_types)
+    return _record(element, field_types)
+
+
+def parse_search_response(source: Union[bytes, Any], columns: Optional[List[str]] = None,
+                          family: Optional[str] = None,
+                          on_error: Optional[Callable[[int, Any, str], None]] = None) -> Dict[str, Any]:
+    """
+    Stream a search/searchMoreWithId response into flat rows.
+
+    Rows are extracted with iterparse as their elements complete and the
+    elements are released right away, so only one page of flat rows is
+    held in memory instead of the parsed tree plus zeep objects.
+
+    Args:
+        source: Response body as bytes or a readable file-like object
+        columns: Requested columns for advanced-search rows; None for full records
+        family: Search family (e.g. 'Transaction') used to type standard fields
+        on_error: Optional callable receiving the position, serialized element
+            and reason of each row that can't be mapped; the row is skipped
+            instead of failing the page
+
+    Returns:
+        Dict with totalRecords, pageSize, totalPages, pageIndex, searchId and 'rows'
+
+    Raises:
+        Fault: For SOAP faults and unsuccessful search statuses
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    field_types = SEARCH_FIELD_TYPES.get(family, {})
+    page: Dict[str, Any] = {'rows': []}
+    rows = page['rows']
+    position = 0
+
+    def add(element: etree._Element, parse: Callable[[], Dict[str, Any]]):
+        nonlocal position
+        try:
+            rows.append(parse())
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(position, etree.tostring(element, encoding='unicode'), f"{type(e).__name__}: {str(e)}")
+        position += 1
+        _release(element)
+
+    for _, element in etree.iterparse(source, events=('end',), tag=_WATCHED_TAGS, remove_blank_text=True):
+        name = _local(element.tag)
+        parent = _local(element.getparent().tag) if element.getparent() is not None else ''
+
+        if name == 'searchRow' and columns is not None:
+            add(element, lambda: _search_row(element, columns, field_types))
+        elif name == 'record' and parent == 'recordList':
+            add(element, lambda: _record(element, field_types))
+        elif parent == 'searchResult' and name in _PAGE_FIELDS and element.text:
+            page[name] = _PAGE_FIELDS[name](element.text)
+        elif parent == 'searchResult' and name == 'status':
+            if element.get('isSuccess') == 'false':
+                detail = next((child for child in element if _local(child.tag) == 'statusDetail'), None)
+                code = message = None
+                if detail is not None:
+                    for child in detail:
+                        if _local(child.tag) == 'code':
+                            code = child.text
+                        elif _local(child.tag) == 'message':
+                            message = child.text
+                raise Fault(message or 'NetSuite search failed', code=code)
+        elif name == 'Fault' and element.tag.startswith(f'{{{SOAP_ENV_NS}}}'):
+            _raise_fault(element)
+    return page
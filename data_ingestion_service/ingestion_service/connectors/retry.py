@@ -0,0 +1,228 @@
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+TRANSIENT_STATUS_CODES = (408, 425, 429, 500, 502, 503, 504)
+
+# requests/httpx connection and timeout errors don't share a stdlib base class
+TRANSIENT_ERROR_NAMES = (
+    'ConnectionError', 'ConnectTimeout', 'ReadTimeout', 'WriteTimeout', 'PoolTimeout',
+    'Timeout', 'ConnectError', 'ReadError', 'RemoteProtocolError', 'ChunkedEncodingError',
+    'ProxyError',
+)
+
+
+class RetryExhaustedError(Exception):
+    """
+    Raised when a transient failure persists after all allowed attempts.
+    """
+
+    def __init__(self, operation: str, attempts: int, last_error: Exception):
+        super().__init__(f"{operation} failed after {attempts} attempts: {last_error}")
+        self.operation = operation
+        self.attempts = attempts
+        self.last_error = last_error
+
+
+def error_status_code(error: Exception) -> Optional[int]:
+    """Get the HTTP status code of requests/httpx/zeep transport errors."""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+    return status if isinstance(status, int) and status > 0 else None
+
+
+def default_classifier(error: Exception) -> str:
+    """
+    Classify an exception as transient (worth retrying) or permanent.
+
+    HTTP 408/425/429/5xx gateway errors, timeouts and connection failures are
+    transient; other HTTP errors and everything else are permanent.
+
+    Args:
+        error: Exception raised by a connector operation
+
+    Returns:
+        TRANSIENT or PERMANENT
+    """
+    status = error_status_code(error)
+    if status is not None:
+        return TRANSIENT if status in TRANSIENT_STATUS_CODES else PERMANENT
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return TRANSIENT
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return TRANSIENT
+    return PERMANENT
+
+
+class RetryBudget:
+    """
+    Bounded number of retries shared by all operations of one job.
+
+    Stops a failing account from multiplying load across every call of a
+    job: once the budget is spent, transient failures are raised immediately.
+    """
+
+    def __init__(self, max_retries: int):
+        """
+        Initialize the budget.
+
+        Args:
+            max_retries: Total retries allowed for the job
+        """
+        self.max_retries = max_retries
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.max_retries - self.spent)
+
+    def try_spend(self) -> bool:
+        """
+        Take one retry from the budget.
+
+        Returns:
+            bool: True if a retry was available, False otherwise
+        """
+        with self._lock:
+            if self.spent >= self.max_retries:
+                return False
+            self.spent += 1
+            return True
+
+
+class RetryPolicy:
+    """
+    Retries transient failures with capped exponential backoff and full jitter.
+
+    The delay before retry ``n`` is drawn uniformly from
+    ``[0, min(max_delay, base_delay * 2 ** (n - 1))]``.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 30.0,
+                 classifier: Callable[[Exception], str] = default_classifier,
+                 sleep: Callable[[float], None] = time.sleep,
+                 random_func: Callable[[], float] = random.random):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_attempts: Maximum attempts per call, including the first one
+            base_delay: Backoff base in seconds
+            max_delay: Cap on a single backoff delay in seconds
+            classifier: Function classifying exceptions as TRANSIENT or PERMANENT
+            sleep: Sleep function, injectable for tests
+            random_func: Source of uniform [0, 1) numbers, injectable for tests
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.classifier = classifier
+        self.sleep = sleep
+        self.random_func = random_func
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any],
+                    classifier: Callable[[Exception], str] = default_classifier) -> 'RetryPolicy':
+        """
+        Create a policy from a connector's 'retry' config section.
+
+        Args:
+            config: Dict with optional max_attempts, base_delay and max_delay
+            classifier: Function classifying exceptions
+
+        Returns:
+            A RetryPolicy
+        """
+        return cls(max_attempts=config.get('max_attempts', 5),
+                   base_delay=config.get('base_delay', 0.5),
+                   max_delay=config.get('max_delay', 30.0),
+                   classifier=classifier)
+
+    def compute_delay(self, attempt: int) -> float:
+        """
+        Get the full-jitter backoff delay after a failed attempt.
+
+        Args:
+            attempt: Number of the attempt that just failed (1-based)
+
+        Returns:
+            Seconds to sleep before the next attempt
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return ceiling * self.random_func()
+
+    def _record(self, operation: str, attempts: int, succeeded: bool):
+        with self._lock:
+            stats = self._stats.setdefault(operation, {'calls': 0, 'attempts': 0, 'retries': 0,
+                                                       'failures': 0, 'last_attempts': 0})
+            stats['calls'] += 1
+            stats['attempts'] += attempts
+            stats['retries'] += attempts - 1
+            stats['last_attempts'] = attempts
+            if not succeeded:
+                stats['failures'] += 1
+
+    def call(self, func: Callable[..., Any], *args, operation: Optional[str] = None,
+             budget: Optional[RetryBudget] = None, **kwargs) -> Any:
+        """
+        Call a function, retrying transient failures.
+
+        Args:
+            func: Function to call
+            *args: Positional arguments for func
+            operation: Name used in logs and stats, defaults to the function name
+            budget: Optional per-job retry budget
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The function's return value
+
+        Raises:
+            RetryExhaustedError: If a transient failure outlasted the attempts or budget
+            Exception: Permanent failures are re-raised unchanged
+        """
+        operation = operation or getattr(func, '__name__', 'call')
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if self.classifier(e) != TRANSIENT:
+                    self._record(operation, attempt, succeeded=False)
+                    raise
+                if attempt >= self.max_attempts or (budget is not None and not budget.try_spend()):
+                    self._record(operation, attempt, succeeded=False)
+                    raise RetryExhaustedError(operation, attempt, e) from e
+
+                delay = self.compute_delay(attempt)
+                logger.warning(f"{operation} failed (attempt {attempt}/{self.max_attempts}): "
+                               f"{str(e)}. Retrying in {delay:.2f} seconds...")
+                self.sleep(delay)
+                continue
+
+            self._record(operation, attempt, succeeded=True)
+            return result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get attempt counters per operation.
+
+        Returns:
+            Dict mapping operation name to calls, attempts, retries, failures
+            and the attempt count of the most recent call
+        """
+        with self._lock:
+            return {operation: dict(values) for operation, values in self._stats.items()}
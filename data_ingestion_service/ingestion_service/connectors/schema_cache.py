@@ -0,0 +1,197 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def schema_hash(schema: Dict[str, Any]) -> str:
+    """
+    Compute a content hash of a schema that ignores key order.
+
+    Args:
+        schema: Schema dict (e.g. {'fields': [...]})
+
+    Returns:
+        Hex SHA-256 digest of the canonical JSON form
+    """
+    canonical = json.dumps(schema, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _safe_name(value: str) -> str:
+    """Make a key component usable as a file or directory name."""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(value))
+
+
+class SchemaCache:
+    """
+    Schema cache keyed by (account, record type, API version).
+
+    Entries live in memory and, when a directory is configured, as one JSON
+    file per key so discovered schemas survive restarts. Every entry carries
+    a content hash; storing a schema whose hash differs from the cached one
+    bumps the entry's version and reports the drift.
+    """
+
+    def __init__(self, directory: Optional[str] = None, ttl_seconds: float = 86400,
+                 on_drift: Optional[Callable[[Tuple[str, str, str], Dict[str, Any], Dict[str, Any]], None]] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Optional directory for persistent entries
+            ttl_seconds: Age after which an entry is considered stale
+            on_drift: Optional callback(key, old_entry, new_entry) on schema changes
+            clock: Wall clock, injectable for tests
+        """
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.on_drift = on_drift
+        self.clock = clock
+        self._entries: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: Tuple[str, str, str]) -> Optional[str]:
+        if not self.directory:
+            return None
+        account, record_type, api_version = (_safe_name(part) for part in key)
+        return os.path.join(self.directory, account, api_version, f'{record_type}.json')
+
+    def _load(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        path = self._path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable schema cache entry {path}: {str(e)}")
+            return None
+        self._entries[key] = entry
+        return entry
+
+    def _save(self, key: Tuple[str, str, str], entry: Dict[str, Any]):
+        self._entries[key] = entry
+        path = self._path(key)
+        if not path:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial entry
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """
+        Check whether an entry is younger than the TTL.
+
+        Args:
+            entry: Cache entry
+
+        Returns:
+            bool: True if the entry can be used without re-discovery
+        """
+        return self.clock() - entry['fetched_at'] < self.ttl_seconds
+
+    def get(self, account: str, record_type: str, api_version: str,
+            allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached entry.
+
+        Args:
+            account: ERP account id
+            record_type: Record type / entity
+            api_version: API version the schema was discovered with
+            allow_stale: Return entries older than the TTL too
+
+        Returns:
+            Entry dict (schema, hash, version, fetched_at), or None on a miss
+        """
+        with self._lock:
+            entry = self._load((account, record_type, api_version))
+        if entry is None or (not allow_stale and not self.is_fresh(entry)):
+            return None
+        return entry
+
+    def put(self, account: str, record_type: str, api_version: str,
+            schema: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store a freshly discovered schema.
+
+        Args:
+            account: ERP account id
+            record_type: Record type / entity
+            api_version: API version the schema was discovered with
+            schema: Discovered schema
+
+        Returns:
+            The stored entry; 'drifted' is True if the schema changed since the last discovery
+        """
+        key = (account, record_type, api_version)
+        content_hash = schema_hash(schema)
+        with self._lock:
+            previous = self._load(key)
+            drifted = previous is not None and previous['hash'] != content_hash
+            version = 1 if previous is None else previous['version'] + (1 if drifted else 0)
+            entry = {
+                'key': list(key),
+                'schema': schema,
+                'hash': content_hash,
+                'version': version,
+                'fetched_at': self.clock(),
+                'drifted': drifted,
+            }
+            self._save(key, entry)
+
+        if drifted:
+            logger.warning(f"Schema drift detected for {record_type} on account {account} "
+                           f"(version {previous['version']} -> {version})")
+            if self.on_drift:
+                self.on_drift(key, previous, entry)
+        return entry
+
+    def invalidate(self, account: str, record_type: Optional[str] = None,
+                   api_version: Optional[str] = None):
+        """
+        Mark entries stale so the next lookup re-discovers them.
+
+        Stale entries keep their hash and version, so drift is still detected
+        on re-discovery.
+
+        Args:
+            account: ERP account id
+            record_type: Optional record type, all record types when omitted
+            api_version: Optional API version, all versions when omitted
+        """
+        def matches(key) -> bool:
+            return (key[0] == account
+                    and record_type in (None, key[1])
+                    and api_version in (None, key[2]))
+
+        with self._lock:
+            keys = [key for key in self._entries if matches(key)]
+            account_dir = os.path.join(self.directory, _safe_name(account)) if self.directory else None
+            if account_dir and os.path.isdir(account_dir):
+                for root, _, names in os.walk(account_dir):
+                    for name in names:
+                        if not name.endswith('.json'):
+                            continue
+                        with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                            key = tuple(json.load(f)['key'])
+                        if matches(key) and key not in keys:
+                            keys.append(key)
+            for key in keys:
+                entry = self._load(key)
+                if entry is not None:
+                    self._save(key, dict(entry, fetched_at=0))
@@ -0,0 +1,71 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from ..jobs.queue import Job
+from .publisher import EventPublisher
+
+logger = logging.getLogger(__name__)
+
+# Job events are typed 'extraction.job.<status>', e.g. 'extraction.job.succeeded'
+JOB_EVENT_PREFIX = 'extraction.job.'
+JOB_STARTED = 'extraction.job.started'
+SEGMENT_WRITTEN = 'extraction.segment.written'
+
+
+class ExtractionEvents:
+    """
+    Publishes extraction lifecycle and change events.
+
+    Job events are keyed by tenant, so a consumer sees the events of each job
+    in order and a busy tenant's job events share messages; their subject is
+    the job id. A segment event announces rows that became durable in the sink,
+    with the files written, so downstream loads can pick up changes without
+    listing storage. Publishing never fails the extraction: errors are
+    logged and the event is skipped.
+    """
+
+    def __init__(self, publisher: EventPublisher):
+        """
+        Initialize the emitter.
+
+        Args:
+            publisher: Publisher the events go to
+        """
+        self.publisher = publisher
+
+    def _emit(self, event_type: str, data: Dict[str, Any], key: str, subject: Optional[str] = None):
+        try:
+            self.publisher.publish(event_type, data, key=key, subject=subject)
+        except Exception as e:
+            logger.error(f"Could not publish {event_type} event for {subject or key}: {str(e)}")
+
+    def job(self, job: Job, event_type: Optional[str] = None):
+        """
+        Publish a job's state change.
+
+        Args:
+            job: Job as updated
+            event_type: Event type, 'extraction.job.<status>' by default
+        """
+        data = job.to_dict()
+        data.pop('params', None)
+        self._emit(event_type or f'{JOB_EVENT_PREFIX}{job.status}', data, key=job.tenant_id, subject=job.job_id)
+
+    def segment_written(self, run_id: str, entity: str, chunk_key: str, segment: int, rows: int,
+                        files: List[Dict[str, Any]], partition_date: str, last_id: Optional[str] = None):
+        """
+        Publish that a segment of a run is durable in the sink.
+
+        Args:
+            run_id: Extraction run identifier
+            entity: Entity/table name
+            chunk_key: Key of the chunk the segment belongs to
+            segment: Segment number within the chunk
+            rows: Rows in the segment
+            files: Manifest entries of the files written
+            partition_date: Date partition the files are in
+            last_id: Id of the segment's last record, if known
+        """
+        self._emit(SEGMENT_WRITTEN, {'run_id': run_id, 'entity': entity, 'chunk': chunk_key, 'segment': segment,
+                                     'rows': rows, 'files': files, 'partition_date': partition_date,
+                                     'last_id': last_id}, key=run_id)
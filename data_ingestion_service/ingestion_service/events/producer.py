@@ -0,0 +1,165 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+try:
+    from azure.eventhub import EventData, EventHubProducerClient
+except ImportError:  # pragma: no cover - only needed for real Event Hubs namespaces
+    EventData = None
+    EventHubProducerClient = None
+
+logger = logging.getLogger(__name__)
+
+
+class EventMessage:
+    """
+    A message handed to a producer: an opaque body plus string properties.
+
+    Messages with the same partition key keep their order on the broker.
+    """
+
+    def __init__(self, body: bytes, properties: Optional[Dict[str, Any]] = None,
+                 partition_key: Optional[str] = None):
+        """
+        Initialize the message.
+
+        Args:
+            body: Message payload
+            properties: Application properties (e.g. content type and encoding)
+            partition_key: Optional key choosing the partition
+        """
+        self.body = body
+        self.properties = properties or {}
+        self.partition_key = partition_key
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+
+class EventProducer(ABC):
+    """
+    Abstract base class for message brokers events are published to.
+
+    A topic is an Event Hub of the namespace, or a Kafka topic.
+    """
+
+    @abstractmethod
+    def send(self, topic: str, messages: List[EventMessage]):
+        """
+        Send messages in as few broker requests as possible.
+
+        Either raises or has sent every message; a retry after an error may
+        send some of them twice.
+
+        Args:
+            topic: Topic to send to
+            messages: Messages, in order
+
+        Raises:
+            Exception: If the broker rejected or didn't acknowledge the messages
+        """
+        pass
+
+    def close(self):
+        """
+        Release connections to the broker.
+        """
+        pass
+
+
+class InMemoryProducer(EventProducer):
+    """
+    Producer keeping sent messages in memory, for tests and local runs.
+
+    Setting fail to an exception makes every send raise it, e.g. to simulate
+    an unreachable broker.
+    """
+
+    def __init__(self):
+        self.sent: Dict[str, List[EventMessage]] = {}
+        self.requests = 0
+        self.fail: Optional[Exception] = None
+        self._lock = threading.Lock()
+
+    def send(self, topic: str, messages: List[EventMessage]):
+        if self.fail is not None:
+            raise self.fail
+        with self._lock:
+            self.requests += 1
+            self.sent.setdefault(topic, []).extend(messages)
+
+    def messages(self, topic: str) -> List[EventMessage]:
+        """
+        Messages sent to a topic so far.
+
+        Args:
+            topic: Topic name
+
+        Returns:
+            The messages, in order
+        """
+        with self._lock:
+            return list(self.sent.get(topic, []))
+
+
+class EventHubProducer(EventProducer):
+    """
+    Producer for Azure Event Hubs; each topic is an Event Hub of one namespace.
+
+    Messages are packed into as few EventDataBatch requests as their size
+    allows, one batch per partition key.
+    """
+
+    def __init__(self, connection_string: str, **client_kwargs):
+        """
+        Initialize the producer.
+
+        Args:
+            connection_string: Event Hubs namespace connection string
+            **client_kwargs: Other EventHubProducerClient arguments (e.g. retry_total)
+        """
+        if EventHubProducerClient is None:
+            raise ImportError("EventHubProducer requires azure-eventhub")
+        self.connection_string = connection_string
+        self.client_kwargs = client_kwargs
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _client(self, topic: str) -> Any:
+        with self._lock:
+            client = self._clients.get(topic)
+            if client is None:
+                client = EventHubProducerClient.from_connection_string(self.connection_string, eventhub_name=topic,
+                                                                      **self.client_kwargs)
+                self._clients[topic] = client
+            return client
+
+    def send(self, topic: str, messages: List[EventMessage]):
+        client = self._client(topic)
+        batch, batch_key = None, None
+        for message in messages:
+            if batch is not None and message.partition_key != batch_key:
+                client.send_batch(batch)
+                batch = None
+            if batch is None:
+                batch, batch_key = client.create_batch(partition_key=message.partition_key), message.partition_key
+            event = EventData(message.body)
+            event.properties = dict(message.properties)
+            try:
+                batch.add(event)
+            except ValueError:
+                # Batch is at the size limit of the Event Hub
+                if len(batch) == 0:
+                    raise
+                client.send_batch(batch)
+                batch = client.create_batch(partition_key=message.partition_key)
+                batch.add(event)
+        if batch is not None and len(batch):
+            client.send_batch(batch)
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
@@ -0,0 +1,293 @@
+import gzip
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .producer import EventMessage, EventProducer
+
+logger = logging.getLogger(__name__)
+
+NONE = 'none'
+GZIP = 'gzip'
+CODECS = {
+    NONE: (lambda data: data, lambda data: data),
+    GZIP: (lambda data: gzip.compress(data, compresslevel=6), gzip.decompress),
+}
+
+CONTENT_TYPE = 'application/x-ndjson'
+
+
+def decode_message(message: EventMessage) -> List[Dict[str, Any]]:
+    """
+    Decode the events packed into a message by EventPublisher.
+
+    Args:
+        message: Message as sent or received
+
+    Returns:
+        The event envelopes, in publish order
+    """
+    _, decompress = CODECS[message.properties.get('content-encoding', NONE)]
+    return [json.loads(line) for line in decompress(message.body).split(b'\n') if line]
+
+
+class EventPublisher:
+    """
+    Publishes events to a topic in compressed batches.
+
+    Events are buffered and packed, per partition key, into NDJSON messages
+    of up to max_batch_events events (or max_batch_bytes before
+    compression). A message is sealed and sent when it is full, or after
+    linger_seconds otherwise, so a burst of events costs one broker request
+    per batch rather than per event.
+
+    publish() never waits for the broker: messages are sent by a background
+    thread, which start() launches (or the first full batch, if start()
+    wasn't called), or by flush(). Messages the broker doesn't take
+    stay buffered and are retried; once the buffer holds more than
+    max_buffered_bytes they are spilled to files in spill_dir (or dropped,
+    without one), and spilled messages are sent first once the broker is
+    back. Spill files left by a previous process are sent too. Delivery is
+    at least once: every event has a unique id consumers can dedupe on.
+    """
+
+    def __init__(self, producer: EventProducer, topic: str, source: str = 'data-ingestion-service',
+                 max_batch_events: int = 500, max_batch_bytes: int = 512 * 1024, linger_seconds: float = 1.0,
+                 compression: str = GZIP, max_buffered_bytes: int = 32 * 1024 * 1024,
+                 spill_dir: Optional[str] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the publisher.
+
+        Args:
+            producer: Producer of the broker
+            topic: Topic the events are sent to
+            source: Source attribute of the events
+            max_batch_events: Maximum events per message
+            max_batch_bytes: Maximum uncompressed bytes per message
+            linger_seconds: Maximum seconds an event waits for its batch to fill
+            compression: 'gzip' or 'none'
+            max_buffered_bytes: Bytes held in memory before messages are spilled
+            spill_dir: Optional directory for spilled messages
+            clock: Monotonic clock, injectable for tests
+        """
+        if compression not in CODECS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.producer = producer
+        self.topic = topic
+        self.source = source
+        self.max_batch_events = max_batch_events
+        self.max_batch_bytes = max_batch_bytes
+        self.linger_seconds = linger_seconds
+        self.compression = compression
+        self.max_buffered_bytes = max_buffered_bytes
+        self.spill_dir = spill_dir
+        self.clock = clock
+        self.stats = {'published': 0, 'sent': 0, 'requests': 0, 'failures': 0, 'spilled': 0, 'dropped': 0}
+
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._pending: List[Tuple[Optional[str], bytes]] = []
+        self._pending_bytes = 0
+        self._pending_since = 0.0
+        self._outbox: Deque[EventMessage] = deque()
+        self._outbox_bytes = 0
+        self._in_flight = 0
+        self._spilled: List[str] = []
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+            self._spilled = sorted(os.path.join(spill_dir, name) for name in os.listdir(spill_dir)
+                                   if name.endswith('.spill'))
+            if self._spilled:
+                logger.info(f"Found {len(self._spilled)} spilled event files to send to {topic}")
+
+    def publish(self, event_type: str, data: Dict[str, Any], key: Optional[str] = None,
+                subject: Optional[str] = None) -> str:
+        """
+        Buffer an event.
+
+        Args:
+            event_type: Event type (e.g. 'extraction.job.succeeded')
+            data: JSON-serializable payload
+            key: Optional partition key; events with the same key stay in order
+                and are packed into the same messages
+            subject: Optional subject of the event, the key by default
+
+        Returns:
+            The event id
+        """
+        event_id = uuid.uuid4().hex
+        envelope = {'id': event_id, 'type': event_type, 'source': self.source,
+                    'time': datetime.now(timezone.utc).isoformat(),
+                    'subject': subject if subject is not None else key, 'data': data}
+        line = json.dumps(envelope, default=str, separators=(',', ':')).encode('utf-8')
+        with self._lock:
+            if not self._pending:
+                self._pending_since = self.clock()
+            self._pending.append((key, line))
+            self._pending_bytes += len(line) + 1
+            self.stats['published'] += 1
+            full = len(self._pending) >= self.max_batch_events or self._pending_bytes >= self.max_batch_bytes
+            if full:
+                self._seal()
+            self._bound()
+        if full:
+            if self._thread is None:
+                self.start()
+            self._wakeup.set()
+        return event_id
+
+    def _seal(self):
+        """Pack the pending events into messages; called with the lock held."""
+        by_key: Dict[Optional[str], List[bytes]] = {}
+        for key, line in self._pending:
+            by_key.setdefault(key, []).append(line)
+        compress, _ = CODECS[self.compression]
+        for key, lines in by_key.items():
+            batch, size = [], 0
+            for line in lines + [None]:
+                if batch and (line is None or len(batch) >= self.max_batch_events
+                              or size + len(line) > self.max_batch_bytes):
+                    message = EventMessage(compress(b'\n'.join(batch)),
+                                           {'content-type': CONTENT_TYPE, 'content-encoding': self.compression,
+                                            'event-count': len(batch)}, partition_key=key)
+                    self._outbox.append(message)
+                    self._outbox_bytes += len(message)
+                    batch, size = [], 0
+                if line is not None:
+                    batch.append(line)
+                    size += len(line) + 1
+        self._pending, self._pending_bytes = [], 0
+
+    def _bound(self, force: bool = False):
+        """Spill or drop messages beyond max_buffered_bytes; called with the lock held."""
+        if not force and self._pending_bytes + self._outbox_bytes <= self.max_buffered_bytes:
+            return
+        if force:
+            self._seal()
+        # Messages being sent stay; everything after them leaves memory
+        messages = [self._outbox.pop() for _ in range(len(self._outbox) - self._in_flight)][::-1]
+        if not messages:
+            return
+        self._outbox_bytes -= sum(len(message) for message in messages)
+        events = sum(message.properties['event-count'] for message in messages)
+        if self.spill_dir is None:
+            self.stats['dropped'] += events
+            logger.warning(f"Event buffer for {self.topic} is full, dropped {events} events")
+            return
+        path = os.path.join(self.spill_dir, f'{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.spill')
+        with open(f'{path}.tmp', 'wb') as f:
+            pickle.dump([(message.body, message.properties, message.partition_key) for message in messages], f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f'{path}.tmp', path)
+        self._spilled.append(path)
+        self.stats['spilled'] += events
+        logger.warning(f"Event buffer for {self.topic} is full, spilled {events} events to {path}")
+
+    def _deliver(self, messages: List[EventMessage]) -> bool:
+        try:
+            self.producer.send(self.topic, messages)
+        except Exception as e:
+            self.stats['failures'] += 1
+            logger.warning(f"Sending {len(messages)} event messages to {self.topic} failed, "
+                           f"keeping them buffered: {str(e)}")
+            return False
+        self.stats['requests'] += 1
+        self.stats['sent'] += sum(message.properties['event-count'] for message in messages)
+        return True
+
+    def _send(self) -> bool:
+        """Send spilled, then buffered messages; returns False if the broker failed."""
+        with self._send_lock:
+            while True:
+                # Checked before every send: a failed send may have left the
+                # buffer full, spilling messages older than the ones left in it
+                with self._lock:
+                    path = self._spilled[0] if self._spilled else None
+                    if path is None:
+                        messages = list(self._outbox)
+                        self._in_flight = len(messages)
+                if path is not None:
+                    with open(path, 'rb') as f:
+                        messages = [EventMessage(body, properties, key)
+                                    for body, properties, key in pickle.load(f)]
+                    if not self._deliver(messages):
+                        return False
+                    os.remove(path)
+                    with self._lock:
+                        self._spilled.pop(0)
+                    continue
+                if not messages:
+                    return True
+                sent = self._deliver(messages)
+                with self._lock:
+                    self._in_flight = 0
+                    if sent:
+                        for _ in messages:
+                            self._outbox_bytes -= len(self._outbox.popleft())
+                if not sent:
+                    return False
+
+    def flush(self) -> bool:
+        """
+        Send everything buffered or spilled now.
+
+        Returns:
+            True if the broker took every message
+        """
+        with self._lock:
+            self._seal()
+        return self._send()
+
+    def _loop(self):
+        while not self._stopping:
+            with self._lock:
+                waited = self.clock() - self._pending_since if self._pending else 0.0
+            self._wakeup.wait(max(0.0, self.linger_seconds - waited))
+            self._wakeup.clear()
+            try:
+                with self._lock:
+                    if self._pending and self.clock() - self._pending_since >= self.linger_seconds:
+                        self._seal()
+                    due = bool(self._outbox or self._spilled)
+                if due:
+                    self._send()
+            except Exception as e:
+                logger.error(f"Event publishing to {self.topic} failed: {str(e)}")
+
+    def start(self):
+        """
+        Send batches from a background thread, including those only due by linger_seconds.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._loop, name='event-publisher', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """
+        Stop the background thread and send what is left; what the broker
+        doesn't take is spilled for the next process (or lost without spill_dir).
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if not self.flush():
+            with self._lock:
+                self._bound(force=True)
+                spilled = len(self._spilled)
+            logger.warning(f"Closed event publisher for {self.topic} with {spilled} spill files unsent")
+        self.producer.close()
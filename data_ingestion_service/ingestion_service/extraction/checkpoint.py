@@ -0,0 +1,181 @@
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DONE = 'done'
+FAILED = 'failed'
+RUNNING = 'running'
+
+
+class ChunkCheckpointStore:
+    """
+    Per-chunk progress of parallel extraction runs, backed by SQLite.
+
+    A chunk is only marked done once its rows are spooled to disk, so a rerun
+    of the same run id skips finished chunks and retries just the failed ones.
+    Resumable runs also record progress within a chunk (pages and rows
+    durably written so far), see save_progress.
+    """
+
+    def __init__(self, path: str = 'checkpoints.db'):
+        """
+        Initialize the store, creating the table if needed.
+
+        Args:
+            path: SQLite database file (':memory:' for tests)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS chunk_checkpoints ('
+            ' run_id TEXT NOT NULL,'
+            ' chunk_key TEXT NOT NULL,'
+            ' status TEXT NOT NULL,'
+            ' rows INTEGER,'
+            ' spool_path TEXT,'
+            ' error TEXT,'
+            ' updated_at TEXT NOT NULL,'
+            ' PRIMARY KEY (run_id, chunk_key))'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS chunk_progress ('
+            ' run_id TEXT NOT NULL,'
+            ' chunk_key TEXT NOT NULL,'
+            ' page INTEGER NOT NULL,'
+            ' segment INTEGER NOT NULL,'
+            ' rows INTEGER NOT NULL,'
+            ' last_id TEXT,'
+            ' partition_date TEXT NOT NULL,'
+            ' status TEXT NOT NULL,'
+            ' updated_at TEXT NOT NULL,'
+            ' PRIMARY KEY (run_id, chunk_key))'
+        )
+
+    def _upsert(self, run_id: str, chunk_key: str, status: str, rows: Optional[int],
+                spool_path: Optional[str], error: Optional[str]):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO chunk_checkpoints (run_id, chunk_key, status, rows, spool_path, error, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (run_id, chunk_key) DO UPDATE SET '
+                'status = excluded.status, rows = excluded.rows, spool_path = excluded.spool_path, '
+                'error = excluded.error, updated_at = excluded.updated_at',
+                (run_id, chunk_key, status, rows, spool_path, error,
+                 datetime.now(timezone.utc).isoformat()),
+            )
+
+    def mark_done(self, run_id: str, chunk_key: str, rows: int, spool_path: str):
+        """
+        Record that a chunk's rows are spooled.
+
+        Args:
+            run_id: Extraction run identifier
+            chunk_key: Chunk key
+            rows: Number of rows extracted
+            spool_path: File holding the chunk's rows
+        """
+        self._upsert(run_id, chunk_key, DONE, rows, spool_path, None)
+
+    def mark_failed(self, run_id: str, chunk_key: str, error: str):
+        """
+        Record that a chunk failed and must be rerun.
+
+        Args:
+            run_id: Extraction run identifier
+            chunk_key: Chunk key
+            error: Error message
+        """
+        self._upsert(run_id, chunk_key, FAILED, None, None, error)
+
+    def get_run(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the checkpoints of a run.
+
+        Args:
+            run_id: Extraction run identifier
+
+        Returns:
+            Dict mapping chunk key to its status, rows, spool_path and error
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT chunk_key, status, rows, spool_path, error FROM chunk_checkpoints WHERE run_id = ?',
+                (run_id,),
+            ).fetchall()
+        return {row[0]: {'status': row[1], 'rows': row[2], 'spool_path': row[3], 'error': row[4]}
+                for row in rows}
+
+    def save_progress(self, run_id: str, chunk_key: str, page: int, segment: int, rows: int,
+                      last_id: Optional[str], partition_date: str, done: bool = False):
+        """
+        Record how far a chunk of a resumable run got.
+
+        Only call this once the rows up to page are durably written, since a
+        resumed run continues after page.
+
+        Args:
+            run_id: Extraction run identifier
+            chunk_key: Chunk key
+            page: Last page whose rows are written (0 before the first)
+            segment: Number of sink segments written
+            rows: Rows written so far
+            last_id: Id of the last written record
+            partition_date: Date the run partitions its output by, kept so a
+                resumed run writes to the same partitions
+            done: Whether the chunk is complete
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO chunk_progress (run_id, chunk_key, page, segment, rows, last_id, partition_date, '
+                'status, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (run_id, chunk_key) DO UPDATE SET '
+                'page = excluded.page, segment = excluded.segment, rows = excluded.rows, '
+                'last_id = excluded.last_id, partition_date = excluded.partition_date, '
+                'status = excluded.status, updated_at = excluded.updated_at',
+                (run_id, chunk_key, page, segment, rows, last_id, partition_date, DONE if done else RUNNING,
+                 datetime.now(timezone.utc).isoformat()),
+            )
+
+    def get_progress(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the progress of a resumable run's chunks.
+
+        Args:
+            run_id: Extraction run identifier
+
+        Returns:
+            Dict mapping chunk key to its page, segment, rows, last_id,
+            partition_date and status
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT chunk_key, page, segment, rows, last_id, partition_date, status '
+                'FROM chunk_progress WHERE run_id = ?',
+                (run_id,),
+            ).fetchall()
+        return {row[0]: {'page': row[1], 'segment': row[2], 'rows': row[3], 'last_id': row[4],
+                         'partition_date': row[5], 'status': row[6]}
+                for row in rows}
+
+    def reset(self, run_id: str):
+        """
+        Forget a run's checkpoints so it starts over.
+
+        Args:
+            run_id: Extraction run identifier
+        """
+        with self._lock:
+            self._conn.execute('DELETE FROM chunk_checkpoints WHERE run_id = ?', (run_id,))
+            self._conn.execute('DELETE FROM chunk_progress WHERE run_id = ?', (run_id,))
+
+    def close(self):
+        """
+        Close the underlying database connection.
+        """
+        self._conn.close()
@@ -0,0 +1,143 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..connectors.base import MIN_TIMESTAMP, Range, _id_sort_key, to_utc_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class Chunk:
+    """
+    Independent slice of an entity: the records whose field lies in [low, high].
+    """
+
+    def __init__(self, entity: str, field: str, low: Any, high: Any, index: int):
+        """
+        Initialize the chunk.
+
+        Args:
+            entity: Entity/table name
+            field: Field the entity is split on (an id or a date)
+            low: Inclusive lower bound
+            high: Inclusive upper bound
+            index: Position of the chunk in the plan, chunks are ordered by it
+        """
+        self.entity = entity
+        self.field = field
+        self.low = low
+        self.high = high
+        self.index = index
+
+    @property
+    def key(self) -> str:
+        """Stable identifier of the chunk within a plan, used for checkpoints."""
+        low = self.low.isoformat() if isinstance(self.low, datetime) else self.low
+        high = self.high.isoformat() if isinstance(self.high, datetime) else self.high
+        return f'{self.entity}:{self.field}:{self.index}:{low}:{high}'
+
+    @property
+    def filter(self) -> Range:
+        return Range(self.field, self.low, self.high)
+
+    def sort_key(self, record: Dict[str, Any], id_field: str) -> Tuple[Any, ...]:
+        """
+        Get the key ordering a record within the chunk.
+
+        Args:
+            record: Extracted record
+            id_field: Name of the record's id field
+
+        Returns:
+            Sort key; chunks of a plan don't overlap, so sorting each chunk and
+            concatenating them in index order orders the whole entity
+        """
+        if isinstance(self.low, datetime):
+            value = record.get(self.field)
+            modified = to_utc_datetime(value) if value is not None else MIN_TIMESTAMP
+            return (modified, _id_sort_key(record.get(id_field)))
+        return (_id_sort_key(record.get(self.field)),)
+
+    def __repr__(self):
+        return f"<Chunk({self.key})>"
+
+
+def _chunk_count(total: int, chunk_count: Optional[int], chunk_size: Optional[int]) -> int:
+    if chunk_count is None and chunk_size is None:
+        raise ValueError("Either chunk_count or chunk_size is required")
+    if chunk_count is None:
+        chunk_count = -(-total // max(1, chunk_size))
+    return max(1, min(chunk_count, total))
+
+
+def plan_id_chunks(entity: str, low_id: int, high_id: int, chunk_count: Optional[int] = None,
+                   chunk_size: Optional[int] = None, field: str = 'internalId') -> List[Chunk]:
+    """
+    Split an entity into contiguous, non-overlapping internalId ranges.
+
+    Args:
+        entity: Entity/table name
+        low_id: Smallest id to extract
+        high_id: Largest id to extract
+        chunk_count: Number of chunks to create
+        chunk_size: Alternatively, the number of ids per chunk
+        field: Numeric id field
+
+    Returns:
+        Chunks ordered by id
+    """
+    if high_id < low_id:
+        return []
+    total = high_id - low_id + 1
+    count = _chunk_count(total, chunk_count, chunk_size)
+    step, extra = divmod(total, count)
+
+    chunks = []
+    low = low_id
+    for index in range(count):
+        high = low + step - 1 + (1 if index < extra else 0)
+        chunks.append(Chunk(entity, field, low, high, index))
+        low = high + 1
+    logger.info(f"Planned {len(chunks)} {field} chunks for {entity} over [{low_id}, {high_id}]")
+    return chunks
+
+
+def plan_date_chunks(entity: str, start: Any, end: Any, chunk_count: Optional[int] = None,
+                     interval: Optional[timedelta] = None,
+                     field: str = 'lastModifiedDate') -> List[Chunk]:
+    """
+    Split an entity into consecutive date windows.
+
+    Date criteria are inclusive at both ends, so a record stamped exactly on
+    a boundary is returned by both neighbouring chunks; the merger drops the
+    duplicate.
+
+    Args:
+        entity: Entity/table name
+        start: Start of the first window (datetime or ISO-8601 string)
+        end: End of the last window
+        chunk_count: Number of windows to create
+        interval: Alternatively, the length of each window
+        field: Date field
+
+    Returns:
+        Chunks ordered by date
+    """
+    start, end = to_utc_datetime(start), to_utc_datetime(end)
+    if end < start:
+        return []
+    if interval is None:
+        if not chunk_count:
+            raise ValueError("Either chunk_count or interval is required")
+        interval = (end - start) / chunk_count
+    if interval <= timedelta(0):
+        return [Chunk(entity, field, start, end, 0)]
+
+    chunks = []
+    low = start
+    while low < end or not chunks:
+        high = min(end, low + interval)
+        chunks.append(Chunk(entity, field, low, high, len(chunks)))
+        low = high
+    logger.info(f"Planned {len(chunks)} {field} chunks for {entity} over [{start}, {end}]")
+    return chunks
@@ -0,0 +1,334 @@
+import hashlib
+import logging
+import pickle
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from ..connectors.base import ERPConnector
+from ..connectors.columnar import arrow_schema, records_to_batch
+from ..sinks.parquet import ParquetSink
+
+logger = logging.getLogger(__name__)
+
+MAPPING = 'mapping'
+VALIDATION = 'validation'
+
+PENDING = 'pending'
+REPLAYED = 'replayed'
+
+
+class ErrorRateExceeded(Exception):
+    """
+    Raised when too many records of a run are dead-lettered to keep going.
+    """
+
+    def __init__(self, run_id: str, errors: int, records: int):
+        super().__init__(f"Run {run_id}: {errors} of {records} records failed, above the error budget")
+        self.run_id = run_id
+        self.errors = errors
+        self.records = records
+
+
+class DeadLetterStore:
+    """
+    Records that failed mapping or validation, backed by SQLite.
+
+    Each record is keyed by its run, entity, stage, source page and position
+    within the page, so a page that is extracted again after a crash or a
+    retry replaces its dead letters instead of duplicating them.
+    """
+
+    def __init__(self, path: str = 'dead_letters.db'):
+        """
+        Initialize the store, creating the table if needed.
+
+        Args:
+            path: SQLite database file (':memory:' for tests)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS dead_letters ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' run_id TEXT NOT NULL,'
+            ' entity TEXT NOT NULL,'
+            ' stage TEXT NOT NULL,'
+            ' page INTEGER NOT NULL,'
+            ' position INTEGER NOT NULL,'
+            ' record_id TEXT,'
+            ' error TEXT NOT NULL,'
+            ' payload BLOB NOT NULL,'
+            ' status TEXT NOT NULL,'
+            ' attempts INTEGER NOT NULL DEFAULT 0,'
+            ' created_at TEXT NOT NULL,'
+            ' updated_at TEXT NOT NULL,'
+            ' UNIQUE (run_id, entity, stage, page, position))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS dead_letters_status ON dead_letters (run_id, status, id)')
+
+    def add(self, letters: List[Dict[str, Any]]):
+        """
+        Store failed records.
+
+        Args:
+            letters: Dicts with run_id, entity, stage, page, position,
+                record_id, error and payload (the raw record, pickled)
+        """
+        if not letters:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [(letter['run_id'], letter['entity'], letter['stage'], letter['page'], letter['position'],
+                 letter.get('record_id'), letter['error'],
+                 pickle.dumps(letter['payload'], protocol=pickle.HIGHEST_PROTOCOL), PENDING, now, now)
+                for letter in letters]
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO dead_letters (run_id, entity, stage, page, position, record_id, error, payload, '
+                'status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (run_id, entity, stage, page, position) DO UPDATE SET '
+                'record_id = excluded.record_id, error = excluded.error, payload = excluded.payload, '
+                'updated_at = excluded.updated_at',
+                rows,
+            )
+
+    def list(self, run_id: Optional[str] = None, entity: Optional[str] = None, status: Optional[str] = PENDING,
+             ids: Optional[List[int]] = None, limit: int = 1000,
+             after_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        List dead letters in the order they were stored.
+
+        Args:
+            run_id: Optional run to filter by
+            entity: Optional entity to filter by
+            status: Status to filter by ('pending' by default, None for all)
+            ids: Optional dead letter ids
+            limit: Maximum number of dead letters
+            after_id: Optional id of the last dead letter of the previous page
+
+        Returns:
+            Dicts with id, run_id, entity, stage, page, position, record_id,
+            error, payload, status, attempts, created_at and updated_at
+        """
+        conditions, args = [], []
+        for column, value in (('run_id', run_id), ('entity', entity), ('status', status)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                args.append(value)
+        if ids is not None:
+            conditions.append(f"id IN ({', '.join('?' for _ in ids)})")
+            args.extend(ids)
+        if after_id is not None:
+            conditions.append('id > ?')
+            args.append(after_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, run_id, entity, stage, page, position, record_id, error, payload, status, attempts, '
+                f'created_at, updated_at FROM dead_letters {where} ORDER BY id LIMIT ?',
+                tuple(args) + (limit,),
+            ).fetchall()
+        return [{'id': row[0], 'run_id': row[1], 'entity': row[2], 'stage': row[3], 'page': row[4],
+                 'position': row[5], 'record_id': row[6], 'error': row[7], 'payload': pickle.loads(row[8]),
+                 'status': row[9], 'attempts': row[10], 'created_at': row[11], 'updated_at': row[12]}
+                for row in rows]
+
+    def counts(self, run_id: str) -> Dict[str, int]:
+        """
+        Count a run's dead letters by status.
+
+        Args:
+            run_id: Extraction run identifier
+
+        Returns:
+            Dict mapping status to count
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM dead_letters WHERE run_id = ? GROUP BY status',
+                                      (run_id,)).fetchall()
+        return dict(rows)
+
+    def mark_replayed(self, ids: List[int]):
+        """
+        Record that dead letters were replayed into the sink.
+
+        Args:
+            ids: Dead letter ids
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._conn.executemany('UPDATE dead_letters SET status = ?, attempts = attempts + 1, updated_at = ? '
+                                   'WHERE id = ?', [(REPLAYED, now, letter_id) for letter_id in ids])
+
+    def mark_failed(self, errors: Dict[int, str]):
+        """
+        Record that replaying dead letters failed again; they stay pending.
+
+        Args:
+            errors: Dict mapping dead letter id to the new error
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._conn.executemany('UPDATE dead_letters SET error = ?, attempts = attempts + 1, updated_at = ? '
+                                   'WHERE id = ?', [(error, now, letter_id) for letter_id, error in errors.items()])
+
+    def close(self):
+        """
+        Close the underlying database connection.
+        """
+        self._conn.close()
+
+
+class DeadLetterRouter:
+    """
+    Collects the failed records of one run and enforces its error budget.
+
+    Failed records are buffered until flush() and counted against the
+    records seen; once at least min_records were seen and more than
+    max_error_rate of them failed, check() raises ErrorRateExceeded so a
+    systematically broken extraction (e.g. a changed field type) stops
+    instead of dead-lettering the whole entity.
+    """
+
+    def __init__(self, store: DeadLetterStore, run_id: str, max_error_rate: float = 0.01,
+                 min_records: int = 1000, id_field: Optional[str] = None):
+        """
+        Initialize the router.
+
+        Args:
+            store: Dead letter store
+            run_id: Extraction run identifier
+            max_error_rate: Fraction of failed records tolerated
+            min_records: Records seen before the rate is enforced
+            id_field: Record id field stored with validation failures
+        """
+        self.store = store
+        self.run_id = run_id
+        self.max_error_rate = max_error_rate
+        self.min_records = min_records
+        self.id_field = id_field
+        self.records = 0
+        self.errors = 0
+        self._pending: List[Dict[str, Any]] = []
+
+    def _add(self, entity: str, stage: str, page: int, position: int, payload: Any, error: str):
+        record_id = payload.get(self.id_field) if self.id_field and isinstance(payload, dict) else None
+        self._pending.append({'run_id': self.run_id, 'entity': entity, 'stage': stage, 'page': page,
+                              'position': position, 'record_id': str(record_id) if record_id is not None else None,
+                              'error': error, 'payload': payload})
+        self.errors += 1
+        self.records += 1
+
+    def mapping_error(self, entity: str, page: int, position: int, payload: Any, error: str):
+        """
+        Route a record the connector couldn't map; usable as record_error_handler.
+
+        Args:
+            entity: Entity/table name
+            page: Source page
+            position: Position of the record in the page
+            payload: Raw record
+            error: Reason
+        """
+        self._add(entity, MAPPING, page, position, payload, error)
+
+    def validation_error(self, entity: str, page: int, position: int, record: Dict[str, Any], error: str):
+        """
+        Route a mapped record that doesn't fit the entity's schema.
+
+        Args:
+            entity: Entity/table name
+            page: Source page
+            position: Position of the record among the page's mapped rows
+            record: Flat row
+            error: Reason
+        """
+        # Mapped rows were already counted as seen
+        self.records -= 1
+        self._add(entity, VALIDATION, page, position, record, error)
+
+    def accepted(self, count: int):
+        """
+        Count records that passed mapping.
+
+        Args:
+            count: Number of records
+        """
+        self.records += count
+
+    def flush(self):
+        """
+        Persist the buffered dead letters.
+        """
+        self.store.add(self._pending)
+        if self._pending:
+            logger.warning(f"Run {self.run_id}: dead-lettered {len(self._pending)} records")
+        self._pending = []
+
+    def check(self):
+        """
+        Enforce the error budget.
+
+        Raises:
+            ErrorRateExceeded: If the error rate is above max_error_rate
+        """
+        if self.records >= self.min_records and self.errors > self.max_error_rate * self.records:
+            raise ErrorRateExceeded(self.run_id, self.errors, self.records)
+
+
+def replay_dead_letters(store: DeadLetterStore, connector: ERPConnector, sink: ParquetSink, run_id: str,
+                        entity: str, fields: Optional[List[str]] = None, ids: Optional[List[int]] = None,
+                        limit: int = 10000) -> Dict[str, int]:
+    """
+    Map and validate a run's pending dead letters again and write those that pass.
+
+    Run after fixing what made them fail, e.g. a schema refresh or a mapping
+    fix. Records that still fail stay pending with the new error.
+
+    The written files are named after the replayed dead letter ids (and dated
+    by when the first of them was stored), so if a replay dies between writing
+    and marking the letters, running it again replaces the same files instead
+    of writing the rows a second time.
+
+    Args:
+        store: Dead letter store
+        connector: Connector of the run's ERP account (only used for mapping and schema)
+        sink: Sink the run wrote to
+        run_id: Extraction run identifier
+        entity: Entity/table name
+        fields: Fields the run extracted
+        ids: Optional dead letter ids, all pending ones of the run by default
+        limit: Maximum number of dead letters replayed
+
+    Returns:
+        Dict with the number of records replayed and still failing
+    """
+    letters = store.list(run_id=run_id, entity=entity, ids=ids, limit=limit)
+    schema = arrow_schema(connector.get_schema(entity), fields)
+    rows, row_ids, errors = [], [], {}
+    for letter in letters:
+        try:
+            row = (connector.map_record(entity, letter['payload'], fields) if letter['stage'] == MAPPING
+                   else letter['payload'])
+        except Exception as e:
+            errors[letter['id']] = f"{type(e).__name__}: {str(e)}"
+            continue
+        rows.append(row)
+        row_ids.append(letter['id'])
+
+    def reject(index: int, reason: str):
+        errors[row_ids[index]] = reason
+
+    batch = records_to_batch(rows, schema, on_error=reject)
+    replayed = [letter_id for letter_id in row_ids if letter_id not in errors]
+    if batch.num_rows:
+        digest = hashlib.sha1(','.join(str(letter['id']) for letter in letters).encode()).hexdigest()[:12]
+        sink.write(entity, [batch], schema, run_id=f'{run_id}-replay-{digest}',
+                   partition_date=min(letter['created_at'] for letter in letters)[:10])
+    store.mark_replayed(replayed)
+    store.mark_failed(errors)
+    logger.info(f"Run {run_id}: replayed {len(replayed)} dead letters, {len(errors)} still failing")
+    return {'replayed': len(replayed), 'failed': len(errors)}
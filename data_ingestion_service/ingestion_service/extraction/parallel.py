@@ -0,0 +1,242 @@
+import logging
+import os
+import pickle
+import re
+import threading
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+from ..connectors.base import ERPConnector
+from ..connectors.factory import ERPConnectorFactory
+from .checkpoint import DONE, ChunkCheckpointStore
+from .chunking import Chunk
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkExtractionError(Exception):
+    """
+    Raised when chunks of a parallel run failed; the finished chunks stay checkpointed.
+    """
+
+    def __init__(self, run_id: str, errors: Dict[str, str]):
+        super().__init__(f"{len(errors)} chunks of run {run_id} failed: "
+                         + '; '.join(f"{key}: {error}" for key, error in errors.items()))
+        self.run_id = run_id
+        self.errors = errors
+
+
+class ConnectorSpec:
+    """
+    Picklable recipe for creating a connector inside a worker process.
+    """
+
+    def __init__(self, erp_type: str, config: Dict[str, Any]):
+        """
+        Initialize the spec.
+
+        Args:
+            erp_type: Type of ERP passed to ERPConnectorFactory
+            config: Connector configuration
+        """
+        self.erp_type = erp_type
+        self.config = config
+        # Travels with the pickled spec, so workers can reuse their connector across tasks
+        self.key = uuid.uuid4().hex
+
+    def __call__(self) -> ERPConnector:
+        return ERPConnectorFactory.create_connector(self.erp_type, self.config)
+
+
+_worker_state = threading.local()
+
+
+def _worker_connector(factory: Callable[[], ERPConnector]) -> ERPConnector:
+    """Get this worker's connector, connecting it on first use."""
+    connectors = getattr(_worker_state, 'connectors', None)
+    if connectors is None:
+        connectors = _worker_state.connectors = {}
+    # Specs are unpickled afresh for every task in process workers, so their
+    # identity can't be used as the key
+    key = getattr(factory, 'key', None) or id(factory)
+    connector = connectors.get(key)
+    if connector is None:
+        connector = factory()
+        if not connector.connect():
+            raise ConnectionError(f"Worker could not connect {type(connector).__name__}")
+        connectors[key] = connector
+    return connector
+
+
+def extract_chunk(factory: Callable[[], ERPConnector], chunk: Chunk, fields: Optional[List[str]],
+                  spool_path: str) -> int:
+    """
+    Extract one chunk and spool its rows, ordered, to a file.
+
+    Runs inside pool workers. Each worker thread or process keeps its own
+    connector, since SOAP clients are not safe to share between threads.
+
+    Args:
+        factory: Callable creating an unconnected connector
+        chunk: Chunk to extract
+        fields: Optional list of fields to retrieve
+        spool_path: File to write the chunk's rows to
+
+    Returns:
+        Number of rows extracted
+    """
+    connector = _worker_connector(factory)
+    if fields:
+        fields = list(dict.fromkeys([connector.id_field, chunk.field] + list(fields)))
+    rows = connector.get_data(chunk.entity, filters=chunk.filter, fields=fields)
+    rows.sort(key=lambda row: chunk.sort_key(row, connector.id_field))
+
+    # Pickle keeps datetimes and decimals intact; rename so a crash never
+    # leaves a partial spool file behind a done checkpoint
+    tmp_path = f'{spool_path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(rows, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, spool_path)
+    return len(rows)
+
+
+class ParallelExtractor:
+    """
+    Extracts the chunks of one entity concurrently and merges them in order.
+
+    Chunks run on a thread pool by default. Threads of one process share the
+    account's governor, which enforces the account's concurrency and rate
+    limits. Process workers each get their own governor, so the pool is
+    capped at max_concurrency instead.
+    """
+
+    def __init__(self, connector_factory: Callable[[], ERPConnector], checkpoints: ChunkCheckpointStore,
+                 spool_dir: str, workers: int = 4, use_processes: bool = False,
+                 max_concurrency: Optional[int] = None, id_field: str = 'internalId'):
+        """
+        Initialize the extractor.
+
+        Args:
+            connector_factory: Callable creating an unconnected connector; must be
+                picklable (e.g. a ConnectorSpec) when use_processes is set
+            checkpoints: Store for per-chunk progress
+            spool_dir: Directory for the spooled rows of finished chunks
+            workers: Pool size
+            use_processes: Run chunks in a process pool instead of a thread pool
+            max_concurrency: Account concurrency limit the pool size is capped at
+            id_field: Record id field used to drop duplicates when merging
+        """
+        self.connector_factory = connector_factory
+        self.checkpoints = checkpoints
+        self.spool_dir = spool_dir
+        self.workers = max(1, min(workers, max_concurrency) if max_concurrency else workers)
+        self.use_processes = use_processes
+        self.id_field = id_field
+
+    def _spool_path(self, run_id: str, chunk: Chunk) -> str:
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', f'{run_id}-{chunk.index:06d}')
+        return os.path.join(self.spool_dir, f'{name}.pkl')
+
+    def _executor(self) -> Executor:
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='chunk')
+
+    def run(self, run_id: str, chunks: List[Chunk], write_batch: Callable[[List[Dict[str, Any]]], None],
+            fields: Optional[List[str]] = None, batch_size: int = 1000) -> Dict[str, Any]:
+        """
+        Extract all chunks, then write their rows in order without duplicates.
+
+        Chunks already checkpointed as done for this run id are not extracted
+        again. Nothing is written unless every chunk succeeded, and the
+        spooled rows are deleted once they are.
+
+        Args:
+            run_id: Identifier of the run; reuse it to resume a failed run
+            chunks: Chunks from a plan
+            write_batch: Callable persisting a batch of merged rows
+            fields: Optional list of fields to retrieve
+            batch_size: Number of rows per write_batch call
+
+        Returns:
+            Dict with the number of chunks extracted and skipped, rows written
+            and duplicates dropped
+
+        Raises:
+            ChunkExtractionError: If any chunk failed
+        """
+        os.makedirs(self.spool_dir, exist_ok=True)
+        done = self.checkpoints.get_run(run_id)
+        pending = [chunk for chunk in chunks
+                   if done.get(chunk.key, {}).get('status') != DONE
+                   or not os.path.exists(done[chunk.key]['spool_path'])]
+        logger.info(f"Run {run_id}: extracting {len(pending)} of {len(chunks)} chunks "
+                    f"with {self.workers} workers")
+
+        errors = {}
+        if pending:
+            with self._executor() as executor:
+                futures = {executor.submit(extract_chunk, self.connector_factory, chunk, fields,
+                                           self._spool_path(run_id, chunk)): chunk
+                           for chunk in pending}
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    try:
+                        rows = future.result()
+                    except Exception as e:
+                        logger.error(f"Run {run_id}: chunk {chunk.key} failed: {str(e)}")
+                        self.checkpoints.mark_failed(run_id, chunk.key, str(e))
+                        errors[chunk.key] = str(e)
+                        continue
+                    self.checkpoints.mark_done(run_id, chunk.key, rows, self._spool_path(run_id, chunk))
+        if errors:
+            raise ChunkExtractionError(run_id, errors)
+
+        written, duplicates = self._merge(run_id, chunks, write_batch, batch_size)
+        for chunk in chunks:
+            try:
+                os.remove(self._spool_path(run_id, chunk))
+            except FileNotFoundError:
+                pass
+        logger.info(f"Run {run_id}: wrote {written} rows, dropped {duplicates} duplicates")
+        return {'chunks': len(pending), 'skipped': len(chunks) - len(pending),
+                'records': written, 'duplicates': duplicates}
+
+    def _merge(self, run_id: str, chunks: List[Chunk],
+               write_batch: Callable[[List[Dict[str, Any]]], None], batch_size: int):
+        """
+        Stream the spooled chunks in plan order, dropping rows already written.
+
+        Adjacent chunks only overlap on their shared boundary (date chunks
+        include both bounds), so each chunk is only checked against the ids of
+        the previous chunk's rows that also fall within it.
+        """
+        ordered = sorted(chunks, key=lambda c: c.index)
+        boundary = set()
+        batch = []
+        written = 0
+        duplicates = 0
+        for position, chunk in enumerate(ordered):
+            following = ordered[position + 1] if position + 1 < len(ordered) else None
+            with open(self._spool_path(run_id, chunk), 'rb') as f:
+                rows = pickle.load(f)
+            next_boundary = set()
+            for row in rows:
+                record_id = row.get(self.id_field)
+                if record_id is not None:
+                    if record_id in boundary:
+                        duplicates += 1
+                        continue
+                    if following is not None and following.filter.matches(row):
+                        next_boundary.add(record_id)
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    write_batch(batch)
+                    written += len(batch)
+                    batch = []
+            boundary = next_boundary
+        if batch:
+            write_batch(batch)
+            written += len(batch)
+        return written, duplicates
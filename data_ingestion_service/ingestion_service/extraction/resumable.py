@@ -0,0 +1,231 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..connectors.base import After, And, ERPConnector, Filter, Range, parse_filters
+from ..connectors.columnar import arrow_schema, records_to_batch
+from ..events.lifecycle import ExtractionEvents
+from ..sinks.parquet import ParquetSink
+from .checkpoint import DONE, ChunkCheckpointStore
+from .chunking import Chunk
+from .deadletter import DeadLetterRouter, DeadLetterStore
+
+logger = logging.getLogger(__name__)
+
+
+class ResumableExtractor:
+    """
+    Extracts an entity into a ParquetSink so that a crashed run resumes where it stopped.
+
+    Pages are buffered and written as one sink segment every
+    checkpoint_pages pages (or checkpoint_seconds). Only after a segment is
+    durable does the chunk's checkpoint move to its last page, so a resumed
+    run redoes at most one segment. Segment files are named after the run,
+    chunk and segment number, which makes the redo overwrite the segment
+    that was in flight instead of duplicating its rows.
+
+    Connectors whose searches return records in id order resume after the
+    last id written rather than at the next page number, since page
+    boundaries shift when records are created or deleted between the runs.
+    Other connectors resume at the next page.
+
+    With a dead letter store, records that fail mapping or don't fit the
+    schema are set aside with their reason, raw payload and source page
+    while the rest of the page is written, until the run's error rate goes
+    over max_error_rate.
+
+    With an event emitter, every checkpointed segment is announced as a
+    change event listing the files written.
+    """
+
+    def __init__(self, connector: ERPConnector, checkpoints: ChunkCheckpointStore, sink: ParquetSink,
+                 checkpoint_pages: int = 10, checkpoint_seconds: Optional[float] = None, page_size: int = 1000,
+                 dead_letters: Optional[DeadLetterStore] = None, max_error_rate: float = 0.01,
+                 min_records: int = 1000, events: Optional[ExtractionEvents] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the extractor.
+
+        Args:
+            connector: Connected ERP connector
+            checkpoints: Store for per-chunk progress
+            sink: Sink the rows are written to
+            checkpoint_pages: Pages per segment and checkpoint
+            checkpoint_seconds: Optional maximum seconds between checkpoints,
+                for slow pages
+            page_size: Rows per page for connectors without native pages
+            dead_letters: Optional store for records that fail mapping or
+                validation; without it they fail the run or become nulls
+            max_error_rate: Fraction of dead-lettered records tolerated
+            min_records: Records seen before the error rate is enforced
+            events: Optional emitter for segment events
+            clock: Monotonic clock, injectable for tests
+        """
+        self.connector = connector
+        self.checkpoints = checkpoints
+        self.sink = sink
+        self.checkpoint_pages = max(1, checkpoint_pages)
+        self.checkpoint_seconds = checkpoint_seconds
+        self.page_size = page_size
+        self.dead_letters = dead_letters
+        self.max_error_rate = max_error_rate
+        self.min_records = min_records
+        self.events = events
+        self.clock = clock
+        self._router: Optional[DeadLetterRouter] = None
+
+    @staticmethod
+    def segment_id(run_id: str, chunk: Chunk, segment: int) -> str:
+        """Deterministic file name part of a segment."""
+        return f'{run_id}-c{chunk.index:04d}-s{segment:05d}'
+
+    def run(self, run_id: str, entity: str, chunks: Optional[List[Chunk]] = None, filters: Optional[Any] = None,
+            fields: Optional[List[str]] = None,
+            should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        Extract an entity, or continue a previous run with the same id.
+
+        Args:
+            run_id: Identifier of the run; reuse it to resume
+            entity: Entity/table name
+            chunks: Optional chunks from a plan, the whole entity by default
+            filters: Optional filters applied to every chunk
+            fields: Optional list of fields to retrieve
+            should_stop: Optional callable checked between pages; when it
+                returns True the run checkpoints and stops early
+
+        Returns:
+            Dict with the chunks extracted and skipped, rows written, files
+            written, records dead-lettered and whether the run stopped early
+
+        Raises:
+            ErrorRateExceeded: If too many records were dead-lettered
+        """
+        if chunks is None:
+            chunks = [Chunk(entity, 'all', None, None, 0)]
+        schema = arrow_schema(self.connector.get_schema(entity), fields)
+        progress = self.checkpoints.get_progress(run_id)
+        result = {'chunks': 0, 'skipped': 0, 'records': 0, 'files': 0, 'dead_letters': 0, 'stopped': False}
+        if self.dead_letters is not None:
+            self._router = DeadLetterRouter(self.dead_letters, run_id, self.max_error_rate, self.min_records,
+                                            id_field=self.connector.id_field)
+            self.connector.record_error_handler = self._router.mapping_error
+        try:
+            self._run_chunks(run_id, chunks, progress, schema, filters, fields, should_stop, result)
+        finally:
+            if self._router is not None:
+                self.connector.record_error_handler = None
+                result['dead_letters'] = self._router.errors
+                self._router = None
+        logger.info(f"Run {run_id}: wrote {result['records']} {entity} rows in {result['files']} files, "
+                    f"skipped {result['skipped']} finished chunks")
+        return result
+
+    def _run_chunks(self, run_id: str, chunks: List[Chunk], progress: Dict[str, Dict[str, Any]], schema: Any,
+                    filters: Optional[Any], fields: Optional[List[str]],
+                    should_stop: Optional[Callable[[], bool]], result: Dict[str, Any]):
+        for chunk in sorted(chunks, key=lambda c: c.index):
+            state = progress.get(chunk.key)
+            if state is not None and state['status'] == DONE:
+                result['skipped'] += 1
+                continue
+            if state is not None:
+                logger.info(f"Run {run_id}: resuming chunk {chunk.key} after page {state['page']} "
+                            f"({state['rows']} rows written)")
+            if not self._run_chunk(run_id, chunk, state, schema, filters, fields, should_stop, result):
+                result['stopped'] = True
+                logger.info(f"Run {run_id}: stopped at chunk {chunk.key}, resume with the same run id")
+                break
+            result['chunks'] += 1
+
+    def _run_chunk(self, run_id: str, chunk: Chunk, state: Optional[Dict[str, Any]], schema: Any,
+                   filters: Optional[Any], fields: Optional[List[str]],
+                   should_stop: Optional[Callable[[], bool]], result: Dict[str, Any]) -> bool:
+        """Extract one chunk from its checkpoint; returns False if stopped early."""
+        if state is None:
+            state = {'page': 0, 'segment': 0, 'rows': 0, 'last_id': None,
+                     'partition_date': datetime.now(timezone.utc).date().isoformat()}
+            # Persisting the partition date up front keeps the output of a
+            # resumed run in the same partitions, even across midnight
+            self._save(run_id, chunk, state)
+        expr = parse_filters(filters)
+        bounds = chunk.filter if chunk.low is not None or chunk.high is not None else None
+        start_page, page_offset = state['page'] + 1, 0
+        if state['last_id'] is not None and self.connector.ordered_by_id:
+            bounds = self._resume_filter(chunk, bounds, state['last_id'])
+            # Pages of the narrowed search are numbered on from the checkpoint
+            start_page, page_offset = 1, state['page']
+        if bounds is not None:
+            expr = bounds if expr is None else And(bounds, expr)
+
+        pages = self.connector.stream_pages(chunk.entity, filters=expr, fields=fields,
+                                            start_page=start_page, page_size=self.page_size)
+        buffered: List[Tuple[int, List[Dict[str, Any]]]] = []
+        last_page = state['page']
+        started = self.clock()
+        for page_index, rows in pages:
+            page_index += page_offset
+            buffered.append((page_index, rows))
+            last_page = page_index
+            if self._router is not None:
+                self._router.accepted(len(rows))
+            due = len(buffered) >= self.checkpoint_pages or (
+                self.checkpoint_seconds is not None and self.clock() - started >= self.checkpoint_seconds)
+            stopping = should_stop is not None and should_stop()
+            if due or stopping:
+                self._flush(run_id, chunk, state, schema, buffered, last_page, result)
+                buffered, started = [], self.clock()
+            if stopping:
+                return False
+        self._flush(run_id, chunk, state, schema, buffered, last_page, result, done=True)
+        return True
+
+    def _resume_filter(self, chunk: Chunk, bounds: Optional[Filter], last_id: str) -> Filter:
+        """Restrict a chunk to the records after the last id written."""
+        id_field = self.connector.id_field
+        after = int(last_id) if last_id.isdigit() else last_id
+        if bounds is not None and chunk.field == id_field and isinstance(after, int):
+            # Searches take one criterion per field, so narrow the chunk's own id range
+            return Range(id_field, after + 1, chunk.high)
+        resume = After(id_field, after)
+        return resume if bounds is None else And(bounds, resume)
+
+    def _batch(self, entity: str, page: int, rows: List[Dict[str, Any]], schema: Any) -> Any:
+        if self._router is None:
+            return records_to_batch(rows, schema)
+        router = self._router
+        return records_to_batch(rows, schema, on_error=lambda position, reason: router.validation_error(
+            entity, page, position, rows[position], reason))
+
+    def _flush(self, run_id: str, chunk: Chunk, state: Dict[str, Any], schema: Any,
+               pages: List[Tuple[int, List[Dict[str, Any]]]], page: int, result: Dict[str, Any],
+               done: bool = False):
+        """Write buffered pages as the next segment, then move the checkpoint past them."""
+        batches = [self._batch(chunk.entity, page_index, rows, schema) for page_index, rows in pages if rows]
+        if self._router is not None:
+            # Dead letters are durable before the checkpoint passes their page
+            self._router.flush()
+            self._router.check()
+        rows = sum(batch.num_rows for batch in batches)
+        manifest = []
+        if rows:
+            manifest = self.sink.write(chunk.entity, batches, schema,
+                                       run_id=self.segment_id(run_id, chunk, state['segment']),
+                                       partition_date=state['partition_date'])
+            state['segment'] += 1
+            state['rows'] += rows
+            last_rows = next(page_rows for _, page_rows in reversed(pages) if page_rows)
+            last_id = last_rows[-1].get(self.connector.id_field) if self.connector.id_field else None
+            state['last_id'] = str(last_id) if last_id is not None else state['last_id']
+            result['records'] += rows
+            result['files'] += len(manifest)
+        state['page'] = page
+        self._save(run_id, chunk, state, done)
+        if manifest and self.events is not None:
+            self.events.segment_written(run_id, chunk.entity, chunk.key, state['segment'] - 1, rows, manifest,
+                                        state['partition_date'], last_id=state['last_id'])
+
+    def _save(self, run_id: str, chunk: Chunk, state: Dict[str, Any], done: bool = False):
+        self.checkpoints.save_progress(run_id, chunk.key, state['page'], state['segment'], state['rows'],
+                                       state['last_id'], state['partition_date'], done=done)
@@ -0,0 +1,190 @@
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from ..connectors.base import to_utc_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class WatermarkConflictError(Exception):
+    """
+    Raised when a watermark changed underneath an extraction run.
+    """
+    pass
+
+
+class Watermark:
+    """
+    High-watermark of an incremental extraction: the last-modified timestamp
+    and id of the last record that was durably written.
+    """
+
+    def __init__(self, modified_at: Any, record_id: Optional[str] = None):
+        """
+        Initialize the watermark.
+
+        Args:
+            modified_at: Last-modified timestamp (datetime or ISO-8601 string)
+            record_id: Id of the last record written at modified_at
+        """
+        self.modified_at = to_utc_datetime(modified_at)
+        self.record_id = str(record_id) if record_id is not None else None
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any], modified_field: str, id_field: str) -> 'Watermark':
+        """
+        Build the watermark that points at a record.
+
+        Args:
+            record: Extracted record
+            modified_field: Name of the record's last-modified field
+            id_field: Name of the record's id field
+
+        Returns:
+            A Watermark
+        """
+        return cls(record.get(modified_field), record.get(id_field))
+
+    def __eq__(self, other):
+        if not isinstance(other, Watermark):
+            return NotImplemented
+        return (self.modified_at, self.record_id) == (other.modified_at, other.record_id)
+
+    def __repr__(self):
+        modified_at = self.modified_at.isoformat() if self.modified_at else None
+        return f"<Watermark(modified_at={modified_at}, record_id={self.record_id})>"
+
+
+class WatermarkStore(ABC):
+    """
+    Abstract base class for persisted per (tenant, entity) watermarks.
+    """
+
+    @abstractmethod
+    def get(self, tenant_id: str, entity: str) -> Optional[Watermark]:
+        """
+        Get the current watermark.
+
+        Args:
+            tenant_id: Tenant identifier
+            entity: Entity/table name
+
+        Returns:
+            The stored Watermark, or None if the entity was never extracted
+        """
+        pass
+
+    @abstractmethod
+    def advance(self, tenant_id: str, entity: str, watermark: Watermark,
+                expected: Optional[Watermark] = None):
+        """
+        Atomically move the watermark forward.
+
+        Args:
+            tenant_id: Tenant identifier
+            entity: Entity/table name
+            watermark: New watermark
+            expected: Watermark the caller started from; the update is rejected
+                if the stored value is different
+
+        Raises:
+            WatermarkConflictError: If the stored watermark is not the expected one
+        """
+        pass
+
+    @abstractmethod
+    def reset(self, tenant_id: str, entity: str):
+        """
+        Forget the watermark so the next run does a full extraction.
+
+        Args:
+            tenant_id: Tenant identifier
+            entity: Entity/table name
+        """
+        pass
+
+
+class SQLiteWatermarkStore(WatermarkStore):
+    """
+    Watermark store backed by a local SQLite database.
+    """
+
+    def __init__(self, path: str = 'watermarks.db'):
+        """
+        Initialize the store, creating the table if needed.
+
+        Args:
+            path: SQLite database file (':memory:' for tests)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Autocommit mode, transactions are opened explicitly in advance()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS watermarks ('
+            ' tenant_id TEXT NOT NULL,'
+            ' entity TEXT NOT NULL,'
+            ' modified_at TEXT,'
+            ' record_id TEXT,'
+            ' updated_at TEXT NOT NULL,'
+            ' PRIMARY KEY (tenant_id, entity))'
+        )
+
+    @staticmethod
+    def _row_to_watermark(row) -> Optional[Watermark]:
+        if row is None:
+            return None
+        return Watermark(row[0], row[1])
+
+    def get(self, tenant_id: str, entity: str) -> Optional[Watermark]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT modified_at, record_id FROM watermarks WHERE tenant_id = ? AND entity = ?',
+                (tenant_id, entity),
+            ).fetchone()
+        return self._row_to_watermark(row)
+
+    def advance(self, tenant_id: str, entity: str, watermark: Watermark,
+                expected: Optional[Watermark] = None):
+        modified_at = watermark.modified_at.isoformat() if watermark.modified_at else None
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT modified_at, record_id FROM watermarks WHERE tenant_id = ? AND entity = ?',
+                    (tenant_id, entity),
+                ).fetchone()
+                current = self._row_to_watermark(row)
+                if current != expected:
+                    raise WatermarkConflictError(
+                        f"Watermark for {tenant_id}/{entity} is {current}, expected {expected}")
+
+                self._conn.execute(
+                    'INSERT INTO watermarks (tenant_id, entity, modified_at, record_id, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT (tenant_id, entity) DO UPDATE SET '
+                    'modified_at = excluded.modified_at, record_id = excluded.record_id, '
+                    'updated_at = excluded.updated_at',
+                    (tenant_id, entity, modified_at, watermark.record_id,
+                     datetime.now(timezone.utc).isoformat()),
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def reset(self, tenant_id: str, entity: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM watermarks WHERE tenant_id = ? AND entity = ?',
+                               (tenant_id, entity))
+
+    def close(self):
+        """
+        Close the underlying database connection.
+        """
+        self._conn.close()
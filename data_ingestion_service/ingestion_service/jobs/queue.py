@@ -0,0 +1,435 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+NIGHTLY = 'nightly'
+# Lower runs first
+PRIORITIES = {INTERACTIVE: 0, NIGHTLY: 10}
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Seconds a running job stays owned by its scheduler without a heartbeat
+DEFAULT_LEASE_SECONDS = 60.0
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a tenant already has too many queued jobs to accept another.
+    """
+
+
+class Job:
+    """
+    An extraction job: one entity of one ERP account, for one tenant.
+    """
+
+    def __init__(self, job_id: str, tenant_id: str, erp_type: str, account_id: str, entity: str,
+                 priority: str = NIGHTLY, params: Optional[Dict[str, Any]] = None, status: str = QUEUED,
+                 cancel_requested: bool = False, error: Optional[str] = None,
+                 result: Optional[Dict[str, Any]] = None, created_at: Optional[str] = None,
+                 started_at: Optional[str] = None, finished_at: Optional[str] = None):
+        """
+        Initialize the job.
+
+        Args:
+            job_id: Unique job identifier
+            tenant_id: Tenant the job runs for
+            erp_type: Type of ERP passed to ERPConnectorFactory
+            account_id: ERP account the job extracts from
+            entity: Entity/table to extract
+            priority: 'interactive' or 'nightly'
+            params: Extraction parameters (fields, filters, batch_size, ...)
+            status: 'queued', 'running', 'succeeded', 'failed' or 'cancelled'
+            cancel_requested: Whether a running job was asked to stop
+            error: Error message of a failed job
+            result: Result of a succeeded job (e.g. the sink manifest summary)
+            created_at: ISO timestamp of submission
+            started_at: ISO timestamp of the start
+            finished_at: ISO timestamp of the end
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unsupported priority: {priority}")
+        self.job_id = job_id
+        self.tenant_id = tenant_id
+        self.erp_type = erp_type
+        self.account_id = account_id
+        self.entity = entity
+        self.priority = priority
+        self.params = params or {}
+        self.status = status
+        self.cancel_requested = cancel_requested
+        self.error = error
+        self.result = result
+        self.created_at = created_at
+        self.started_at = started_at
+        self.finished_at = finished_at
+
+    @property
+    def account_key(self) -> str:
+        """Key of the ERP account, as used by AccountGovernor (e.g. 'netsuite:1234567')."""
+        return f'{self.erp_type}:{self.account_id}'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'tenant_id': self.tenant_id,
+            'erp_type': self.erp_type,
+            'account_id': self.account_id,
+            'entity': self.entity,
+            'priority': self.priority,
+            'params': self.params,
+            'status': self.status,
+            'cancel_requested': self.cancel_requested,
+            'error': self.error,
+            'result': self.result,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+    def __repr__(self):
+        return f"Job({self.job_id!r}, {self.tenant_id!r}, {self.account_key!r}, {self.entity!r}, {self.status!r})"
+
+
+class JobQueue(ABC):
+    """
+    Persistent queue of extraction jobs.
+
+    Jobs move queued -> running -> succeeded/failed/cancelled. claim() is
+    atomic and leases the job to the claiming scheduler, which renews the
+    lease with heartbeat(); only jobs whose lease ran out (their scheduler
+    died) are requeued. Several schedulers can therefore share one queue
+    without running a job twice.
+    """
+
+    @abstractmethod
+    def submit(self, job: Job) -> Job:
+        """
+        Add a job to the queue.
+
+        Args:
+            job: Job to enqueue
+
+        Returns:
+            The stored job, with created_at set
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Get a job by id.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            The job, or None if unknown
+        """
+
+    @abstractmethod
+    def list(self, tenant_id: Optional[str] = None, status: Optional[str] = None,
+             limit: int = 100, after: Optional[str] = None) -> List[Job]:
+        """
+        List jobs, most recently submitted first.
+
+        Args:
+            tenant_id: Optional tenant to filter by
+            status: Optional status to filter by
+            limit: Maximum number of jobs
+            after: Optional id of the last job of the previous page; only
+                jobs submitted before it are listed
+
+        Returns:
+            List of jobs
+        """
+
+    @abstractmethod
+    def queued(self) -> List[Job]:
+        """
+        Get the jobs waiting to run, by priority and then submission order.
+
+        Returns:
+            List of queued jobs
+        """
+
+    @abstractmethod
+    def running(self) -> List[Job]:
+        """
+        Get the jobs currently running.
+
+        Returns:
+            List of running jobs
+        """
+
+    @abstractmethod
+    def claim(self, job_id: str, owner: Optional[str] = None,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """
+        Move a queued job to running, leased to owner.
+
+        Args:
+            job_id: Job identifier
+            owner: Identifier of the claiming scheduler
+            lease_seconds: Seconds until the lease runs out unless renewed
+
+        Returns:
+            True if this caller claimed the job, False if it is no longer queued
+        """
+
+    @abstractmethod
+    def heartbeat(self, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[str]:
+        """
+        Renew the leases of the jobs owner is running.
+
+        Args:
+            owner: Identifier of the scheduler
+            lease_seconds: Seconds until the leases run out unless renewed
+
+        Returns:
+            Ids of owner's jobs whose cancellation was requested, possibly
+            through another process
+        """
+
+    @abstractmethod
+    def finish(self, job_id: str, status: str, error: Optional[str] = None,
+               result: Optional[Dict[str, Any]] = None, owner: Optional[str] = None) -> bool:
+        """
+        Record the outcome of a running job.
+
+        Args:
+            job_id: Job identifier
+            status: 'succeeded', 'failed' or 'cancelled'
+            error: Error message of a failed job
+            result: Result of a succeeded job
+            owner: If given, only record it while the job is still leased to owner
+
+        Returns:
+            False if owner had lost the job (its lease ran out and it was requeued)
+        """
+
+    @abstractmethod
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job: queued jobs are cancelled at once, running jobs are asked to stop.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            The updated job, or None if unknown
+        """
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        """
+        Put running jobs whose lease ran out (their scheduler crashed) back in the queue.
+
+        Returns:
+            Number of requeued jobs
+        """
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Job queue backed by a local SQLite database.
+    """
+
+    _COLUMNS = ('job_id, tenant_id, erp_type, account_id, entity, priority, params, status, cancel_requested, '
+                'error, result, created_at, started_at, finished_at')
+
+    def __init__(self, path: str = 'jobs.db', clock: Callable[[], float] = time.time):
+        """
+        Initialize the queue, creating the table if needed.
+
+        Args:
+            path: SQLite database file (':memory:' for tests)
+            clock: Wall clock for leases, shared by every process using the file
+        """
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' seq INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' job_id TEXT NOT NULL UNIQUE,'
+            ' tenant_id TEXT NOT NULL,'
+            ' erp_type TEXT NOT NULL,'
+            ' account_id TEXT NOT NULL,'
+            ' entity TEXT NOT NULL,'
+            ' priority TEXT NOT NULL,'
+            ' rank INTEGER NOT NULL,'
+            ' params TEXT NOT NULL,'
+            ' status TEXT NOT NULL,'
+            ' cancel_requested INTEGER NOT NULL DEFAULT 0,'
+            ' error TEXT,'
+            ' result TEXT,'
+            ' created_at TEXT NOT NULL,'
+            ' started_at TEXT,'
+            ' finished_at TEXT,'
+            ' owner TEXT,'
+            ' lease_expires_at REAL)'
+        )
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(jobs)')}
+        for column, column_type in (('owner', 'TEXT'), ('lease_expires_at', 'REAL')):
+            if column not in columns:
+                # Queues created before leases existed
+                self._conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} {column_type}')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_status_rank ON jobs (status, rank, seq)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_tenant ON jobs (tenant_id, seq)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, seq)')
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    @staticmethod
+    def _row_to_job(row) -> Job:
+        return Job(row[0], row[1], row[2], row[3], row[4], priority=row[5], params=json.loads(row[6]),
+                   status=row[7], cancel_requested=bool(row[8]), error=row[9],
+                   result=json.loads(row[10]) if row[10] is not None else None,
+                   created_at=row[11], started_at=row[12], finished_at=row[13])
+
+    def _select(self, where: str = '', args: tuple = (), order: str = 'seq', limit: Optional[int] = None) -> List[Job]:
+        query = f'SELECT {self._COLUMNS} FROM jobs {where} ORDER BY {order}'
+        if limit is not None:
+            query += f' LIMIT {int(limit)}'
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def submit(self, job: Job) -> Job:
+        job.job_id = job.job_id or uuid.uuid4().hex
+        job.status = QUEUED
+        job.created_at = self._now()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO jobs (job_id, tenant_id, erp_type, account_id, entity, priority, rank, params, '
+                'status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job.job_id, job.tenant_id, job.erp_type, job.account_id, job.entity, job.priority,
+                 PRIORITIES[job.priority], json.dumps(job.params), QUEUED, job.created_at),
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        jobs = self._select('WHERE job_id = ?', (job_id,))
+        return jobs[0] if jobs else None
+
+    def list(self, tenant_id: Optional[str] = None, status: Optional[str] = None,
+             limit: int = 100, after: Optional[str] = None) -> List[Job]:
+        conditions, args = [], []
+        if tenant_id is not None:
+            conditions.append('tenant_id = ?')
+            args.append(tenant_id)
+        if status is not None:
+            conditions.append('status = ?')
+            args.append(status)
+        if after is not None:
+            # Keyset pagination: seeks by seq instead of skipping earlier pages
+            conditions.append('seq < (SELECT seq FROM jobs WHERE job_id = ?)')
+            args.append(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self._select(where, tuple(args), order='seq DESC', limit=limit)
+
+    def queued(self) -> List[Job]:
+        return self._select('WHERE status = ?', (QUEUED,), order='rank, seq')
+
+    def running(self) -> List[Job]:
+        return self._select('WHERE status = ?', (RUNNING,))
+
+    def claim(self, job_id: str, owner: Optional[str] = None,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE jobs SET status = ?, started_at = ?, owner = ?, lease_expires_at = ? '
+                'WHERE job_id = ? AND status = ?',
+                (RUNNING, self._now(), owner, self._clock() + lease_seconds, job_id, QUEUED),
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[str]:
+        with self._lock:
+            self._conn.execute('UPDATE jobs SET lease_expires_at = ? WHERE status = ? AND owner = ?',
+                               (self._clock() + lease_seconds, RUNNING, owner))
+            rows = self._conn.execute(
+                'SELECT job_id FROM jobs WHERE status = ? AND owner = ? AND cancel_requested = 1',
+                (RUNNING, owner),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None,
+               result: Optional[Dict[str, Any]] = None, owner: Optional[str] = None) -> bool:
+        if status not in FINISHED:
+            raise ValueError(f"Not a final job status: {status}")
+        query = 'UPDATE jobs SET status = ?, error = ?, result = ?, finished_at = ?, lease_expires_at = NULL ' \
+                'WHERE job_id = ?'
+        args = (status, error, json.dumps(result) if result is not None else None, self._now(), job_id)
+        if owner is not None:
+            query += ' AND status = ? AND owner = ?'
+            args += (RUNNING, owner)
+        with self._lock:
+            cursor = self._conn.execute(query, args)
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute(
+                    'UPDATE jobs SET status = ?, finished_at = ? WHERE job_id = ? AND status = ?',
+                    (CANCELLED, self._now(), job_id, QUEUED),
+                )
+                self._conn.execute('UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? AND status = ?',
+                                   (job_id, RUNNING))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return self.get(job_id)
+
+    def requeue_expired(self) -> int:
+        # Jobs without a lease were claimed before leases existed
+        expired = 'status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)'
+        now = self._clock()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Jobs whose cancellation was already requested are not restarted
+                self._conn.execute(
+                    f'UPDATE jobs SET status = ?, finished_at = ?, lease_expires_at = NULL '
+                    f'WHERE {expired} AND cancel_requested = 1',
+                    (CANCELLED, self._now(), RUNNING, now),
+                )
+                cursor = self._conn.execute(
+                    f'UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, lease_expires_at = NULL '
+                    f'WHERE {expired}',
+                    (QUEUED, RUNNING, now),
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        if cursor.rowcount:
+            logger.warning(f"Requeued {cursor.rowcount} jobs whose scheduler stopped renewing their lease")
+        return cursor.rowcount
+
+    def close(self):
+        """
+        Close the underlying database connection.
+        """
+        self._conn.close()
@@ -0,0 +1,129 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ..connectors.base import ERPConnector
+from ..connectors.columnar import arrow_schema
+from ..events.lifecycle import ExtractionEvents
+from ..extraction.checkpoint import ChunkCheckpointStore
+from ..extraction.deadletter import DeadLetterStore, replay_dead_letters
+from ..extraction.resumable import ResumableExtractor
+from ..metadata.repository import MetadataRepository
+from ..sinks.parquet import ParquetSink
+from .queue import Job
+from .scheduler import JobCancelled
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionJobRunner:
+    """
+    Runs an extraction job: streams the entity from its connector into a ParquetSink.
+
+    Cancellation is checked between batches, so a cancelled job stops after
+    the batch in flight and its partially written files are discarded.
+
+    With a checkpoint store the job runs as a ResumableExtractor run keyed
+    by the job id: a job requeued after a crash or eviction continues from
+    its last checkpoint, and a cancelled job keeps the segments it wrote.
+    A dead letter store additionally sets bad records aside instead of
+    failing the job, up to max_error_rate.
+    """
+
+    def __init__(self, connector_factory: Callable[[Job], ERPConnector],
+                 sink_factory: Callable[[Job], ParquetSink], batch_size: int = 10000,
+                 checkpoints: Optional[ChunkCheckpointStore] = None, checkpoint_pages: int = 10,
+                 dead_letters: Optional[DeadLetterStore] = None, max_error_rate: float = 0.01,
+                 events: Optional[ExtractionEvents] = None, metadata: Optional[MetadataRepository] = None):
+        """
+        Initialize the runner.
+
+        Args:
+            connector_factory: Creates the (not yet connected) connector of a job's ERP account
+            sink_factory: Creates the sink of a job's tenant
+            batch_size: Default rows per batch
+            checkpoints: Optional store making runs resumable
+            checkpoint_pages: Pages between checkpoints of resumable runs
+            dead_letters: Optional dead letter store for resumable runs
+            max_error_rate: Fraction of dead-lettered records tolerated per job
+            events: Optional emitter for the segment events of resumable runs
+            metadata: Optional repository the extracted entity's schema is saved to
+        """
+        self.connector_factory = connector_factory
+        self.sink_factory = sink_factory
+        self.batch_size = batch_size
+        self.checkpoints = checkpoints
+        self.checkpoint_pages = checkpoint_pages
+        self.dead_letters = dead_letters
+        self.max_error_rate = max_error_rate
+        self.events = events
+        self.metadata = metadata
+
+    @staticmethod
+    def _until_cancelled(batches: Iterator[Any], cancelled: threading.Event) -> Iterator[Any]:
+        for batch in batches:
+            if cancelled.is_set():
+                raise JobCancelled()
+            yield batch
+
+    def __call__(self, job: Job, cancelled: threading.Event) -> Optional[Dict[str, Any]]:
+        connector = self.connector_factory(job)
+        if not connector.connect():
+            raise ConnectionError(f"Could not connect to {job.account_key}")
+        try:
+            if self.metadata is not None:
+                self._save_schema(job, connector)
+            fields = job.params.get('fields')
+            if self.checkpoints is not None:
+                return self._run_resumable(job, connector, fields, cancelled)
+            schema = arrow_schema(connector.get_schema(job.entity), fields)
+            batches = connector.iter_batches(job.entity, filters=job.params.get('filters'), fields=fields,
+                                             batch_size=job.params.get('batch_size', self.batch_size))
+            manifest = self.sink_factory(job).write(job.entity, self._until_cancelled(batches, cancelled),
+                                                    schema, run_id=job.job_id[:12])
+        finally:
+            connector.disconnect()
+        return {'files': len(manifest), 'rows': sum(part['rows'] for part in manifest)}
+
+    def _save_schema(self, job: Job, connector: ERPConnector):
+        try:
+            self.metadata.save_schema(job.tenant_id, job.erp_type, job.account_id, job.entity,
+                                      connector.get_schema(job.entity))
+        except Exception as e:
+            # Stale metadata shouldn't stop the extraction itself
+            logger.warning(f"Could not save the {job.entity} schema of job {job.job_id}: {str(e)}")
+
+    def _run_resumable(self, job: Job, connector: ERPConnector, fields: Optional[List[str]],
+                       cancelled: threading.Event) -> Dict[str, Any]:
+        extractor = ResumableExtractor(connector, self.checkpoints, self.sink_factory(job),
+                                       checkpoint_pages=self.checkpoint_pages,
+                                       page_size=job.params.get('batch_size', self.batch_size),
+                                       dead_letters=self.dead_letters, max_error_rate=self.max_error_rate,
+                                       events=self.events)
+        result = extractor.run(job.job_id, job.entity, filters=job.params.get('filters'), fields=fields,
+                               should_stop=cancelled.is_set)
+        if result['stopped']:
+            raise JobCancelled()
+        return {'files': result['files'], 'rows': result['records'], 'dead_letters': result['dead_letters']}
+
+    def replay(self, job: Job, ids: Optional[List[int]] = None) -> Dict[str, int]:
+        """
+        Replay a job's pending dead letters into its sink.
+
+        Args:
+            job: Job whose run dead-lettered the records
+            ids: Optional dead letter ids, all pending ones by default
+
+        Returns:
+            Dict with the number of records replayed and still failing
+        """
+        if self.dead_letters is None:
+            raise ValueError("No dead letter store configured")
+        connector = self.connector_factory(job)
+        if not connector.connect():
+            raise ConnectionError(f"Could not connect to {job.account_key}")
+        try:
+            return replay_dead_letters(self.dead_letters, connector, self.sink_factory(job), job.job_id,
+                                       job.entity, fields=job.params.get('fields'), ids=ids)
+        finally:
+            connector.disconnect()
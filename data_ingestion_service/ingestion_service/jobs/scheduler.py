@@ -0,0 +1,314 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from ..events.lifecycle import JOB_STARTED, ExtractionEvents
+from .queue import (CANCELLED, DEFAULT_LEASE_SECONDS, FAILED, INTERACTIVE, PRIORITIES, QUEUED, SUCCEEDED, Job,
+                    JobQueue, QueueFullError)
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """
+    Raised by a job runner that stopped because the job was cancelled.
+    """
+
+
+class Backpressure:
+    """
+    Holds back new work while a downstream sink falls behind.
+
+    probe() returns the current backlog (e.g. bytes or files waiting to be
+    uploaded). Dispatch pauses once it reaches high_watermark and resumes only
+    when it drains below low_watermark, so the scheduler doesn't flap around
+    a single threshold.
+    """
+
+    def __init__(self, probe: Callable[[], float], high_watermark: float, low_watermark: Optional[float] = None):
+        """
+        Initialize the gate.
+
+        Args:
+            probe: Callable returning the sink backlog
+            high_watermark: Backlog at which dispatch pauses
+            low_watermark: Backlog below which dispatch resumes, half the high
+                watermark by default
+        """
+        self.probe = probe
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark if low_watermark is not None else high_watermark / 2
+        self.engaged = False
+
+    def blocked(self) -> bool:
+        """
+        Check whether new work should wait.
+
+        Returns:
+            True while the backlog is above the watermarks
+        """
+        backlog = self.probe()
+        if self.engaged and backlog < self.low_watermark:
+            self.engaged = False
+            logger.info(f"Sink backlog drained to {backlog}, resuming dispatch")
+        elif not self.engaged and backlog >= self.high_watermark:
+            self.engaged = True
+            logger.warning(f"Sink backlog at {backlog}, pausing dispatch of batch jobs")
+        return self.engaged
+
+
+class JobScheduler:
+    """
+    Dispatches queued jobs to a worker pool with fair share across tenants.
+
+    Each time a worker is free the scheduler picks, among the queued jobs
+    whose ERP account is below its concurrency limit:
+
+    1. the most urgent priority class (interactive before nightly),
+    2. the tenant with the fewest running jobs relative to its share,
+    3. the tenant served least recently,
+    4. that tenant's oldest job.
+
+    A tenant with a large backfill therefore gets one worker in turn with
+    every other tenant rather than all of them, and jobs stuck behind a busy
+    ERP account don't block jobs of other accounts. While the backpressure
+    gate is engaged only interactive jobs are started, and submit() refuses
+    work beyond max_queued_per_tenant.
+
+    Claimed jobs are leased to this scheduler and the lease is renewed on
+    every poll. The same heartbeat picks up cancellations requested through
+    any process sharing the queue and requeues jobs of schedulers that
+    stopped renewing their leases.
+    """
+
+    def __init__(self, queue: JobQueue, runner: Callable[[Job, threading.Event], Optional[Dict[str, Any]]],
+                 max_workers: int = 4, max_jobs_per_account: int = 2,
+                 tenant_shares: Optional[Dict[str, float]] = None, max_queued_per_tenant: Optional[int] = None,
+                 backpressure: Optional[Backpressure] = None, poll_interval: float = 1.0,
+                 events: Optional[ExtractionEvents] = None, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """
+        Initialize the scheduler.
+
+        Args:
+            queue: Job queue to dispatch from
+            runner: Callable running a job; gets the job and an Event set when
+                the job is cancelled, returns an optional result dict and
+                raises JobCancelled if it stopped early
+            max_workers: Jobs running at once in this process
+            max_jobs_per_account: Jobs running at once against one ERP account
+                (NetSuite limits concurrent requests per account)
+            tenant_shares: Optional relative weights per tenant (default 1.0)
+            max_queued_per_tenant: Optional cap on queued jobs per tenant
+            backpressure: Optional sink backpressure gate
+            poll_interval: Seconds between queue polls of the background loop
+            events: Optional emitter for job lifecycle events
+            lease_seconds: Seconds a running job stays leased without a
+                heartbeat; must be well above poll_interval
+        """
+        self.queue = queue
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_jobs_per_account = max_jobs_per_account
+        self.tenant_shares = tenant_shares or {}
+        self.max_queued_per_tenant = max_queued_per_tenant
+        self.backpressure = backpressure
+        self.poll_interval = poll_interval
+        self.events = events
+        self.lease_seconds = lease_seconds
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._active: Dict[str, threading.Event] = {}
+        self._last_served: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def submit(self, job: Job) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            job: Job to run
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If the tenant already has max_queued_per_tenant jobs queued
+        """
+        if self.max_queued_per_tenant is not None:
+            queued = self.queue.list(tenant_id=job.tenant_id, status=QUEUED, limit=self.max_queued_per_tenant)
+            if len(queued) >= self.max_queued_per_tenant:
+                raise QueueFullError(f"Tenant {job.tenant_id} already has {len(queued)} queued jobs")
+        job = self.queue.submit(job)
+        logger.info(f"Queued {job.priority} job {job.job_id}: {job.entity} of {job.account_key} "
+                    f"for tenant {job.tenant_id}")
+        if self.events is not None:
+            self.events.job(job)
+        self._wakeup.set()
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued job, or signal a running one to stop.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            The updated job, or None if unknown
+        """
+        job = self.queue.cancel(job_id)
+        with self._lock:
+            event = self._active.get(job_id)
+        if event is not None:
+            event.set()
+        if job is not None and job.status == CANCELLED:
+            self._job_event(job.job_id)
+        return job
+
+    def select(self, queued: List[Job], running: List[Job]) -> Optional[Job]:
+        """
+        Pick the next job to start.
+
+        Args:
+            queued: Queued jobs, by priority and submission order
+            running: Running jobs, across all schedulers sharing the queue
+
+        Returns:
+            The job to start, or None if every queued job has to wait
+        """
+        per_account = Counter(job.account_key for job in running)
+        per_tenant = Counter(job.tenant_id for job in running)
+        blocked = self.backpressure is not None and self.backpressure.blocked()
+
+        best, best_key = None, None
+        for job in queued:
+            if per_account[job.account_key] >= self.max_jobs_per_account:
+                continue
+            if blocked and job.priority != INTERACTIVE:
+                continue
+            share = self.tenant_shares.get(job.tenant_id, 1.0)
+            # queued is in submission order, so the first job per key is the oldest
+            key = (PRIORITIES[job.priority], per_tenant[job.tenant_id] / share,
+                   self._last_served.get(job.tenant_id, 0.0))
+            if best_key is None or key < best_key:
+                best, best_key = job, key
+        return best
+
+    def dispatch(self) -> List[Job]:
+        """
+        Start queued jobs until workers, accounts or the queue run out.
+
+        Returns:
+            The jobs started
+        """
+        started = []
+        while True:
+            with self._lock:
+                if len(self._active) >= self.max_workers:
+                    break
+            job = self.select(self.queue.queued(), self.queue.running())
+            if job is None:
+                break
+            if not self.queue.claim(job.job_id, self.owner, self.lease_seconds):
+                # Another scheduler sharing the queue got it first
+                continue
+            event = threading.Event()
+            with self._lock:
+                self._active[job.job_id] = event
+                self._last_served[job.tenant_id] = time.monotonic()
+            self._executor.submit(self._run, job, event)
+            started.append(job)
+        return started
+
+    def heartbeat(self) -> int:
+        """
+        Renew the leases of this scheduler's running jobs, stop those whose
+        cancellation was requested elsewhere and requeue jobs whose scheduler
+        died.
+
+        Returns:
+            Number of requeued jobs
+        """
+        for job_id in self.queue.heartbeat(self.owner, self.lease_seconds):
+            with self._lock:
+                event = self._active.get(job_id)
+            if event is not None and not event.is_set():
+                logger.info(f"Cancellation of job {job_id} requested, stopping it")
+                event.set()
+        return self.queue.requeue_expired()
+
+    def _finish(self, job: Job, status: str, **kwargs):
+        if not self.queue.finish(job.job_id, status, owner=self.owner, **kwargs):
+            logger.warning(f"Lease of job {job.job_id} expired while it ran, its {status} outcome is dropped")
+
+    def _job_event(self, job_id: str, event_type: Optional[str] = None):
+        if self.events is None:
+            return
+        job = self.queue.get(job_id)
+        if job is not None:
+            self.events.job(job, event_type)
+
+    def _run(self, job: Job, cancelled: threading.Event):
+        logger.info(f"Starting job {job.job_id}: {job.entity} of {job.account_key} for tenant {job.tenant_id}")
+        self._job_event(job.job_id, JOB_STARTED)
+        try:
+            result = self.runner(job, cancelled)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+            logger.info(f"Cancelled job {job.job_id}")
+        except Exception as e:
+            self._finish(job, FAILED, error=str(e))
+            logger.error(f"Job {job.job_id} failed: {str(e)}")
+        else:
+            self._finish(job, SUCCEEDED, result=result)
+            logger.info(f"Finished job {job.job_id}")
+        finally:
+            self._job_event(job.job_id)
+            with self._lock:
+                self._active.pop(job.job_id, None)
+            self._wakeup.set()
+
+    def _loop(self):
+        while not self._stopping:
+            try:
+                self.heartbeat()
+                self.dispatch()
+            except Exception as e:
+                logger.error(f"Job dispatch failed: {str(e)}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def start(self):
+        """
+        Requeue jobs orphaned by a dead scheduler and start dispatching in the background.
+        """
+        if self._thread is not None:
+            return
+        self.heartbeat()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._loop, name='job-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """
+        Stop dispatching; running jobs finish unless cancelled.
+
+        Args:
+            wait: Wait for running jobs to finish
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=wait)
@@ -1,13 +1,129 @@
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 import os
 from datetime import datetime
 from .middleware.auth import AuthValidator
+from .connectors.factory import ERPConnectorFactory
+from .events.lifecycle import ExtractionEvents
+from .events.producer import EventHubProducer
+from .events.publisher import EventPublisher
+from .extraction.checkpoint import ChunkCheckpointStore
+from .extraction.deadletter import PENDING, DeadLetterStore
+from .jobs.queue import NIGHTLY, PRIORITIES, Job, QueueFullError, SQLiteJobQueue
+from .jobs.runner import ExtractionJobRunner
+from .jobs.scheduler import JobScheduler
+from .metadata.repository import MetadataRepository
+from .pagination import MAX_PAGE_SIZE, ORJSONResponse, decode_cursor, page_response
+from .sinks.azure_blob import AzureBlobBackend
+from .sinks.local import LocalFileSystemBackend
+from .sinks.parquet import ParquetSink
+
+_scheduler: Optional[JobScheduler] = None
+_publisher: Optional[EventPublisher] = None
+_metadata: Optional[MetadataRepository] = None
+
+def _connector_config(job: Job) -> Dict[str, Any]:
+    # Credentials should come from Key Vault per tenant in production
+    prefix = job.erp_type.upper()
+    return {
+        "account_id": job.account_id,
+        "api_version": os.getenv(f"{prefix}_API_VERSION", "2020_1"),
+        "oauth": {
+            "account_id": job.account_id,
+            "consumer_key": os.getenv(f"{prefix}_CONSUMER_KEY"),
+            "consumer_secret": os.getenv(f"{prefix}_CONSUMER_SECRET"),
+            "token_id": os.getenv(f"{prefix}_TOKEN_ID"),
+            "token_secret": os.getenv(f"{prefix}_TOKEN_SECRET")
+        }
+    }
+
+def _storage_backend():
+    connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+    if connection_string:
+        return AzureBlobBackend.from_connection_string(connection_string, os.getenv("INGESTION_CONTAINER", "ingestion"))
+    return LocalFileSystemBackend(os.getenv("INGESTION_DATA_DIR", "data"))
+
+def _event_publisher() -> Optional[EventPublisher]:
+    global _publisher
+    connection_string = os.getenv("EVENTHUB_CONNECTION_STRING")
+    if _publisher is None and connection_string:
+        _publisher = EventPublisher(EventHubProducer(connection_string), os.getenv("EVENTHUB_NAME", "ingestion-events"),
+                                    linger_seconds=float(os.getenv("EVENTS_LINGER_SECONDS", "1.0")),
+                                    compression=os.getenv("EVENTS_COMPRESSION", "gzip"),
+                                    spill_dir=os.getenv("EVENTS_SPILL_DIR", "event_spill"))
+    return _publisher
+
+def get_metadata_repository() -> MetadataRepository:
+    global _metadata
+    if _metadata is None:
+        _metadata = MetadataRepository.from_url(os.getenv("METADATA_DATABASE_URL", "sqlite:///metadata.db"))
+        _metadata.create_all()
+    return _metadata
+
+def get_scheduler() -> JobScheduler:
+    global _scheduler
+    if _scheduler is None:
+        backend = _storage_backend()
+        publisher = _event_publisher()
+        events = ExtractionEvents(publisher) if publisher is not None else None
+        runner = ExtractionJobRunner(
+            lambda job: ERPConnectorFactory.create_connector(job.erp_type, _connector_config(job)),
+            lambda job: ParquetSink(backend, job.tenant_id),
+            checkpoints=ChunkCheckpointStore(os.getenv("CHECKPOINTS_DB_PATH", "checkpoints.db")),
+            checkpoint_pages=int(os.getenv("CHECKPOINT_PAGES", "10")),
+            dead_letters=DeadLetterStore(os.getenv("DEAD_LETTERS_DB_PATH", "dead_letters.db")),
+            max_error_rate=float(os.getenv("MAX_ERROR_RATE", "0.01")),
+            events=events,
+            metadata=get_metadata_repository())
+        max_queued = os.getenv("JOB_MAX_QUEUED_PER_TENANT")
+        _scheduler = JobScheduler(SQLiteJobQueue(os.getenv("JOBS_DB_PATH", "jobs.db")), runner,
+                                  max_workers=int(os.getenv("JOB_WORKERS", "4")),
+                                  max_jobs_per_account=int(os.getenv("JOB_MAX_PER_ACCOUNT", "2")),
+                                  max_queued_per_tenant=int(max_queued) if max_queued else None,
+                                  events=events)
+    return _scheduler
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler = get_scheduler()
+    publisher = _event_publisher()
+    if publisher is not None:
+        publisher.start()
+    scheduler.start()
+    yield
+    scheduler.stop()
+    if publisher is not None:
+        publisher.close()
 
 app = FastAPI(title="Data Ingestion Service",
               description="Service for connecting to data sources, extracting data, profiling it, and storing metadata",
-              version="0.1.0")
+              version="0.1.0",
+              lifespan=lifespan,
+              default_response_class=ORJSONResponse)
 auth_validator = AuthValidator()
 
+class JobRequest(BaseModel):
+    tenant_id: str
+    erp_type: str = "netsuite"
+    account_id: str
+    entity: str
+    priority: str = Field(NIGHTLY, description="'interactive' or 'nightly'")
+    fields: Optional[List[str]] = None
+    filters: Optional[Dict[str, Any]] = None
+    batch_size: Optional[int] = None
+
+class ReplayRequest(BaseModel):
+    ids: Optional[List[int]] = None
+
+def _get_job_or_404(scheduler: JobScheduler, job_id: str) -> Job:
+    job = scheduler.queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @app.get("/api/v1")
 async def root():
     return {"message": "Data Ingestion Service API", "status": "online", "timestamp": datetime.now().isoformat()}
@@ -24,6 +140,103 @@ async def version():
 async def protected_endpoint(user_data = Depends(auth_validator)):
     return {"message": "This is a protected endpoint", "user": user_data}
 
+@app.post("/api/v1/jobs", status_code=202)
+def submit_job(request: JobRequest, user_data = Depends(auth_validator),
+               scheduler: JobScheduler = Depends(get_scheduler)):
+    if request.priority not in PRIORITIES:
+        raise HTTPException(status_code=422, detail=f"Unsupported priority: {request.priority}")
+    params = {key: value for key, value in request.model_dump(include={"fields", "filters", "batch_size"}).items()
+              if value is not None}
+    job = Job(None, request.tenant_id, request.erp_type, request.account_id, request.entity,
+              priority=request.priority, params=params)
+    try:
+        return scheduler.submit(job).to_dict()
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+@app.get("/api/v1/jobs")
+def list_jobs(tenant_id: Optional[str] = None, status: Optional[str] = None,
+              limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+              fields: Optional[str] = None, user_data = Depends(auth_validator),
+              scheduler: JobScheduler = Depends(get_scheduler)):
+    after = decode_cursor(cursor, 1)[0] if cursor else None
+    jobs = scheduler.queue.list(tenant_id=tenant_id, status=status, limit=limit + 1, after=after)
+    return page_response([job.to_dict() for job in jobs], limit, lambda job: [job["job_id"]], fields)
+
+@app.get("/api/v1/jobs/{job_id}")
+def get_job(job_id: str, user_data = Depends(auth_validator), scheduler: JobScheduler = Depends(get_scheduler)):
+    return _get_job_or_404(scheduler, job_id).to_dict()
+
+@app.post("/api/v1/jobs/{job_id}/cancel")
+def cancel_job(job_id: str, user_data = Depends(auth_validator), scheduler: JobScheduler = Depends(get_scheduler)):
+    job = scheduler.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/api/v1/jobs/{job_id}/dead-letters")
+def list_dead_letters(job_id: str, status: Optional[str] = PENDING, limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+                      cursor: Optional[str] = None, fields: Optional[str] = None,
+                      user_data = Depends(auth_validator), scheduler: JobScheduler = Depends(get_scheduler)):
+    job = _get_job_or_404(scheduler, job_id)
+    after_id = decode_cursor(cursor, 1)[0] if cursor else None
+    letters = scheduler.runner.dead_letters.list(run_id=job.job_id, status=status, limit=limit + 1, after_id=after_id)
+    return page_response(letters, limit, lambda letter: [letter["id"]], fields)
+
+@app.post("/api/v1/jobs/{job_id}/dead-letters/replay")
+def replay_dead_letters(job_id: str, request: ReplayRequest, user_data = Depends(auth_validator),
+                        scheduler: JobScheduler = Depends(get_scheduler)):
+    job = _get_job_or_404(scheduler, job_id)
+    return scheduler.runner.replay(job, ids=request.ids)
+
+@app.get("/api/v1/metadata/{tenant_id}/{erp_type}/{account_id}/entities")
+def list_entities(tenant_id: str, erp_type: str, account_id: str, limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+                  cursor: Optional[str] = None, fields: Optional[str] = None, user_data = Depends(auth_validator),
+                  metadata: MetadataRepository = Depends(get_metadata_repository)):
+    after = decode_cursor(cursor, 1)[0] if cursor else None
+    tables = metadata.list_tables(tenant_id, erp_type, account_id, limit=limit + 1, after=after)
+    return page_response(tables, limit, lambda table: [table["name"]], fields)
+
+@app.get("/api/v1/metadata/{tenant_id}/{erp_type}/{account_id}/{entity}/columns")
+def list_entity_columns(tenant_id: str, erp_type: str, account_id: str, entity: str,
+                        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                        fields: Optional[str] = None, user_data = Depends(auth_validator),
+                        metadata: MetadataRepository = Depends(get_metadata_repository)):
+    after = decode_cursor(cursor, 1)[0] if cursor else None
+    columns = metadata.list_columns(tenant_id, erp_type, account_id, entity, limit=limit + 1, after=after)
+    return page_response(columns, limit, lambda column: [column["position"]], fields)
+
+@app.get("/api/v1/metadata/{tenant_id}/{erp_type}/{account_id}/{entity}/schema")
+def get_entity_schema(tenant_id: str, erp_type: str, account_id: str, entity: str, user_data = Depends(auth_validator),
+                      metadata: MetadataRepository = Depends(get_metadata_repository)):
+    schema = metadata.get_schema(tenant_id, erp_type, account_id, entity)
+    if schema is None:
+        raise HTTPException(status_code=404, detail="Schema not found")
+    return schema
+
+@app.get("/api/v1/metadata/{tenant_id}/{erp_type}/{account_id}/{entity}/profile")
+def get_entity_profile(tenant_id: str, erp_type: str, account_id: str, entity: str, columns: Optional[str] = None,
+                       limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                       fields: Optional[str] = None, user_data = Depends(auth_validator),
+                       metadata: MetadataRepository = Depends(get_metadata_repository)):
+    after = decode_cursor(cursor, 1)[0] if cursor else None
+    profiles = metadata.latest_profiles(tenant_id, erp_type, account_id, entity,
+                                        columns=columns.split(",") if columns else None, limit=limit + 1, after=after)
+    return page_response(profiles, limit, lambda profile: [profile["name"]], fields)
+
+@app.get("/api/v1/metadata/{tenant_id}/{erp_type}/{account_id}/{entity}/profile/{column}")
+def get_column_profile_history(tenant_id: str, erp_type: str, account_id: str, entity: str, column: str,
+                               limit: int = Query(30, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                               fields: Optional[str] = None, user_data = Depends(auth_validator),
+                               metadata: MetadataRepository = Depends(get_metadata_repository)):
+    try:
+        before = datetime.fromisoformat(decode_cursor(cursor, 1)[0]) if cursor else None
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    profiles = metadata.profile_history(tenant_id, erp_type, account_id, entity, column, limit=limit + 1,
+                                        before=before)
+    return page_response(profiles, limit, lambda profile: [profile["profiled_at"].isoformat()], fields)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
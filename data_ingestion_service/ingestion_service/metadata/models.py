@@ -0,0 +1,114 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import (JSON, BigInteger, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String,
+                        UniqueConstraint)
+from sqlalchemy.orm import declarative_base, relationship
+
+Base = declarative_base()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class DataSource(Base):
+    """An ERP account a tenant extracts from."""
+
+    __tablename__ = 'data_sources'
+    __table_args__ = (UniqueConstraint('tenant_id', 'erp_type', 'account_id', name='uq_data_sources_account'),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(String(64), nullable=False)
+    erp_type = Column(String(32), nullable=False)
+    account_id = Column(String(128), nullable=False)
+    name = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_now)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=_now, onupdate=_now)
+
+    tables = relationship('MetadataTable', back_populates='data_source', cascade='all, delete-orphan')
+
+    def __repr__(self):
+        return f"<DataSource(id={self.id}, tenant_id={self.tenant_id}, erp_type={self.erp_type}, " \
+               f"account_id={self.account_id})>"
+
+
+class MetadataTable(Base):
+    """An entity (record type) of a data source."""
+
+    __tablename__ = 'metadata_tables'
+    __table_args__ = (UniqueConstraint('data_source_id', 'name', name='uq_metadata_tables_name'),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    data_source_id = Column(Integer, ForeignKey('data_sources.id', ondelete='CASCADE'), nullable=False)
+    name = Column(String(128), nullable=False)
+    column_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=_now, onupdate=_now)
+
+    data_source = relationship('DataSource', back_populates='tables')
+    columns = relationship('MetadataColumn', back_populates='table', cascade='all, delete-orphan',
+                           order_by='MetadataColumn.position')
+
+    def __repr__(self):
+        return f"<MetadataTable(id={self.id}, name={self.name})>"
+
+
+class MetadataColumn(Base):
+    """A field of an entity, as reported by the connector's get_schema."""
+
+    __tablename__ = 'metadata_columns'
+    __table_args__ = (
+        UniqueConstraint('table_id', 'name', name='uq_metadata_columns_name'),
+        Index('ix_metadata_columns_position', 'table_id', 'position'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    table_id = Column(Integer, ForeignKey('metadata_tables.id', ondelete='CASCADE'), nullable=False)
+    name = Column(String(128), nullable=False)
+    type = Column(String(32), nullable=False)
+    label = Column(String(255), nullable=True)
+    position = Column(Integer, nullable=False)
+    is_key = Column(Boolean, nullable=False, default=False)
+    is_custom = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=_now)
+
+    table = relationship('MetadataTable', back_populates='columns')
+
+    def __repr__(self):
+        return f"<MetadataColumn(id={self.id}, name={self.name}, type={self.type})>"
+
+
+class ColumnProfileStat(Base):
+    """
+    Profile statistics of one column at one point in time.
+
+    Data source and entity are stored on every row (rather than joined
+    through metadata_columns) so that the latest profile of a column is a
+    single descending scan of the uq_profile_stats_run key.
+    """
+
+    __tablename__ = 'profile_stats'
+    __table_args__ = (
+        UniqueConstraint('data_source_id', 'entity', 'column_name', 'profiled_at', name='uq_profile_stats_run'),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    data_source_id = Column(Integer, ForeignKey('data_sources.id', ondelete='CASCADE'), nullable=False)
+    entity = Column(String(128), nullable=False)
+    column_name = Column(String(128), nullable=False)
+    profiled_at = Column(DateTime(timezone=True), nullable=False)
+    type = Column(String(64), nullable=True)
+    row_count = Column(BigInteger, nullable=False, default=0)
+    value_count = Column(BigInteger, nullable=False, default=0)
+    null_count = Column(BigInteger, nullable=False, default=0)
+    null_fraction = Column(Float, nullable=True)
+    distinct_count = Column(BigInteger, nullable=True)
+    min_value = Column(JSON, nullable=True)
+    max_value = Column(JSON, nullable=True)
+    mean = Column(Float, nullable=True)
+    stddev = Column(Float, nullable=True)
+    quantiles = Column(JSON, nullable=True)
+    top_k = Column(JSON, nullable=True)
+
+    def __repr__(self):
+        return f"<ColumnProfileStat(data_source_id={self.data_source_id}, entity={self.entity}, " \
+               f"column_name={self.column_name}, profiled_at={self.profiled_at})>"
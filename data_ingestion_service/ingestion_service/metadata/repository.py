@@ -0,0 +1,410 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, bindparam, create_engine, delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+
+from .models import Base, ColumnProfileStat, DataSource, MetadataColumn, MetadataTable
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement, well below the bind parameter limits of SQLite
+# (32766) and MySQL (65535) for the widest table
+UPSERT_CHUNK_ROWS = 1000
+
+
+def _jsonable(value: Any) -> Any:
+    """Make a profile value (dates, decimals, nested lists) storable in a JSON column."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    return str(value)
+
+
+def bulk_upsert(conn: Connection, table: Any, rows: List[Dict[str, Any]], keys: Sequence[str],
+                update_columns: Optional[Sequence[str]] = None, chunk_rows: int = UPSERT_CHUNK_ROWS) -> int:
+    """
+    Insert rows, updating those whose key already exists, in one statement per chunk.
+
+    MySQL gets INSERT ... ON DUPLICATE KEY UPDATE, PostgreSQL and SQLite
+    INSERT ... ON CONFLICT DO UPDATE. Other dialects (e.g. Oracle) look the
+    keys up once and then run one executemany INSERT and one executemany
+    UPDATE, so the number of round trips never grows with the row count.
+
+    Args:
+        conn: Connection, inside the caller's transaction
+        table: Table or model class
+        rows: Row dicts, all with the same keys
+        keys: Columns of the unique key the rows are matched on
+        update_columns: Columns overwritten on a match, all non-key columns by default
+        chunk_rows: Maximum rows per statement
+
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+    table = getattr(table, '__table__', table)
+    if update_columns is None:
+        update_columns = [column for column in rows[0] if column not in keys]
+    dialect = conn.dialect.name
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        if dialect in ('mysql', 'mariadb'):
+            stmt = mysql.insert(table).values(chunk)
+            # Updating a key column to itself makes a duplicate a no-op
+            stmt = stmt.on_duplicate_key_update({column: stmt.inserted[column]
+                                                 for column in update_columns or keys[:1]})
+        elif dialect in ('postgresql', 'sqlite'):
+            stmt = (postgresql if dialect == 'postgresql' else sqlite).insert(table).values(chunk)
+            if update_columns:
+                stmt = stmt.on_conflict_do_update(index_elements=list(keys),
+                                                  set_={column: stmt.excluded[column] for column in update_columns})
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=list(keys))
+        else:
+            _merge(conn, table, chunk, keys, update_columns)
+            continue
+        conn.execute(stmt)
+    return len(rows)
+
+
+def _merge(conn: Connection, table: Any, rows: List[Dict[str, Any]], keys: Sequence[str],
+           update_columns: Sequence[str]):
+    key_columns = [table.c[key] for key in keys]
+    existing = {tuple(row) for row in conn.execute(
+        select(*key_columns).where(tuple_(*key_columns).in_([tuple(row[key] for key in keys) for row in rows])))}
+    new = [row for row in rows if tuple(row[key] for key in keys) not in existing]
+    matched = [row for row in rows if tuple(row[key] for key in keys) in existing]
+    if new:
+        conn.execute(insert(table), new)
+    if matched and update_columns:
+        stmt = update(table).where(and_(*(table.c[key] == bindparam(f'key_{key}') for key in keys))).values(
+            {column: bindparam(f'value_{column}') for column in update_columns})
+        conn.execute(stmt, [{**{f'key_{key}': row[key] for key in keys},
+                             **{f'value_{column}': row[column] for column in update_columns}} for row in matched])
+
+
+class MetadataRepository:
+    """
+    Schemas and profile statistics of the entities extracted per tenant.
+
+    Columns and profile statistics are written with bulk_upsert, so saving
+    the schema or profile of a 500-field record type is one INSERT rather
+    than 500 ORM adds. Data source ids are cached once committed.
+    """
+
+    def __init__(self, engine: Engine):
+        """
+        Initialize the repository.
+
+        Args:
+            engine: SQLAlchemy engine of the metadata database
+        """
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._source_ids: Dict[Tuple[str, str, str], int] = {}
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'MetadataRepository':
+        """
+        Create a repository from a database URL.
+
+        Args:
+            url: SQLAlchemy database URL (e.g. 'mysql+pymysql://...' or 'sqlite://')
+            **kwargs: Other create_engine arguments
+
+        Returns:
+            A MetadataRepository
+        """
+        return cls(create_engine(url, pool_pre_ping=True, **kwargs))
+
+    def create_all(self):
+        """
+        Create the metadata tables and indexes if they don't exist.
+        """
+        Base.metadata.create_all(self.engine)
+
+    def _source_id(self, conn: Connection, tenant_id: str, erp_type: str, account_id: str) -> int:
+        with self._lock:
+            source_id = self._source_ids.get((tenant_id, erp_type, account_id))
+        if source_id is not None:
+            return source_id
+        now = datetime.now(timezone.utc)
+        bulk_upsert(conn, DataSource, [{'tenant_id': tenant_id, 'erp_type': erp_type, 'account_id': account_id,
+                                        'created_at': now, 'updated_at': now}],
+                    keys=['tenant_id', 'erp_type', 'account_id'], update_columns=[])
+        return conn.execute(select(DataSource.id).where(
+            DataSource.tenant_id == tenant_id, DataSource.erp_type == erp_type,
+            DataSource.account_id == account_id)).scalar_one()
+
+    def _find_source_id(self, conn: Connection, tenant_id: str, erp_type: str, account_id: str) -> Optional[int]:
+        with self._lock:
+            source_id = self._source_ids.get((tenant_id, erp_type, account_id))
+        if source_id is not None:
+            return source_id
+        return conn.execute(select(DataSource.id).where(
+            DataSource.tenant_id == tenant_id, DataSource.erp_type == erp_type,
+            DataSource.account_id == account_id)).scalar()
+
+    def save_schema(self, tenant_id: str, erp_type: str, account_id: str, entity: str,
+                    schema: Dict[str, Any]) -> int:
+        """
+        Store the schema of an entity, as returned by a connector's get_schema.
+
+        Fields no longer in the schema are removed.
+
+        Args:
+            tenant_id: Tenant identifier
+            erp_type: Type of ERP
+            account_id: ERP account identifier
+            entity: Entity/table name
+            schema: Schema dict with a 'fields' list
+
+        Returns:
+            Id of the entity's metadata table
+        """
+        fields = schema.get('fields', [])
+        now = datetime.now(timezone.utc)
+        with self.engine.begin() as conn:
+            source_id = self._source_id(conn, tenant_id, erp_type, account_id)
+            bulk_upsert(conn, MetadataTable, [{'data_source_id': source_id, 'name': entity,
+                                               'column_count': len(fields), 'updated_at': now}],
+                        keys=['data_source_id', 'name'])
+            table_id = conn.execute(select(MetadataTable.id).where(
+                MetadataTable.data_source_id == source_id, MetadataTable.name == entity)).scalar_one()
+            rows = [{'table_id': table_id, 'name': field['name'], 'type': field.get('type', 'string'),
+                     'label': field.get('label'), 'position': position, 'is_key': bool(field.get('isKey')),
+                     'is_custom': bool(field.get('isCustom')), 'updated_at': now}
+                    for position, field in enumerate(fields)]
+            bulk_upsert(conn, MetadataColumn, rows, keys=['table_id', 'name'])
+            conn.execute(delete(MetadataColumn).where(MetadataColumn.table_id == table_id,
+                                                      MetadataColumn.name.notin_([row['name'] for row in rows])))
+        # Only cached once committed, a rolled back insert leaves no id behind
+        with self._lock:
+            self._source_ids[(tenant_id, erp_type, account_id)] = source_id
+        logger.info(f"Saved {len(fields)} {entity} fields of {erp_type}:{account_id} for tenant {tenant_id}")
+        return table_id
+
+    def get_schema(self, tenant_id: str, erp_type: str, account_id: str, entity: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a stored schema.
+
+        Args:
+            tenant_id: Tenant identifier
+            erp_type: Type of ERP
+            account_id: ERP account identifier
+            entity: Entity/table name
+
+        Returns:
+            Schema dict with a 'fields' list in the connector's format, or
+            None if the entity's schema was never saved
+        """
+        query = (select(MetadataTable.id, MetadataColumn.name, MetadataColumn.type, MetadataColumn.label,
+                        MetadataColumn.is_key, MetadataColumn.is_custom)
+                 .join(DataSource, DataSource.id == MetadataTable.data_source_id)
+                 .outerjoin(MetadataColumn, MetadataColumn.table_id == MetadataTable.id)
+                 .where(DataSource.tenant_id == tenant_id, DataSource.erp_type == erp_type,
+                        DataSource.account_id == account_id, MetadataTable.name == entity)
+                 .order_by(MetadataColumn.position))
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        if not rows:
+            return None
+        fields = []
+        for _, name, field_type, label, is_key, is_custom in rows:
+            if name is None:
+                continue
+            field = {'name': name, 'type': field_type}
+            if label is not None:
+                field['label'] = label
+            if is_key:
+                field['isKey'] = True
+            if is_custom:
+                field['isCustom'] = True
+            fields.append(field)
+        return {'fields': fields}
+
+    def save_profile(self, tenant_id: str, erp_type: str, account_id: str, entity: str, profile: Any,
+                     profiled_at: Optional[datetime] = None) -> int:
+        """
+        Store the column statistics of a profile.
+
+        Saving the same profile time again overwrites its statistics.
+
+        Args:
+            tenant_id: Tenant identifier
+            erp_type: Type of ERP
+            account_id: ERP account identifier
+            entity: Entity/table name
+            profile: TableProfile or its to_dict()
+            profiled_at: Time of the profile, now by default
+
+        Returns:
+            Number of columns stored
+        """
+        if hasattr(profile, 'to_dict'):
+            profile = profile.to_dict()
+        profiled_at = profiled_at or datetime.now(timezone.utc)
+        rows = [{'entity': entity, 'column_name': column['name'],
+                 'profiled_at': profiled_at, 'type': column.get('type'), 'row_count': profile.get('rows', 0),
+                 'value_count': column.get('count', 0), 'null_count': column.get('nulls', 0),
+                 'null_fraction': column.get('null_fraction'), 'distinct_count': column.get('distinct'),
+                 'min_value': _jsonable(column.get('min')), 'max_value': _jsonable(column.get('max')),
+                 'mean': column.get('mean'), 'stddev': column.get('stddev'),
+                 'quantiles': _jsonable(column.get('quantiles')), 'top_k': _jsonable(column.get('top_k'))}
+                for column in profile.get('columns', [])]
+        with self.engine.begin() as conn:
+            source_id = self._source_id(conn, tenant_id, erp_type, account_id)
+            for row in rows:
+                row['data_source_id'] = source_id
+            bulk_upsert(conn, ColumnProfileStat, rows,
+                        keys=['data_source_id', 'entity', 'column_name', 'profiled_at'])
+        with self._lock:
+            self._source_ids[(tenant_id, erp_type, account_id)] = source_id
+        logger.info(f"Saved profile of {len(rows)} {entity} columns of {erp_type}:{account_id} "
+                    f"for tenant {tenant_id}")
+        return len(rows)
+
+    @staticmethod
+    def _stat_dict(row: Any) -> Dict[str, Any]:
+        return {'name': row.column_name, 'type': row.type, 'profiled_at': row.profiled_at, 'rows': row.row_count,
+                'count': row.value_count, 'nulls': row.null_count, 'null_fraction': row.null_fraction,
+                'min': row.min_value, 'max': row.max_value, 'mean': row.mean, 'stddev': row.stddev,
+                'quantiles': row.quantiles, 'distinct': row.distinct_count, 'top_k': row.top_k}
+
+    def list_tables(self, tenant_id: str, erp_type: str, account_id: str, limit: int = 100,
+                    after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List the entities with a stored schema, by name.
+
+        Args:
+            tenant_id: Tenant identifier
+            erp_type: Type of ERP
+            account_id: ERP account identifier
+            limit: Maximum number of entities
+            after: Optional name of the last entity of the previous page
+
+        Returns:
+            Dicts with name, column_count and updated_at
+        """
+        query = (select(MetadataTable.name, MetadataTable.column_count, MetadataTable.updated_at)
+                 .join(DataSource, DataSource.id == MetadataTable.data_source_id)
+                 .where(DataSource.tenant_id == tenant_id, DataSource.erp_type == erp_type,
+                        DataSource.account_id == account_id)
+                 .order_by(MetadataTable.name)
+                 .limit(limit))
+        if after is not None:
+            query = query.where(MetadataTable.name > after)
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(query)]
+
+    def list_columns(self, tenant_id: str, erp_type: str, account_id: str, entity: str, limit: int = 100,
+                     after: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        List the stored fields of an entity in schema order.
+
+        Args:
+            tenant_id: Tenant identifier
+            erp_type: Type of ERP
+            account_id: ERP account identifier
+            entity: Entity/table name
+            limit: Maximum number of fields
+            after: Optional position of the last field of the previous page
+
+        Returns:
+            Dicts with name, type, label, position, is_key and is_custom
+        """
+        query = (select(MetadataColumn.name, MetadataColumn.type, MetadataColumn.label, MetadataColumn.position,
+                        MetadataColumn.is_key, MetadataColumn.is_custom)
+                 .join(MetadataTable, MetadataTable.id == MetadataColumn.table_id)
+                 .join(DataSource, DataSource.id == MetadataTable.data_source_id)
+                 .where(DataSource.tenant_id == tenant_id, DataSource.erp_type == erp_type,
+                        DataSource.account_id == account_id, MetadataTable.name == entity)
+                 .order_by(MetadataColumn.position)
+                 .limit(limit))
+        if after is not None:
+            query = query.where(MetadataColumn.position > after)
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(query)]
+
+    def latest_profiles(self, tenant_id: str, erp_type: str, account_id: str, entity: str,
+                        columns: Optional[List[str]] = None, limit: Optional[int] = None,
+                        after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the most recent statistics of each column of an entity.
+
+        Both the per-column maximum and the lookup of its row are range scans
+        of uq_profile_stats_run (data_source_id, entity, column_name, profiled_at).
+
+        Args:
+            tenant_id: Tenant identifier
+            erp_type: Type of ERP
+            account_id: ERP account identifier
+            entity: Entity/table name
+            columns: Optional columns, all by default
+            limit: Optional maximum number of columns
+            after: Optional name of the last column of the previous page
+
+        Returns:
+            Column statistics in the format of ColumnProfile.to_dict, plus
+            rows and profiled_at, ordered by column name
+        """
+        stats = ColumnProfileStat.__table__
+        with self.engine.connect() as conn:
+            source_id = self._find_source_id(conn, tenant_id, erp_type, account_id)
+        if source_id is None:
+            return []
+        latest = (select(stats.c.column_name, func.max(stats.c.profiled_at).label('profiled_at'))
+                  .where(stats.c.data_source_id == source_id, stats.c.entity == entity)
+                  .group_by(stats.c.column_name))
+        if columns is not None:
+            latest = latest.where(stats.c.column_name.in_(columns))
+        if after is not None:
+            latest = latest.where(stats.c.column_name > after)
+        latest = latest.order_by(stats.c.column_name).limit(limit).subquery()
+        query = (select(stats)
+                 .join(latest, and_(stats.c.column_name == latest.c.column_name,
+                                    stats.c.profiled_at == latest.c.profiled_at))
+                 .where(stats.c.data_source_id == source_id, stats.c.entity == entity)
+                 .order_by(stats.c.column_name))
+        with self.engine.connect() as conn:
+            return [self._stat_dict(row) for row in conn.execute(query)]
+
+    def profile_history(self, tenant_id: str, erp_type: str, account_id: str, entity: str, column: str,
+                        limit: int = 30, before: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Get a column's statistics over time, most recent first.
+
+        Args:
+            tenant_id: Tenant identifier
+            erp_type: Type of ERP
+            account_id: ERP account identifier
+            entity: Entity/table name
+            column: Column name
+            limit: Maximum number of profiles
+            before: Optional profile time of the last profile of the previous page
+
+        Returns:
+            Column statistics as returned by latest_profiles
+        """
+        stats = ColumnProfileStat.__table__
+        with self.engine.connect() as conn:
+            source_id = self._find_source_id(conn, tenant_id, erp_type, account_id)
+        if source_id is None:
+            return []
+        query = (select(stats)
+                 .where(stats.c.data_source_id == source_id, stats.c.entity == entity,
+                        stats.c.column_name == column)
+                 .order_by(stats.c.profiled_at.desc())
+                 .limit(limit))
+        if before is not None:
+            query = query.where(stats.c.profiled_at < before)
+        with self.engine.connect() as conn:
+            return [self._stat_dict(row) for row in conn.execute(query)]
@@ -0,0 +1,96 @@
+import base64
+import binascii
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+MAX_PAGE_SIZE = 1000
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, which is several times faster than
+    the standard library on large listings. Values orjson doesn't know
+    (e.g. Decimal) are rendered as strings.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last item of a page as an opaque cursor.
+
+    Args:
+        *values: Sort key values
+
+    Returns:
+        URL-safe cursor string
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(list(values))).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decode a cursor made by encode_cursor.
+
+    Args:
+        cursor: Cursor from a previous page
+        size: Number of sort key values expected
+
+    Returns:
+        The sort key values
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a ?fields= parameter.
+
+    Args:
+        fields: Comma-separated field names
+
+    Returns:
+        Field names, or None for all fields
+    """
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(',') if field.strip()]
+
+
+def page_response(items: List[Dict[str, Any]], limit: int, key: Callable[[Dict[str, Any]], Sequence[Any]],
+                  fields: Optional[str] = None) -> ORJSONResponse:
+    """
+    Build a page of a keyset-paginated listing.
+
+    Callers fetch limit + 1 items; the extra item only tells whether there
+    is a next page, whose cursor is the sort key of the page's last item.
+
+    Args:
+        items: Up to limit + 1 items in sort order
+        limit: Page size
+        key: Returns the sort key values of an item
+        fields: Optional ?fields= parameter selecting the fields returned
+
+    Returns:
+        Response with 'items' and 'next_cursor' (None on the last page)
+    """
+    page = items[:limit]
+    next_cursor = encode_cursor(*key(page[-1])) if len(items) > limit else None
+    selected = parse_fields(fields)
+    if selected is not None:
+        page = [{field: item[field] for field in selected if field in item} for item in page]
+    return ORJSONResponse({'items': page, 'next_cursor': next_cursor})
@@ -0,0 +1,414 @@
+import logging
+from decimal import Context, Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from ..connectors.columnar import pa, require_pyarrow
+
+try:
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pc = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_SAMPLE_SIZE = 10000
+
+BOOLEAN = 'boolean'
+INTEGER = 'integer'
+DECIMAL = 'decimal'
+CURRENCY = 'currency'
+DATE = 'date'
+DATETIME = 'datetime'
+EMAIL = 'email'
+PHONE = 'phone'
+STRING = 'string'
+
+TRUE_VALUES = ['true', 't', 'yes', 'y']
+FALSE_VALUES = ['false', 'f', 'no', 'n']
+
+# RE2 patterns, matched over whole columns by pyarrow.compute
+_NUMBER = r'(?:\d{1,3}(?:,\d{3})+|\d+)'
+INTEGER_PATTERN = rf'^[+-]?{_NUMBER}$'
+DECIMAL_PATTERN = rf'^[+-]?(?:{_NUMBER}(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?$'
+CURRENCY_PATTERN = (rf'^[+-]?(?P<prefix>[$€£¥]|[A-Z]{{3}})\s?[+-]?{_NUMBER}(?:\.\d+)?$'
+                    rf'|^[+-]?{_NUMBER}(?:\.\d+)?\s?(?P<suffix>[$€£¥]|[A-Z]{{3}})$')
+LEADING_ZERO_PATTERN = r'^[+-]?0\d'
+DATETIME_PATTERN = r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?$'
+EMAIL_PATTERN = r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}$'
+PHONE_PATTERN = r'^(?:\+\d{1,3}[\s.-]?)?\(?\d{2,4}\)?[\s.-]?\d{3,4}[\s.-]?\d{3,5}$'
+
+# Date pattern -> strptime formats it may stand for, most likely first
+DATE_FORMATS: List[Tuple[str, List[str]]] = [
+    (r'^\d{4}-\d{2}-\d{2}$', ['%Y-%m-%d']),
+    (r'^\d{4}/\d{1,2}/\d{1,2}$', ['%Y/%m/%d']),
+    # NetSuite's default date preference is US style, so it wins ties
+    (r'^\d{1,2}/\d{1,2}/\d{4}$', ['%m/%d/%Y', '%d/%m/%Y']),
+    (r'^\d{1,2}\.\d{1,2}\.\d{4}$', ['%d.%m.%Y']),
+    (r'^\d{1,2}-\d{1,2}-\d{4}$', ['%m-%d-%Y', '%d-%m-%Y']),
+]
+
+# Widest decimal Arrow stores (decimal256); longer numbers stay strings
+MAX_DECIMAL_PRECISION = 76
+# Currency amounts keep at least cents, even if the sample had whole amounts only
+CURRENCY_MIN_SCALE = 2
+# Digits of a plain (non-scientific) number without sign, separators or padding zeros
+_PLAIN_DIGITS = r'^[+-]?0*(?P<whole>\d*)(?:\.(?P<fraction>\d*?)0*)?$'
+
+
+def _decimal_type(column_type: Dict[str, Any]) -> 'pa.DataType':
+    precision = column_type.get('precision', 38)
+    scale = min(column_type.get('scale', 9), precision)
+    if precision <= 38:
+        return pa.decimal128(precision, scale)
+    return pa.decimal256(precision, scale)
+
+
+_ARROW_TYPES = {
+    BOOLEAN: lambda column_type: pa.bool_(),
+    INTEGER: lambda column_type: pa.int64(),
+    DECIMAL: _decimal_type,
+    CURRENCY: _decimal_type,
+    DATE: lambda column_type: pa.date32(),
+    DATETIME: lambda column_type: pa.timestamp('us', tz='UTC'),
+}
+
+
+def _result(name: str, inferred: str, confidence: float, sample_size: int, **details) -> Dict[str, Any]:
+    result = {'name': name, 'type': inferred, 'confidence': confidence, 'sample_size': sample_size}
+    result.update({key: value for key, value in details.items() if value is not None})
+    return result
+
+
+def _typed_result(name: str, value_type: 'pa.DataType', sample_size: int) -> Optional[Dict[str, Any]]:
+    """Type of a column that is already typed in Arrow."""
+    if pa.types.is_boolean(value_type):
+        inferred = BOOLEAN
+    elif pa.types.is_integer(value_type):
+        inferred = INTEGER
+    elif pa.types.is_floating(value_type) or pa.types.is_decimal(value_type):
+        inferred = DECIMAL
+    elif pa.types.is_date(value_type):
+        inferred = DATE
+    elif pa.types.is_timestamp(value_type):
+        inferred = DATETIME
+    else:
+        return None
+    return _result(name, inferred, 1.0, sample_size)
+
+
+def _ratio(mask: Any, total: int) -> float:
+    return pc.sum(mask).as_py() / total if total else 0.0
+
+
+def _decimal_digits(values: 'pa.Array') -> Tuple[int, int]:
+    """Precision and scale needed to store every value of a numeric string column."""
+    parts = pc.extract_regex(pc.replace_substring(values, ',', ''), r'^[+-]?0*(?P<whole>\d*)\.?(?P<fraction>\d*)')
+    whole = pc.max(pc.utf8_length(parts.field('whole'))).as_py() or 0
+    scale = pc.max(pc.utf8_length(parts.field('fraction'))).as_py() or 0
+    return max(1, whole + scale), scale
+
+
+def infer_column(name: str, array: Any, threshold: float = DEFAULT_THRESHOLD) -> Dict[str, Any]:
+    """
+    Infer the type and format of one column from a sample of its values.
+
+    Every check runs over the whole sample at once (RE2 regexes and
+    strptime kernels in pyarrow.compute), cheapest first, and a type is
+    chosen when at least `threshold` of the non-empty values fit it, so a
+    few dirty values don't demote a column to string.
+
+    Args:
+        name: Column name
+        array: pyarrow Array/ChunkedArray of sampled values
+        threshold: Fraction of values that must match a type
+
+    Returns:
+        Dict with name, type, confidence and sample_size, plus format for
+        dates, precision/scale for decimals and symbol for currencies
+    """
+    require_pyarrow()
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    array = pc.drop_null(array)
+    typed = _typed_result(name, array.type, len(array))
+    if typed is not None:
+        return typed
+    if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+        return _result(name, STRING, 1.0, len(array))
+
+    values = pc.utf8_trim_whitespace(array)
+    values = pc.filter(values, pc.not_equal(values, ''))
+    total = len(values)
+    if total == 0:
+        return _result(name, STRING, 0.0, 0)
+
+    def fits(mask: Any) -> Optional[float]:
+        ratio = _ratio(mask, total)
+        return ratio if ratio >= threshold else None
+
+    lowered = pc.utf8_lower(values)
+    confidence = fits(pc.is_in(lowered, value_set=pa.array(TRUE_VALUES + FALSE_VALUES)))
+    if confidence is not None:
+        return _result(name, BOOLEAN, confidence, total)
+
+    # Zero-padded numbers are identifiers (e.g. '00123'); casting would lose the padding
+    padded = pc.any(pc.match_substring_regex(values, LEADING_ZERO_PATTERN)).as_py()
+    if not padded:
+        integers = pc.match_substring_regex(values, INTEGER_PATTERN)
+        confidence = fits(integers)
+        if confidence is not None:
+            longest = pc.max(pc.utf8_length(pc.filter(values, integers))).as_py() or 0
+            # Beyond int64 (18 digits plus sign/separators) keep them exact as decimals
+            if longest <= 18:
+                return _result(name, INTEGER, confidence, total)
+        decimals = pc.match_substring_regex(values, DECIMAL_PATTERN)
+        confidence = fits(decimals)
+        if confidence is not None:
+            precision, scale = _decimal_digits(pc.filter(values, decimals))
+            if precision <= MAX_DECIMAL_PRECISION:
+                return _result(name, DECIMAL, confidence, total, precision=precision, scale=scale)
+
+    currency = pc.match_substring_regex(values, CURRENCY_PATTERN)
+    confidence = fits(currency)
+    if confidence is not None:
+        matched = pc.filter(values, currency)
+        symbols = pc.extract_regex(matched, CURRENCY_PATTERN)
+        # A group outside the matching alternative extracts as ''
+        prefix = symbols.field('prefix')
+        symbol = pc.if_else(pc.equal(prefix, ''), symbols.field('suffix'), prefix)
+        counts = pc.value_counts(symbol)
+        common = counts[pc.index(counts.field('counts'), pc.max(counts.field('counts'))).as_py()]
+        amounts = pc.replace_substring_regex(matched, r'[^0-9.,+-]', '')
+        precision, scale = _decimal_digits(amounts)
+        precision, scale = precision + max(0, CURRENCY_MIN_SCALE - scale), max(scale, CURRENCY_MIN_SCALE)
+        if precision <= MAX_DECIMAL_PRECISION:
+            return _result(name, CURRENCY, confidence, total, symbol=common['values'].as_py(),
+                           precision=precision, scale=scale)
+
+    confidence = fits(pc.match_substring_regex(values, DATETIME_PATTERN))
+    if confidence is not None:
+        return _result(name, DATETIME, confidence, total, format='ISO8601')
+
+    for pattern, formats in DATE_FORMATS:
+        if fits(pc.match_substring_regex(values, pattern)) is None:
+            continue
+        # The regex only checks the shape; strptime rejects month 13 and the like
+        best = max(formats, key=lambda fmt: pc.count(pc.strptime(values, format=fmt, unit='s',
+                                                                 error_is_null=True)).as_py())
+        confidence = fits(pc.is_valid(pc.strptime(values, format=best, unit='s', error_is_null=True)))
+        if confidence is not None:
+            return _result(name, DATE, confidence, total, format=best)
+
+    confidence = fits(pc.match_substring_regex(values, EMAIL_PATTERN))
+    if confidence is not None:
+        return _result(name, EMAIL, confidence, total)
+    confidence = fits(pc.match_substring_regex(values, PHONE_PATTERN))
+    if confidence is not None:
+        return _result(name, PHONE, confidence, total)
+    return _result(name, STRING, 1.0, total)
+
+
+def infer_types(batch: Any, threshold: float = DEFAULT_THRESHOLD) -> Dict[str, Dict[str, Any]]:
+    """
+    Infer the type of every column of a sample.
+
+    Args:
+        batch: pyarrow RecordBatch or Table, pandas DataFrame or list of row dicts
+        threshold: Fraction of values that must match a type
+
+    Returns:
+        Dict mapping column name to its infer_column result
+    """
+    require_pyarrow()
+    if isinstance(batch, pd.DataFrame):
+        batch = pa.RecordBatch.from_pandas(batch, preserve_index=False)
+    elif isinstance(batch, list):
+        batch = pa.RecordBatch.from_pylist(batch)
+    return {field.name: infer_column(field.name, column, threshold)
+            for field, column in zip(batch.schema, batch.columns)}
+
+
+def cast_column(array: Any, column_type: Dict[str, Any]) -> Any:
+    """
+    Cast a string column to its inferred type.
+
+    Values that don't fit the type become nulls instead of failing the batch.
+
+    Args:
+        array: pyarrow string Array/ChunkedArray
+        column_type: infer_column result
+
+    Returns:
+        Array of the inferred type, or the input if it needs no cast
+    """
+    inferred = column_type['type']
+    if inferred not in _ARROW_TYPES or not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+        return array
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    values = pc.utf8_trim_whitespace(array)
+
+    if inferred == BOOLEAN:
+        lowered = pc.utf8_lower(values)
+        known = pc.is_in(lowered, value_set=pa.array(TRUE_VALUES + FALSE_VALUES))
+        return pc.if_else(known, pc.is_in(lowered, value_set=pa.array(TRUE_VALUES)), None)
+    if inferred == DATE:
+        parsed = pc.strptime(values, format=column_type['format'], unit='s', error_is_null=True)
+        return pc.cast(parsed, pa.date32())
+    if inferred == DATETIME:
+        parsed = pd.to_datetime(values.to_pandas(), format='ISO8601', utc=True, errors='coerce')
+        return pa.array(parsed, type=pa.timestamp('us', tz='UTC'))
+
+    pattern = {INTEGER: INTEGER_PATTERN, DECIMAL: DECIMAL_PATTERN, CURRENCY: CURRENCY_PATTERN}[inferred]
+    valid = pc.fill_null(pc.match_substring_regex(values, pattern), False)
+    if inferred == CURRENCY:
+        amounts = pc.extract_regex(values, r'(?P<amount>\d[\d,]*(?:\.\d+)?)').field('amount')
+        numbers = _cast_decimal(pc.replace_substring(amounts, ',', ''), valid, _decimal_type(column_type))
+        # The sign may sit before or after the symbol ('-$5', '$-5')
+        numbers = pc.if_else(pc.match_substring(values, '-'), pc.negate(numbers), numbers)
+        return numbers
+    # Arrow's integer parser rejects a leading '+'
+    digits = pc.replace_substring_regex(values, r'^\+|,', '')
+    if inferred == DECIMAL:
+        return _cast_decimal(digits, valid, _decimal_type(column_type))
+    return pc.cast(pc.if_else(valid, digits, None), _ARROW_TYPES[inferred](column_type))
+
+
+def _cast_decimal(digits: 'pa.Array', valid: 'pa.Array', value_type: 'pa.DataType') -> 'pa.Array':
+    """
+    Cast number strings to an exact decimal type.
+
+    Values whose digits don't fit the precision/scale inferred from the
+    sample become nulls rather than failing the batch or being rounded.
+    Plain numbers are checked by counting digits; the rare scientific
+    notation values are checked one by one.
+    """
+    parts = pc.extract_regex(digits, _PLAIN_DIGITS)
+    plain = pc.fill_null(pc.and_(valid, pc.is_valid(parts)), False)
+    fits = pc.and_(pc.less_equal(pc.utf8_length(parts.field('whole')), value_type.precision - value_type.scale),
+                   pc.less_equal(pc.utf8_length(parts.field('fraction')), value_type.scale))
+    fits = pc.and_(plain, pc.fill_null(fits, False))
+    numbers = pc.cast(pc.if_else(fits, digits, None), value_type)
+
+    scientific = pc.and_(valid, pc.invert(plain))
+    if not pc.any(scientific).as_py():
+        return numbers
+    context = Context(prec=MAX_DECIMAL_PRECISION * 2)
+    quantum = Decimal(1).scaleb(-value_type.scale)
+    exact = []
+    for value, check in zip(digits.to_pylist(), scientific.to_pylist()):
+        number = None
+        if check:
+            try:
+                number = Decimal(value).quantize(quantum, context=context)
+                if number != Decimal(value) or len(number.as_tuple().digits) > value_type.precision:
+                    number = None
+            except InvalidOperation:
+                number = None
+        exact.append(number)
+    return pc.if_else(scientific, pa.array(exact, type=value_type), numbers)
+
+
+def typed_schema(schema: 'pa.Schema', column_types: Dict[str, Dict[str, Any]]) -> 'pa.Schema':
+    """
+    Refine the string columns of a schema with inferred types.
+
+    Args:
+        schema: Arrow schema, e.g. from connectors.columnar.arrow_schema
+        column_types: infer_types result
+
+    Returns:
+        Schema with inferred types for string columns
+    """
+    fields = []
+    for field in schema:
+        inferred = column_types.get(field.name, {}).get('type')
+        if pa.types.is_string(field.type) and inferred in _ARROW_TYPES:
+            field = field.with_type(_ARROW_TYPES[inferred](column_types[field.name]))
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def cast_batch(batch: 'pa.RecordBatch', column_types: Dict[str, Dict[str, Any]]) -> 'pa.RecordBatch':
+    """
+    Cast the string columns of a batch to their inferred types.
+
+    Args:
+        batch: RecordBatch
+        column_types: infer_types result
+
+    Returns:
+        RecordBatch matching typed_schema(batch.schema, column_types)
+    """
+    schema = typed_schema(batch.schema, column_types)
+    columns = [cast_column(column, column_types[field.name]) if field.name in column_types else column
+               for field, column in zip(batch.schema, batch.columns)]
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class TypeInferencer:
+    """
+    Infers entity column types once per schema version.
+
+    Results are cached by entity, the schema_hash of get_schema and the
+    sampled fields, so a sync only samples and re-infers when NetSuite's
+    schema changed.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, sample_size: int = DEFAULT_SAMPLE_SIZE, seed: int = 0):
+        """
+        Initialize the inferencer.
+
+        Args:
+            threshold: Fraction of values that must match a type
+            sample_size: Rows sampled per entity
+            seed: Sampling seed
+        """
+        self.threshold = threshold
+        self.sample_size = sample_size
+        self.seed = seed
+        self._cache: Dict[Tuple[str, Optional[str], Optional[Tuple[str, ...]]], Dict[str, Dict[str, Any]]] = {}
+
+    def infer_entity(self, connector: Any, entity: str, sample: Optional[Any] = None,
+                     fields: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the inferred column types of an entity.
+
+        Args:
+            connector: Connected ERPConnector
+            entity: Entity/table name
+            sample: Optional sample to infer from; by default a reservoir
+                sample of the entity is drawn from the connector on a cache miss
+            fields: Optional fields to sample
+
+        Returns:
+            Dict mapping column name to its infer_column result
+        """
+        schema_hash = connector.get_schema(entity).get('schema_hash')
+        key = (entity, schema_hash, tuple(fields) if fields is not None else None)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        if sample is None:
+            from .sampling import ReservoirSampler, sample_entity
+
+            sampler = ReservoirSampler(size=self.sample_size, seed=self.seed)
+            sample = sample_entity(connector, entity, sampler, fields=fields, columnar=False).sample()
+        column_types = infer_types(sample, self.threshold)
+        self._cache[key] = column_types
+        logger.info(f"Inferred {len(column_types)} column types of {entity} (schema {schema_hash})")
+        return column_types
+
+    def invalidate(self, entity: Optional[str] = None):
+        """
+        Drop cached types.
+
+        Args:
+            entity: Entity to drop, all entities by default
+        """
+        for key in [key for key in self._cache if entity is None or key[0] == entity]:
+            del self._cache[key]
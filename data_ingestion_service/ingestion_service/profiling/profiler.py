@@ -0,0 +1,360 @@
+import json
+import logging
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from ..connectors.columnar import pa, require_pyarrow
+from .sketches import CountMinSketch, HyperLogLog, KLLSketch, SpaceSaving, hash_values
+
+try:
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pc = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 10
+DEFAULT_TOP_K_CANDIDATES = 1000
+DEFAULT_HLL_PRECISION = 14
+DEFAULT_QUANTILE_K = 200
+DEFAULT_COUNT_MIN_WIDTH = 2048
+DEFAULT_COUNT_MIN_DEPTH = 4
+
+QUANTILES = {'p01': 0.01, 'p05': 0.05, 'p25': 0.25, 'p50': 0.5, 'p75': 0.75, 'p95': 0.95, 'p99': 0.99}
+
+
+def _orderable(value_type: 'pa.DataType') -> bool:
+    return (pa.types.is_integer(value_type) or pa.types.is_floating(value_type) or pa.types.is_decimal(value_type)
+            or pa.types.is_boolean(value_type) or pa.types.is_temporal(value_type)
+            or pa.types.is_string(value_type) or pa.types.is_large_string(value_type))
+
+
+def _numeric(value_type: 'pa.DataType') -> bool:
+    return pa.types.is_integer(value_type) or pa.types.is_floating(value_type) or pa.types.is_decimal(value_type)
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, default=str, sort_keys=True)
+
+
+def _countable(array: Any) -> Any:
+    """
+    Values Arrow can count and hash: nested values (lists, structs, maps)
+    become their JSON text, other arrays are returned as they are.
+    """
+    if not pa.types.is_nested(array.type):
+        return array
+    return pa.array([_json(value) for value in array.to_pylist()], pa.string())
+
+
+class ColumnProfile:
+    """
+    Mergeable statistics of one column.
+
+    Each update runs a handful of Arrow compute kernels over a whole batch;
+    per-batch partial results are folded in with Chan et al.'s parallel
+    variance formula, so profiles of separate batches, workers, processes or
+    incremental syncs can be merged into the profile of their union.
+
+    Distinct counts, quantiles and frequencies come from fixed-size sketches
+    (see profiling.sketches) whose accuracy/memory trade-off is set by the
+    constructor arguments.
+
+    A column whose first batches are all null takes the type of its first
+    batch with values. Nested values are counted by their JSON text and get
+    no min/max.
+    """
+
+    def __init__(self, name: str, value_type: 'pa.DataType', top_k: int = DEFAULT_TOP_K,
+                 top_k_candidates: int = DEFAULT_TOP_K_CANDIDATES, hll_precision: int = DEFAULT_HLL_PRECISION,
+                 quantile_k: int = DEFAULT_QUANTILE_K, count_min_width: int = DEFAULT_COUNT_MIN_WIDTH,
+                 count_min_depth: int = DEFAULT_COUNT_MIN_DEPTH, seed: Optional[int] = None):
+        """
+        Initialize an empty profile.
+
+        Args:
+            name: Column name
+            value_type: Arrow type of the column
+            top_k: Number of most frequent values reported
+            top_k_candidates: Values tracked by the heavy-hitter summary
+            hll_precision: HyperLogLog precision of the distinct estimate
+            quantile_k: KLL sketch size of numeric quantiles
+            count_min_width: Counters per count-min row
+            count_min_depth: Count-min rows
+            seed: Seed of the quantile sketch, for reproducible profiles
+        """
+        self.name = name
+        self.value_type = value_type
+        self.top_k = top_k
+        self.quantile_k = quantile_k
+        self.seed = seed
+        self.count = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.distinct_sketch = HyperLogLog(hll_precision)
+        self.heavy_hitters = SpaceSaving(max(top_k, top_k_candidates))
+        self.frequencies = CountMinSketch(count_min_width, count_min_depth)
+        self.quantile_sketch = KLLSketch(quantile_k, seed) if _numeric(value_type) else None
+
+    def _adopt_type(self, value_type: 'pa.DataType'):
+        """Type a column that so far only held nulls."""
+        if not pa.types.is_null(self.value_type) or pa.types.is_null(value_type):
+            return
+        self.value_type = value_type
+        if _numeric(value_type):
+            self.quantile_sketch = KLLSketch(self.quantile_k, self.seed)
+
+    def update(self, array: Any):
+        """
+        Add a batch of column values.
+
+        Args:
+            array: pyarrow Array or ChunkedArray of the column's type
+        """
+        self._adopt_type(array.type)
+        self.nulls += array.null_count
+        if array.null_count:
+            array = pc.drop_null(array)
+        count = len(array)
+        if count == 0:
+            return
+
+        if _orderable(self.value_type):
+            bounds = pc.min_max(array)
+            self._merge_bounds(bounds['min'].as_py(), bounds['max'].as_py())
+        if _numeric(self.value_type):
+            values = pc.cast(array, pa.float64())
+            self._merge_moments(count, pc.mean(values).as_py(), pc.variance(values, ddof=0).as_py() * count)
+            self.quantile_sketch.update(values.to_numpy())
+        self.count += count
+
+        counts = pc.value_counts(_countable(array))
+        values, frequencies = counts.field('values'), counts.field('counts').to_numpy()
+        hashes = hash_values(values)
+        self.distinct_sketch.update(hashes)
+        self.frequencies.update(hashes, frequencies)
+        self.heavy_hitters.update(values, frequencies)
+
+    def _merge_bounds(self, low: Any, high: Any):
+        if low is not None and (self.min is None or low < self.min):
+            self.min = low
+        if high is not None and (self.max is None or high > self.max):
+            self.max = high
+
+    def _merge_moments(self, count: int, mean: float, m2: float):
+        # self.count is still the number of values before this merge
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+
+    def merge(self, other: 'ColumnProfile'):
+        """
+        Fold another profile of the same column into this one.
+
+        Args:
+            other: Profile built from other batches
+        """
+        self.nulls += other.nulls
+        if other.count == 0:
+            return
+        self._adopt_type(other.value_type)
+        self._merge_bounds(other.min, other.max)
+        if _numeric(self.value_type):
+            self._merge_moments(other.count, other.mean, other.m2)
+            self.quantile_sketch.merge(other.quantile_sketch)
+        self.count += other.count
+        self.distinct_sketch.merge(other.distinct_sketch)
+        self.frequencies.merge(other.frequencies)
+        self.heavy_hitters.merge(other.heavy_hitters)
+
+    @property
+    def distinct(self) -> int:
+        """Estimated number of distinct non-null values."""
+        return min(self.count, self.distinct_sketch.estimate())
+
+    @property
+    def stddev(self) -> Optional[float]:
+        """Sample standard deviation."""
+        if not _numeric(self.value_type) or self.count < 2:
+            return None
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def quantiles(self, fractions: List[float]) -> List[Optional[float]]:
+        """
+        Estimate quantiles of a numeric column.
+
+        Args:
+            fractions: Quantiles between 0 and 1
+
+        Returns:
+            Estimated value for each fraction, None for non-numeric or empty columns
+        """
+        if self.quantile_sketch is None:
+            return [None for _ in fractions]
+        return self.quantile_sketch.quantiles(fractions)
+
+    def frequency(self, value: Any) -> int:
+        """
+        Estimate how often a value occurred.
+
+        Args:
+            value: Value to look up
+
+        Returns:
+            Upper bound of the value's frequency, exact for tracked heavy hitters
+        """
+        value_type = self.value_type
+        if pa.types.is_nested(value_type):
+            value, value_type = _json(value), pa.string()
+        count, error = self.heavy_hitters.estimate(value)
+        if error == 0 and count > 0:
+            return count
+        sketched = int(self.frequencies.estimate(hash_values(pa.array([value], type=value_type)))[0])
+        return min(count, sketched) if count else sketched
+
+    def top(self) -> List[Dict[str, Any]]:
+        """
+        Get the most frequent values.
+
+        Returns:
+            Up to top_k {'value', 'count', 'error'} dicts, most frequent first;
+            the true frequency lies between count - error and count
+        """
+        return [{'value': value, 'count': count, 'error': error}
+                for value, count, error in self.heavy_hitters.top(self.top_k)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the profile as a plain dict.
+
+        Returns:
+            Dict with name, type, count, nulls, null_fraction, min, max, mean,
+            stddev, quantiles, distinct and top_k
+        """
+        rows = self.count + self.nulls
+        numeric = _numeric(self.value_type) and self.count > 0
+        return {
+            'name': self.name,
+            'type': str(self.value_type),
+            'count': self.count,
+            'nulls': self.nulls,
+            'null_fraction': self.nulls / rows if rows else 0.0,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean if numeric else None,
+            'stddev': self.stddev,
+            'quantiles': dict(zip(QUANTILES, self.quantiles(list(QUANTILES.values())))) if numeric else None,
+            'distinct': self.distinct,
+            'top_k': self.top(),
+        }
+
+
+class TableProfile:
+    """
+    Mergeable profile of every column of a stream of batches.
+    """
+
+    def __init__(self, **column_options):
+        """
+        Initialize an empty profile.
+
+        Args:
+            **column_options: ColumnProfile arguments (top_k, hll_precision, ...)
+                used for every column
+        """
+        require_pyarrow()
+        self.column_options = column_options
+        self.rows = 0
+        self.columns: Dict[str, ColumnProfile] = {}
+
+    def _column(self, name: str, value_type: 'pa.DataType') -> ColumnProfile:
+        column = self.columns.get(name)
+        if column is None:
+            column = self.columns[name] = ColumnProfile(name, value_type, **self.column_options)
+        return column
+
+    def update(self, batch: Any):
+        """
+        Add a batch of rows.
+
+        Args:
+            batch: pyarrow RecordBatch or Table, a pandas DataFrame or a list of row dicts
+        """
+        if isinstance(batch, pd.DataFrame):
+            batch = pa.RecordBatch.from_pandas(batch, preserve_index=False)
+        elif isinstance(batch, list):
+            batch = pa.RecordBatch.from_pylist(batch)
+        self.rows += batch.num_rows
+        for field, column in zip(batch.schema, batch.columns):
+            self._column(field.name, field.type).update(column)
+
+    def merge(self, other: 'TableProfile'):
+        """
+        Fold another profile of the same table into this one.
+
+        Args:
+            other: Profile built from other batches
+        """
+        self.rows += other.rows
+        for name, column in other.columns.items():
+            self._column(name, column.value_type).merge(column)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the profile as a plain dict.
+
+        Returns:
+            Dict with the row count and a 'columns' list of column profiles
+        """
+        return {'rows': self.rows, 'columns': [column.to_dict() for column in self.columns.values()]}
+
+
+def profile_batches(batches: Iterable[Any], **kwargs) -> TableProfile:
+    """
+    Profile a stream of batches in one pass.
+
+    Args:
+        batches: pyarrow RecordBatches/Tables or pandas DataFrames
+        **kwargs: TableProfile arguments
+
+    Returns:
+        The TableProfile of all batches
+    """
+    profile = TableProfile(**kwargs)
+    for batch in batches:
+        profile.update(batch)
+    return profile
+
+
+def profile_entity(connector: Any, entity: str, filters: Optional[Any] = None, fields: Optional[List[str]] = None,
+                   batch_size: int = 10000, sampler: Optional[Any] = None, **kwargs) -> TableProfile:
+    """
+    Profile an entity straight from a connector, one batch in memory at a time.
+
+    Args:
+        connector: Connected ERPConnector
+        entity: Entity/table name
+        filters: Optional filters to apply
+        fields: Optional fields to profile, all schema fields by default
+        batch_size: Rows per batch
+        sampler: Optional ReservoirSampler/StratifiedSampler (see profiling.sampling);
+            only its sample is profiled, so profiling cost stays flat as the entity grows
+        **kwargs: TableProfile arguments
+
+    Returns:
+        The TableProfile of the entity (of the sample when a sampler is given)
+    """
+    batches = connector.iter_batches(entity, filters=filters, fields=fields, batch_size=batch_size)
+    if sampler is not None:
+        for batch in batches:
+            sampler.update(batch)
+        batches = [sampler.sample()]
+    profile = profile_batches(batches, **kwargs)
+    logger.info(f"Profiled {profile.rows} {entity} rows across {len(profile.columns)} columns")
+    return profile
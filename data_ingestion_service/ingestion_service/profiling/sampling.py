@@ -0,0 +1,363 @@
+import logging
+import math
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..connectors.columnar import pa, require_pyarrow
+from .sketches import hash_values
+
+try:
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pc = None
+
+logger = logging.getLogger(__name__)
+
+OTHER_STRATUM = '__other__'
+NULL_STRATUM = '__null__'
+
+_PERIOD_FORMATS = {'day': '%Y-%m-%d', 'month': '%Y-%m', 'year': '%Y'}
+
+
+def _mix(hashes: np.ndarray, seed: int) -> np.ndarray:
+    """splitmix64 finalizer of seeded hashes, so each seed gives an independent sample."""
+    with np.errstate(over='ignore'):
+        z = hashes + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def _num_rows(batch: Any) -> int:
+    return len(batch) if isinstance(batch, list) else batch.num_rows
+
+
+def _take(batch: Any, indices: np.ndarray) -> Any:
+    if isinstance(batch, list):
+        return [batch[i] for i in indices]
+    return batch.take(pa.array(indices))
+
+
+def _column(batch: Any, name: str) -> 'pa.Array':
+    if isinstance(batch, list):
+        return pa.array([row.get(name) for row in batch])
+    return batch.column(name)
+
+
+def _normalize(batch: Any) -> Any:
+    if isinstance(batch, pd.DataFrame):
+        return pa.RecordBatch.from_pandas(batch, preserve_index=False)
+    return batch
+
+
+class ReservoirSampler:
+    """
+    Uniform fixed-size sample of a stream of batches.
+
+    Every row gets a random key and the rows with the smallest keys are
+    kept (bottom-k sampling), which is a uniform sample without replacement
+    computed with vectorized selection per batch rather than a per-row
+    loop. Keys come from a seeded generator, or from a hash of key_field so
+    the same records are sampled on every run and partial samples of
+    separate workers merge into a sample of the whole stream.
+
+    Memory is bounded by size rows, or fewer when max_bytes is set.
+    """
+
+    def __init__(self, size: int = 10000, seed: int = 0, key_field: Optional[str] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Initialize an empty sampler.
+
+        Args:
+            size: Maximum number of sampled rows
+            seed: Seed of the row keys
+            key_field: Field hashed into the row keys (e.g. 'internalId') for
+                samples that are stable across runs and mergeable
+            max_bytes: Optional memory budget of the sample
+        """
+        self.size = size
+        self.seed = seed
+        self.key_field = key_field
+        self.max_bytes = max_bytes
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+        self._parts: List[Any] = []
+        self._keys: List[np.ndarray] = []
+        self._buffered = 0
+        self._threshold = math.inf
+        self._row_bytes: Optional[float] = None
+
+    @property
+    def capacity(self) -> int:
+        """Rows kept, limited by max_bytes once the row size is known."""
+        if self.max_bytes is None or not self._row_bytes:
+            return self.size
+        return max(1, min(self.size, int(self.max_bytes // self._row_bytes)))
+
+    @property
+    def fraction(self) -> float:
+        """Fraction of the rows seen that are in the sample."""
+        return min(self.seen, self.capacity) / self.seen if self.seen else 0.0
+
+    def keys(self, batch: Any) -> np.ndarray:
+        """
+        Draw the sampling keys of a batch's rows.
+
+        Args:
+            batch: RecordBatch, Table or list of row dicts
+
+        Returns:
+            Keys in [0, 1), one per row
+        """
+        if self.key_field is None:
+            return self._rng.random(_num_rows(batch))
+        values = pc.fill_null(pc.cast(_column(batch, self.key_field), pa.string()), '')
+        return (_mix(hash_values(values), self.seed) >> np.uint64(11)) * (1.0 / 2 ** 53)
+
+    def _measure(self, batch: Any):
+        if isinstance(batch, list):
+            rows = batch[:100]
+            size = sum(sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values()) for row in rows)
+        else:
+            rows, size = batch, batch.nbytes
+        row_bytes = size / max(1, _num_rows(rows))
+        self._row_bytes = row_bytes if self._row_bytes is None else max(self._row_bytes, row_bytes)
+
+    def offer(self, batch: Any, keys: np.ndarray):
+        """
+        Add a batch whose row keys were already drawn.
+
+        Args:
+            batch: RecordBatch, Table or list of row dicts
+            keys: Row keys from keys()
+        """
+        rows = _num_rows(batch)
+        if rows == 0:
+            return
+        self.seen += rows
+        if self.max_bytes is not None:
+            self._measure(batch)
+        selected = np.flatnonzero(keys < self._threshold)
+        if len(selected) == 0:
+            return
+        if len(selected) < rows:
+            batch, keys = _take(batch, selected), keys[selected]
+        self._parts.append(batch)
+        self._keys.append(keys)
+        self._buffered += len(keys)
+        # Compacting lazily keeps selection amortized O(rows) per batch
+        if self._buffered > 2 * self.capacity:
+            self._compact()
+
+    def update(self, batch: Any):
+        """
+        Add a batch of rows.
+
+        Args:
+            batch: RecordBatch, Table, pandas DataFrame or list of row dicts
+        """
+        batch = _normalize(batch)
+        self.offer(batch, self.keys(batch))
+
+    def _compact(self):
+        if not self._parts:
+            return
+        keys = np.concatenate(self._keys)
+        if isinstance(self._parts[0], list):
+            rows = [row for part in self._parts for row in part]
+        else:
+            rows = pa.concat_tables([pa.Table.from_batches([part]) if isinstance(part, pa.RecordBatch) else part
+                                     for part in self._parts], promote_options='default')
+        capacity = self.capacity
+        order = np.argsort(keys, kind='stable')[:capacity]
+        rows, keys = _take(rows, order), keys[order]
+        if len(keys) == capacity:
+            self._threshold = float(keys[-1])
+        self._parts, self._keys, self._buffered = [rows], [keys], len(keys)
+
+    def merge(self, other: 'ReservoirSampler'):
+        """
+        Fold in the sampler of another part of the stream.
+
+        Only meaningful with key_field set, or with samplers whose seeds differ,
+        so the two key sequences are independent.
+
+        Args:
+            other: Sampler of other rows
+        """
+        other._compact()
+        seen = self.seen
+        for part, keys in zip(other._parts, other._keys):
+            self.offer(part, keys)
+        self.seen = seen + other.seen
+        self._row_bytes = max(filter(None, [self._row_bytes, other._row_bytes]), default=None)
+
+    def sample(self) -> Any:
+        """
+        Get the sample.
+
+        Returns:
+            Arrow Table (list of row dicts if fed lists) ordered by row key
+        """
+        self._compact()
+        if not self._parts:
+            return []
+        return self._parts[0]
+
+
+class StratifiedSampler:
+    """
+    Fixed-size sample per stratum, e.g. per subsidiary or per month.
+
+    Small strata are kept whole while large ones are down-sampled, so rare
+    subsidiaries or periods stay represented. Memory is bounded by
+    size_per_stratum * max_strata rows; strata beyond max_strata share one
+    '__other__' stratum.
+    """
+
+    def __init__(self, stratify_by: str, size_per_stratum: int = 1000, seed: int = 0,
+                 key_field: Optional[str] = None, period: Optional[str] = None, max_strata: int = 100,
+                 max_bytes: Optional[int] = None):
+        """
+        Initialize an empty sampler.
+
+        Args:
+            stratify_by: Field whose value defines the stratum
+            size_per_stratum: Maximum sampled rows per stratum
+            seed: Seed of the row keys
+            key_field: Field hashed into the row keys (see ReservoirSampler)
+            period: Bucket a date/datetime field by 'day', 'month', 'quarter' or 'year'
+            max_strata: Maximum number of distinct strata
+            max_bytes: Optional memory budget of the whole sample
+        """
+        if period is not None and period not in _PERIOD_FORMATS and period != 'quarter':
+            raise ValueError(f"Unsupported period: {period}")
+        self.stratify_by = stratify_by
+        self.size_per_stratum = size_per_stratum
+        self.period = period
+        self.max_strata = max_strata
+        self.max_bytes = max_bytes
+        # Only draws row keys, so every stratum shares one key sequence
+        self._key_source = ReservoirSampler(seed=seed, key_field=key_field)
+        self.strata: Dict[str, ReservoirSampler] = {}
+
+    def _labels(self, batch: Any) -> np.ndarray:
+        column = _column(batch, self.stratify_by)
+        if self.period == 'quarter':
+            column = pc.binary_join_element_wise(pc.cast(pc.year(column), pa.string()),
+                                                 pc.cast(pc.quarter(column), pa.string()), '-Q')
+        elif self.period is not None:
+            column = pc.strftime(column, format=_PERIOD_FORMATS[self.period])
+        labels = pc.fill_null(pc.cast(column, pa.string()), NULL_STRATUM)
+        return labels.to_numpy(zero_copy_only=False)
+
+    def _stratum(self, label: str) -> ReservoirSampler:
+        if label not in self.strata and len(self.strata) >= self.max_strata - 1:
+            label = OTHER_STRATUM
+        stratum = self.strata.get(label)
+        if stratum is None:
+            budget = self.max_bytes // self.max_strata if self.max_bytes is not None else None
+            stratum = self.strata[label] = ReservoirSampler(self.size_per_stratum, max_bytes=budget)
+        return stratum
+
+    def update(self, batch: Any):
+        """
+        Add a batch of rows.
+
+        Args:
+            batch: RecordBatch, Table, pandas DataFrame or list of row dicts
+        """
+        batch = _normalize(batch)
+        if _num_rows(batch) == 0:
+            return
+        keys = self._key_source.keys(batch)
+        labels = self._labels(batch)
+        order = np.argsort(labels, kind='stable')
+        values, starts = np.unique(labels[order], return_index=True)
+        for label, rows in zip(values, np.split(order, starts[1:])):
+            self._stratum(str(label)).offer(_take(batch, rows), keys[rows])
+
+    @property
+    def seen(self) -> int:
+        """Rows seen across all strata."""
+        return sum(stratum.seen for stratum in self.strata.values())
+
+    def samples(self) -> Dict[str, Any]:
+        """
+        Get the sample of each stratum.
+
+        Returns:
+            Dict mapping stratum label to its sample
+        """
+        return {label: stratum.sample() for label, stratum in sorted(self.strata.items())}
+
+    def weights(self) -> Dict[str, float]:
+        """
+        Get the rows each sampled row stands for, per stratum.
+
+        Returns:
+            Dict mapping stratum label to seen / sampled rows
+        """
+        return {label: 1.0 / stratum.fraction for label, stratum in sorted(self.strata.items()) if stratum.seen}
+
+    def sample(self) -> Any:
+        """
+        Get all strata samples together.
+
+        Returns:
+            Arrow Table (list of row dicts if fed lists) ordered by stratum
+        """
+        parts = [part for part in self.samples().values() if _num_rows(part)]
+        if not parts:
+            return []
+        if isinstance(parts[0], list):
+            return [row for part in parts for row in part]
+        return pa.concat_tables(parts, promote_options='default')
+
+
+def sample_batches(batches: Iterable[Any], sampler: Any) -> Any:
+    """
+    Run a stream of batches through a sampler.
+
+    Args:
+        batches: RecordBatches, Tables, DataFrames or lists of row dicts
+        sampler: ReservoirSampler or StratifiedSampler
+
+    Returns:
+        The sampler, for chaining into sample()
+    """
+    for batch in batches:
+        sampler.update(batch)
+    return sampler
+
+
+def sample_entity(connector: Any, entity: str, sampler: Any, filters: Optional[Any] = None,
+                  fields: Optional[List[str]] = None, batch_size: int = 10000, columnar: bool = True) -> Any:
+    """
+    Sample an entity straight from a connector's output stream.
+
+    Args:
+        connector: Connected ERPConnector
+        entity: Entity/table name
+        sampler: ReservoirSampler or StratifiedSampler
+        filters: Optional filters to apply
+        fields: Optional fields to retrieve
+        batch_size: Rows per batch
+        columnar: Sample Arrow batches from iter_batches (requires pyarrow)
+            instead of row dicts from stream_data
+
+    Returns:
+        The sampler
+    """
+    if columnar:
+        require_pyarrow()
+        batches = connector.iter_batches(entity, filters=filters, fields=fields, batch_size=batch_size)
+    else:
+        batches = connector.stream_data(entity, filters=filters, fields=fields, batch_size=batch_size)
+    sample_batches(batches, sampler)
+    logger.info(f"Sampled {entity}: kept {_num_rows(sampler.sample())} of {sampler.seen} rows")
+    return sampler
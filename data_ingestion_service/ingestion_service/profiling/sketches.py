@@ -0,0 +1,383 @@
+import heapq
+import logging
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..connectors.columnar import pa
+
+try:
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pc = None
+
+logger = logging.getLogger(__name__)
+
+_UINT64_BITS = np.uint64(64)
+
+
+def hash_values(values: Any) -> np.ndarray:
+    """
+    Hash an Arrow array to uint64, consistently across batches and processes.
+
+    Args:
+        values: Array without nulls
+
+    Returns:
+        uint64 hashes, one per value
+    """
+    value_type = values.type
+    if (pa.types.is_integer(value_type) or pa.types.is_floating(value_type) or pa.types.is_boolean(value_type)
+            or pa.types.is_temporal(value_type)):
+        array = values.to_numpy(zero_copy_only=False)
+    else:
+        array = pc.cast(values, pa.string()).to_numpy(zero_copy_only=False)
+    # Values come from value_counts and are already unique, so skip categorizing them
+    return pd.util.hash_array(array, categorize=False)
+
+
+def _leading_zeros(values: np.ndarray) -> np.ndarray:
+    """Count leading zero bits of uint64 values."""
+    zeros = np.zeros(len(values), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        # Top `shift` bits all zero: count them and move the rest up
+        empty = values < (np.uint64(1) << (_UINT64_BITS - np.uint64(shift)))
+        zeros[empty] += shift
+        values = np.where(empty, values << np.uint64(shift), values)
+    zeros += (values >> np.uint64(63)) == 0
+    return zeros
+
+
+class HyperLogLog:
+    """
+    Cardinality sketch with 2**precision one-byte registers.
+
+    The relative standard error is about 1.04 / sqrt(2**precision), e.g.
+    0.8% for the default 16 KiB sketch. Merging takes the register-wise
+    maximum, so a merged sketch equals the sketch of the combined data.
+    """
+
+    def __init__(self, precision: int = 14):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            precision: Bits of the hash used to pick a register (4-18)
+        """
+        if not 4 <= precision <= 18:
+            raise ValueError(f"HyperLogLog precision must be between 4 and 18, got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of estimates."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, hashes: np.ndarray):
+        """
+        Add values by their 64-bit hashes.
+
+        Args:
+            hashes: uint64 hashes (see hash_values)
+        """
+        if len(hashes) == 0:
+            return
+        precision = np.uint64(self.precision)
+        index = (hashes >> (_UINT64_BITS - precision)).astype(np.intp)
+        rank = np.minimum(_leading_zeros(hashes << precision), 64 - self.precision) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other: 'HyperLogLog'):
+        """
+        Fold another sketch of the same precision into this one.
+
+        Args:
+            other: Sketch built from other data
+        """
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog precision {other.precision} into {self.precision}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        """
+        Estimate the number of distinct values.
+
+        Returns:
+            Estimated cardinality
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is far more accurate while many registers are empty
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class KLLSketch:
+    """
+    Quantile sketch (Karnin, Lang and Liberty) over float values.
+
+    Values live in levels of compactors; level h items stand for 2**h
+    values. A full level is sorted and every other item, from a random
+    offset, is promoted. Rank error is about 1.7 / k of the count with k=200
+    keeping a few hundred floats regardless of how many values were added.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            k: Capacity of the top level; larger is more accurate
+            seed: Seed of the compaction coin flips, for reproducible sketches
+        """
+        self.k = max(8, k)
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so every promoted pair is complete
+                keep, items = (items[-1:], items[:-1]) if len(items) % 2 else (items[:0], items)
+                promoted = items[int(self._rng.integers(2))::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values: np.ndarray):
+        """
+        Add values.
+
+        Args:
+            values: float values without NaNs
+        """
+        if len(values) == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other: 'KLLSketch'):
+        """
+        Fold another sketch into this one.
+
+        Args:
+            other: Sketch built from other data
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def _weighted(self) -> Tuple[np.ndarray, np.ndarray]:
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2.0 ** level) for level, values in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, fractions: List[float]) -> List[Optional[float]]:
+        """
+        Estimate quantiles.
+
+        Args:
+            fractions: Quantiles between 0 and 1
+
+        Returns:
+            Estimated value for each fraction, None if the sketch is empty
+        """
+        if self.count == 0:
+            return [None for _ in fractions]
+        items, cumulative = self._weighted()
+        positions = np.searchsorted(cumulative, np.asarray(fractions) * cumulative[-1], side='left')
+        return items[np.minimum(positions, len(items) - 1)].tolist()
+
+    def rank(self, value: float) -> float:
+        """
+        Estimate the fraction of values less than or equal to a value.
+
+        Args:
+            value: Value to rank
+
+        Returns:
+            Fraction between 0 and 1
+        """
+        if self.count == 0:
+            return 0.0
+        items, cumulative = self._weighted()
+        position = np.searchsorted(items, value, side='right')
+        return float(cumulative[position - 1] / cumulative[-1]) if position else 0.0
+
+
+class CountMinSketch:
+    """
+    Frequency sketch answering 'how often did this value occur' for any value.
+
+    Estimates never undercount and overcount by at most e / width of the
+    total count with probability 1 - exp(-depth).
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4, seed: int = 0):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            width: Counters per row
+            depth: Number of rows (independent hash functions)
+            seed: Seed of the row hash functions; sketches only merge with the same seed
+        """
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        # Odd multipliers for multiply-shift hashing of the 64-bit value hashes
+        self._multipliers = np.random.default_rng(seed).integers(1, 2**63, size=depth, dtype=np.uint64) | np.uint64(1)
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        mixed = hashes[np.newaxis, :] * self._multipliers[:, np.newaxis]
+        return ((mixed >> np.uint64(32)) % np.uint64(self.width)).astype(np.intp)
+
+    def update(self, hashes: np.ndarray, counts: np.ndarray):
+        """
+        Add occurrences of values.
+
+        Args:
+            hashes: uint64 hashes of the values
+            counts: Occurrences of each value
+        """
+        if len(hashes) == 0:
+            return
+        for row, columns in enumerate(self._columns(hashes)):
+            self.table[row] += np.bincount(columns, weights=counts, minlength=self.width).astype(np.int64)
+
+    def merge(self, other: 'CountMinSketch'):
+        """
+        Fold another sketch with the same shape and seed into this one.
+
+        Args:
+            other: Sketch built from other data
+        """
+        if (other.width, other.depth, other.seed) != (self.width, self.depth, self.seed):
+            raise ValueError("Cannot merge count-min sketches of different shapes or seeds")
+        self.table += other.table
+
+    def estimate(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Estimate the frequencies of values.
+
+        Args:
+            hashes: uint64 hashes of the values
+
+        Returns:
+            int64 upper bounds of each value's frequency
+        """
+        return self.table[np.arange(self.depth)[:, np.newaxis], self._columns(hashes)].min(axis=0)
+
+
+class SpaceSaving:
+    """
+    Heavy-hitter summary tracking the most frequent values (Metwally et al.).
+
+    Each tracked value has a count that never undercounts and an error bound
+    (true frequency >= count - error); untracked values occurred at most
+    `floor` times. Summaries merge following Agarwal et al.'s mergeable
+    summaries, so the reported top values stay correct across batches.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize an empty summary.
+
+        Args:
+            capacity: Number of values tracked
+        """
+        self.capacity = capacity
+        self.counts: Dict[Any, int] = {}
+        self.errors: Dict[Any, int] = {}
+        self.floor = 0
+
+    def _merge(self, counts: Dict[Any, int], errors: Dict[Any, int], floor: int):
+        merged_counts, merged_errors = {}, {}
+        for value in self.counts.keys() | counts.keys():
+            merged_counts[value] = self.counts.get(value, self.floor) + counts.get(value, floor)
+            merged_errors[value] = (self.errors.get(value, self.floor) + errors.get(value, floor))
+        dropped_floor = 0
+        if len(merged_counts) > self.capacity:
+            kept = heapq.nlargest(self.capacity + 1, merged_counts.items(), key=lambda item: item[1])
+            dropped_floor = kept.pop()[1]
+            merged_counts = dict(kept)
+            merged_errors = {value: merged_errors[value] for value in merged_counts}
+        self.counts, self.errors = merged_counts, merged_errors
+        self.floor = max(self.floor + floor, dropped_floor)
+
+    def update(self, values: Any, counts: np.ndarray):
+        """
+        Add the distinct values of a batch with their exact counts.
+
+        Args:
+            values: Distinct values, as a list or Arrow array
+            counts: Occurrences of each value
+        """
+        floor = 0
+        if len(values) > self.capacity:
+            # Everything below the batch's capacity-th heaviest value can't be a heavy hitter yet
+            order = np.argpartition(-counts, self.capacity)
+            heaviest, rest = order[:self.capacity], order[self.capacity:]
+            floor = int(counts[rest].max())
+            values = values.take(pa.array(heaviest)) if hasattr(values, 'take') else [values[i] for i in heaviest]
+            counts = counts[heaviest]
+        values = values.to_pylist() if hasattr(values, 'to_pylist') else list(values)
+        self._merge(dict(zip(values, np.asarray(counts).tolist())), {}, floor)
+
+    def merge(self, other: 'SpaceSaving'):
+        """
+        Fold another summary into this one.
+
+        Args:
+            other: Summary built from other data
+        """
+        self._merge(other.counts, other.errors, other.floor)
+
+    def estimate(self, value: Any) -> Tuple[int, int]:
+        """
+        Get a value's frequency bounds.
+
+        Args:
+            value: Value to look up
+
+        Returns:
+            (count, error): the true frequency lies in [count - error, count]
+        """
+        if value in self.counts:
+            return self.counts[value], self.errors[value]
+        return self.floor, self.floor
+
+    def top(self, n: int) -> List[Tuple[Any, int, int]]:
+        """
+        Get the most frequent values.
+
+        Args:
+            n: Number of values
+
+        Returns:
+            (value, count, error) tuples, most frequent first
+        """
+        top = heapq.nlargest(n, self.counts.items(), key=lambda item: item[1])
+        return [(value, count, self.errors[value]) for value, count in top]
@@ -0,0 +1,174 @@
+import logging
+import pickle
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from .profiler import ColumnProfile, TableProfile
+
+logger = logging.getLogger(__name__)
+
+# Bump when ColumnProfile/sketch state changes incompatibly; older rows are ignored
+SKETCH_FORMAT = 1
+
+
+class SketchStore:
+    """
+    Column profiles (with their sketches) per tenant, entity, partition and column, backed by SQLite.
+
+    Incremental syncs profile only the rows they extracted and merge them
+    into the stored partition profile, so statistics over the full history
+    never have to be recomputed.
+    """
+
+    def __init__(self, path: str = 'profiles.db'):
+        """
+        Initialize the store, creating the table if needed.
+
+        Args:
+            path: SQLite database file (':memory:' for tests)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS column_sketches ('
+            ' tenant_id TEXT NOT NULL,'
+            ' entity TEXT NOT NULL,'
+            ' partition TEXT NOT NULL,'
+            ' column_name TEXT NOT NULL,'
+            ' rows INTEGER NOT NULL,'
+            ' format INTEGER NOT NULL,'
+            ' sketch BLOB NOT NULL,'
+            ' updated_at TEXT NOT NULL,'
+            ' PRIMARY KEY (tenant_id, entity, partition, column_name))'
+        )
+
+    def _select(self, tenant_id: str, entity: str, partitions: Optional[List[str]] = None,
+                columns: Optional[List[str]] = None) -> List[tuple]:
+        query = ('SELECT partition, column_name, rows, sketch FROM column_sketches '
+                 'WHERE tenant_id = ? AND entity = ? AND format = ?')
+        params: list = [tenant_id, entity, SKETCH_FORMAT]
+        for name, values in (('partition', partitions), ('column_name', columns)):
+            if values is not None:
+                query += f" AND {name} IN ({', '.join('?' for _ in values)})"
+                params.extend(values)
+        return self._conn.execute(query + ' ORDER BY partition, column_name', params).fetchall()
+
+    def merge(self, tenant_id: str, entity: str, partition: str, profile: TableProfile,
+              replace: bool = False) -> TableProfile:
+        """
+        Merge a profile of new rows into a stored partition.
+
+        Args:
+            tenant_id: Tenant identifier
+            entity: Entity/table name
+            partition: Partition key (e.g. the extraction date)
+            profile: Profile of rows not yet included in the partition
+            replace: Overwrite the partition instead, e.g. after a full re-extraction
+
+        Returns:
+            The stored partition profile after the merge
+        """
+        updated_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                stored = TableProfile(**profile.column_options)
+                if replace:
+                    self._conn.execute('DELETE FROM column_sketches WHERE tenant_id = ? AND entity = ? '
+                                       'AND partition = ?', (tenant_id, entity, partition))
+                else:
+                    self._load_into(stored, self._select(tenant_id, entity, [partition]))
+                stored.merge(profile)
+                for name, column in stored.columns.items():
+                    self._conn.execute(
+                        'INSERT INTO column_sketches '
+                        '(tenant_id, entity, partition, column_name, rows, format, sketch, updated_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                        'ON CONFLICT (tenant_id, entity, partition, column_name) DO UPDATE SET '
+                        'rows = excluded.rows, format = excluded.format, sketch = excluded.sketch, '
+                        'updated_at = excluded.updated_at',
+                        (tenant_id, entity, partition, name, column.count + column.nulls, SKETCH_FORMAT,
+                         pickle.dumps(column, protocol=pickle.HIGHEST_PROTOCOL), updated_at),
+                    )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        logger.info(f"Merged {profile.rows} {entity} rows into tenant {tenant_id} partition {partition} sketches")
+        return stored
+
+    @staticmethod
+    def _load_into(profile: TableProfile, rows: List[tuple]):
+        rows_by_partition: Dict[str, int] = {}
+        for partition, name, row_count, sketch in rows:
+            column: ColumnProfile = pickle.loads(sketch)
+            existing = profile.columns.get(name)
+            if existing is None:
+                profile.columns[name] = column
+            else:
+                existing.merge(column)
+            rows_by_partition[partition] = max(rows_by_partition.get(partition, 0), row_count)
+        profile.rows += sum(rows_by_partition.values())
+
+    def load(self, tenant_id: str, entity: str, partitions: Optional[List[str]] = None,
+             columns: Optional[List[str]] = None) -> TableProfile:
+        """
+        Load the profile of an entity, merged across partitions.
+
+        Args:
+            tenant_id: Tenant identifier
+            entity: Entity/table name
+            partitions: Partitions to include, all by default
+            columns: Columns to include, all by default
+
+        Returns:
+            Merged TableProfile (empty if nothing is stored)
+        """
+        profile = TableProfile()
+        with self._lock:
+            rows = self._select(tenant_id, entity, partitions, columns)
+        self._load_into(profile, rows)
+        return profile
+
+    def partitions(self, tenant_id: str, entity: str) -> List[str]:
+        """
+        List the stored partitions of an entity.
+
+        Args:
+            tenant_id: Tenant identifier
+            entity: Entity/table name
+
+        Returns:
+            Sorted partition keys
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT DISTINCT partition FROM column_sketches WHERE tenant_id = ? '
+                                      'AND entity = ? ORDER BY partition', (tenant_id, entity)).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, tenant_id: str, entity: str, partition: Optional[str] = None):
+        """
+        Forget the sketches of an entity or one of its partitions.
+
+        Args:
+            tenant_id: Tenant identifier
+            entity: Entity/table name
+            partition: Partition to delete, all partitions by default
+        """
+        query = 'DELETE FROM column_sketches WHERE tenant_id = ? AND entity = ?'
+        params = [tenant_id, entity]
+        if partition is not None:
+            query += ' AND partition = ?'
+            params.append(partition)
+        with self._lock:
+            self._conn.execute(query, params)
+
+    def close(self):
+        """
+        Close the underlying database connection.
+        """
+        self._conn.close()
@@ -0,0 +1,182 @@
+import base64
+import io
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, List
+
+from .base import StorageBackend
+
+try:
+    from azure.storage.blob import BlobBlock, ContainerClient
+except ImportError:  # pragma: no cover - only needed for real Azure/Azurite containers
+    BlobBlock = None
+    ContainerClient = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+class BlockBlobWriter(io.RawIOBase):
+    """
+    Writable stream uploading a block blob as staged blocks.
+
+    Data is cut into fixed-size blocks that are staged in parallel while
+    writing continues. At most max_concurrency blocks are in flight, so memory
+    stays at roughly (max_concurrency + 1) * block_size however large the
+    blob gets. Closing the stream commits the block list, which makes the blob
+    visible atomically.
+    """
+
+    def __init__(self, blob_client: Any, block_size: int = DEFAULT_BLOCK_SIZE, max_concurrency: int = 4):
+        """
+        Initialize the writer.
+
+        Args:
+            blob_client: azure.storage.blob BlobClient (or a compatible stand-in)
+            block_size: Bytes per staged block
+            max_concurrency: Maximum number of blocks uploading at once
+        """
+        super().__init__()
+        self.blob_client = blob_client
+        self.block_size = block_size
+        self.max_concurrency = max(1, max_concurrency)
+        self._buffer = bytearray()
+        self._block_ids: List[str] = []
+        self._pending: List[Future] = []
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='blob-block')
+        self._in_flight = threading.Semaphore(self.max_concurrency)
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("write to closed BlockBlobWriter")
+        self._buffer.extend(data)
+        self._position += len(data)
+        while len(self._buffer) >= self.block_size:
+            block = bytes(self._buffer[:self.block_size])
+            del self._buffer[:self.block_size]
+            self._stage(block)
+        return len(data)
+
+    def _stage(self, block: bytes):
+        # Block ids must be base64 and of equal length within a blob
+        block_id = base64.b64encode(f'{len(self._block_ids):08d}'.encode('ascii')).decode('ascii')
+        self._block_ids.append(block_id)
+        self._in_flight.acquire()
+        future = self._executor.submit(self.blob_client.stage_block, block_id, block)
+        future.add_done_callback(lambda _: self._in_flight.release())
+        # Drop finished uploads, surfacing failures before more data is sent
+        pending = []
+        for staged in self._pending:
+            if staged.done():
+                staged.result()
+            else:
+                pending.append(staged)
+        pending.append(future)
+        self._pending = pending
+
+    def _wait(self):
+        for future in self._pending:
+            future.result()
+        self._pending = []
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._buffer:
+                self._stage(bytes(self._buffer))
+                self._buffer = bytearray()
+            self._wait()
+            blocks = [BlobBlock(block_id=block_id) for block_id in self._block_ids] if BlobBlock else self._block_ids
+            self.blob_client.commit_block_list(blocks)
+        finally:
+            self._executor.shutdown(wait=True)
+            super().close()
+
+    def abort(self):
+        """
+        Stop uploading without committing; staged blocks are discarded by the service.
+        """
+        if self.closed:
+            return
+        for future in self._pending:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        super().close()
+
+    def __del__(self):
+        # IOBase would close (and commit) an abandoned writer; discard it instead
+        self.abort()
+
+
+class AzureBlobBackend(StorageBackend):
+    """
+    Storage backend writing block blobs to an Azure Storage container.
+    """
+
+    def __init__(self, container_client: Any, prefix: str = '', block_size: int = DEFAULT_BLOCK_SIZE,
+                 max_concurrency: int = 4):
+        """
+        Initialize the backend.
+
+        Args:
+            container_client: azure.storage.blob ContainerClient (or an object with the same API)
+            prefix: Optional path prefix for every blob
+            block_size: Bytes per staged block
+            max_concurrency: Parallel block uploads per blob
+        """
+        self.container_client = container_client
+        self.prefix = prefix.strip('/')
+        self.block_size = block_size
+        self.max_concurrency = max_concurrency
+
+    @classmethod
+    def from_connection_string(cls, connection_string: str, container: str, **kwargs) -> 'AzureBlobBackend':
+        """
+        Create a backend from a storage connection string.
+
+        'UseDevelopmentStorage=true' targets a local Azurite emulator.
+
+        Args:
+            connection_string: Azure Storage connection string
+            container: Container name
+            **kwargs: Other AzureBlobBackend arguments
+
+        Returns:
+            An AzureBlobBackend
+        """
+        if ContainerClient is None:
+            raise ImportError("AzureBlobBackend requires azure-storage-blob")
+        return cls(ContainerClient.from_connection_string(connection_string, container), **kwargs)
+
+    def _blob_name(self, path: str) -> str:
+        return f'{self.prefix}/{path}' if self.prefix else path
+
+    def open_write(self, path: str) -> BinaryIO:
+        blob_client = self.container_client.get_blob_client(self._blob_name(path))
+        return BlockBlobWriter(blob_client, block_size=self.block_size, max_concurrency=self.max_concurrency)
+
+    def read_bytes(self, path: str) -> bytes:
+        return self.container_client.get_blob_client(self._blob_name(path)).download_blob().readall()
+
+    def list_paths(self, prefix: str = '') -> List[str]:
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        blobs = self.container_client.list_blobs(name_starts_with=self._blob_name(prefix))
+        return sorted(blob.name[strip:] for blob in blobs)
+
+    def delete(self, path: str):
+        blob_client = self.container_client.get_blob_client(self._blob_name(path))
+        try:
+            blob_client.delete_blob()
+        except Exception as e:
+            if type(e).__name__ != 'ResourceNotFoundError':
+                raise
@@ -0,0 +1,65 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import BinaryIO, List
+
+logger = logging.getLogger(__name__)
+
+
+class StorageBackend(ABC):
+    """
+    Abstract base class for the object stores sinks write to.
+
+    Paths are '/'-separated keys relative to the backend's root or container.
+    """
+
+    @abstractmethod
+    def open_write(self, path: str) -> BinaryIO:
+        """
+        Open an object for streaming writes.
+
+        The object only becomes visible once the returned stream is closed;
+        calling the stream's abort() instead discards everything written.
+
+        Args:
+            path: Object path
+
+        Returns:
+            Writable binary stream with an abort() method
+        """
+        pass
+
+    @abstractmethod
+    def read_bytes(self, path: str) -> bytes:
+        """
+        Read a whole object.
+
+        Args:
+            path: Object path
+
+        Returns:
+            Object content
+        """
+        pass
+
+    @abstractmethod
+    def list_paths(self, prefix: str = '') -> List[str]:
+        """
+        List object paths under a prefix.
+
+        Args:
+            prefix: Path prefix
+
+        Returns:
+            Sorted object paths
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, path: str):
+        """
+        Delete an object if it exists.
+
+        Args:
+            path: Object path
+        """
+        pass
@@ -0,0 +1,82 @@
+import io
+import logging
+import os
+import uuid
+from typing import BinaryIO, List
+
+from .base import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+class _AtomicFile(io.FileIO):
+    """File written under a temporary name and renamed into place on close."""
+
+    def __init__(self, path: str):
+        self.final_path = path
+        self.tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        super().__init__(self.tmp_path, 'wb')
+
+    def close(self):
+        if self.closed:
+            return
+        super().close()
+        os.replace(self.tmp_path, self.final_path)
+
+    def abort(self):
+        """Discard the partially written file."""
+        if not self.closed:
+            super().close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __del__(self):
+        # FileIO would close (and publish) an abandoned file; discard it instead
+        self.abort()
+
+
+class LocalFileSystemBackend(StorageBackend):
+    """
+    Storage backend writing objects as files under a root directory.
+    """
+
+    def __init__(self, root: str):
+        """
+        Initialize the backend.
+
+        Args:
+            root: Root directory, created if needed
+        """
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _full_path(self, path: str) -> str:
+        full_path = os.path.abspath(os.path.join(self.root, *path.split('/')))
+        if not full_path.startswith(self.root + os.sep):
+            raise ValueError(f"Path escapes the storage root: {path}")
+        return full_path
+
+    def open_write(self, path: str) -> BinaryIO:
+        full_path = self._full_path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        return _AtomicFile(full_path)
+
+    def read_bytes(self, path: str) -> bytes:
+        with open(self._full_path(path), 'rb') as f:
+            return f.read()
+
+    def list_paths(self, prefix: str = '') -> List[str]:
+        paths = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith('.tmp'):
+                    continue
+                relative = os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, '/')
+                if relative.startswith(prefix):
+                    paths.append(relative)
+        return sorted(paths)
+
+    def delete(self, path: str):
+        full_path = self._full_path(path)
+        if os.path.exists(full_path):
+            os.remove(full_path)
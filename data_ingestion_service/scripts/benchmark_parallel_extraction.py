@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark parallel chunked extraction against a local mock SOAP server.
+
+The server answers search requests for an internalId range with one page
+of rows per request after a fixed latency, like a remote SuiteTalk
+endpoint would. The same entity is then extracted with 1, 2, 4 and 8
+workers to show how throughput scales with the worker count.
+
+Run from the service directory:
+    python scripts/benchmark_parallel_extraction.py --records 20000 --latency 0.05
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ingestion_service.connectors.base import ERPConnector, Range  # noqa: E402
+from ingestion_service.extraction.checkpoint import ChunkCheckpointStore  # noqa: E402
+from ingestion_service.extraction.chunking import plan_id_chunks  # noqa: E402
+from ingestion_service.extraction.parallel import ParallelExtractor  # noqa: E402
+
+PAGE_SIZE = 500
+ENVELOPE = (
+    '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
+    '<soapenv:Body><search low="{low}" high="{high}" pageIndex="{page}"/></soapenv:Body>'
+    '</soapenv:Envelope>'
+)
+
+
+class MockSuiteTalkHandler(BaseHTTPRequestHandler):
+    latency = 0.05
+    total_records = 20000
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8')
+        low, high, page = (int(v) for v in re.search(
+            r'low="(\d+)" high="(\d+)" pageIndex="(\d+)"', body).groups())
+        high = min(high, self.total_records)
+        ids = list(range(low, high + 1))
+        total_pages = max(1, -(-len(ids) // PAGE_SIZE))
+        rows = ''.join(
+            f'<record internalId="{i}"><tranId>INV-{i}</tranId><amount>{i * 1.5}</amount></record>'
+            for i in ids[(page - 1) * PAGE_SIZE:page * PAGE_SIZE])
+
+        time.sleep(self.latency)
+        payload = (f'<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
+                   f'<soapenv:Body><searchResult totalPages="{total_pages}">{rows}</searchResult>'
+                   f'</soapenv:Body></soapenv:Envelope>').encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockSoapConnector(ERPConnector):
+    """Minimal connector posting range searches to the mock server."""
+
+    modified_field = None
+    id_field = 'internalId'
+
+    def __init__(self, url):
+        super().__init__({})
+        self.url = url
+        self.session = None
+
+    def connect(self):
+        self.session = requests.Session()
+        return True
+
+    def disconnect(self):
+        self.session.close()
+        return True
+
+    def test_connection(self):
+        return True
+
+    def get_metadata(self, entity_type=None):
+        return {'records': ['invoice']}
+
+    def get_schema(self, entity):
+        return {'fields': []}
+
+    def get_data(self, entity, filters=None, fields=None, limit=None):
+        assert isinstance(filters, Range)
+        rows = []
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            response = self.session.post(self.url, data=ENVELOPE.format(
+                low=filters.low, high=filters.high, page=page))
+            response.raise_for_status()
+            result = etree.fromstring(response.content).find('.//searchResult')
+            total_pages = int(result.get('totalPages'))
+            for record in result:
+                rows.append({'internalId': record.get('internalId'),
+                             'tranId': record.findtext('tranId'),
+                             'amount': float(record.findtext('amount'))})
+            page += 1
+        return rows
+
+
+class MockConnectorFactory:
+    """Picklable factory so the benchmark also works with process workers."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def __call__(self):
+        return MockSoapConnector(self.url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per mock response')
+    parser.add_argument('--chunks', type=int, default=16)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--processes', action='store_true', help='Use a process pool')
+    args = parser.parse_args()
+
+    MockSuiteTalkHandler.latency = args.latency
+    MockSuiteTalkHandler.total_records = args.records
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockSuiteTalkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/services/NetSuitePort'
+
+    chunks = plan_id_chunks('invoice', 1, args.records, chunk_count=args.chunks)
+    print(f"{args.records} records, {len(chunks)} chunks, {PAGE_SIZE} rows/page, "
+          f"{args.latency * 1000:.0f} ms latency, {'processes' if args.processes else 'threads'}")
+    print(f"{'workers':>8} {'seconds':>9} {'rows/s':>10} {'speedup':>8}")
+
+    baseline = None
+    with tempfile.TemporaryDirectory() as spool_dir:
+        for workers in args.workers:
+            checkpoints = ChunkCheckpointStore(':memory:')
+            extractor = ParallelExtractor(MockConnectorFactory(url), checkpoints, spool_dir,
+                                          workers=workers, use_processes=args.processes)
+            written = []
+            started = time.perf_counter()
+            stats = extractor.run(f'bench-{workers}', chunks, lambda batch: written.append(len(batch)))
+            elapsed = time.perf_counter() - started
+            checkpoints.close()
+
+            assert stats['records'] == args.records, stats
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {args.records / elapsed:>10.0f} {baseline / elapsed:>7.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
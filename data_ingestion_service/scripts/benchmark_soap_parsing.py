@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark raw-XML search response parsing against full tree materialization.
+
+Pages are built from the recorded search response fixtures in
+tests/fixtures/netsuite by repeating their rows up to each page size. The
+baseline parses the whole document, converts it into nested dicts (what
+serialize_object produces from zeep objects) and flattens the rows; the raw
+path streams the same bytes through parse_search_response.
+
+zeep's own CompoundValue materialization needs the NetSuite WSDL and is
+slower than the dict conversion used as the baseline here, so the measured
+speedup is a lower bound.
+
+Run from the service directory:
+    python scripts/benchmark_soap_parsing.py --page-sizes 100 500 1000
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+import tracemalloc
+
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ingestion_service.connectors.netsuite.search import flatten_row  # noqa: E402
+from ingestion_service.connectors.netsuite.soap import parse_search_response  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'fixtures', 'netsuite')
+COLUMNS = ['internalId', 'tranId', 'amount', 'entity', 'lastModifiedDate', 'custbody_margin']
+
+
+def build_page(fixture_path, page_size):
+    """Repeat the fixture's search rows until the page holds page_size rows."""
+    tree = etree.parse(fixture_path)
+    row_list = tree.find('.//{*}searchRowList')
+    templates = list(row_list)
+    for row in templates:
+        row_list.remove(row)
+    for i in range(page_size):
+        row = copy.deepcopy(templates[i % len(templates)])
+        row.find('.//{*}internalId/{*}searchValue').set('internalId', str(1000 + i))
+        row_list.append(row)
+    return etree.tostring(tree, xml_declaration=True, encoding='UTF-8')
+
+
+def _to_dict(element):
+    """Generic element -> nested dict conversion, like serialize_object output."""
+    if len(element) == 0:
+        if element.attrib:
+            return dict(element.attrib)
+        return element.text
+    result = dict(element.attrib)
+    for child in element:
+        name = etree.QName(child).localname
+        value = _to_dict(child)
+        if name in result:
+            if not isinstance(result[name], list):
+                result[name] = [result[name]]
+            result[name].append(value)
+        else:
+            result[name] = value
+    return result
+
+
+def parse_tree(body):
+    root = etree.fromstring(body)
+    result = _to_dict(root.find('.//{*}searchResult'))
+    search_rows = result['searchRowList']['searchRow']
+    if not isinstance(search_rows, list):
+        search_rows = [search_rows]
+    rows = []
+    for search_row in search_rows:
+        basic = search_row['basic']
+        # serialize_object wraps search columns in lists of {'searchValue': ...}
+        basic = {name: value if name == 'customFieldList' else [value] for name, value in basic.items()}
+        rows.append(flatten_row({'basic': basic}, COLUMNS))
+    return rows
+
+
+def parse_raw(body):
+    return parse_search_response(body, COLUMNS, 'Transaction')['rows']
+
+
+def measure(func, body, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        rows = func(body)
+    elapsed = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    func(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--fixture', default=os.path.join(FIXTURES, 'search_advanced_invoice_page1.xml'))
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[100, 500, 1000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'KiB':>7} {'tree ms':>9} {'raw ms':>8} {'speedup':>8} {'tree MiB':>9} {'raw MiB':>8}")
+    for page_size in args.page_sizes:
+        body = build_page(args.fixture, page_size)
+        tree_time, tree_peak, tree_rows = measure(parse_tree, body, args.repeat)
+        raw_time, raw_peak, raw_rows = measure(parse_raw, body, args.repeat)
+        assert tree_rows == raw_rows == page_size
+        print(f"{page_size:>6} {len(body) / 1024:>7.0f} {tree_time * 1000:>9.2f} {raw_time * 1000:>8.2f} "
+              f"{tree_time / raw_time:>7.1f}x {tree_peak / 2**20:>9.2f} {raw_peak / 2**20:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark column-at-once type inference against a per-value parse loop.
+
+Builds string columns as NetSuite returns them for custom free-form fields
+(integers, decimals, currency amounts, US dates, ISO datetimes, emails,
+phone numbers and free text), then infers each column's type with
+infer_types and with a baseline that tries every parser on every value
+(precompiled re patterns, int(), float(), datetime.strptime) and applies
+the same threshold rule.
+
+Run from the service directory:
+    python scripts/benchmark_type_inference.py --rows 100000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ingestion_service.profiling import inference  # noqa: E402
+
+
+def build_columns(rows, seed=7):
+    rng = np.random.default_rng(seed)
+    amounts = rng.lognormal(6, 1.2, rows)
+    days = rng.integers(0, 365, rows)
+    return {
+        'quantity': [str(v) for v in rng.integers(-50, 5000, rows)],
+        'rate': [f'{v:.4f}' for v in amounts / 7],
+        'price': [f'${v:,.2f}' for v in amounts],
+        'ship_date': [f'{1 + d // 31 % 12}/{1 + d % 28}/2024' for d in days],
+        'modified': [f'2024-{1 + d // 31 % 12:02d}-{1 + d % 28:02d}T10:{d % 60:02d}:00Z' for d in days],
+        'email': [f'ap{v}@vendor{v % 97}.com' for v in rng.integers(0, 10**6, rows)],
+        'phone': [f'+1 415-555-{v:04d}' for v in rng.integers(0, 10000, rows)],
+        'memo': [f'PO {v} net 30' for v in rng.integers(0, 10**6, rows)],
+    }
+
+
+_BASELINE_PATTERNS = {
+    'integer': re.compile(inference.INTEGER_PATTERN),
+    'decimal': re.compile(inference.DECIMAL_PATTERN),
+    'currency': re.compile(inference.CURRENCY_PATTERN.replace('(?P<prefix>', '(?:').replace('(?P<suffix>', '(?:')),
+    'datetime': re.compile(inference.DATETIME_PATTERN),
+    'email': re.compile(inference.EMAIL_PATTERN),
+    'phone': re.compile(inference.PHONE_PATTERN),
+}
+_BOOLEANS = set(inference.TRUE_VALUES + inference.FALSE_VALUES)
+
+
+def _parses(value, parse):
+    try:
+        parse(value)
+        return True
+    except ValueError:
+        return False
+
+
+def baseline_column(values, threshold=inference.DEFAULT_THRESHOLD):
+    """Per-value checks in the same order as infer_column."""
+    values = [v.strip() for v in values if v is not None and v.strip()]
+    total = len(values)
+    checks = [
+        ('boolean', lambda v: v.lower() in _BOOLEANS),
+        ('integer', lambda v: _BASELINE_PATTERNS['integer'].match(v) and _parses(v.replace(',', ''), int)),
+        ('decimal', lambda v: _BASELINE_PATTERNS['decimal'].match(v) and _parses(v.replace(',', ''), float)),
+        ('currency', lambda v: _BASELINE_PATTERNS['currency'].match(v)),
+        ('datetime', lambda v: _BASELINE_PATTERNS['datetime'].match(v)),
+        ('date', lambda v: _parses(v, lambda s: datetime.strptime(s, '%m/%d/%Y'))),
+        ('email', lambda v: _BASELINE_PATTERNS['email'].match(v)),
+        ('phone', lambda v: _BASELINE_PATTERNS['phone'].match(v)),
+    ]
+    for name, check in checks:
+        if sum(1 for v in values if check(v)) >= threshold * total:
+            return name
+    return 'string'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    columns = build_columns(args.rows)
+    table = pa.table({name: pa.array(values) for name, values in columns.items()})
+
+    started = time.perf_counter()
+    vectorized = {name: column['type'] for name, column in inference.infer_types(table).items()}
+    vector_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    baseline = {name: baseline_column(values) for name, values in columns.items()}
+    baseline_time = time.perf_counter() - started
+
+    print(f"{'column':<10} {'type':<9}")
+    for name in columns:
+        marker = '' if vectorized[name] == baseline[name] else f'  (baseline: {baseline[name]})'
+        print(f"{name:<10} {vectorized[name]:<9}{marker}")
+    cells = args.rows * len(columns)
+    print(f"vectorized: {vector_time:7.3f} s  {cells / vector_time:>14,.0f} values/s")
+    print(f"per-value:  {baseline_time:7.3f} s  {cells / baseline_time:>14,.0f} values/s")
+    print(f"speedup: {baseline_time / vector_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
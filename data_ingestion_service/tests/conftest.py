@@ -0,0 +1,108 @@
+import threading
+
+from ingestion_service.connectors.base import ERPConnector
+
+
+class MemoryConnector(ERPConnector):
+    """Connector serving a list of records, recording the filters it is asked for."""
+
+    modified_field = "lastModifiedDate"
+    id_field = "internalId"
+
+    def __init__(self, records, fail_on=None):
+        super().__init__({})
+        self.records = records
+        self.fail_on = fail_on
+        self.requests = []
+
+    def connect(self):
+        return True
+
+    def disconnect(self):
+        return True
+
+    def test_connection(self):
+        return True
+
+    def get_metadata(self, entity_type=None):
+        return {"records": ["invoice"]}
+
+    def get_schema(self, entity):
+        return {"fields": []}
+
+    def get_data(self, entity, filters=None, fields=None, limit=None):
+        self.requests.append(filters)
+        if self.fail_on is not None and self.fail_on(filters):
+            raise RuntimeError("chunk exploded")
+        rows = self.records
+        if filters:
+            rows = [r for r in rows if filters.matches(r)]
+        return [dict(r) for r in rows]
+
+
+class Download:
+    def __init__(self, data):
+        self.data = data
+
+    def readall(self):
+        return self.data
+
+
+class BlobProperties(dict):
+    @property
+    def name(self):
+        return self["name"]
+
+
+class InMemoryBlobClient:
+    """Block blob client stand-in following the azure.storage.blob BlobClient API."""
+
+    def __init__(self, container, name):
+        self.container = container
+        self.blob_name = name
+
+    def stage_block(self, block_id, data, **kwargs):
+        with self.container.lock:
+            self.container.staged.setdefault(self.blob_name, {})[block_id] = bytes(data)
+            self.container.stage_calls += 1
+
+    def commit_block_list(self, block_list, **kwargs):
+        with self.container.lock:
+            staged = self.container.staged.pop(self.blob_name, {})
+            ids = [getattr(block, "id", block) for block in block_list]
+            missing = [block_id for block_id in ids if block_id not in staged]
+            if missing:
+                raise ValueError(f"Blocks not staged for {self.blob_name}: {missing}")
+            self.container.blobs[self.blob_name] = b"".join(staged[block_id] for block_id in ids)
+
+    def download_blob(self, **kwargs):
+        with self.container.lock:
+            return Download(self.container.blobs[self.blob_name])
+
+    def delete_blob(self, **kwargs):
+        with self.container.lock:
+            self.container.blobs.pop(self.blob_name, None)
+
+
+class InMemoryBlobContainer:
+    """
+    In-process stand-in for an Azurite/Azure container.
+
+    Implements the subset of ContainerClient that AzureBlobBackend uses and
+    keeps blocks staged but uncommitted out of the visible blobs, like the
+    real service does.
+    """
+
+    def __init__(self):
+        self.blobs = {}
+        self.staged = {}
+        self.stage_calls = 0
+        self.lock = threading.Lock()
+
+    def get_blob_client(self, blob):
+        return InMemoryBlobClient(self, blob)
+
+    def list_blobs(self, name_starts_with=None, **kwargs):
+        with self.lock:
+            return [BlobProperties(name=name) for name in sorted(self.blobs)
+                    if name.startswith(name_starts_with or "")]
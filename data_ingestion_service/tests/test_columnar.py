@@ -0,0 +1,90 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from ingestion_service.connectors.columnar import arrow_schema, records_to_batch, to_pandas, write_parquet
+from ingestion_service.connectors.netsuite.schema import build_schema
+
+from test_netsuite_search import invoice_row, make_connector, row_page
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+SCHEMA = {"fields": [
+    {"name": "internalId", "type": "string", "isKey": True},
+    {"name": "amount", "type": "decimal"},
+    {"name": "tranDate", "type": "date"},
+    {"name": "lastModifiedDate", "type": "datetime"},
+    {"name": "isInactive", "type": "boolean"},
+]}
+
+
+def test_schema_types_come_from_field_definitions():
+    schema = arrow_schema(SCHEMA, fields=["amount", "lastModifiedDate", "memo"])
+
+    assert schema.names == ["amount", "lastModifiedDate", "memo"]
+    assert schema.field("amount").type == pa.decimal128(38, 10)
+    assert schema.field("lastModifiedDate").type == pa.timestamp("us", tz="UTC")
+    assert schema.field("memo").type == pa.string()
+
+
+def test_values_are_converted_and_bad_values_become_null():
+    batch = records_to_batch([
+        {"internalId": 1, "amount": "10.5", "tranDate": "2024-03-01T00:00:00",
+         "lastModifiedDate": "2024-03-01T10:00:00Z", "isInactive": "false"},
+        {"internalId": "2", "amount": "n/a", "tranDate": None, "lastModifiedDate": None},
+    ], arrow_schema(SCHEMA))
+
+    assert batch.column("internalId").to_pylist() == ["1", "2"]
+    assert batch.column("amount").to_pylist() == [Decimal("10.5"), None]
+    assert batch.column("tranDate").to_pylist() == [date(2024, 3, 1), None]
+    assert batch.column("lastModifiedDate").to_pylist()[0] == datetime(2024, 3, 1, 10, tzinfo=timezone.utc)
+    assert batch.column("isInactive").to_pylist() == [False, None]
+
+
+def test_out_of_range_values_are_rejected_per_record():
+    schema = arrow_schema({"fields": [
+        {"name": "count", "type": "integer"},
+        {"name": "rate", "type": "decimal", "precision": 5, "scale": 2},
+    ]})
+    rejected = []
+
+    batch = records_to_batch([
+        {"count": 1.0, "rate": 0.1},
+        {"count": 2.5, "rate": "1.25"},
+        {"count": 2 ** 63, "rate": "1"},
+        {"count": "3", "rate": "1000.00"},
+        {"count": 4, "rate": 999.994},
+    ], schema, on_error=lambda index, reason: rejected.append(index))
+
+    assert rejected == [1, 2, 3]
+    assert batch.column("count").to_pylist() == [1, 4]
+    assert batch.column("rate").to_pylist() == [Decimal("0.10"), Decimal("999.99")]
+
+
+def test_netsuite_streams_one_page_at_a_time():
+    pages = [row_page([invoice_row(str(i), f"INV-{i}", i)], page_index=i, total_pages=3) for i in (1, 2, 3)]
+    connector = make_connector(pages)
+    connector.schema_cache.put("1234567", "invoice", "2020_1", build_schema("invoice", []))
+
+    batches = connector.iter_batches("invoice", fields=["internalId", "total"], batch_size=1)
+    first = next(batches)
+
+    assert first.num_rows == 1
+    assert [c[0] for c in connector.service.calls] == ["search"]
+    assert sum(b.num_rows for b in batches) == 2
+
+
+def test_table_hands_off_to_pandas_and_parquet(tmp_path):
+    pages = [row_page([invoice_row(str(i), f"INV-{i}", i * 1.5) for i in range(1, 4)])]
+    connector = make_connector(pages)
+    connector.schema_cache.put("1234567", "invoice", "2020_1", build_schema("invoice", []))
+
+    table = connector.get_table("invoice", fields=["internalId", "tranId", "amount"])
+    frame = to_pandas(table)
+    assert list(frame["tranId"]) == ["INV-1", "INV-2", "INV-3"]
+
+    path = str(tmp_path / "invoices.parquet")
+    assert write_parquet(table.to_batches(), path, table.schema) == 3
+    assert pq.read_table(path).equals(table)
@@ -0,0 +1,124 @@
+import pytest
+
+from ingestion_service.connectors.columnar import arrow_schema, records_to_batch
+from ingestion_service.connectors.netsuite.schema import build_schema
+from ingestion_service.extraction.checkpoint import ChunkCheckpointStore
+from ingestion_service.extraction.deadletter import (MAPPING, REPLAYED, VALIDATION, DeadLetterStore,
+                                                     ErrorRateExceeded, replay_dead_letters)
+from ingestion_service.extraction.resumable import ResumableExtractor
+from ingestion_service.sinks.local import LocalFileSystemBackend
+from ingestion_service.sinks.parquet import ParquetSink
+
+from test_netsuite_search import invoice_row, make_connector, row_page
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+FIELDS = ["internalId", "tranId", "amount", "custbody_qty"]
+
+
+def with_qty(row, qty):
+    row["basic"]["customFieldList"] = {"customField": [{"scriptId": "custbody_qty", "searchValue": qty}]}
+    return row
+
+
+def messy_connector(qty_type="integer"):
+    pages = [
+        row_page([with_qty(invoice_row("1", "INV-1", 1.0), "1"), with_qty(invoice_row("2", "INV-2", 2.0), "2")],
+                 page_index=1, total_pages=3),
+        # An unmappable row and a quantity that isn't an integer
+        row_page([{"basic": ["garbage"]}, with_qty(invoice_row("3", "INV-3", 3.0), "12 units"),
+                  with_qty(invoice_row("4", "INV-4", 4.0), "4")], page_index=2, total_pages=3),
+        row_page([with_qty(invoice_row("5", "INV-5", 5.0), "5")], page_index=3, total_pages=3),
+    ]
+    connector = make_connector(pages)
+    connector.schema_cache.put("1234567", "invoice", "2020_1", build_schema("invoice", [
+        {"name": "custbody_qty", "type": qty_type, "isCustom": True}]))
+    return connector
+
+
+def written_ids(root):
+    ids = []
+    for path in sorted(root.rglob("*.parquet")):
+        ids.extend(pq.read_table(path).column("internalId").to_pylist())
+    return sorted(ids, key=int)
+
+
+def test_strict_conversion_reports_records_instead_of_nulling_them():
+    schema = arrow_schema({"fields": [{"name": "id", "type": "string"}, {"name": "qty", "type": "integer"}]})
+    rejected = []
+
+    batch = records_to_batch([{"id": "a", "qty": "1"}, {"id": "b", "qty": "x"}, {"id": "c", "qty": None}], schema,
+                             on_error=lambda index, reason: rejected.append((index, reason)))
+
+    assert batch.column("id").to_pylist() == ["a", "c"]
+    assert rejected == [(1, "qty: 'x' is not int64")]
+
+
+def test_bad_records_are_dead_lettered_and_the_run_keeps_going(tmp_path):
+    store = DeadLetterStore(":memory:")
+    extractor = ResumableExtractor(messy_connector(), ChunkCheckpointStore(":memory:"),
+                                   ParquetSink(LocalFileSystemBackend(str(tmp_path)), "t1"), checkpoint_pages=1,
+                                   dead_letters=store, max_error_rate=0.5, min_records=1)
+
+    result = extractor.run("run1", "invoice", fields=FIELDS)
+
+    assert (result["records"], result["dead_letters"]) == (4, 2)
+    assert written_ids(tmp_path) == ["1", "2", "4", "5"]
+    letters = store.list(run_id="run1")
+    assert [(letter["stage"], letter["page"], letter["position"]) for letter in letters] == \
+        [(MAPPING, 2, 0), (VALIDATION, 2, 0)]
+    assert letters[0]["payload"] == {"basic": ["garbage"]}
+    assert letters[0]["error"].startswith("AttributeError")
+    assert letters[1]["record_id"] == "3" and letters[1]["error"] == "custbody_qty: '12 units' is not int64"
+
+
+def test_error_budget_aborts_before_the_segment_is_checkpointed(tmp_path):
+    store = DeadLetterStore(":memory:")
+    checkpoints = ChunkCheckpointStore(":memory:")
+    extractor = ResumableExtractor(messy_connector(), checkpoints,
+                                   ParquetSink(LocalFileSystemBackend(str(tmp_path)), "t1"), checkpoint_pages=1,
+                                   dead_letters=store, max_error_rate=0.2, min_records=1)
+
+    with pytest.raises(ErrorRateExceeded):
+        extractor.run("run1", "invoice", fields=FIELDS)
+
+    assert checkpoints.get_progress("run1")["invoice:all:0:None:None"]["page"] == 1
+    assert written_ids(tmp_path) == ["1", "2"]
+    # Dead letters are stored even though the run stopped
+    assert store.counts("run1") == {"pending": 2}
+
+
+def test_replay_writes_records_that_pass_after_a_fix(tmp_path):
+    store = DeadLetterStore(":memory:")
+    sink = ParquetSink(LocalFileSystemBackend(str(tmp_path)), "t1")
+    ResumableExtractor(messy_connector(), ChunkCheckpointStore(":memory:"), sink, dead_letters=store,
+                       max_error_rate=0.5, min_records=1).run("run1", "invoice", fields=FIELDS)
+
+    # The custom field turns out to be free text
+    result = replay_dead_letters(store, messy_connector(qty_type="string"), sink, "run1", "invoice", fields=FIELDS)
+
+    assert result == {"replayed": 1, "failed": 1}
+    assert written_ids(tmp_path) == ["1", "2", "3", "4", "5"]
+    assert store.counts("run1") == {"pending": 1, REPLAYED: 1}
+    assert [letter["attempts"] for letter in store.list(run_id="run1", status=None)] == [1, 1]
+
+
+def test_replay_rerun_after_a_crash_rewrites_the_same_files(tmp_path):
+    store = DeadLetterStore(":memory:")
+    sink = ParquetSink(LocalFileSystemBackend(str(tmp_path)), "t1")
+    ResumableExtractor(messy_connector(), ChunkCheckpointStore(":memory:"), sink, dead_letters=store,
+                       max_error_rate=0.5, min_records=1).run("run1", "invoice", fields=FIELDS)
+
+    def crash(ids):
+        raise RuntimeError("worker killed")
+
+    mark_replayed = store.mark_replayed
+    store.mark_replayed = crash
+    with pytest.raises(RuntimeError):
+        replay_dead_letters(store, messy_connector(qty_type="string"), sink, "run1", "invoice", fields=FIELDS)
+    store.mark_replayed = mark_replayed
+
+    # The letters are still pending, the rerun replaces what the crashed replay wrote
+    result = replay_dead_letters(store, messy_connector(qty_type="string"), sink, "run1", "invoice", fields=FIELDS)
+    assert result == {"replayed": 1, "failed": 1}
+    assert written_ids(tmp_path) == ["1", "2", "3", "4", "5"]
@@ -0,0 +1,161 @@
+import os
+import threading
+
+from ingestion_service.events.lifecycle import SEGMENT_WRITTEN, ExtractionEvents
+from ingestion_service.events.producer import InMemoryProducer
+from ingestion_service.events.publisher import NONE, EventPublisher, decode_message
+from ingestion_service.extraction.checkpoint import ChunkCheckpointStore
+from ingestion_service.extraction.resumable import ResumableExtractor
+from ingestion_service.jobs.queue import SQLiteJobQueue
+from ingestion_service.jobs.scheduler import JobScheduler
+from ingestion_service.sinks.local import LocalFileSystemBackend
+from ingestion_service.sinks.parquet import ParquetSink
+
+from test_jobs import GatedRunner, job, wait_for
+from test_resumable_extraction import FIELDS, paged_connector
+
+
+def sent_events(producer, topic="events"):
+    return [event for message in producer.messages(topic) for event in decode_message(message)]
+
+
+def test_events_are_sent_in_compressed_batches():
+    producer = InMemoryProducer()
+    publisher = EventPublisher(producer, "events", max_batch_events=3)
+
+    ids = [publisher.publish("row.changed", {"n": i}, key="run1") for i in range(7)]
+
+    # Two full batches go out in the background, the last event waits for its batch to fill
+    wait_for(lambda: len(producer.messages("events")) == 2)
+    assert [message.properties["event-count"] for message in producer.messages("events")] == [3, 3]
+    assert producer.messages("events")[0].properties["content-encoding"] == "gzip"
+    assert publisher.flush()
+    events = sent_events(producer)
+    assert [event["id"] for event in events] == ids
+    assert [event["data"]["n"] for event in events] == list(range(7))
+    assert {event["subject"] for event in events} == {"run1"}
+    assert {message.partition_key for message in producer.messages("events")} == {"run1"}
+    assert publisher.stats["sent"] == 7
+
+
+def test_batches_are_split_by_partition_key_and_size():
+    producer = InMemoryProducer()
+    publisher = EventPublisher(producer, "events", max_batch_bytes=400, compression=NONE)
+    for i in range(4):
+        publisher.publish("row.changed", {"n": i}, key="a")
+    publisher.publish("row.changed", {"n": 9}, key="b")
+
+    publisher.flush()
+
+    messages = producer.messages("events")
+    keys = [message.partition_key for message in messages]
+    assert keys.count("a") > 1 and keys[-1] == "b"
+    assert all(len(message.body) <= 400 for message in messages)
+    assert all(event["subject"] == message.partition_key
+               for message in messages for event in decode_message(message))
+    assert [event["data"]["n"] for event in sent_events(producer)] == [0, 1, 2, 3, 9]
+
+
+def test_linger_sends_partial_batches_in_the_background():
+    producer = InMemoryProducer()
+    publisher = EventPublisher(producer, "events", linger_seconds=0.05)
+    publisher.start()
+
+    publisher.publish("job.started", {"job_id": "j1"})
+
+    wait_for(lambda: producer.requests == 1)
+    publisher.close()
+    assert [event["type"] for event in sent_events(producer)] == ["job.started"]
+
+
+def test_events_spill_to_disk_while_the_broker_is_down(tmp_path):
+    spill_dir = str(tmp_path / "spill")
+    producer = InMemoryProducer()
+    producer.fail = ConnectionError("broker unreachable")
+    publisher = EventPublisher(producer, "events", max_batch_events=2, max_buffered_bytes=1, spill_dir=spill_dir)
+
+    for i in range(6):
+        publisher.publish("row.changed", {"n": i})
+    publisher.close()
+
+    assert publisher.stats["spilled"] == 6 and publisher.stats["failures"] >= 1
+    assert len(os.listdir(spill_dir)) == 3
+
+    # A new process picks the spilled events up once the broker is back
+    producer = InMemoryProducer()
+    publisher = EventPublisher(producer, "events", spill_dir=spill_dir)
+    publisher.publish("row.changed", {"n": 6})
+    assert publisher.flush()
+    assert [event["data"]["n"] for event in sent_events(producer)] == list(range(7))
+    assert os.listdir(spill_dir) == []
+
+
+class BlockingProducer(InMemoryProducer):
+    """Producer whose sends wait until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.sending = threading.Event()
+        self.release = threading.Event()
+
+    def send(self, topic, messages):
+        self.sending.set()
+        assert self.release.wait(5)
+        super().send(topic, messages)
+
+
+def test_events_spilled_during_a_send_go_before_newer_buffered_ones(tmp_path):
+    producer = BlockingProducer()
+    publisher = EventPublisher(producer, "events", max_batch_events=1, compression=NONE, max_buffered_bytes=650,
+                               spill_dir=str(tmp_path))
+    publisher.publish("row.changed", {"n": 0, "pad": "x" * 100})
+    assert producer.sending.wait(5)
+
+    # While event 0 is in flight, events 1 and 2 overflow the buffer and are spilled, event 3 stays buffered
+    for i in range(1, 4):
+        publisher.publish("row.changed", {"n": i, "pad": "x" * 100})
+    assert publisher.stats["spilled"] == 2
+    producer.release.set()
+
+    wait_for(lambda: publisher.stats["sent"] == 4)
+    assert [event["data"]["n"] for event in sent_events(producer)] == [0, 1, 2, 3]
+    publisher.close()
+
+
+def test_full_buffer_without_spill_dir_drops_events():
+    producer = InMemoryProducer()
+    producer.fail = ConnectionError("broker unreachable")
+    publisher = EventPublisher(producer, "events", max_batch_events=2, max_buffered_bytes=1)
+
+    for i in range(4):
+        publisher.publish("row.changed", {"n": i})
+
+    assert publisher.stats["dropped"] == 4
+    producer.fail = None
+    assert publisher.flush() and producer.requests == 0
+
+
+def test_job_and_segment_lifecycle_events(tmp_path):
+    producer = InMemoryProducer()
+    events = ExtractionEvents(EventPublisher(producer, "events"))
+    runner = GatedRunner()
+    scheduler = JobScheduler(SQLiteJobQueue(":memory:"), runner, events=events)
+
+    job_id = scheduler.submit(job("t1", "acct-1")).job_id
+    scheduler.dispatch()
+    runner.release.set()
+    scheduler.stop()
+    ResumableExtractor(paged_connector(pages=3), ChunkCheckpointStore(":memory:"),
+                       ParquetSink(LocalFileSystemBackend(str(tmp_path)), "t1"), checkpoint_pages=2,
+                       events=events).run("run1", "invoice", fields=FIELDS)
+    events.publisher.flush()
+
+    sent = sent_events(producer)
+    assert [event["type"] for event in sent if event["subject"] == job_id] == \
+        ["extraction.job.queued", "extraction.job.started", "extraction.job.succeeded"]
+    # Job events of a tenant share messages
+    assert {message.partition_key for message in producer.messages("events")} == {"t1", "run1"}
+    segments = [event["data"] for event in sent if event["type"] == SEGMENT_WRITTEN]
+    assert [(segment["segment"], segment["rows"], segment["last_id"]) for segment in segments] == \
+        [(0, 4, "4"), (1, 2, "6")]
+    assert segments[0]["files"][0]["rows"] == 4
@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from ingestion_service.connectors.base import After, And, Eq, In, Or, Range, parse_filters
+from ingestion_service.connectors.netsuite.search import compile_filters
+
+record = {"amount": "150.0", "status": "open", "tranDate": "2024-05-01T00:00:00Z", "memo": None}
+
+
+def test_filter_evaluation():
+    assert Eq("status", "open").matches(record)
+    assert In("status", ["closed", "open"]).matches(record)
+    assert Range("amount", 100, 200).matches(record)
+    assert not Range("amount", high=100).matches(record)
+    assert After("tranDate", datetime(2024, 4, 30, tzinfo=timezone.utc)).matches(record)
+    assert not After("memo", "x").matches(record)
+    assert (Eq("status", "closed") | Range("amount", low=100)).matches(record)
+    assert not (Eq("status", "open") & Eq("amount", 1)).matches(record)
+
+
+def test_dict_filters_are_parsed():
+    expr = parse_filters({"status": "open", "entity": ["1", "2"], "amount": {"gte": 10, "lte": 20}})
+    assert expr == And(Eq("status", "open"), In("entity", ["1", "2"]),
+                       After("amount", 10, inclusive=True), Range("amount", high=20))
+
+    with pytest.raises(ValueError):
+        parse_filters({"amount": {"like": "%x"}})
+
+
+def test_netsuite_pushdown_and_residual():
+    since = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    expr = And(
+        After("lastModifiedDate", since),
+        Range("amount", 10, 20),
+        Or(Eq("subsidiary", 1), Eq("subsidiary", 3)),
+        Eq("memo", "rush"),
+        In("tranId", ["INV-1", "INV-2"]),
+        Eq("customField", "x"),
+    )
+    plan = compile_filters("invoice", expr)
+
+    assert plan.native == {
+        "lastModifiedDate": {"operator": "after", "searchValue": since},
+        "amount": {"operator": "between", "searchValue": 10.0, "searchValue2": 20.0},
+        "subsidiary": {"operator": "anyOf", "searchValue": [{"internalId": "1"}, {"internalId": "3"}]},
+        "memo": {"operator": "is", "searchValue": "rush"},
+    }
+    assert plan.residual == And(In("tranId", ["INV-1", "INV-2"]), Eq("customField", "x"))
+    assert plan.describe()["pushed_down"][0].startswith("lastModifiedDate >")
+
+
+def test_internal_id_ranges_use_numeric_field():
+    plan = compile_filters("customer", Range("internalId", 100, 199))
+    assert plan.native == {"internalIdNumber": {"operator": "between", "searchValue": 100, "searchValue2": 199}}
+
+
+def test_mixed_or_and_duplicate_field_stay_residual():
+    expr = And(After("tranDate", "2024-01-01"), Range("tranDate", high="2024-02-01"),
+               Or(Eq("status", "a"), Eq("memo", "b")))
+    plan = compile_filters("invoice", expr)
+
+    assert list(plan.native) == ["tranDate"]
+    assert plan.residual == And(Range("tranDate", high="2024-02-01"), Or(Eq("status", "a"), Eq("memo", "b")))
+
+
+def test_transaction_type_is_not_overridable():
+    plan = compile_filters("invoice", Eq("type", "_creditMemo"))
+    assert plan.native == {}
+    assert plan.residual == Eq("type", "_creditMemo")
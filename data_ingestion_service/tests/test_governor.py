@@ -0,0 +1,170 @@
+import threading
+
+import pytest
+from requests import HTTPError, Response, Session
+from zeep.exceptions import Fault, TransportError
+
+from ingestion_service.connectors.governor import AccountGovernor, get_governor, reset_governors
+from ingestion_service.connectors.retry import TRANSIENT, default_classifier
+from ingestion_service.connectors.netsuite.connector import (
+    NetSuiteConnector, ThrottleAwareTransport, is_throttling_error, retry_after_seconds,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    reset_governors()
+    yield
+    reset_governors()
+
+
+def make_governor(**kwargs):
+    clock = FakeClock()
+    settings = {"requests_per_second": 2.0, "max_concurrency": 4, "clock": clock, "sleep": clock.sleep}
+    settings.update(kwargs)
+    return AccountGovernor("netsuite:TEST", **settings), clock
+
+
+def test_token_bucket_spaces_requests():
+    governor, clock = make_governor()
+    waits = []
+    for _ in range(4):
+        with governor.slot():
+            waits.append(clock.now)
+
+    # Two requests fit the initial burst, the rest are spaced at 2 req/s
+    assert waits == [0.0, 0.0, 0.5, 1.0]
+    metrics = governor.metrics()
+    assert metrics["requests"] == 4
+    assert metrics["total_wait_seconds"] == pytest.approx(1.0)
+
+
+def test_throttle_decreases_multiplicatively_and_coalesces():
+    governor, clock = make_governor(throttle_cooldown=1.0)
+    governor.record_throttle()
+    governor.record_throttle()  # same burst of failures, ignored
+
+    assert governor.bucket.rate == pytest.approx(1.0)
+    assert governor.concurrency_limit == 2
+    assert governor.metrics()["throttle_events"] == 1
+    assert governor.metrics()["throttle_signals"] == 2
+
+    clock.now += 2.0
+    governor.record_throttle()
+    assert governor.bucket.rate == pytest.approx(0.5)
+    assert governor.concurrency_limit == 1
+
+
+def test_success_window_increases_additively():
+    governor, _ = make_governor(success_window=3, increase_step=0.25)
+    governor.record_throttle()
+    for _ in range(3):
+        governor.record_success()
+
+    assert governor.bucket.rate == pytest.approx(1.25)
+    assert governor.concurrency_limit == 3
+
+
+def test_throttle_shrinks_the_burst_with_the_rate():
+    governor, clock = make_governor(requests_per_second=8.0)
+    governor.record_throttle()
+    assert governor.bucket.capacity == pytest.approx(4.0)
+
+    clock.now += 10.0
+    waits = []
+    for _ in range(6):
+        with governor.slot():
+            waits.append(clock.now - 10.0)
+
+    # Only the lowered rate's burst goes out at once
+    assert waits == pytest.approx([0.0, 0.0, 0.0, 0.0, 0.25, 0.5])
+
+
+def test_retry_after_blocks_new_requests():
+    governor, clock = make_governor()
+    governor.record_throttle(retry_after=5)
+    governor.acquire()
+    assert clock.now == pytest.approx(5.0)
+
+
+def test_concurrency_limit_blocks_extra_callers():
+    governor = AccountGovernor("netsuite:TEST", max_concurrency=1, requests_per_second=1000)
+    governor.acquire()
+    with pytest.raises(TimeoutError):
+        governor.acquire(timeout=0.05)
+
+    released = threading.Timer(0.05, governor.release)
+    released.start()
+    governor.acquire(timeout=2)
+    assert governor.in_flight == 1
+
+
+def test_connectors_share_governor_per_account():
+    first = NetSuiteConnector({"account_id": "1234567-sb1"})
+    second = NetSuiteConnector({"account_id": "1234567_SB1"})
+    other = NetSuiteConnector({"account_id": "7654321"})
+
+    assert first.governor is second.governor
+    assert first.governor is get_governor("netsuite:1234567_SB1")
+    assert other.governor is not first.governor
+
+
+def test_connector_call_reports_throttling():
+    connector = NetSuiteConnector({"account_id": "1234567"})
+
+    class Service:
+        def search(self, **kwargs):
+            raise Fault("WS_CONCUR_SESSION_DISALLWD: Only one request may be made against a session")
+
+    connector.service = Service()
+    with pytest.raises(Fault):
+        connector._invoke("search")
+
+    assert connector.governor.metrics()["throttle_events"] == 1
+    assert connector.governor.in_flight == 0
+
+
+def test_throttling_and_retry_agree_on_status_codes():
+    response = Response()
+    response.status_code = 503
+    errors = [TransportError(status_code=429), HTTPError(response=response)]
+
+    assert all(is_throttling_error(error) for error in errors)
+    assert all(default_classifier(error) == TRANSIENT for error in errors)
+    assert not is_throttling_error(TransportError(status_code=0))
+
+
+def test_non_throttle_faults_are_not_throttling():
+    assert not is_throttling_error(Fault("INVALID_LOGIN_CREDENTIALS"))
+    assert is_throttling_error(Fault("error", detail=None, code="EXCEEDED_REQUEST_LIMIT"))
+
+
+class ThrottledSession(Session):
+    def request(self, method, url, **kwargs):
+        response = Response()
+        response.status_code = 429
+        response.headers["Retry-After"] = "7"
+        response._content = b"Too Many Requests"
+        return response
+
+
+def test_transport_errors_keep_retry_after():
+    transport = ThrottleAwareTransport(session=ThrottledSession())
+    with pytest.raises(TransportError) as raised:
+        transport.post("https://1234567.suitetalk.api.netsuite.com/services/NetSuitePort", b"<x/>", {})
+
+    assert raised.value.status_code == 429
+    assert is_throttling_error(raised.value)
+    assert retry_after_seconds(raised.value) == 7.0
+    assert retry_after_seconds(TransportError(status_code=503)) is None
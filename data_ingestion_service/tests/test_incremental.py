@@ -0,0 +1,115 @@
+import pytest
+
+from ingestion_service.connectors.base import After, to_utc_datetime
+from ingestion_service.extraction.incremental import IncrementalExtractor
+from ingestion_service.extraction.watermarks import (
+    SQLiteWatermarkStore,
+    Watermark,
+    WatermarkConflictError,
+)
+
+from conftest import MemoryConnector
+
+
+def invoice(internal_id, modified):
+    return {"internalId": str(internal_id), "lastModifiedDate": modified, "amount": internal_id}
+
+
+@pytest.fixture
+def store():
+    store = SQLiteWatermarkStore(":memory:")
+    yield store
+    store.close()
+
+
+def test_first_run_is_full_then_only_changes(store):
+    connector = MemoryConnector([
+        invoice(2, "2024-01-01T10:00:00Z"),
+        invoice(1, "2024-01-01T09:00:00Z"),
+        invoice(3, "2024-01-01T11:00:00Z"),
+    ])
+    extractor = IncrementalExtractor(connector, store, "tenant-a")
+    written = []
+
+    result = extractor.run("invoice", written.extend, batch_size=2)
+    assert [r["internalId"] for r in written] == ["1", "2", "3"]
+    assert result["batches"] == 2
+    assert store.get("tenant-a", "invoice") == Watermark("2024-01-01T11:00:00+00:00", "3")
+
+    connector.records.append(invoice(4, "2024-01-01T12:00:00Z"))
+    written.clear()
+    extractor.run("invoice", written.extend)
+    assert [r["internalId"] for r in written] == ["4"]
+    assert connector.requests[-1] == After("lastModifiedDate", to_utc_datetime("2024-01-01T11:00:00Z"), inclusive=True)
+
+
+def test_id_tiebreaker_for_equal_timestamps(store):
+    same_time = "2024-02-01T00:00:00Z"
+    connector = MemoryConnector([invoice(10, same_time), invoice(9, same_time)])
+    extractor = IncrementalExtractor(connector, store, "tenant-a")
+    written = []
+
+    extractor.run("invoice", written.extend, batch_size=1)
+    assert [r["internalId"] for r in written] == ["9", "10"]
+
+    connector.records.append(invoice(11, same_time))
+    written.clear()
+    extractor.run("invoice", written.extend)
+    assert [r["internalId"] for r in written] == ["11"]
+
+
+def test_watermark_not_advanced_when_write_fails(store):
+    connector = MemoryConnector([invoice(1, "2024-01-01T09:00:00Z"), invoice(2, "2024-01-01T10:00:00Z")])
+    extractor = IncrementalExtractor(connector, store, "tenant-a")
+    calls = []
+
+    def failing_writer(batch):
+        calls.append(batch)
+        if len(calls) == 2:
+            raise IOError("sink unavailable")
+
+    with pytest.raises(IOError):
+        extractor.run("invoice", failing_writer, batch_size=1)
+    assert store.get("tenant-a", "invoice") == Watermark("2024-01-01T09:00:00Z", "1")
+
+    written = []
+    extractor.run("invoice", written.extend)
+    assert [r["internalId"] for r in written] == ["2"]
+
+
+def test_watermarks_are_per_tenant(store):
+    store.advance("tenant-a", "invoice", Watermark("2024-01-01T00:00:00Z", "5"))
+    assert store.get("tenant-b", "invoice") is None
+
+
+def test_concurrent_advance_is_rejected(store):
+    first = Watermark("2024-01-01T00:00:00Z", "1")
+    store.advance("tenant-a", "invoice", first)
+
+    with pytest.raises(WatermarkConflictError):
+        store.advance("tenant-a", "invoice", Watermark("2024-01-02T00:00:00Z", "2"), expected=None)
+    assert store.get("tenant-a", "invoice") == first
+
+
+def test_watermark_survives_reopen(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = SQLiteWatermarkStore(path)
+    store.advance("tenant-a", "invoice", Watermark("2024-03-01T00:00:00Z", "7"))
+    store.close()
+
+    reopened = SQLiteWatermarkStore(path)
+    assert reopened.get("tenant-a", "invoice") == Watermark("2024-03-01T00:00:00Z", "7")
+    reopened.close()
+
+
+def test_changes_are_pulled_in_bounded_windows(store):
+    connector = MemoryConnector([invoice(i, f"2024-01-01T{i:02d}:00:00Z") for i in range(7, 0, -1)])
+    extractor = IncrementalExtractor(connector, store, "tenant-a")
+    written = []
+
+    result = extractor.run("invoice", written.extend, batch_size=2, window_size=3)
+    assert [r["internalId"] for r in written] == ["1", "2", "3", "4", "5", "6", "7"]
+    assert result["records"] == 7
+    assert result["batches"] == 5
+    assert len(connector.requests) == 3
+    assert connector.requests[-1] == After("lastModifiedDate", to_utc_datetime("2024-01-01T06:00:00Z"), inclusive=True)
@@ -0,0 +1,208 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ingestion_service import main
+from ingestion_service.connectors.netsuite.schema import build_schema
+from ingestion_service.jobs.queue import (CANCELLED, FAILED, INTERACTIVE, QUEUED, SUCCEEDED, Job,
+                                          QueueFullError, SQLiteJobQueue)
+from ingestion_service.jobs.runner import ExtractionJobRunner
+from ingestion_service.jobs.scheduler import Backpressure, JobCancelled, JobScheduler
+from ingestion_service.sinks.local import LocalFileSystemBackend
+from ingestion_service.sinks.parquet import ParquetSink
+
+from test_netsuite_search import invoice_row, make_connector, row_page
+
+
+class GatedRunner:
+    """Runner whose jobs block until released, honouring cancellation."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+
+    def __call__(self, job, cancelled):
+        self.started.append(job.job_id)
+        while not self.release.wait(0.01):
+            if cancelled.is_set():
+                raise JobCancelled()
+        if job.params.get("fail"):
+            raise RuntimeError("boom")
+        return {"rows": 1}
+
+
+def job(tenant, account, priority="nightly", **params):
+    return Job(None, tenant, "netsuite", account, "invoice", priority=priority, params=params)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def make_scheduler(**kwargs):
+    runner = GatedRunner()
+    return JobScheduler(SQLiteJobQueue(":memory:"), runner, **kwargs), runner
+
+
+def test_big_backfill_does_not_starve_other_tenants():
+    scheduler, runner = make_scheduler(max_workers=2)
+    backfill = [scheduler.submit(job("big", f"acct-{i}")).job_id for i in range(5)]
+    small = scheduler.submit(job("small", "acct-9")).job_id
+
+    started = [started.job_id for started in scheduler.dispatch()]
+
+    assert started == [backfill[0], small]
+    runner.release.set()
+    scheduler.stop()
+    assert scheduler.queue.get(small).status == SUCCEEDED
+    assert len(scheduler.queue.queued()) == 4
+
+
+def test_priorities_and_account_concurrency():
+    scheduler, runner = make_scheduler(max_workers=3, max_jobs_per_account=1)
+    nightly = scheduler.submit(job("t1", "acct-1")).job_id
+    interactive = scheduler.submit(job("t1", "acct-1", priority=INTERACTIVE)).job_id
+    other_account = scheduler.submit(job("t1", "acct-2")).job_id
+
+    started = [started.job_id for started in scheduler.dispatch()]
+
+    # The interactive job goes first and then holds acct-1's only slot
+    assert started == [interactive, other_account]
+    assert scheduler.queue.get(nightly).status == QUEUED
+    runner.release.set()
+    wait_for(lambda: scheduler.queue.get(interactive).status == SUCCEEDED)
+    assert [started.job_id for started in scheduler.dispatch()] == [nightly]
+    scheduler.stop()
+
+
+def test_backpressure_holds_batch_jobs_until_backlog_drains():
+    backlog = {"bytes": 100}
+    gate = Backpressure(lambda: backlog["bytes"], high_watermark=100, low_watermark=20)
+    scheduler, runner = make_scheduler(max_workers=4, backpressure=gate)
+    nightly = scheduler.submit(job("t1", "acct-1")).job_id
+    interactive = scheduler.submit(job("t2", "acct-2", priority=INTERACTIVE)).job_id
+
+    assert [started.job_id for started in scheduler.dispatch()] == [interactive]
+    backlog["bytes"] = 50
+    assert scheduler.dispatch() == []
+    backlog["bytes"] = 10
+    assert [started.job_id for started in scheduler.dispatch()] == [nightly]
+    runner.release.set()
+    scheduler.stop()
+
+
+def test_queue_cap_rejects_submissions():
+    scheduler, _ = make_scheduler(max_queued_per_tenant=2)
+    scheduler.submit(job("t1", "acct-1"))
+    scheduler.submit(job("t1", "acct-1"))
+
+    with pytest.raises(QueueFullError):
+        scheduler.submit(job("t1", "acct-1"))
+    scheduler.submit(job("t2", "acct-1"))
+
+
+def test_cancel_failure_and_recovery():
+    scheduler, runner = make_scheduler(max_workers=2, max_jobs_per_account=2)
+    running = scheduler.submit(job("t1", "acct-1")).job_id
+    failing = scheduler.submit(job("t1", "acct-1", fail=True)).job_id
+    queued = scheduler.submit(job("t1", "acct-1")).job_id
+    scheduler.dispatch()
+    wait_for(lambda: len(runner.started) == 2)
+
+    assert scheduler.cancel(queued).status == CANCELLED
+    assert scheduler.cancel(running).cancel_requested
+    wait_for(lambda: scheduler.queue.get(running).status == CANCELLED)
+    runner.release.set()
+    wait_for(lambda: scheduler.queue.get(failing).status == FAILED)
+    assert scheduler.queue.get(failing).error == "boom"
+    scheduler.stop()
+
+
+
+def test_only_expired_leases_are_requeued():
+    now = {"t": 1000.0}
+    queue = SQLiteJobQueue(":memory:", clock=lambda: now["t"])
+    orphan = queue.submit(job("t1", "acct-1")).job_id
+    assert queue.claim(orphan, "a", lease_seconds=30) and not queue.claim(orphan, "b")
+
+    # A live scheduler keeps its job while it renews the lease
+    now["t"] += 20
+    assert queue.requeue_expired() == 0
+    assert queue.heartbeat("a", lease_seconds=30) == []
+    now["t"] += 20
+    assert queue.requeue_expired() == 0
+
+    # Once it stops, the job goes back to the queue and its late outcome is dropped
+    now["t"] += 31
+    assert queue.requeue_expired() == 1
+    assert queue.get(orphan).status == QUEUED
+    assert not queue.finish(orphan, SUCCEEDED, owner="a")
+    assert queue.get(orphan).status == QUEUED
+
+
+def test_cancel_reaches_job_running_in_another_process(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    runner = GatedRunner()
+    worker = JobScheduler(SQLiteJobQueue(path), runner, poll_interval=0.01)
+    api = JobScheduler(SQLiteJobQueue(path), GatedRunner())
+    running = api.submit(job("t1", "acct-1")).job_id
+    worker.start()
+    wait_for(lambda: runner.started == [running])
+
+    # Starting another scheduler on the same queue leaves the live job alone
+    api.start()
+    assert api.queue.get(running).status != QUEUED
+    assert api.cancel(running).cancel_requested
+    wait_for(lambda: worker.queue.get(running).status == CANCELLED)
+    assert runner.started == [running]
+    api.stop()
+    worker.stop()
+
+
+def test_extraction_runner_writes_entity_to_sink(tmp_path):
+    pages = [row_page([invoice_row(str(i), f"INV-{i}", float(i)) for i in range(1, 6)])]
+    connector = make_connector(pages)
+    connector.connect = lambda: True
+    connector.schema_cache.put("1234567", "invoice", "2020_1", build_schema("invoice", []))
+    backend = LocalFileSystemBackend(str(tmp_path))
+    runner = ExtractionJobRunner(lambda job: connector, lambda job: ParquetSink(backend, job.tenant_id))
+
+    extraction = job("t1", "1234567", fields=["internalId", "amount"])
+    extraction.job_id = "0123456789abcdef"
+
+    result = runner(extraction, threading.Event())
+
+    assert result == {"files": 1, "rows": 5}
+    assert [path.rsplit("/", 1)[1] for path in backend.list_paths("tenant=t1/entity=invoice")] == \
+        ["part-0123456789ab-00000.parquet"]
+
+
+def test_job_endpoints():
+    scheduler, runner = make_scheduler(max_queued_per_tenant=1)
+    main.app.dependency_overrides[main.auth_validator] = lambda: {"username": "ops"}
+    main.app.dependency_overrides[main.get_scheduler] = lambda: scheduler
+    client = TestClient(main.app)
+    try:
+        response = client.post("/api/v1/jobs", json={"tenant_id": "t1", "account_id": "1234567",
+                                                     "entity": "invoice", "priority": "interactive",
+                                                     "fields": ["internalId"]})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert response.json()["params"] == {"fields": ["internalId"]}
+
+        assert client.post("/api/v1/jobs", json={"tenant_id": "t1", "account_id": "1",
+                                                 "entity": "invoice"}).status_code == 429
+        assert client.post("/api/v1/jobs", json={"tenant_id": "t2", "account_id": "1", "entity": "invoice",
+                                                 "priority": "urgent"}).status_code == 422
+        listing = client.get("/api/v1/jobs", params={"tenant_id": "t1"}).json()
+        assert [job["job_id"] for job in listing["items"]] == [job_id] and listing["next_cursor"] is None
+        assert client.get(f"/api/v1/jobs/{job_id}").json()["status"] == QUEUED
+        assert client.post(f"/api/v1/jobs/{job_id}/cancel").json()["status"] == CANCELLED
+        assert client.get("/api/v1/jobs/unknown").status_code == 404
+    finally:
+        main.app.dependency_overrides.clear()
@@ -0,0 +1,108 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+from sqlalchemy import event, inspect, select
+
+from ingestion_service.connectors.netsuite.schema import build_schema
+from ingestion_service.metadata.models import MetadataColumn
+from ingestion_service.metadata.repository import MetadataRepository, _merge
+from ingestion_service.profiling.profiler import profile_batches
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def repository():
+    repository = MetadataRepository.from_url("sqlite://")
+    repository.create_all()
+    return repository
+
+
+def count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement.split()[0].upper()))
+    return statements
+
+
+def custom_fields(count):
+    return [{"name": f"custbody_{i:03d}", "type": "string", "label": f"Field {i}", "isCustom": True}
+            for i in range(count)]
+
+
+def test_wide_schema_is_saved_in_a_constant_number_of_statements(repository):
+    schema = build_schema("invoice", custom_fields(500))
+    statements = count_statements(repository.engine)
+
+    repository.save_schema("t1", "netsuite", "1234567", "invoice", schema)
+
+    # Data source, table and all 512 columns, plus the lookups and stale field cleanup
+    assert statements.count("INSERT") == 3 and len(statements) <= 8
+    assert repository.get_schema("t1", "netsuite", "1234567", "invoice") == schema
+
+    statements.clear()
+    schema = build_schema("invoice", custom_fields(499))
+    repository.save_schema("t1", "netsuite", "1234567", "invoice", schema)
+
+    # The data source id is cached
+    assert statements.count("INSERT") == 2
+    assert repository.get_schema("t1", "netsuite", "1234567", "invoice") == schema
+    assert repository.get_schema("t1", "netsuite", "1234567", "bill") is None
+
+
+def test_latest_profile_per_column(repository):
+    older = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    frame = pd.DataFrame({"amount": [1.5, 2.5, None], "tranDate": [date(2024, 1, 1), date(2024, 1, 3), None]})
+    account = ("t1", "netsuite", "1234567")
+    repository.save_profile(*account, "invoice", profile_batches([frame]), profiled_at=older)
+    repository.save_profile(*account, "invoice", profile_batches([frame.iloc[:1]]),
+                            profiled_at=older + timedelta(days=1))
+    repository.save_profile("t2", "netsuite", "1234567", "invoice", profile_batches([frame]),
+                            profiled_at=older + timedelta(days=2))
+    # Another account of the same tenant keeps its own statistics
+    repository.save_profile("t1", "netsuite", "7654321", "invoice", profile_batches([frame]),
+                            profiled_at=older + timedelta(days=2))
+
+    latest = repository.latest_profiles(*account, "invoice")
+
+    assert [(column["name"], column["rows"], column["count"]) for column in latest] == \
+        [("amount", 1, 1), ("tranDate", 1, 1)]
+    assert latest[1]["min"] == "2024-01-01"
+    assert [column["name"] for column in repository.latest_profiles(*account, "invoice", columns=["amount"])] == \
+        ["amount"]
+    history = repository.profile_history(*account, "invoice", "amount")
+    assert [column["max"] for column in history] == [1.5, 2.5]
+    assert repository.latest_profiles("t1", "netsuite", "unknown", "invoice") == []
+
+
+def test_saving_a_profile_again_overwrites_it(repository):
+    profiled_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    account = ("t1", "netsuite", "1234567")
+    repository.save_profile(*account, "invoice", {"rows": 2, "columns": [{"name": "amount", "count": 2, "nulls": 0}]},
+                            profiled_at=profiled_at)
+    repository.save_profile(*account, "invoice", {"rows": 3, "columns": [{"name": "amount", "count": 3, "nulls": 0}]},
+                            profiled_at=profiled_at)
+
+    assert [column["rows"] for column in repository.profile_history(*account, "invoice", "amount")] == [3]
+    # The unique key is the only index the latest-profile lookups need
+    inspector = inspect(repository.engine)
+    assert inspector.get_indexes("profile_stats") == []
+    keys = {key["name"]: key["column_names"] for key in inspector.get_unique_constraints("profile_stats")}
+    assert keys["uq_profile_stats_run"] == ["data_source_id", "entity", "column_name", "profiled_at"]
+
+
+def test_generic_merge_updates_and_inserts(repository):
+    repository.save_schema("t1", "netsuite", "1234567", "invoice", build_schema("invoice", []))
+    table = MetadataColumn.__table__
+    with repository.engine.begin() as conn:
+        table_id = conn.execute(select(table.c.table_id)).scalars().first()
+        now = datetime.now(timezone.utc)
+        _merge(conn, table, [
+            {"table_id": table_id, "name": "amount", "type": "currency", "position": 8, "updated_at": now},
+            {"table_id": table_id, "name": "custbody_x", "type": "string", "position": 12, "updated_at": now},
+        ], keys=["table_id", "name"], update_columns=["type", "updated_at"])
+
+    fields = repository.get_schema("t1", "netsuite", "1234567", "invoice")["fields"]
+    assert {field["name"]: field["type"] for field in fields}["amount"] == "currency"
+    assert fields[-1]["name"] == "custbody_x"
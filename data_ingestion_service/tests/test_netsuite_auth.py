@@ -0,0 +1,119 @@
+import base64
+import hashlib
+import hmac
+from urllib.parse import quote
+
+import httpx
+from lxml import etree
+from requests import Request
+
+from ingestion_service.connectors.netsuite.connector import (
+    NetSuiteOAuthHandler,
+    NetSuiteTBAAuth,
+    NetSuiteTokenPassportPlugin,
+    SOAP_ENV_NS,
+)
+
+# Published OAuth 1.0a HMAC-SHA1 example ("Creating a signature", Twitter API docs)
+vector_config = {
+    "account_id": "1234567_SB1",
+    "consumer_key": "xvz1evFS4wEEPTGEFPHBog",
+    "consumer_secret": "kAcSOqF21Fu85e7zjz7ZN2U4ZRhfV3WpwPAoE3Z7kBw",
+    "token_id": "370773112-GmHxMAgYyLbNEtIKZeRNFsMKPR9EyMZeS9weJAEb",
+    "token_secret": "LswwdoUaIvS8ltyTt5jkRh4J50vUPVVHtR2YPi5kE",
+    "signature_method": "HMAC-SHA1",
+}
+vector_nonce = "kYjzVBB8Y0ZFabxSWbWovY3uYSQ2pTgmZeNu2VS4cg"
+vector_timestamp = "1318622958"
+vector_signature = "hCtSmYh+iHYCEqBWrE7C7hYmtUk="
+
+netsuite_config = {
+    "account_id": "1234567-sb1",
+    "consumer_key": "ck",
+    "consumer_secret": "cs",
+    "token_id": "tok",
+    "token_secret": "ts",
+}
+
+
+def parse_header(value):
+    assert value.startswith("OAuth ")
+    pairs = [item.split("=", 1) for item in value[len("OAuth "):].split(", ")]
+    return {k: v.strip('"') for k, v in pairs}
+
+
+def test_signature_matches_published_vector():
+    handler = NetSuiteOAuthHandler(vector_config)
+    header = handler.sign_request(
+        "POST",
+        "https://api.twitter.com/1.1/statuses/update.json?include_entities=true",
+        params=[("status", "Hello Ladies + Gentlemen, a signed OAuth request!")],
+        nonce=vector_nonce,
+        timestamp=vector_timestamp,
+    )
+    fields = parse_header(header)
+    assert fields["oauth_signature"] == quote(vector_signature, safe="")
+    assert fields["realm"] == "1234567_SB1"
+
+
+def test_requests_auth_signs_form_body(monkeypatch):
+    handler = NetSuiteOAuthHandler(vector_config)
+    monkeypatch.setattr("secrets.token_hex", lambda n: vector_nonce)
+    monkeypatch.setattr("time.time", lambda: int(vector_timestamp))
+
+    prepared = Request(
+        "POST",
+        "https://api.twitter.com/1.1/statuses/update.json",
+        params={"include_entities": "true"},
+        data={"status": "Hello Ladies + Gentlemen, a signed OAuth request!"},
+        auth=NetSuiteTBAAuth(handler),
+    ).prepare()
+
+    fields = parse_header(prepared.headers["Authorization"])
+    assert fields["oauth_signature"] == quote(vector_signature, safe="")
+
+
+def test_each_request_gets_fresh_nonce():
+    auth = NetSuiteOAuthHandler(netsuite_config).build_auth()
+    first = Request("GET", "https://example.com/a", auth=auth).prepare()
+    second = Request("GET", "https://example.com/a", auth=auth).prepare()
+
+    first_fields = parse_header(first.headers["Authorization"])
+    second_fields = parse_header(second.headers["Authorization"])
+    assert first_fields["oauth_nonce"] != second_fields["oauth_nonce"]
+    assert first_fields["oauth_signature_method"] == "HMAC-SHA256"
+    assert first_fields["realm"] == "1234567_SB1"
+
+
+def test_httpx_auth_hook():
+    auth = NetSuiteOAuthHandler(netsuite_config).build_auth()
+    request = httpx.Request("GET", "https://example.com/record/v1/customer?limit=5")
+    signed = auth(request)
+    assert signed.headers["Authorization"].startswith('OAuth realm="1234567_SB1"')
+
+
+def test_token_passport_signature():
+    handler = NetSuiteOAuthHandler(netsuite_config)
+    passport = handler.token_passport(nonce="abc123", timestamp="1700000000")
+
+    expected = base64.b64encode(
+        hmac.new(b"cs&ts", b"1234567_SB1&ck&tok&abc123&1700000000", hashlib.sha256).digest()
+    ).decode()
+    assert passport["signature"] == expected
+    assert passport["algorithm"] == "HMAC_SHA256"
+    assert passport["account"] == "1234567_SB1"
+
+
+def test_passport_plugin_replaces_header_per_request():
+    plugin = NetSuiteTokenPassportPlugin(NetSuiteOAuthHandler(netsuite_config), "2020_1")
+    envelope = etree.Element(f"{{{SOAP_ENV_NS}}}Envelope")
+    etree.SubElement(envelope, f"{{{SOAP_ENV_NS}}}Body")
+
+    envelope, _ = plugin.egress(envelope, {}, None, None)
+    first_nonce = envelope.findtext(f".//{{{plugin.core_ns}}}nonce")
+    envelope, _ = plugin.egress(envelope, {}, None, None)
+
+    passports = envelope.findall(f".//{{{plugin.messages_ns}}}tokenPassport")
+    assert len(passports) == 1
+    assert envelope[0].tag == f"{{{SOAP_ENV_NS}}}Header"
+    assert passports[0].findtext(f"{{{plugin.core_ns}}}nonce") != first_nonce
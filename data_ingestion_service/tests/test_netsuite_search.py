@@ -0,0 +1,156 @@
+from types import SimpleNamespace
+
+import pytest
+
+from ingestion_service.connectors.governor import reset_governors
+from ingestion_service.connectors.netsuite.connector import NetSuiteConnector
+from ingestion_service.connectors.netsuite.search import SearchSpec, flatten_record
+
+
+class FakeClient:
+    def get_type(self, qname):
+        def build(**values):
+            return {"xsi_type": qname, **values}
+        return build
+
+
+class FakeService:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def _respond(self, index):
+        return SimpleNamespace(body=SimpleNamespace(searchResult=self.pages[index]))
+
+    def search(self, **kwargs):
+        self.calls.append(("search", kwargs))
+        return self._respond(0)
+
+    def searchMoreWithId(self, **kwargs):
+        self.calls.append(("searchMoreWithId", kwargs))
+        return self._respond(kwargs["pageIndex"] - 1)
+
+
+def column(value):
+    return [{"searchValue": value, "customLabel": None}]
+
+
+def row_page(rows, page_index=1, total_pages=1):
+    return {
+        "status": {"isSuccess": True},
+        "totalPages": total_pages,
+        "pageIndex": page_index,
+        "searchId": "WEBSERVICES_1234567_abc",
+        "searchRowList": {"searchRow": rows},
+    }
+
+
+def make_connector(pages, **config):
+    reset_governors()
+    connector = NetSuiteConnector({"account_id": "1234567", "api_version": "2020_1", **config})
+    connector.client = FakeClient()
+    connector.service = FakeService(pages)
+    return connector
+
+
+def invoice_row(internal_id, tran_id, amount):
+    return {
+        "basic": {
+            "internalId": column({"internalId": internal_id, "externalId": None, "type": None, "name": None}),
+            "tranId": column(tran_id),
+            "amount": column(amount),
+        }
+    }
+
+
+def test_fields_become_advanced_search_columns():
+    connector = make_connector([row_page([invoice_row("1", "INV-1", 10.5)])], page_size=500)
+
+    rows = connector.get_data("invoice", fields=["internalId", "tranId", "amount"])
+
+    assert rows == [{"internalId": "1", "tranId": "INV-1", "amount": 10.5}]
+    operation, kwargs = connector.service.calls[0]
+    record = kwargs["searchRecord"]
+    assert record["xsi_type"] == "{urn:sales_2020_1.transactions.webservices.netsuite.com}TransactionSearchAdvanced"
+    assert record["columns"] == {"basic": {"internalId": [{}], "tranId": [{}], "amount": [{}]}}
+    assert record["criteria"]["basic"]["type"] == {"operator": "anyOf", "searchValue": ["_invoice"]}
+    assert kwargs["_soapheaders"]["searchPreferences"] == {
+        "bodyFieldsOnly": True,
+        "returnSearchColumns": True,
+        "pageSize": 500,
+    }
+
+
+def test_rows_only_contain_requested_fields():
+    row = invoice_row("1", "INV-1", 10.5)
+    row["basic"]["memo"] = column("not requested")
+    connector = make_connector([row_page([row])])
+
+    rows = connector.get_data("invoice", fields=["tranId"])
+    assert rows == [{"tranId": "INV-1"}]
+
+
+def test_pages_are_followed_until_limit():
+    pages = [
+        row_page([invoice_row(str(i), f"INV-{i}", i) for i in range(page * 2, page * 2 + 2)],
+                 page_index=page + 1, total_pages=3)
+        for page in range(3)
+    ]
+    connector = make_connector(pages)
+
+    rows = connector.get_data("invoice", fields=["internalId"], limit=3)
+    assert [r["internalId"] for r in rows] == ["0", "1", "2"]
+    assert [c[0] for c in connector.service.calls] == ["search", "searchMoreWithId"]
+    assert connector.service.calls[1][1]["searchId"] == "WEBSERVICES_1234567_abc"
+
+
+def test_without_fields_uses_basic_search_and_full_records():
+    page = {
+        "status": {"isSuccess": True},
+        "totalPages": 1,
+        "recordList": {"record": [{
+            "internalId": "7",
+            "entityId": "ACME",
+            "email": None,
+            "subsidiary": {"internalId": "1", "name": "Parent", "externalId": None, "type": None},
+            "customFieldList": {"customField": [{"scriptId": "custentity_tier", "value": "gold"}]},
+        }]},
+    }
+    connector = make_connector([page])
+
+    rows = connector.get_data("customer")
+    assert rows == [{"internalId": "7", "entityId": "ACME", "subsidiary": "1", "custentity_tier": "gold"}]
+    record = connector.service.calls[0][1]["searchRecord"]
+    assert record["xsi_type"] == "{urn:common_2020_1.platform.webservices.netsuite.com}CustomerSearchBasic"
+    assert connector.service.calls[0][1]["_soapheaders"]["searchPreferences"]["returnSearchColumns"] is False
+
+
+def test_failed_search_status_raises():
+    page = {"status": {"isSuccess": False, "statusDetail": [{"code": "INVALID_SRCH_COL", "message": "bad column"}]}}
+    connector = make_connector([page], retry={"max_attempts": 1})
+
+    with pytest.raises(Exception, match="bad column"):
+        connector.get_data("invoice", fields=["bogus"])
+
+
+def test_unknown_record_type():
+    with pytest.raises(ValueError):
+        SearchSpec("timeBill")
+
+
+def test_flatten_record_projection():
+    assert flatten_record({"a": 1, "b": 2}, fields=["b", "c"]) == {"b": 2, "c": None}
+
+
+def test_filters_pushed_down_and_residual_applied():
+    rows = [invoice_row("1", "INV-1", 10.0), invoice_row("2", "INV-2", 20.0)]
+    connector = make_connector([row_page(rows)])
+
+    result = connector.get_data("invoice", filters={"amount": {"gte": 5}, "tranId": ["INV-2", "INV-9"]},
+                                fields=["internalId"])
+
+    assert result == [{"internalId": "2"}]
+    record = connector.service.calls[0][1]["searchRecord"]
+    assert record["criteria"]["basic"]["amount"] == {"operator": "greaterThanOrEqualTo", "searchValue": 5.0}
+    assert "tranId" in record["columns"]["basic"]
+    assert connector.explain_filters("invoice", {"tranId": ["INV-2", "INV-9"]})["residual"] == "tranId in ['INV-2', 'INV-9']"
@@ -0,0 +1,152 @@
+import io
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from lxml import etree
+from zeep.exceptions import Fault
+
+from ingestion_service.connectors.governor import reset_governors
+from ingestion_service.connectors.netsuite.connector import NetSuiteConnector, is_throttling_error
+from ingestion_service.connectors.netsuite.search import SearchSpec
+from ingestion_service.connectors.netsuite.soap import parse_search_response
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "netsuite")
+COLUMNS = ["internalId", "tranId", "amount", "entity", "lastModifiedDate", "custbody_margin"]
+OAUTH = {"account_id": "1234567", "consumer_key": "ck", "consumer_secret": "cs",
+         "token_id": "tk", "token_secret": "ts"}
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.raw = io.BytesIO(body)
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def post(self, url, data=None, headers=None, stream=False):
+        self.requests.append((url, etree.fromstring(data), headers))
+        return self.responses.pop(0)
+
+
+def make_connector(responses, **config):
+    reset_governors()
+    connector = NetSuiteConnector({"account_id": "1234567", "api_version": "2020_1", "oauth": OAUTH,
+                                   "raw_xml": True, "endpoint_url": "https://example.test/services/NetSuitePort_2020_1",
+                                   **config})
+    connector.service = object()
+    connector.session = FakeSession(responses)
+    return connector
+
+
+def test_search_rows_are_flat_and_typed():
+    page = parse_search_response(fixture("search_advanced_invoice_page1.xml"), COLUMNS, "Transaction")
+
+    assert page["totalPages"] == 2
+    assert page["searchId"] == "WEBSERVICES_1234567_0101202412345678901234_abcdef"
+    assert page["rows"][0] == {
+        "internalId": "101",
+        "tranId": "INV-101",
+        "amount": 1250.5,
+        "entity": "42",
+        "lastModifiedDate": datetime(2024, 1, 5, 10, 15, tzinfo=timezone(timedelta(hours=-8))),
+        "custbody_margin": 0.25,
+    }
+    assert page["rows"][1]["tranId"] == "INV-102 & credit"
+    assert page["rows"][1]["custbody_margin"] is None
+
+
+def test_full_records_keep_body_fields_and_skip_sublists():
+    page = parse_search_response(fixture("search_basic_customer.xml"), None, "Customer")
+
+    assert page["rows"] == [{
+        "internalId": "7",
+        "externalId": "CUST-7",
+        "entityId": "ACME",
+        "isInactive": False,
+        "subsidiary": "1",
+        "balance": 1500.25,
+        "lastModifiedDate": datetime(2024, 2, 1, 12, tzinfo=timezone(timedelta(hours=-8))),
+        "custentity_tier": "gold",
+        "custentity_region": "3",
+    }]
+
+
+def test_soap_fault_is_raised_as_throttling_fault():
+    with pytest.raises(Fault) as excinfo:
+        parse_search_response(fixture("fault_request_blocked.xml"), COLUMNS)
+
+    assert excinfo.value.code == "WS_CONCUR_SESSION_DISALLWD"
+    assert is_throttling_error(excinfo.value)
+
+
+def test_raw_mode_builds_envelopes_and_follows_pages():
+    connector = make_connector([FakeResponse(fixture("search_advanced_invoice_page1.xml")),
+                                FakeResponse(fixture("search_advanced_invoice_page2.xml"))])
+
+    rows = connector.get_data("invoice", filters={"amount": {"gte": 10}}, fields=["internalId", "amount"])
+
+    assert rows == [{"internalId": "101", "amount": 1250.5}, {"internalId": "102", "amount": 80.0},
+                    {"internalId": "103", "amount": 15.75}]
+    (_, search, headers), (_, more, more_headers) = connector.session.requests
+    assert headers["SOAPAction"] == "search" and more_headers["SOAPAction"] == "searchMoreWithId"
+
+    ns = {"m": "urn:messages_2020_1.platform.webservices.netsuite.com",
+          "c": "urn:core_2020_1.platform.webservices.netsuite.com",
+          "common": "urn:common_2020_1.platform.webservices.netsuite.com",
+          "s": "urn:sales_2020_1.transactions.webservices.netsuite.com",
+          "xsi": "http://www.w3.org/2001/XMLSchema-instance"}
+    record = search.find(".//m:searchRecord", ns)
+    assert record.get(f"{{{ns['xsi']}}}type") == "rec:TransactionSearchAdvanced"
+    amount = record.find("s:criteria/s:basic/common:amount", ns)
+    assert amount.get("operator") == "greaterThanOrEqualTo"
+    assert amount.findtext("c:searchValue", namespaces=ns) == "10.0"
+    assert [e.tag.rpartition("}")[2] for e in record.find("s:columns/s:basic", ns)] == ["internalId", "amount"]
+    assert search.find(".//m:searchPreferences/m:returnSearchColumns", ns).text == "true"
+    assert more.findtext(".//m:pageIndex", namespaces=ns) == "2"
+
+    # Every request carries its own passport nonce
+    nonces = [r.findtext(".//m:tokenPassport/c:nonce", namespaces=ns) for r in (search, more)]
+    assert all(nonces) and nonces[0] != nonces[1]
+
+
+def test_raw_mode_retries_fault_with_fresh_passport():
+    connector = make_connector([FakeResponse(fixture("fault_request_blocked.xml"), status_code=500),
+                                FakeResponse(fixture("search_basic_customer.xml"))],
+                               retry={"base_delay": 0})
+
+    rows = connector.get_data("customer")
+
+    assert rows[0]["entityId"] == "ACME"
+    assert len(connector.session.requests) == 2
+    assert connector.retry_stats()["search"]["retries"] == 1
+
+
+def test_basic_search_envelope_uses_record_refs():
+    connector = make_connector([])
+    spec = SearchSpec("customer", criteria={"subsidiary": {"operator": "anyOf", "searchValue": [{"internalId": "1"}]}})
+    envelope = etree.fromstring(connector.envelopes.search(spec, connector.passport_plugin.build_passport(),
+                                                           spec.preferences(1000)))
+
+    value = envelope.find(".//{urn:common_2020_1.platform.webservices.netsuite.com}subsidiary/"
+                          "{urn:core_2020_1.platform.webservices.netsuite.com}searchValue")
+    assert value.get("internalId") == "1"
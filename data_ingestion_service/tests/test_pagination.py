@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+
+from ingestion_service import main
+from ingestion_service.connectors.netsuite.schema import build_schema
+from ingestion_service.jobs.queue import Job, SQLiteJobQueue
+from ingestion_service.metadata.repository import MetadataRepository
+from ingestion_service.pagination import decode_cursor, encode_cursor
+
+from test_jobs import make_scheduler
+
+
+@pytest.fixture
+def client():
+    main.app.dependency_overrides[main.auth_validator] = lambda: {"username": "ops"}
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def walk(client, url, **params):
+    pages, cursor = [], None
+    while True:
+        body = client.get(url, params=dict(params, cursor=cursor) if cursor else params).json()
+        pages.append(body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_cursors_are_opaque_and_round_trip():
+    cursor = encode_cursor("2024-01-01T00:00:00+00:00", 42)
+
+    assert "=" not in cursor and "2024" not in cursor
+    assert decode_cursor(cursor, 2) == ["2024-01-01T00:00:00+00:00", 42]
+
+
+def test_jobs_are_listed_by_keyset_with_field_selection(client):
+    scheduler, _ = make_scheduler()
+    main.app.dependency_overrides[main.get_scheduler] = lambda: scheduler
+    ids = [scheduler.submit(Job(None, "t1", "netsuite", str(i), "invoice")).job_id for i in range(5)]
+    # Jobs submitted while paging don't shift the later pages
+    first = client.get("/api/v1/jobs", params={"limit": 2, "fields": "job_id,account_id"}).json()
+    scheduler.submit(Job(None, "t1", "netsuite", "late", "invoice"))
+
+    rest = walk(client, "/api/v1/jobs", limit=2, fields="job_id", cursor=first["next_cursor"])
+
+    assert first["items"] == [{"job_id": ids[4], "account_id": "4"}, {"job_id": ids[3], "account_id": "3"}]
+    assert rest == [[{"job_id": ids[2]}, {"job_id": ids[1]}], [{"job_id": ids[0]}]]
+    assert client.get("/api/v1/jobs", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/v1/jobs", params={"limit": 0}).status_code == 422
+
+
+def test_keyset_seeks_past_the_previous_page():
+    queue = SQLiteJobQueue(":memory:")
+    ids = [queue.submit(Job(None, "t1", "netsuite", "1", "invoice")).job_id for _ in range(4)]
+
+    assert [job.job_id for job in queue.list(after=ids[2], limit=10)] == [ids[1], ids[0]]
+    plan = " ".join(row[3] for row in queue._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT job_id FROM jobs WHERE tenant_id = ? AND seq < ? ORDER BY seq DESC", ("t1", 3)))
+    assert "jobs_tenant" in plan and "TEMP B-TREE" not in plan
+
+
+def test_metadata_listings_page_by_keyset(client):
+    # Endpoints run in worker threads, which must share the in-memory database
+    repository = MetadataRepository.from_url("sqlite://", poolclass=StaticPool,
+                                             connect_args={"check_same_thread": False})
+    repository.create_all()
+    main.app.dependency_overrides[main.get_metadata_repository] = lambda: repository
+    for entity in ("invoice", "customer", "vendor"):
+        repository.save_schema("t1", "netsuite", "1", entity, build_schema(entity, []))
+    profiled_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for day in range(3):
+        repository.save_profile("t1", "netsuite", "1", "invoice", {"rows": day, "columns": [{"name": "amount"}, {"name": "memo"}]},
+                                profiled_at=profiled_at + timedelta(days=day))
+
+    entities = walk(client, "/api/v1/metadata/t1/netsuite/1/entities", limit=2, fields="name")
+    columns = walk(client, "/api/v1/metadata/t1/netsuite/1/invoice/columns", limit=5, fields="name")
+    profiles = walk(client, "/api/v1/metadata/t1/netsuite/1/invoice/profile", limit=1, fields="name,rows")
+    history = walk(client, "/api/v1/metadata/t1/netsuite/1/invoice/profile/amount", limit=2, fields="rows")
+
+    assert entities == [[{"name": "customer"}, {"name": "invoice"}], [{"name": "vendor"}]]
+    assert [column["name"] for page in columns for column in page] == \
+        [field["name"] for field in build_schema("invoice", [])["fields"]]
+    assert profiles == [[{"name": "amount", "rows": 2}], [{"name": "memo", "rows": 2}]]
+    assert history == [[{"rows": 2}, {"rows": 1}], [{"rows": 0}]]
@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from ingestion_service.extraction.checkpoint import ChunkCheckpointStore
+from ingestion_service.extraction.chunking import plan_date_chunks, plan_id_chunks
+from ingestion_service.extraction.parallel import ChunkExtractionError, ParallelExtractor
+
+from conftest import MemoryConnector
+
+
+def invoice(internal_id, modified="2024-01-01T00:00:00Z"):
+    return {"internalId": str(internal_id), "lastModifiedDate": modified}
+
+
+@pytest.fixture
+def checkpoints():
+    store = ChunkCheckpointStore(":memory:")
+    yield store
+    store.close()
+
+
+def test_id_chunks_cover_range_without_overlap():
+    chunks = plan_id_chunks("invoice", 1, 10, chunk_count=3)
+
+    assert [(c.low, c.high) for c in chunks] == [(1, 4), (5, 7), (8, 10)]
+    assert len(plan_id_chunks("invoice", 1, 10, chunk_size=4)) == 3
+    assert len(plan_id_chunks("invoice", 1, 2, chunk_count=8)) == 2
+
+
+def test_date_chunks_share_boundaries():
+    chunks = plan_date_chunks("invoice", "2024-01-01T00:00:00Z", "2024-01-03T00:00:00Z", chunk_count=2)
+
+    assert [(c.low.day, c.high.day) for c in chunks] == [(1, 2), (2, 3)]
+    assert chunks[0].high == chunks[1].low == datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+
+def test_merge_is_ordered_and_deduplicated(tmp_path, checkpoints):
+    records = [invoice(1, "2024-01-01T12:00:00Z"), invoice(2, "2024-01-02T00:00:00Z"),
+               invoice(3, "2024-01-02T18:00:00Z"), invoice(4, "2024-01-01T06:00:00Z")]
+    chunks = plan_date_chunks("invoice", "2024-01-01T00:00:00Z", "2024-01-03T00:00:00Z", chunk_count=2)
+    extractor = ParallelExtractor(lambda: MemoryConnector(records), checkpoints, str(tmp_path), workers=2)
+    batches = []
+
+    stats = extractor.run("run-1", chunks, batches.append, batch_size=3)
+
+    assert [[r["internalId"] for r in b] for b in batches] == [["4", "1", "2"], ["3"]]
+    assert stats == {"chunks": 2, "skipped": 0, "records": 4, "duplicates": 1}
+    # Spooled rows are removed once merged
+    assert list(tmp_path.glob("*.pkl")) == []
+
+
+def test_failed_chunk_reruns_alone(tmp_path, checkpoints):
+    # Deliberately unordered, the extractor sorts each chunk
+    records = [invoice(i) for i in range(30, 0, -1)]
+    chunks = plan_id_chunks("invoice", 1, 30, chunk_count=3)
+    failing = lambda: MemoryConnector(records, fail_on=lambda f: f.low == 11)
+    extractor = ParallelExtractor(failing, checkpoints, str(tmp_path), workers=3)
+    with pytest.raises(ChunkExtractionError) as excinfo:
+        extractor.run("run-1", chunks, lambda batch: None)
+    assert list(excinfo.value.errors) == [chunks[1].key]
+
+    calls = []
+    written = []
+    extractor.connector_factory = lambda: MemoryConnector(records, fail_on=lambda f: calls.append(f))
+    stats = extractor.run("run-1", chunks, written.extend)
+
+    assert stats["chunks"] == 1 and stats["skipped"] == 2
+    assert calls == [chunks[1].filter]
+    assert [r["internalId"] for r in written] == [str(i) for i in range(1, 31)]
+
+
+def test_pool_is_capped_by_account_concurrency(tmp_path, checkpoints):
+    extractor = ParallelExtractor(lambda: None, checkpoints, str(tmp_path), workers=16, max_concurrency=5)
+
+    assert extractor.workers == 5
+
@@ -0,0 +1,110 @@
+import math
+import pickle
+import random
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from ingestion_service.profiling.profiler import TableProfile, profile_batches
+
+pa = pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def frame():
+    rng = random.Random(7)
+    return pd.DataFrame({
+        "internalId": [str(i) for i in range(20000)],
+        "amount": [round(rng.lognormvariate(5, 1), 2) if i % 10 else None for i in range(20000)],
+        "status": [rng.choice(["open", "paid", "paid", "paid", "void"]) for _ in range(20000)],
+        "tranDate": [date(2024, 1, 1 + i % 28) for i in range(20000)],
+    })
+
+
+def batches(frame, size):
+    return [frame.iloc[i:i + size] for i in range(0, len(frame), size)]
+
+
+def test_numeric_stats_match_exact_values(frame):
+    profile = profile_batches(batches(frame, 3000))
+
+    amount = profile.to_dict()["columns"][1]
+    exact = frame["amount"].dropna()
+    assert profile.rows == 20000
+    assert amount["count"] == len(exact) and amount["nulls"] == 2000
+    assert amount["null_fraction"] == pytest.approx(0.1)
+    assert amount["min"] == exact.min() and amount["max"] == exact.max()
+    assert amount["mean"] == pytest.approx(exact.mean(), rel=1e-12)
+    assert amount["stddev"] == pytest.approx(exact.std(), rel=1e-9)
+
+
+def test_distinct_and_top_k(frame):
+    profile = profile_batches(batches(frame, 4096), top_k=2)
+    columns = profile.columns
+
+    assert columns["status"].distinct == 3
+    assert columns["tranDate"].distinct == 28
+    assert columns["internalId"].distinct == pytest.approx(20000, rel=0.1)
+    exact = frame["status"].value_counts()
+    assert columns["status"].top() == [{"value": "paid", "count": exact["paid"], "error": 0},
+                                       {"value": exact.index[1], "count": exact.iloc[1], "error": 0}]
+    assert columns["tranDate"].min == date(2024, 1, 1)
+
+
+def test_merged_partial_profiles_equal_single_pass(frame):
+    left, right = TableProfile(), TableProfile()
+    for i, batch in enumerate(batches(frame, 2500)):
+        (left if i % 2 else right).update(pa.RecordBatch.from_pandas(batch, preserve_index=False))
+
+    # Partial profiles travel between worker processes
+    merged = pickle.loads(pickle.dumps(left))
+    merged.merge(right)
+    single = profile_batches([frame]).to_dict()
+
+    for got, expected in zip(merged.to_dict()["columns"], single["columns"]):
+        for key in ("count", "nulls", "min", "max", "distinct"):
+            assert got[key] == expected[key], (got["name"], key)
+        if expected["distinct"] <= 1000:
+            # Exact below top_k_candidates; values tied on frequency may come in any order
+            assert [top["count"] for top in got["top_k"]] == [top["count"] for top in expected["top_k"]]
+        if expected["mean"] is not None:
+            assert math.isclose(got["mean"], expected["mean"], rel_tol=1e-12)
+            assert math.isclose(got["stddev"], expected["stddev"], rel_tol=1e-9)
+
+
+def test_all_null_column():
+    batch = pa.record_batch({"memo": pa.array([None, None], pa.string())})
+
+    memo = profile_batches([batch]).to_dict()["columns"][0]
+
+    assert memo["count"] == 0 and memo["nulls"] == 2 and memo["distinct"] == 0
+    assert memo["min"] is None and memo["top_k"] == []
+
+
+def test_nested_columns_are_counted_by_value():
+    profile = TableProfile()
+    profile.update([{"lines": [1, 2], "address": {"city": "Oslo"}}, {"lines": [1, 2], "address": None}])
+
+    lines, address = profile.to_dict()["columns"]
+
+    assert lines["count"] == 2 and lines["distinct"] == 1 and lines["min"] is None
+    assert lines["top_k"][0] == {"value": "[1, 2]", "count": 2, "error": 0}
+    assert profile.columns["lines"].frequency([1, 2]) == 2
+    assert address["count"] == 1 and address["nulls"] == 1
+
+
+def test_column_typed_by_first_batch_with_values():
+    first = TableProfile()
+    first.update([{"amount": None}])
+    first.update([{"amount": 1.5}, {"amount": 2.5}])
+    later = TableProfile()
+    later.update([{"amount": None}])
+    later.merge(profile_batches([pa.record_batch({"amount": pa.array([1.5, 2.5])})]))
+
+    for profile in (first, later):
+        amount = profile.to_dict()["columns"][0]
+        assert amount["type"] == "double" and amount["nulls"] == 1
+        assert (amount["min"], amount["max"], amount["mean"]) == (1.5, 2.5, 2.0)
+        assert amount["quantiles"]["p50"] in (1.5, 2.5)
+
@@ -0,0 +1,137 @@
+import pytest
+
+from ingestion_service.connectors.netsuite.schema import build_schema
+from ingestion_service.extraction.checkpoint import ChunkCheckpointStore
+from ingestion_service.extraction.chunking import plan_id_chunks
+from ingestion_service.extraction.resumable import ResumableExtractor
+from ingestion_service.sinks.local import LocalFileSystemBackend
+from ingestion_service.sinks.parquet import ParquetSink
+
+from test_netsuite_search import invoice_row, make_connector, row_page
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+FIELDS = ["internalId", "tranId", "amount"]
+
+
+def paged_connector(pages=5, rows_per_page=2, first_id=1):
+    data = [
+        row_page([invoice_row(str(i), f"INV-{i}", float(i))
+                  for i in range(first_id + page * rows_per_page, first_id + (page + 1) * rows_per_page)],
+                 page_index=page + 1, total_pages=pages)
+        for page in range(pages)
+    ]
+    connector = make_connector(data)
+    connector.schema_cache.put("1234567", "invoice", "2020_1", build_schema("invoice", []))
+    return connector
+
+
+class CrashingCheckpoints(ChunkCheckpointStore):
+    """Fails the nth progress save, i.e. crashes after a segment is written but before it is checkpointed."""
+
+    def __init__(self, crash_at):
+        super().__init__(":memory:")
+        self.saves = 0
+        self.crash_at = crash_at
+
+    def save_progress(self, *args, **kwargs):
+        self.saves += 1
+        if self.saves == self.crash_at:
+            raise RuntimeError("node evicted")
+        super().save_progress(*args, **kwargs)
+
+
+def written_ids(root):
+    ids = []
+    for path in sorted(root.rglob("*.parquet")):
+        ids.extend(pq.read_table(path).column("internalId").to_pylist())
+    return ids
+
+
+def test_stream_pages_jumps_to_the_resume_page():
+    connector = paged_connector(pages=4)
+
+    pages = list(connector.stream_pages("invoice", fields=FIELDS, start_page=3))
+
+    assert [index for index, _ in pages] == [3, 4]
+    assert [row["internalId"] for row in pages[0][1]] == ["5", "6"]
+    assert [(operation, kwargs.get("pageIndex")) for operation, kwargs in connector.service.calls] == \
+        [("search", None), ("searchMoreWithId", 3), ("searchMoreWithId", 4)]
+
+
+def test_stream_pages_applies_the_page_size():
+    connector = paged_connector(pages=1)
+
+    list(connector.stream_pages("invoice", fields=FIELDS, page_size=250))
+    list(connector.stream_pages("invoice", fields=FIELDS, page_size=5000))
+
+    sizes = [kwargs["_soapheaders"]["searchPreferences"]["pageSize"] for _, kwargs in connector.service.calls]
+    assert sizes == [250, 1000]
+
+
+def test_resume_after_crash_rewrites_the_segment_in_flight(tmp_path):
+    sink = ParquetSink(LocalFileSystemBackend(str(tmp_path)), "t1")
+    # Save 1 is the chunk start, save 2 follows segment 0, save 3 would follow segment 1
+    checkpoints = CrashingCheckpoints(crash_at=3)
+
+    with pytest.raises(RuntimeError):
+        ResumableExtractor(paged_connector(), checkpoints, sink, checkpoint_pages=2).run("run1", "invoice",
+                                                                                       fields=FIELDS)
+    progress = checkpoints.get_progress("run1")["invoice:all:0:None:None"]
+    assert (progress["page"], progress["segment"], progress["rows"], progress["last_id"]) == (2, 1, 4, "4")
+    # Segment 1 reached the sink but not the checkpoint
+    assert len(written_ids(tmp_path)) == 8
+
+    # The resumed search starts after the last id written, whatever page it is on now
+    connector = paged_connector(pages=3, first_id=5)
+    result = ResumableExtractor(connector, checkpoints, sink, checkpoint_pages=2).run("run1", "invoice",
+                                                                                     fields=FIELDS)
+
+    assert result["records"] == 6
+    calls = connector.service.calls
+    assert calls[0][1]["searchRecord"]["criteria"]["basic"]["internalIdNumber"] == \
+        {"operator": "greaterThan", "searchValue": 4}
+    assert [kwargs.get("pageIndex") for _, kwargs in calls] == [None, 2, 3]
+    assert sorted(written_ids(tmp_path), key=int) == [str(i) for i in range(1, 11)]
+    progress = checkpoints.get_progress("run1")["invoice:all:0:None:None"]
+    assert (progress["status"], progress["page"]) == ("done", 5)
+
+    # A finished run is not extracted again
+    again = ResumableExtractor(paged_connector(), checkpoints, sink).run("run1", "invoice", fields=FIELDS)
+    assert again["skipped"] == 1 and again["records"] == 0
+
+
+def test_stop_checkpoints_and_resume_finishes_remaining_chunks(tmp_path):
+    sink = ParquetSink(LocalFileSystemBackend(str(tmp_path)), "t1")
+    checkpoints = ChunkCheckpointStore(":memory:")
+    chunks = plan_id_chunks("invoice", 1, 10, chunk_count=2)
+    calls = {"pages": 0}
+
+    def stop_after_three_pages():
+        calls["pages"] += 1
+        return calls["pages"] == 3
+
+    first = ResumableExtractor(paged_connector(), checkpoints, sink, checkpoint_pages=10).run(
+        "run2", "invoice", chunks=chunks, fields=FIELDS, should_stop=stop_after_three_pages)
+    assert first["stopped"] and first["records"] == 6
+    assert checkpoints.get_progress("run2")[chunks[0].key]["page"] == 3
+
+    second = ResumableExtractor(paged_connector(), checkpoints, sink, checkpoint_pages=10).run(
+        "run2", "invoice", chunks=chunks, fields=FIELDS)
+    assert not second["stopped"] and second["chunks"] == 2
+    progress = checkpoints.get_progress("run2")
+    assert {state["status"] for state in progress.values()} == {"done"}
+    assert len({state["partition_date"] for state in progress.values()}) == 1
+
+
+def test_resumed_id_chunk_narrows_its_id_range(tmp_path):
+    sink = ParquetSink(LocalFileSystemBackend(str(tmp_path)), "t1")
+    checkpoints = ChunkCheckpointStore(":memory:")
+    chunk = plan_id_chunks("invoice", 1, 100, chunk_count=1)[0]
+    checkpoints.save_progress("run3", chunk.key, 2, 1, 4, "4", "2024-01-01")
+    connector = paged_connector(pages=1, first_id=5)
+
+    ResumableExtractor(connector, checkpoints, sink).run("run3", "invoice", chunks=[chunk], fields=FIELDS)
+
+    criteria = connector.service.calls[0][1]["searchRecord"]["criteria"]["basic"]
+    assert criteria["internalIdNumber"] == {"operator": "between", "searchValue": 5, "searchValue2": chunk.high}
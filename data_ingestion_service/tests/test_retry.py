@@ -0,0 +1,119 @@
+import pytest
+import requests
+from zeep.exceptions import Fault, TransportError
+
+from ingestion_service.connectors.governor import reset_governors
+from ingestion_service.connectors.netsuite.connector import NetSuiteConnector
+from ingestion_service.connectors.retry import (
+    PERMANENT,
+    TRANSIENT,
+    RetryBudget,
+    RetryExhaustedError,
+    RetryPolicy,
+    default_classifier,
+)
+
+
+class Flaky:
+    def __init__(self, errors, result="ok"):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+def make_policy(**kwargs):
+    delays = []
+    policy = RetryPolicy(sleep=delays.append, random_func=lambda: 1.0, **kwargs)
+    return policy, delays
+
+
+def test_transient_failures_are_retried_with_capped_backoff():
+    policy, delays = make_policy(max_attempts=5, base_delay=1.0, max_delay=3.0)
+    func = Flaky([ConnectionError("reset")] * 3)
+
+    assert policy.call(func, operation="search") == "ok"
+    assert func.calls == 4
+    assert delays == [1.0, 2.0, 3.0]
+    assert policy.stats()["search"]["last_attempts"] == 4
+    assert policy.stats()["search"]["retries"] == 3
+
+
+def test_full_jitter_draws_below_ceiling():
+    policy = RetryPolicy(base_delay=2.0, max_delay=10.0, random_func=lambda: 0.25)
+    assert policy.compute_delay(1) == pytest.approx(0.5)
+    assert policy.compute_delay(4) == pytest.approx(2.5)
+
+
+def test_permanent_failures_are_not_retried():
+    policy, delays = make_policy()
+    func = Flaky([ValueError("bad field")])
+
+    with pytest.raises(ValueError):
+        policy.call(func, operation="search")
+    assert func.calls == 1
+    assert delays == []
+    assert policy.stats()["search"]["failures"] == 1
+
+
+def test_attempts_exhausted():
+    policy, _ = make_policy(max_attempts=3)
+    func = Flaky([TimeoutError()] * 5)
+
+    with pytest.raises(RetryExhaustedError) as exc_info:
+        policy.call(func, operation="search")
+    assert exc_info.value.attempts == 3
+    assert isinstance(exc_info.value.last_error, TimeoutError)
+
+
+def test_budget_is_shared_across_calls():
+    policy, _ = make_policy(max_attempts=10)
+    budget = RetryBudget(2)
+
+    assert policy.call(Flaky([TimeoutError()]), budget=budget) == "ok"
+    with pytest.raises(RetryExhaustedError) as exc_info:
+        policy.call(Flaky([TimeoutError()] * 5), budget=budget)
+    assert exc_info.value.attempts == 2
+    assert budget.remaining == 0
+
+
+def test_http_status_classification():
+    response = requests.Response()
+    response.status_code = 503
+    assert default_classifier(requests.HTTPError(response=response)) == TRANSIENT
+    response.status_code = 404
+    assert default_classifier(requests.HTTPError(response=response)) == PERMANENT
+    assert default_classifier(TransportError(status_code=429)) == TRANSIENT
+    assert default_classifier(requests.ConnectionError()) == TRANSIENT
+
+
+def test_netsuite_fault_classification():
+    reset_governors()
+    connector = NetSuiteConnector({"account_id": "1234567"})
+
+    assert connector.classify_error(Fault("WS_CONCUR_SESSION_DISALLWD")) == TRANSIENT
+    assert connector.classify_error(Fault("An unexpected error occurred", code="UNEXPECTED_ERROR")) == TRANSIENT
+    assert connector.classify_error(Fault("INSUFFICIENT_PERMISSION")) == PERMANENT
+
+
+def test_connector_test_connection_retries_and_reports_attempts():
+    reset_governors()
+    connector = NetSuiteConnector({"account_id": "1234567", "retry": {"base_delay": 0, "budget": 5}})
+
+    class Service:
+        def __init__(self):
+            self.getServerTime = Flaky([Fault("UNEXPECTED_ERROR")] * 2)
+
+    connector.service = Service()
+    assert connector.test_connection() is True
+    assert connector.retry_stats()["getServerTime"]["last_attempts"] == 3
+    assert connector.retry_budget.remaining == 3
+
+    connector.service.getServerTime = Flaky([Fault("INVALID_LOGIN_CREDENTIALS")])
+    assert connector.test_connection() is False
+    assert connector.retry_stats()["getServerTime"]["failures"] == 1
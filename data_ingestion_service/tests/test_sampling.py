@@ -0,0 +1,106 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from ingestion_service.connectors.netsuite.schema import build_schema
+from ingestion_service.profiling.profiler import profile_entity
+from ingestion_service.profiling.sampling import (OTHER_STRATUM, ReservoirSampler, StratifiedSampler,
+                                                  sample_batches, sample_entity)
+
+from test_netsuite_search import invoice_row, make_connector, row_page
+
+pa = pytest.importorskip("pyarrow")
+
+
+def invoices(start, count):
+    ids = np.arange(start, start + count)
+    return pa.record_batch({
+        "internalId": pa.array(ids.astype(str)),
+        "subsidiary": pa.array(np.where(ids % 100 == 0, "rare", np.where(ids % 2, "us", "uk"))),
+        "tranDate": pa.array([date(2024, 1 + int(i) % 3, 1) for i in ids], pa.date32()),
+    })
+
+
+def batches(count, size):
+    return [invoices(start, min(size, count - start)) for start in range(0, count, size)]
+
+
+def ids(table):
+    return sorted(int(i) for i in table.column("internalId").to_pylist())
+
+
+def test_reservoir_sample_is_uniform_and_bounded():
+    sampler = sample_batches(batches(100000, 7000), ReservoirSampler(size=5000, seed=3))
+
+    sample = sampler.sample()
+    assert sample.num_rows == 5000 and sampler.seen == 100000
+    assert sampler.fraction == pytest.approx(0.05)
+    assert len(set(ids(sample))) == 5000
+    # Every decile of the stream is represented about equally
+    deciles = np.bincount(np.array(ids(sample)) // 10000, minlength=10)
+    assert deciles.min() > 400 and deciles.max() < 600
+
+
+def test_seeded_sample_does_not_depend_on_batch_sizes():
+    small = sample_batches(batches(20000, 333), ReservoirSampler(size=100, seed=9)).sample()
+    large = sample_batches(batches(20000, 20000), ReservoirSampler(size=100, seed=9)).sample()
+    other = sample_batches(batches(20000, 20000), ReservoirSampler(size=100, seed=10)).sample()
+
+    assert ids(small) == ids(large)
+    assert ids(small) != ids(other)
+
+
+def test_keyed_samples_merge_across_workers():
+    whole = sample_batches(batches(30000, 5000), ReservoirSampler(size=500, key_field="internalId"))
+    left = sample_batches(batches(30000, 5000)[:3], ReservoirSampler(size=500, key_field="internalId"))
+    right = sample_batches(batches(30000, 5000)[3:][::-1], ReservoirSampler(size=500, key_field="internalId"))
+
+    left.merge(right)
+
+    assert ids(left.sample()) == ids(whole.sample())
+    assert left.seen == 30000
+
+
+def test_memory_budget_caps_sample_rows():
+    sampler = sample_batches(batches(50000, 10000), ReservoirSampler(size=10000, max_bytes=64 * 1024))
+
+    sample = sampler.sample()
+    assert sample.num_rows == sampler.capacity < 10000
+    assert sample.nbytes <= 64 * 1024 * 1.1
+
+
+def test_stratified_sample_keeps_rare_strata():
+    sampler = sample_batches(batches(60000, 8000), StratifiedSampler("subsidiary", size_per_stratum=200, seed=1))
+
+    samples = sampler.samples()
+    assert {label: table.num_rows for label, table in samples.items()} == {"rare": 200, "uk": 200, "us": 200}
+    assert set(samples["rare"].column("subsidiary").to_pylist()) == {"rare"}
+    assert sampler.weights()["rare"] == pytest.approx(600 / 200)
+    assert sampler.sample().num_rows == 600
+
+
+def test_stratified_by_period_and_strata_limit():
+    sampler = StratifiedSampler("tranDate", size_per_stratum=10, period="month", max_strata=3)
+    sample_batches(batches(3000, 1000), sampler)
+    assert sorted(sampler.strata) == ["2024-01", "2024-02", OTHER_STRATUM]
+
+    quarters = sample_batches(batches(3000, 1000), StratifiedSampler("tranDate", period="quarter"))
+    assert list(quarters.strata) == ["2024-Q1"]
+
+
+def test_samples_connector_stream_and_feeds_profiler():
+    pages = [row_page([invoice_row(str(i), f"INV-{i}", float(i)) for i in range(1, 51)])]
+    connector = make_connector(pages)
+    connector.schema_cache.put("1234567", "invoice", "2020_1", build_schema("invoice", []))
+
+    rows = sample_entity(connector, "invoice", ReservoirSampler(size=10, seed=1), fields=["internalId", "amount"],
+                         batch_size=7, columnar=False).sample()
+    assert len(rows) == 10 and set(rows[0]) == {"internalId", "amount"}
+
+    profile = profile_entity(connector, "invoice", fields=["internalId", "amount"], batch_size=7,
+                             sampler=ReservoirSampler(size=10, seed=1))
+    # Same seed and stream: the profiled sample is the same rows
+    assert profile.rows == 10
+    assert sorted(top["value"] for top in profile.columns["internalId"].top()) == \
+        sorted(row["internalId"] for row in rows)
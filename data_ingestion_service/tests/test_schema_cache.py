@@ -0,0 +1,122 @@
+from types import SimpleNamespace
+
+from ingestion_service.connectors.governor import reset_governors
+from ingestion_service.connectors.netsuite.connector import NetSuiteConnector
+from ingestion_service.connectors.schema_cache import SchemaCache, schema_hash
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeClient:
+    def get_type(self, qname):
+        def build(**values):
+            return {"xsi_type": qname, **values}
+        return build
+
+
+class CustomizationService:
+    def __init__(self, custom_fields):
+        self.custom_fields = custom_fields
+        self.calls = []
+
+    def getCustomizationId(self, **kwargs):
+        self.calls.append("getCustomizationId")
+        refs = [{"internalId": str(i), "scriptId": field["scriptId"]}
+                for i, field in enumerate(self.custom_fields)]
+        return SimpleNamespace(body=SimpleNamespace(getCustomizationIdResult={
+            "status": {"isSuccess": True},
+            "customizationRefList": {"customizationRef": refs},
+        }))
+
+    def getList(self, **kwargs):
+        self.calls.append("getList")
+        return SimpleNamespace(body=SimpleNamespace(readResponseList={
+            "status": {"isSuccess": True},
+            "readResponse": [{"status": {"isSuccess": True}, "record": field}
+                             for field in self.custom_fields],
+        }))
+
+
+def make_connector(custom_fields, directory=None):
+    reset_governors()
+    connector = NetSuiteConnector({"account_id": "1234567", "api_version": "2020_1",
+                                   "schema_cache": {"directory": directory, "ttl_seconds": 60}})
+    connector.client = FakeClient()
+    connector.service = CustomizationService(custom_fields)
+    return connector
+
+
+def test_hash_ignores_key_order():
+    assert schema_hash({"a": 1, "b": [1, 2]}) == schema_hash({"b": [1, 2], "a": 1})
+    assert schema_hash({"a": 1}) != schema_hash({"a": 2})
+
+
+def test_entries_expire_and_version_bumps_on_drift():
+    clock = FakeClock()
+    drifts = []
+    cache = SchemaCache(ttl_seconds=60, clock=clock, on_drift=lambda key, old, new: drifts.append(key))
+    key = ("1234567", "customer", "2020_1")
+
+    first = cache.put(*key, {"fields": [{"name": "email"}]})
+    assert cache.get(*key) is first
+    assert cache.put(*key, {"fields": [{"name": "email"}]})["version"] == 1
+
+    clock.now += 61
+    assert cache.get(*key) is None
+    assert cache.get(*key, allow_stale=True)["version"] == 1
+
+    changed = cache.put(*key, {"fields": [{"name": "email"}, {"name": "custentity_tier"}]})
+    assert changed["version"] == 2
+    assert changed["drifted"]
+    assert drifts == [key]
+
+
+def test_entries_persist_and_invalidate_on_disk(tmp_path):
+    key = ("1234567", "customer", "2020_1")
+    SchemaCache(str(tmp_path)).put(*key, {"fields": []})
+
+    reloaded = SchemaCache(str(tmp_path))
+    assert reloaded.get(*key)["schema"] == {"fields": []}
+
+    SchemaCache(str(tmp_path)).invalidate("1234567", record_type="customer")
+    assert SchemaCache(str(tmp_path)).get(*key) is None
+
+
+def test_get_schema_discovers_custom_fields_once():
+    connector = make_connector([
+        {"scriptId": "custentity_tier", "fieldType": "_integerNumber", "label": "Tier",
+         "appliesToCustomer": True},
+        {"scriptId": "custentity_vendor_only", "fieldType": "_freeFormText", "label": "V",
+         "appliesToCustomer": False},
+    ])
+
+    schema = connector.get_schema("customer")
+    connector.get_schema("customer")
+
+    custom = [field for field in schema["fields"] if field.get("isCustom")]
+    assert custom == [{"name": "custentity_tier", "type": "integer", "label": "Tier", "isCustom": True}]
+    assert schema["schema_version"] == 1
+    assert connector.service.calls == ["getCustomizationId", "getList"]
+    assert connector.get_metadata("customer")["schemas"]["customer"]["hash"] == schema["schema_hash"]
+
+
+def test_refresh_detects_drift_and_falls_back_to_stale_schema(tmp_path):
+    connector = make_connector([], directory=str(tmp_path))
+    original = connector.get_schema("customer")
+
+    connector.service.custom_fields.append(
+        {"scriptId": "custentity_region", "fieldType": "_freeFormText", "appliesToCustomer": True})
+    entry = connector.refresh_schema("customer")
+    assert entry["drifted"]
+    assert entry["version"] == 2
+    assert entry["hash"] != original["schema_hash"]
+
+    connector.service = None
+    connector.invalidate_schema("customer")
+    assert connector.get_schema("customer")["schema_version"] == 2
@@ -0,0 +1,106 @@
+import io
+from datetime import datetime, timezone
+
+import pytest
+
+from ingestion_service.sinks.azure_blob import AzureBlobBackend, BlockBlobWriter
+from ingestion_service.sinks.local import LocalFileSystemBackend
+from ingestion_service.sinks.parquet import ParquetSink
+
+from conftest import InMemoryBlobContainer
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+SCHEMA = pa.schema([
+    ("internalId", pa.string()),
+    ("amount", pa.float64()),
+    ("lastModifiedDate", pa.timestamp("us", tz="UTC")),
+])
+
+
+def rows(start, count, day=5):
+    return [{"internalId": str(i), "amount": i * 1.5,
+             "lastModifiedDate": datetime(2024, 1, day + i % 2, 12, tzinfo=timezone.utc)}
+            for i in range(start, start + count)]
+
+
+@pytest.fixture(params=["local", "blob"])
+def backend(request, tmp_path):
+    if request.param == "local":
+        return LocalFileSystemBackend(str(tmp_path / "lake"))
+    return AzureBlobBackend(InMemoryBlobContainer(), prefix="staging", block_size=256)
+
+
+def read_table(backend, path):
+    return pq.read_table(io.BytesIO(backend.read_bytes(path)))
+
+
+def test_partitions_by_tenant_entity_and_date(backend):
+    sink = ParquetSink(backend, "acme", partition_field="lastModifiedDate")
+
+    manifest = sink.write("invoice", [rows(0, 10), rows(10, 10)], SCHEMA, run_id="run1")
+
+    assert [f["path"] for f in manifest] == [
+        "tenant=acme/entity=invoice/date=2024-01-05/part-run1-00000.parquet",
+        "tenant=acme/entity=invoice/date=2024-01-06/part-run1-00001.parquet",
+    ]
+    assert backend.list_paths("tenant=acme/") == [f["path"] for f in manifest]
+    first = read_table(backend, manifest[0]["path"])
+    assert first.schema == SCHEMA
+    assert first.column("internalId").to_pylist() == [str(i) for i in range(0, 20, 2)]
+    assert sum(f["rows"] for f in manifest) == 20
+
+
+def test_row_groups_and_compression(backend):
+    sink = ParquetSink(backend, "acme", row_group_size=4, compression="zstd")
+    batches = [pa.RecordBatch.from_pylist(rows(i, 3), schema=SCHEMA) for i in range(0, 9, 3)]
+
+    (written,) = sink.write("invoice", batches, SCHEMA)
+
+    today = datetime.now(timezone.utc).date().isoformat()
+    assert written["partition"] == today and written["row_groups"] == 3
+    metadata = pq.ParquetFile(io.BytesIO(backend.read_bytes(written["path"]))).metadata
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [4, 4, 1]
+    assert metadata.row_group(0).column(0).compression == "ZSTD"
+
+
+def test_failed_stream_leaves_no_objects(backend):
+    def failing():
+        yield rows(0, 5)
+        raise RuntimeError("connector failed")
+
+    with pytest.raises(RuntimeError):
+        ParquetSink(backend, "acme").write("invoice", failing(), SCHEMA)
+
+    assert backend.list_paths() == []
+
+
+def test_blob_writer_stages_blocks_in_parallel_and_commits_in_order():
+    container = InMemoryBlobContainer()
+    data = bytes(range(256)) * 40
+
+    with BlockBlobWriter(container.get_blob_client("big.bin"), block_size=1000, max_concurrency=3) as writer:
+        for offset in range(0, len(data), 333):
+            writer.write(data[offset:offset + 333])
+        assert "big.bin" not in container.blobs
+
+    assert container.stage_calls == 11
+    assert container.blobs["big.bin"] == data
+
+
+def test_aborted_blob_is_never_committed():
+    container = InMemoryBlobContainer()
+    writer = BlockBlobWriter(container.get_blob_client("partial.bin"), block_size=10)
+    writer.write(b"x" * 25)
+
+    writer.abort()
+
+    assert container.blobs == {}
+
+
+def test_local_backend_rejects_paths_outside_root(tmp_path):
+    backend = LocalFileSystemBackend(str(tmp_path))
+
+    with pytest.raises(ValueError):
+        backend.open_write("../escape.parquet")
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingestion_service.profiling.profiler import TableProfile, profile_batches
+from ingestion_service.profiling.sketches import CountMinSketch, HyperLogLog, KLLSketch, SpaceSaving, hash_values
+from ingestion_service.profiling.store import SketchStore
+
+pa = pytest.importorskip("pyarrow")
+
+
+def hashes(values):
+    return hash_values(pa.array(values))
+
+
+@pytest.mark.parametrize("precision", [10, 14])
+def test_hyperloglog_within_its_error_bound(precision):
+    sketch = HyperLogLog(precision)
+    for start in range(0, 200000, 50000):
+        sketch.update(hashes([f"INV-{i}" for i in range(start, start + 50000)]))
+
+    # Four standard errors
+    assert abs(sketch.estimate() - 200000) / 200000 < 4 * sketch.relative_error
+    assert HyperLogLog(precision).estimate() == 0
+
+
+def test_hyperloglog_merge_equals_union():
+    left, right, union = HyperLogLog(12), HyperLogLog(12), HyperLogLog(12)
+    left.update(hashes(list(range(0, 30000))))
+    right.update(hashes(list(range(20000, 50000))))
+    union.update(hashes(list(range(0, 50000))))
+
+    left.merge(right)
+
+    assert np.array_equal(left.registers, union.registers)
+    with pytest.raises(ValueError):
+        left.merge(HyperLogLog(10))
+
+
+@pytest.mark.parametrize("k", [100, 400])
+def test_kll_quantile_rank_error(k):
+    rng = np.random.default_rng(3)
+    values = rng.lognormal(5, 1, 300000)
+    parts = [KLLSketch(k, seed=i) for i in range(3)]
+    for i, chunk in enumerate(np.array_split(values, 30)):
+        parts[i % 3].update(chunk)
+    sketch = parts[0]
+    sketch.merge(parts[1])
+    sketch.merge(parts[2])
+
+    ordered = np.sort(values)
+    fractions = [0.01, 0.25, 0.5, 0.75, 0.99]
+    for fraction, estimate in zip(fractions, sketch.quantiles(fractions)):
+        true_rank = np.searchsorted(ordered, estimate, side="right") / len(values)
+        assert abs(true_rank - fraction) < 4.0 / k
+    assert sketch.count == len(values)
+    assert sum(len(level) for level in sketch.levels) < 4 * k
+
+
+def test_count_min_never_undercounts():
+    rng = np.random.default_rng(5)
+    values = pd.Series(rng.zipf(1.5, 100000) % 5000)
+    exact = values.value_counts()
+    left, right = CountMinSketch(width=512), CountMinSketch(width=512)
+    half = len(exact) // 2
+    left.update(hashes(exact.index[:half].tolist()), exact.values[:half])
+    right.update(hashes(exact.index[half:].tolist()), exact.values[half:])
+    left.merge(right)
+
+    estimates = left.estimate(hashes(exact.index.tolist()))
+
+    assert (estimates >= exact.values).all()
+    # e / width of the total with probability 1 - exp(-depth) per value
+    assert np.mean(estimates - exact.values <= np.e / 512 * len(values)) > 0.95
+
+
+def test_space_saving_bounds_hold_across_merges():
+    rng = np.random.default_rng(11)
+    values = rng.zipf(1.3, 200000) % 100000
+    exact = pd.Series(values).value_counts()
+    parts = []
+    for chunk in np.array_split(values, 8):
+        summary = SpaceSaving(capacity=50)
+        counts = pd.Series(chunk).value_counts()
+        summary.update(counts.index.tolist(), counts.values)
+        parts.append(summary)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    top = merged.top(10)
+    assert [value for value, _, _ in top[:5]] == exact.index[:5].tolist()
+    for value, count, error in top:
+        assert count - error <= exact[value] <= count
+    untracked = next(value for value in exact.index if value not in merged.counts)
+    assert exact[untracked] <= merged.floor
+
+
+def test_store_merges_incremental_syncs(tmp_path):
+    frame = pd.DataFrame({"entity": [str(i % 97) for i in range(30000)],
+                          "amount": np.random.default_rng(1).normal(100, 15, 30000)})
+    store = SketchStore(str(tmp_path / "profiles.db"))
+
+    for start in range(0, 30000, 10000):
+        store.merge("acme", "invoice", "2024-01-05", profile_batches([frame.iloc[start:start + 10000]], seed=1))
+    store.merge("acme", "invoice", "2024-01-06", profile_batches([frame.iloc[:10]], seed=1))
+    store.merge("acme", "invoice", "2024-01-06", profile_batches([frame.iloc[:100]], seed=1), replace=True)
+
+    full = profile_batches([frame, frame.iloc[:100]], seed=1)
+    loaded = store.load("acme", "invoice")
+    assert loaded.rows == full.rows == 30100
+    assert store.partitions("acme", "invoice") == ["2024-01-05", "2024-01-06"]
+    for name, column in full.columns.items():
+        got, expected = loaded.columns[name].to_dict(), column.to_dict()
+        assert (got["count"], got["distinct"], got["min"], got["max"]) == \
+            (expected["count"], expected["distinct"], expected["min"], expected["max"])
+    amount = loaded.columns["amount"].to_dict()
+    assert amount["mean"] == pytest.approx(full.columns["amount"].mean)
+    assert amount["quantiles"]["p50"] == pytest.approx(frame["amount"].median(), rel=0.02)
+    entity = store.load("acme", "invoice", partitions=["2024-01-05"], columns=["entity"]).columns["entity"]
+    assert entity.frequency("0") == (frame["entity"] == "0").sum()
+
+    store.delete("acme", "invoice", "2024-01-06")
+    assert store.partitions("acme", "invoice") == ["2024-01-05"]
+    store.close()
+
+
+def test_profile_accuracy_is_configurable():
+    batch = pa.record_batch({"id": pa.array([str(i) for i in range(50000)])})
+
+    small = TableProfile(hll_precision=6, top_k_candidates=10, count_min_width=64)
+    small.update(batch)
+    column = small.columns["id"]
+
+    assert column.distinct_sketch.registers.nbytes == 64
+    assert abs(column.distinct - 50000) / 50000 < 4 * column.distinct_sketch.relative_error
+    assert len(column.heavy_hitters.counts) == 10
@@ -0,0 +1,106 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from ingestion_service.connectors.netsuite.schema import build_schema
+from ingestion_service.profiling.inference import TypeInferencer, cast_batch, infer_column, infer_types
+
+from test_netsuite_search import invoice_row, make_connector, row_page
+
+pa = pytest.importorskip("pyarrow")
+
+
+def test_detects_types_and_formats():
+    types = infer_types([
+        {"qty": "12", "rate": "1,250.50", "price": "$1,200.00", "due": "31.01.2024", "email": "ap@acme.com",
+         "phone": "+1 415-555-0100", "active": "Yes", "modified": "2024-01-05T10:15:00-08:00", "memo": "net 30"},
+        {"qty": "-3", "rate": "0.125", "price": "$15", "due": "01.02.2024", "email": "billing@example.co.uk",
+         "phone": "(415) 555-0101", "active": "no", "modified": "2024-01-06 09:00", "memo": "rush"},
+    ])
+
+    assert {name: column["type"] for name, column in types.items()} == {
+        "qty": "integer", "rate": "decimal", "price": "currency", "due": "date", "email": "email",
+        "phone": "phone", "active": "boolean", "modified": "datetime", "memo": "string",
+    }
+    assert (types["rate"]["precision"], types["rate"]["scale"]) == (7, 3)
+    assert types["price"]["symbol"] == "$"
+    assert types["due"]["format"] == "%d.%m.%Y"
+
+
+def test_day_first_dates_win_when_months_exceed_twelve():
+    us = infer_column("d", pa.array(["01/02/2024", "03/04/2024"]))
+    day_first = infer_column("d", pa.array(["01/02/2024", "25/04/2024"]))
+
+    assert us["format"] == "%m/%d/%Y"
+    assert day_first["format"] == "%d/%m/%Y"
+
+
+def test_threshold_tolerates_dirty_values():
+    values = pa.array([str(i) for i in range(99)] + ["n/a", None, " "])
+
+    assert infer_column("qty", values)["type"] == "integer"
+    assert infer_column("qty", values)["confidence"] == pytest.approx(99 / 100)
+    assert infer_column("qty", values, threshold=1.0)["type"] == "string"
+
+
+def test_zero_padded_and_oversized_numbers_are_not_integers():
+    assert infer_column("zip", pa.array(["02139", "94105"]))["type"] == "string"
+    assert infer_column("big", pa.array(["1234567890123456789012"]))["type"] == "decimal"
+
+
+def test_decimals_are_cast_exactly():
+    ids = ["12345678901234567890123", "12345678901234567890124", "12345678901234567890125"]
+    batch = pa.record_batch({"id": pa.array(ids), "rate": pa.array(["0.10", "1.5e-1", "123.456"])})
+    types = infer_types(batch.slice(0, 2))
+
+    typed = cast_batch(batch, types)
+    rates = cast_batch(batch, types).column("rate")
+
+    # Distinct 23-digit keys stay distinct
+    assert typed.schema.field("id").type == pa.decimal128(23, 0)
+    assert [str(value) for value in typed.column("id").to_pylist()] == ids
+    # Values that don't fit the inferred scale become nulls rather than being rounded
+    assert rates.type == pa.decimal128(3, 2)
+    assert rates.to_pylist() == [Decimal("0.10"), Decimal("0.15"), None]
+
+
+def test_cast_batch_turns_strings_into_typed_columns():
+    batch = pa.record_batch({
+        "price": pa.array(["$1,200.50", "-$3", "bad"]),
+        "due": pa.array(["1/31/2024", "2/1/2024", None]),
+        "modified": pa.array(["2024-01-05T10:15:00-08:00", "2024-01-05 10:15", "2024-01-05T10:15:00Z"]),
+        "memo": pa.array(["a", "b", "c"]),
+    })
+    types = infer_types(batch, threshold=0.6)
+
+    typed = cast_batch(batch, types)
+
+    assert typed.schema.field("price").type == pa.decimal128(6, 2)
+    assert typed.column("price").to_pylist() == [Decimal("1200.50"), Decimal("-3.00"), None]
+    assert typed.column("due").to_pylist() == [date(2024, 1, 31), date(2024, 2, 1), None]
+    assert typed.column("modified")[0].as_py() == datetime(2024, 1, 5, 18, 15, tzinfo=timezone.utc)
+    assert typed.column("memo").to_pylist() == ["a", "b", "c"]
+
+
+def test_inferred_types_are_cached_per_schema_hash_and_feed_iter_batches():
+    pages = [row_page([invoice_row(str(i), f"{1000 + i}", i * 1.5) for i in range(1, 4)])]
+    connector = make_connector(pages)
+    connector.schema_cache.put("1234567", "invoice", "2020_1", build_schema("invoice", []))
+    inferencer = TypeInferencer()
+
+    types = inferencer.infer_entity(connector, "invoice", fields=["internalId", "tranId", "amount"])
+    searches = len(connector.service.calls)
+    assert inferencer.infer_entity(connector, "invoice", fields=["internalId", "tranId", "amount"]) is types
+    assert len(connector.service.calls) == searches
+    # Other fields are sampled separately
+    assert "amount" not in inferencer.infer_entity(connector, "invoice", fields=["internalId", "tranId"])
+
+    table = connector.get_table("invoice", fields=["tranId", "amount"], column_types=types)
+    assert table.schema.field("tranId").type == pa.int64()
+    assert table.column("tranId").to_pylist() == [1001, 1002, 1003]
+
+    # A schema change (new custom field) means a new hash and a fresh inference
+    connector.schema_cache.put("1234567", "invoice", "2020_1", build_schema("invoice", [
+        {"name": "custbody_po", "type": "string", "isCustom": True}]))
+    assert inferencer.infer_entity(connector, "invoice", fields=["internalId", "tranId"]) is not types